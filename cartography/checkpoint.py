@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# The checkpoint of the current sync run. Set at the start of a run by `cartography.sync.run_with_config` if
+# `--checkpoint-file` is given; None means no progress is recorded.
+current = None
+
+# The kinds of units of work whose completion is recorded.
+STAGE = 'stages'
+AWS_ACCOUNT = 'aws_accounts'
+GCP_PROJECT = 'gcp_projects'
+
+
+class Checkpoint:
+    """
+    A file that records which units of work (sync stages, AWS accounts, GCP projects) of a sync run have completed, so
+    that an interrupted run can be resumed under the same update tag without repeating them.
+
+    The file is rewritten after every completed unit, so it is always consistent with the data in the graph: a unit is
+    only recorded once everything it wrote to Neo4j has been committed.
+
+    :type path: string
+    :param path: The path of the checkpoint file.
+    :type update_tag: int
+    :param update_tag: The update tag of the sync run.
+    :type completed: dict
+    :param completed: A dict mapping unit kinds to the names of the completed units. Optional.
+    """
+
+    def __init__(self, path, update_tag, completed=None):
+        self.path = path
+        self.update_tag = update_tag
+        self.completed = {kind: set(names) for kind, names in (completed or {}).items()}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a checkpoint from the given file.
+        :return: The Checkpoint, or None if the file does not exist.
+        """
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        return cls(path, data['update_tag'], data['completed'])
+
+    def is_completed(self, kind, name):
+        with self._lock:
+            return name in self.completed.get(kind, set())
+
+    def mark_completed(self, kind, name):
+        with self._lock:
+            self.completed.setdefault(kind, set()).add(name)
+            self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        data = {
+            'update_tag': self.update_tag,
+            'completed': {kind: sorted(names) for kind, names in self.completed.items()},
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        # Write to a temporary file first so that an interrupted write never leaves a corrupt checkpoint behind.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        """
+        Delete the checkpoint file, once the sync run it belongs to has completed.
+        """
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def is_completed(kind, name):
+    """
+    Return True if the given unit of work was completed by an earlier attempt of the current sync run.
+    :param kind: The kind of the unit, e.g. `STAGE`.
+    :param name: The name of the unit, e.g. the stage name or the AWS account ID.
+    """
+    return current is not None and current.is_completed(kind, name)
+
+
+def mark_completed(kind, name):
+    """
+    Record that the given unit of work has completed. Does nothing if no checkpoint file is configured.
+    :param kind: The kind of the unit, e.g. `STAGE`.
+    :param name: The name of the unit, e.g. the stage name or the AWS account ID.
+    """
+    if current is not None:
+        current.mark_completed(kind, name)
@@ -11,6 +11,10 @@ import cartography.util
 logger = logging.getLogger(__name__)
 
 
+def _comma_separated_list(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
 class CLI:
     """
     :type sync: cartography.sync.Sync
@@ -87,6 +91,25 @@ class CLI:
                 'supersedes other methods of supplying a Neo4j password.'
             ),
         )
+        parser.add_argument(
+            '--neo4j-batch-size',
+            type=int,
+            default=1000,
+            help=(
+                'The number of rows that batched loaders write to Neo4j in a single transaction. Smaller batches '
+                'hold fewer locks at a time, larger batches need fewer round trips. Default = 1000.'
+            ),
+        )
+        parser.add_argument(
+            '--neo4j-max-retry-time',
+            type=float,
+            default=None,
+            help=(
+                'The number of seconds to keep retrying a Neo4j write transaction that failed with a transient error, '
+                'such as a deadlock or a cluster leader switch. Retries back off exponentially. Defaults to the Neo4j '
+                'driver setting of 15 seconds.'
+            ),
+        )
         # TODO add the below parameters to a 'sync' subparser
         parser.add_argument(
             '--update-tag',
@@ -113,6 +136,152 @@ class CLI:
                 'respects the AWS CLI/SDK environment variables and does not override them.'
             ),
         )
+        parser.add_argument(
+            '--aws-sync-workers',
+            type=int,
+            default=1,
+            help=(
+                'The number of AWS accounts to sync concurrently. Each account is synced with its own boto3 session, '
+                'Neo4j session and job parameters, and the post-ingestion cleanup jobs run once after all accounts '
+                'have finished. Only useful together with --aws-sync-all-profiles. Default = 1.'
+            ),
+        )
+        parser.add_argument(
+            '--aws-region-workers',
+            type=int,
+            default=1,
+            help=(
+                'The maximum number of AWS regions to query concurrently for each regional AWS service, such as EC2, '
+                'RDS, Lambda, EKS, ECR and DynamoDB. The results are still written to Neo4j one region at a time. '
+                'Default = 1.'
+            ),
+        )
+        parser.add_argument(
+            '--aws-rate-limit',
+            type=float,
+            default=None,
+            help=(
+                'The maximum number of requests per second to send to each AWS service in each region of each account. '
+                'The rate is halved whenever a request is throttled and recovers as requests succeed. Throttled '
+                'requests are counted and reported at the end of the AWS sync either way.'
+            ),
+        )
+        parser.add_argument(
+            '--aws-s3-workers',
+            type=int,
+            default=1,
+            help=(
+                'The maximum number of S3 buckets to look up the location, ACL, policy and settings of at the same '
+                'time. Default = 1.'
+            ),
+        )
+        parser.add_argument(
+            '--aws-s3-bucket-settings',
+            action='store_true',
+            help=(
+                'Also fetch the default encryption, public access block and versioning configuration of each S3 '
+                'bucket, in the same pass as its ACL and policy.'
+            ),
+        )
+        parser.add_argument(
+            '--aws-elbv2-workers',
+            type=int,
+            default=1,
+            help=(
+                'The maximum number of ELBv2 load balancers in each region to fetch the listeners, target groups and '
+                'target health of at the same time. Default = 1.'
+            ),
+        )
+        parser.add_argument(
+            '--aws-ecr-workers',
+            type=int,
+            default=1,
+            help=(
+                'The maximum number of ECR repositories in each region to list and describe the images of at the same '
+                'time. Default = 1.'
+            ),
+        )
+        parser.add_argument(
+            '--aws-ecr-incremental',
+            action='store_true',
+            help=(
+                'Only describe and load the images of ECR repositories whose image digests and tags changed since the '
+                'previous sync. The images of the other repositories are kept as they are.'
+            ),
+        )
+        parser.add_argument(
+            '--aws-route53-workers',
+            type=int,
+            default=1,
+            help=(
+                'The maximum number of Route53 hosted zones to fetch the record sets of at the same time. Zones are '
+                'still written to Neo4j one at a time. Default = 1.'
+            ),
+        )
+        parser.add_argument(
+            '--aws-tags-all-types',
+            action='store_true',
+            help=(
+                'Fetch the AWS tags of all supported resource types with one paginated GetResources call per region '
+                'instead of one per resource type and region, and load them in one batch per node label.'
+            ),
+        )
+        parser.add_argument(
+            '--aws-iam-authorization-details',
+            action='store_true',
+            help=(
+                'Fetch IAM users, groups, roles, their policies and group memberships with a few paginated '
+                'GetAccountAuthorizationDetails calls instead of several API calls per principal. This is much faster '
+                'for accounts with many principals.'
+            ),
+        )
+        parser.add_argument(
+            '--aws-policy-cache-dir',
+            type=str,
+            default=None,
+            help=(
+                'A directory to keep downloaded IAM managed policy documents in. Policy versions never change, so '
+                'later runs only download the managed policies whose default version changed since. Without this flag '
+                'each managed policy is still only downloaded once per run.'
+            ),
+        )
+        parser.add_argument(
+            '--aws-modules',
+            type=_comma_separated_list,
+            default=None,
+            help=(
+                'A comma-separated list of the AWS modules to sync, e.g. "iam,ec2:instances,ec2:security_groups". A '
+                'module name selects the whole module and "ec2:<name>" selects part of EC2. Default = all modules.'
+            ),
+        )
+        parser.add_argument(
+            '--aws-regions',
+            type=_comma_separated_list,
+            default=None,
+            help=(
+                'A comma-separated list of the AWS regions to sync. When set, the cleanup jobs of regional modules are '
+                'skipped so that resources in the other regions are kept. Default = all regions.'
+            ),
+        )
+        parser.add_argument(
+            '--aws-accounts',
+            type=_comma_separated_list,
+            default=None,
+            help=(
+                'A comma-separated list of the AWS account IDs or profile names to sync. When set, the cleanup jobs '
+                'that are not scoped to a single account are skipped. Default = all accounts.'
+            ),
+        )
+        parser.add_argument(
+            '--gcp-projects',
+            type=_comma_separated_list,
+            default=None,
+            help=(
+                'A comma-separated list of the IDs of the GCP projects whose resources to sync. When set, the GCP '
+                'resource cleanup jobs are skipped so that resources in the other projects are kept. Default = all '
+                'projects.'
+            ),
+        )
         parser.add_argument(
             '--crxcavator-api-base-uri',
             type=str,
@@ -188,6 +357,25 @@ class CLI:
                 'If omitted the default permission relationships will be created'
             ),
         )
+        parser.add_argument(
+            '--permission-relationships-workers',
+            type=int,
+            default=1,
+            help=(
+                'The number of processes to evaluate resource permission relationships with. Evaluating them is CPU '
+                'bound, so more processes than CPU cores do not help. Default = 1, which evaluates them in the syncing '
+                'thread.'
+            ),
+        )
+        parser.add_argument(
+            '--permission-relationships-incremental',
+            action='store_true',
+            help=(
+                'Only evaluate resource permission relationships again for principals whose policies changed since '
+                'the last sync. Relationships whose permissions or target resources changed are still evaluated for '
+                'all principals.'
+            ),
+        )
         parser.add_argument(
             '--jamf-base-uri',
             type=str,
@@ -240,6 +428,64 @@ class CLI:
                 'The port of your statsd server. Only used if --statsd-enabled is on. Default = UDP 8125.'
             ),
         )
+        parser.add_argument(
+            '--stage-workers',
+            type=int,
+            default=1,
+            help=(
+                'The maximum number of sync stages (e.g. aws, gcp, okta) to run concurrently. Stages only run '
+                'concurrently when their declared dependencies allow it, and each stage uses its own Neo4j session. '
+                'Default = 1, which runs the stages one after another.'
+            ),
+        )
+        parser.add_argument(
+            '--stages',
+            type=_comma_separated_list,
+            default=None,
+            help=(
+                'A comma-separated list of the sync stages to run, e.g. "create-indexes,aws". Dependencies on the '
+                'stages that are left out are ignored. Default = all stages.'
+            ),
+        )
+        parser.add_argument(
+            '--checkpoint-file',
+            type=str,
+            default=None,
+            help=(
+                'A file to record the progress of the sync run in: the completed sync stages, AWS accounts and GCP '
+                'projects. The file is deleted when the run completes. See --resume.'
+            ),
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help=(
+                'Resume the interrupted sync run recorded in --checkpoint-file: reuse its update tag and skip the '
+                'stages, AWS accounts and GCP projects that already completed. Cleanup jobs that span several of '
+                'these run once all of them have completed under that update tag. Starts a new run if the file does '
+                'not exist.'
+            ),
+        )
+        replay_group = parser.add_mutually_exclusive_group()
+        replay_group.add_argument(
+            '--record-dir',
+            type=str,
+            default=None,
+            help=(
+                'A directory to record the raw responses of AWS, GCP, GSuite, GitHub and Okta API calls to, as '
+                'compressed JSON files. A recorded run can be loaded again with --replay-dir.'
+            ),
+        )
+        replay_group.add_argument(
+            '--replay-dir',
+            type=str,
+            default=None,
+            help=(
+                'A directory of API responses recorded with --record-dir. API calls are answered from this directory '
+                'instead of being sent, so that the load, cleanup and analysis phases can be re-run without network '
+                'access. A call whose response was not recorded fails the sync stage that made it.'
+            ),
+        )
         return parser
 
     def main(self, argv):
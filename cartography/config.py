@@ -12,6 +12,12 @@ class Config:
     :param neo4j_user: User name for a Neo4j graph database service. Optional.
     :type neo4j_password: string
     :param neo4j_password: Password for a Neo4j graph database service. Optional.
+    :type neo4j_batch_size: int
+    :param neo4j_batch_size: The number of rows that batched loaders write to Neo4j per transaction. Optional.
+    :type neo4j_max_retry_time: float
+    :param neo4j_max_retry_time: The number of seconds the Neo4j driver keeps retrying a write transaction that failed
+        with a transient error, with exponential backoff between attempts. Defaults to the driver's own setting.
+        Optional.
     :type update_tag: int
     :param update_tag: Update tag for a cartography sync run. Optional.
     :type aws_sync_all_profiles: bool
@@ -33,6 +39,13 @@ class Config:
     :param github_config: Base64 encoded config object for GitHub ingestion. Optional.
     :type permission_relationships_file: str
     :param permission_relationships_file: File path for the resource permission relationships file. Optional.
+    :type permission_relationships_workers: int
+    :param permission_relationships_workers: The number of processes to evaluate resource permission relationships
+        with. Defaults to 1, which evaluates them in the syncing thread. Optional.
+    :type permission_relationships_incremental: bool
+    :param permission_relationships_incremental: If True, only evaluate resource permission relationships again for
+        principals whose policies changed, unless the relationship's target resources changed. Defaults to False.
+        Optional.
     :type jamf_base_uri: string
     :param jamf_base_uri: Jamf data provider base URI, e.g. https://example.com/JSSResource. Optional.
     :type jamf_user: string
@@ -45,6 +58,70 @@ class Config:
     :param statsd_host: If statsd_enabled is True, send metrics to this host. Optional.
     :type: statsd_port: int
     :param statsd_port: If statsd_enabled is True, send metrics to this port on statsd_host. Optional.
+    :type aws_sync_workers: int
+    :param aws_sync_workers: The number of AWS accounts to sync concurrently. Each account is synced with its own boto3
+        session and Neo4j session. Defaults to 1, which syncs the accounts one after another. Optional.
+    :type aws_region_workers: int
+    :param aws_region_workers: The maximum number of AWS regions to query concurrently for each AWS service. Defaults to
+        1, which queries the regions one after another. Optional.
+    :type aws_rate_limit: float
+    :param aws_rate_limit: The maximum number of requests per second to send to each AWS service in each region of each
+        account. The rate is lowered automatically when requests are throttled. Optional.
+    :type aws_s3_workers: int
+    :param aws_s3_workers: The maximum number of S3 buckets to look up the location, ACL, policy and settings of
+        concurrently. Defaults to 1, which looks up the buckets one after another. Optional.
+    :type aws_s3_bucket_settings: bool
+    :param aws_s3_bucket_settings: If True, also fetch the default encryption, public access block and versioning
+        configuration of each S3 bucket. Defaults to False. Optional.
+    :type aws_elbv2_workers: int
+    :param aws_elbv2_workers: The maximum number of ELBv2 load balancers in each region to fetch the listeners, target
+        groups and target health of concurrently. Defaults to 1. Optional.
+    :type aws_ecr_workers: int
+    :param aws_ecr_workers: The maximum number of ECR repositories in each region to fetch the images of concurrently.
+        Defaults to 1. Optional.
+    :type aws_ecr_incremental: bool
+    :param aws_ecr_incremental: If True, skip describing and loading the images of ECR repositories whose image list
+        did not change since the previous sync. Defaults to False. Optional.
+    :type aws_route53_workers: int
+    :param aws_route53_workers: The maximum number of Route53 hosted zones to fetch the record sets of concurrently.
+        Defaults to 1, which fetches the zones one after another. Optional.
+    :type aws_tags_all_types: bool
+    :param aws_tags_all_types: If True, fetch the tags of all supported resource types with one paginated call per
+        region instead of one per resource type and region, and load them in one batch per node label. Defaults to
+        False. Optional.
+    :type aws_iam_authorization_details: bool
+    :param aws_iam_authorization_details: If True, fetch IAM users, groups, roles and their policies with the bulk
+        GetAccountAuthorizationDetails call instead of several calls per principal. Defaults to False. Optional.
+    :type aws_policy_cache_dir: string
+    :param aws_policy_cache_dir: A directory to keep downloaded IAM managed policy documents in between runs. Optional.
+    :type stage_workers: int
+    :param stage_workers: The maximum number of sync stages to run concurrently. Stages only run concurrently when
+        their declared dependencies allow it. Defaults to 1, which runs the stages one after another. Optional.
+    :type record_dir: string
+    :param record_dir: A directory to record the raw responses of provider API calls to, so that the run can later be
+        replayed with replay_dir. Optional.
+    :type replay_dir: string
+    :param replay_dir: A directory of responses recorded with record_dir to answer provider API calls from, instead of
+        calling the APIs. Optional.
+    :type stages: list(str)
+    :param stages: The names of the sync stages to run. Defaults to None, which runs all stages. Optional.
+    :type aws_modules: list(str)
+    :param aws_modules: The AWS modules to sync, e.g. `iam` or `ec2:instances`. Defaults to None, which syncs all AWS
+        modules. Optional.
+    :type aws_regions: list(str)
+    :param aws_regions: The AWS regions to sync. Defaults to None, which syncs all regions. Optional.
+    :type aws_accounts: list(str)
+    :param aws_accounts: The AWS account IDs or profile names to sync. Defaults to None, which syncs all accounts.
+        Optional.
+    :type gcp_projects: list(str)
+    :param gcp_projects: The IDs of the GCP projects whose resources to sync. Defaults to None, which syncs all
+        projects. Optional.
+    :type checkpoint_file: string
+    :param checkpoint_file: A file to record the completed stages, AWS accounts and GCP projects of the sync run in, so
+        that an interrupted run can be resumed. The file is deleted when the run completes. Optional.
+    :type resume: bool
+    :param resume: If True and checkpoint_file exists, resume the run recorded in it: reuse its update tag and skip the
+        units that already completed. Defaults to False. Optional.
     """
 
     def __init__(
@@ -52,8 +129,22 @@ class Config:
         neo4j_uri,
         neo4j_user=None,
         neo4j_password=None,
+        neo4j_batch_size=None,
+        neo4j_max_retry_time=None,
         update_tag=None,
         aws_sync_all_profiles=False,
+        aws_sync_workers=1,
+        aws_region_workers=1,
+        aws_rate_limit=None,
+        aws_s3_workers=1,
+        aws_s3_bucket_settings=False,
+        aws_elbv2_workers=1,
+        aws_ecr_workers=1,
+        aws_ecr_incremental=False,
+        aws_route53_workers=1,
+        aws_tags_all_types=False,
+        aws_iam_authorization_details=False,
+        aws_policy_cache_dir=None,
         analysis_job_directory=None,
         crxcavator_api_base_uri=None,
         crxcavator_api_key=None,
@@ -62,6 +153,8 @@ class Config:
         okta_saml_role_regex=None,
         github_config=None,
         permission_relationships_file=None,
+        permission_relationships_workers=1,
+        permission_relationships_incremental=False,
         jamf_base_uri=None,
         jamf_user=None,
         jamf_password=None,
@@ -69,12 +162,36 @@ class Config:
         statsd_prefix=None,
         statsd_host=None,
         statsd_port=None,
+        stage_workers=1,
+        record_dir=None,
+        replay_dir=None,
+        stages=None,
+        aws_modules=None,
+        aws_regions=None,
+        aws_accounts=None,
+        gcp_projects=None,
+        checkpoint_file=None,
+        resume=False,
     ):
         self.neo4j_uri = neo4j_uri
         self.neo4j_user = neo4j_user
         self.neo4j_password = neo4j_password
+        self.neo4j_batch_size = neo4j_batch_size
+        self.neo4j_max_retry_time = neo4j_max_retry_time
         self.update_tag = update_tag
         self.aws_sync_all_profiles = aws_sync_all_profiles
+        self.aws_sync_workers = aws_sync_workers
+        self.aws_region_workers = aws_region_workers
+        self.aws_rate_limit = aws_rate_limit
+        self.aws_s3_workers = aws_s3_workers
+        self.aws_s3_bucket_settings = aws_s3_bucket_settings
+        self.aws_elbv2_workers = aws_elbv2_workers
+        self.aws_ecr_workers = aws_ecr_workers
+        self.aws_ecr_incremental = aws_ecr_incremental
+        self.aws_route53_workers = aws_route53_workers
+        self.aws_tags_all_types = aws_tags_all_types
+        self.aws_iam_authorization_details = aws_iam_authorization_details
+        self.aws_policy_cache_dir = aws_policy_cache_dir
         self.analysis_job_directory = analysis_job_directory
         self.crxcavator_api_base_uri = crxcavator_api_base_uri
         self.crxcavator_api_key = crxcavator_api_key
@@ -83,6 +200,8 @@ class Config:
         self.okta_saml_role_regex = okta_saml_role_regex
         self.github_config = github_config
         self.permission_relationships_file = permission_relationships_file
+        self.permission_relationships_workers = permission_relationships_workers
+        self.permission_relationships_incremental = permission_relationships_incremental
         self.jamf_base_uri = jamf_base_uri
         self.jamf_user = jamf_user
         self.jamf_password = jamf_password
@@ -90,3 +209,13 @@ class Config:
         self.statsd_prefix = statsd_prefix
         self.statsd_host = statsd_host
         self.statsd_port = statsd_port
+        self.stage_workers = stage_workers
+        self.record_dir = record_dir
+        self.replay_dir = replay_dir
+        self.stages = stages
+        self.aws_modules = aws_modules
+        self.aws_regions = aws_regions
+        self.aws_accounts = aws_accounts
+        self.gcp_projects = gcp_projects
+        self.checkpoint_file = checkpoint_file
+        self.resume = resume
@@ -1,6 +1,8 @@
 CREATE INDEX ON :AWSAccount(id);
 CREATE INDEX ON :AWSCidrBlock(id);
 CREATE INDEX ON :AWSDNSRecord(id);
+CREATE INDEX ON :AWSDNSRecord(name);
+CREATE INDEX ON :AWSDNSRecord(value);
 CREATE INDEX ON :AWSDNSZone(name);
 CREATE INDEX ON :AWSDNSZone(zoneid);
 CREATE INDEX ON :AWSGroup(arn);
@@ -42,6 +44,7 @@ CREATE INDEX ON :EC2Subnet(subnetid);
 CREATE INDEX ON :ECRImage(id);
 CREATE INDEX ON :ECRRepository(id);
 CREATE INDEX ON :ECRRepository(name);
+CREATE INDEX ON :ECRRepository(uri);
 CREATE INDEX ON :ECRRepositoryImage(id);
 CREATE INDEX ON :ECRRepositoryImage(tag);
 CREATE INDEX ON :ECRScanFinding(id);
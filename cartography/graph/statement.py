@@ -62,8 +62,14 @@ class GraphStatement:
     def _run(self, session):
         """
         Non-iterative statement execution.
+
+        The statement runs in a managed write transaction so that the Neo4j driver retries it on transient errors. The
+        records are read inside the transaction and returned as a list.
         """
-        return session.run(self.query, self.parameters)
+        return session.write_transaction(self._run_in_transaction)
+
+    def _run_in_transaction(self, tx):
+        return list(tx.run(self.query, self.parameters))
 
     def _run_iterative(self, session):
         """
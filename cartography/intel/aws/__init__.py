@@ -1,4 +1,7 @@
 import logging
+from collections import namedtuple
+from concurrent.futures import as_completed
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
 import botocore.exceptions
@@ -17,57 +20,169 @@ from . import redshift
 from . import resourcegroupstaggingapi
 from . import route53
 from . import s3
+import cartography.checkpoint
+import cartography.intel.aws.ratelimit
+import cartography.intel.aws.util
+import cartography.replay
+import cartography.util
+from cartography.intel.aws.util import get_client
 from cartography.util import run_analysis_job
 from cartography.util import run_cleanup_job
+from cartography.util import SKIP_CLEANUP
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
 
 
-def _sync_one_account(neo4j_session, boto3_session, account_id, sync_tag, common_job_parameters):
-    iam.sync(neo4j_session, boto3_session, account_id, sync_tag, common_job_parameters)
-    s3.sync(neo4j_session, boto3_session, account_id, sync_tag, common_job_parameters)
+# The AWS modules that can be selected with `--aws-modules`, in the order they are synced. Modules listed in
+# SUBMODULES can also be narrowed down with `<module>:<submodule>`.
+MODULES = [
+    'iam',
+    's3',
+    'dynamodb',
+    'ec2',
+    'ecr',
+    'eks',
+    'lambda_function',
+    'rds',
+    'redshift',
+    'route53',
+    'elasticsearch',
+    'permission_relationships',
+    'resourcegroupstaggingapi',
+]
+SUBMODULES = {
+    'ec2': list(ec2.SYNC_FUNCTIONS),
+}
 
-    try:
-        regions = ec2.get_ec2_regions(boto3_session)
-    except botocore.exceptions.ClientError as e:
-        logger.debug("Error occurred getting EC2 regions.", exc_info=True)
-        logger.error(
-            (
-                "Failed to retrieve AWS region list, an error occurred: %s. Could not get regions for account %s."
-            ),
-            e,
-            account_id,
-        )
-        return
+# The parts of AWS that a sync run covers. `modules` maps module names to the set of their submodules to sync, or to
+# None for all of them, `regions` lists the regions to sync, and `all_accounts` says whether every account is synced. A
+# value of None for `modules` or `regions` selects everything.
+Selection = namedtuple('Selection', 'modules regions all_accounts')
+FULL_SELECTION = Selection(modules=None, regions=None, all_accounts=True)
+
+
+def parse_module_selection(selectors):
+    """
+    Parse `--aws-modules` selectors such as `iam` or `ec2:instances` into the `modules` of a Selection.
+    :param selectors: A list of selector strings, or None to select every module.
+    :return: A dict mapping module names to a set of submodule names or None, or None if selectors is None.
+    """
+    if selectors is None:
+        return None
+    modules = {}
+    for selector in selectors:
+        module, _, submodule = selector.partition(':')
+        if module not in MODULES:
+            raise ValueError(f"Unknown AWS module '{module}'. Valid modules are: {', '.join(MODULES)}.")
+        if not submodule:
+            modules[module] = None
+            continue
+        if submodule not in SUBMODULES.get(module, []):
+            raise ValueError(
+                f"Unknown AWS submodule '{selector}'. Valid submodules are: "
+                f"{', '.join(f'{m}:{sub}' for m, subs in SUBMODULES.items() for sub in subs)}.",
+            )
+        if module not in modules:
+            modules[module] = set()
+        if modules[module] is not None:
+            modules[module].add(submodule)
+    return modules
 
-    dynamodb.sync(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
-    ec2.sync(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
-    ecr.sync(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
-    eks.sync(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
-    lambda_function.sync(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
-    rds.sync(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
-    redshift.sync(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
+
+def _sync_one_account(
+    neo4j_session, boto3_session, account_id, sync_tag, common_job_parameters, selection=FULL_SELECTION,
+):
+    def selected(module):
+        return selection.modules is None or module in selection.modules
+
+    def submodules(module):
+        return None if selection.modules is None else selection.modules[module]
+
+    if selected('iam'):
+        iam.sync(neo4j_session, boto3_session, account_id, sync_tag, common_job_parameters)
+    if selected('s3'):
+        s3.sync(neo4j_session, boto3_session, account_id, sync_tag, common_job_parameters)
+
+    regional_modules = [
+        'dynamodb', 'ec2', 'ecr', 'eks', 'lambda_function', 'rds', 'redshift', 'resourcegroupstaggingapi',
+    ]
+    regions = []
+    if any(selected(module) for module in regional_modules):
+        try:
+            regions = ec2.get_ec2_regions(boto3_session)
+        except botocore.exceptions.ClientError as e:
+            logger.debug("Error occurred getting EC2 regions.", exc_info=True)
+            logger.error(
+                (
+                    "Failed to retrieve AWS region list, an error occurred: %s. Could not get regions for account %s."
+                ),
+                e,
+                account_id,
+            )
+            return
+
+    regional_job_parameters = common_job_parameters
+    if selection.regions is not None:
+        regions = [region for region in regions if region in selection.regions]
+        # The cleanup jobs of regional modules are scoped to the account rather than the region, so they would delete
+        # the resources of the regions that were left out.
+        regional_job_parameters = dict(common_job_parameters, **{SKIP_CLEANUP: True})
+
+    if selected('dynamodb'):
+        dynamodb.sync(neo4j_session, boto3_session, regions, account_id, sync_tag, regional_job_parameters)
+    if selected('ec2'):
+        ec2_job_parameters = regional_job_parameters
+        if submodules('ec2') is not None:
+            # The EC2 cleanup jobs also delete relationships that other parts of EC2 create, e.g. the instances cleanup
+            # deletes the security groups of every network interface in the account.
+            ec2_job_parameters = dict(regional_job_parameters, **{SKIP_CLEANUP: True})
+        ec2.sync(
+            neo4j_session, boto3_session, regions, account_id, sync_tag, ec2_job_parameters,
+            modules=submodules('ec2'),
+        )
+    if selected('ecr'):
+        ecr.sync(neo4j_session, boto3_session, regions, account_id, sync_tag, regional_job_parameters)
+    if selected('eks'):
+        eks.sync(neo4j_session, boto3_session, regions, account_id, sync_tag, regional_job_parameters)
+    if selected('lambda_function'):
+        lambda_function.sync(neo4j_session, boto3_session, regions, account_id, sync_tag, regional_job_parameters)
+    if selected('rds'):
+        rds.sync(neo4j_session, boto3_session, regions, account_id, sync_tag, regional_job_parameters)
+    if selected('redshift'):
+        redshift.sync(neo4j_session, boto3_session, regions, account_id, sync_tag, regional_job_parameters)
 
     # NOTE each of the below will generate DNS records
-    route53.sync(neo4j_session, boto3_session, account_id, sync_tag)
-    elasticsearch.sync(neo4j_session, boto3_session, account_id, sync_tag)
+    if selected('route53'):
+        route53.sync(
+            neo4j_session, boto3_session, account_id, sync_tag,
+            workers=common_job_parameters.get('aws_route53_workers', 1),
+        )
+    if selected('elasticsearch'):
+        elasticsearch.sync(neo4j_session, boto3_session, account_id, sync_tag)
 
     # NOTE clean up all DNS records, regardless of which job created them
-    run_cleanup_job('aws_account_dns_cleanup.json', neo4j_session, common_job_parameters)
+    if selected('route53'):
+        run_cleanup_job('aws_account_dns_cleanup.json', neo4j_session, common_job_parameters)
 
     # MAP IAM permissions
-    permission_relationships.sync(neo4j_session, account_id, sync_tag, common_job_parameters)
+    if selected('permission_relationships'):
+        permission_relationships.sync(neo4j_session, account_id, sync_tag, common_job_parameters)
 
     # AWS Tags - Must always be last.
-    resourcegroupstaggingapi.sync(neo4j_session, boto3_session, regions, sync_tag, common_job_parameters)
+    if selected('resourcegroupstaggingapi'):
+        tag_job_parameters = regional_job_parameters
+        if not selection.all_accounts:
+            # The tag cleanup job is not scoped to an account.
+            tag_job_parameters = dict(regional_job_parameters, **{SKIP_CLEANUP: True})
+        resourcegroupstaggingapi.sync(neo4j_session, boto3_session, regions, sync_tag, tag_job_parameters)
 
 
 def _autodiscover_accounts(neo4j_session, boto3_session, account_id, sync_tag, common_job_parameters):
     logger.info("Trying to autodiscover accounts.")
     try:
         # Fetch all accounts
-        client = boto3_session.client('organizations')
+        client = get_client(boto3_session, 'organizations')
         paginator = client.get_paginator('list_accounts')
         accounts = []
         for page in paginator.paginate():
@@ -84,28 +199,107 @@ def _autodiscover_accounts(neo4j_session, boto3_session, account_id, sync_tag, c
         logger.debug(f"The current account ({account_id}) doesn't have enough permissions to perform autodiscovery.")
 
 
-def _sync_multiple_accounts(neo4j_session, accounts, sync_tag, common_job_parameters):
+def _sync_account(
+    neo4j_session, profile_name, account_id, sync_tag, common_job_parameters, selection=FULL_SELECTION,
+):
+    logger.info("Syncing AWS account with ID '%s' using configured profile '%s'.", account_id, profile_name)
+    # Each account gets its own copy of the job parameters so that concurrently synced accounts don't clobber AWS_ID.
+    account_job_parameters = dict(common_job_parameters, AWS_ID=account_id)
+    boto3_session = boto3.Session(profile_name=profile_name)
+    cartography.replay.register_boto3_session(boto3_session)
+    cartography.intel.aws.ratelimit.register_boto3_session(boto3_session, account_id)
+
+    _autodiscover_accounts(neo4j_session, boto3_session, account_id, sync_tag, account_job_parameters)
+
+    _sync_one_account(neo4j_session, boto3_session, account_id, sync_tag, account_job_parameters, selection)
+    cartography.checkpoint.mark_completed(cartography.checkpoint.AWS_ACCOUNT, account_id)
+
+
+def _sync_account_in_new_session(
+    neo4j_driver, profile_name, account_id, sync_tag, common_job_parameters, selection=FULL_SELECTION,
+):
+    with neo4j_driver.session() as neo4j_session:
+        _sync_account(neo4j_session, profile_name, account_id, sync_tag, common_job_parameters, selection)
+
+
+def _sync_multiple_accounts(
+    neo4j_session, accounts, sync_tag, common_job_parameters, neo4j_driver=None, workers=1, selection=FULL_SELECTION,
+):
+    """
+    Sync the given AWS accounts and then run the post-ingestion cleanup jobs once for all of them.
+
+    :param neo4j_session: The Neo4j session
+    :param accounts: A dict mapping AWS profile names to AWS account ids
+    :param sync_tag: The update tag of this sync run
+    :param common_job_parameters: Parameters to carry to the cleanup jobs
+    :param neo4j_driver: The Neo4j driver to open per-worker sessions from. Required if workers is greater than 1.
+    :param workers: The number of accounts to sync concurrently. Each worker uses its own boto3 session, Neo4j session
+    and copy of common_job_parameters.
+    :param selection: The Selection of modules, regions and accounts to sync. If `selection.all_accounts` is False,
+    `accounts` only contains the accounts to sync and the cleanup jobs that are not scoped to an account are skipped.
+    :return: Nothing
+    """
     logger.debug("Syncing AWS accounts: %s", ', '.join(accounts.values()))
-    organizations.sync(neo4j_session, accounts, sync_tag, common_job_parameters)
+    if selection.all_accounts:
+        organizations.sync(neo4j_session, accounts, sync_tag, common_job_parameters)
+    else:
+        # The account cleanup job would delete the accounts that were left out.
+        organizations.load_aws_accounts(neo4j_session, accounts, sync_tag, common_job_parameters)
+
+    completed = [
+        account_id for account_id in accounts.values()
+        if cartography.checkpoint.is_completed(cartography.checkpoint.AWS_ACCOUNT, account_id)
+    ]
+    if completed:
+        logger.info("Skipping AWS accounts that completed in an earlier attempt of this run: %s", ', '.join(completed))
+        accounts = {
+            profile_name: account_id for profile_name, account_id in accounts.items() if account_id not in completed
+        }
 
-    for profile_name, account_id in accounts.items():
-        logger.info("Syncing AWS account with ID '%s' using configured profile '%s'.", account_id, profile_name)
-        common_job_parameters["AWS_ID"] = account_id
-        boto3_session = boto3.Session(profile_name=profile_name)
+    if workers > 1 and neo4j_driver is None:
+        logger.warning("Concurrent AWS account sync requires a Neo4j driver; syncing accounts one at a time instead.")
+        workers = 1
 
-        _autodiscover_accounts(neo4j_session, boto3_session, account_id, sync_tag, common_job_parameters)
+    if workers <= 1:
+        for profile_name, account_id in accounts.items():
+            _sync_account(neo4j_session, profile_name, account_id, sync_tag, common_job_parameters, selection)
+    else:
+        logger.info("Syncing %d AWS accounts using %d workers.", len(accounts), workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(
+                    _sync_account_in_new_session, neo4j_driver, profile_name, account_id, sync_tag,
+                    common_job_parameters, selection,
+                ): account_id
+                for profile_name, account_id in accounts.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception:
+                    logger.error("Sync of AWS account '%s' failed, cancelling pending accounts.", futures[future])
+                    for pending in futures:
+                        pending.cancel()
+                    raise
 
-        _sync_one_account(neo4j_session, boto3_session, account_id, sync_tag, common_job_parameters)
+    # Link the DNS records of all accounts to what they point to once, now that the records, load balancers and EC2
+    # instances of every account are in the graph, and then remove the links of these records that went away.
+    if selection.modules is None or 'route53' in selection.modules:
+        route53.link_aws_resources(neo4j_session, sync_tag)
+        run_cleanup_job('aws_dns_links_cleanup.json', neo4j_session, common_job_parameters)
 
-    del common_job_parameters["AWS_ID"]
+    if not selection.all_accounts:
+        return
 
     # There may be orphan Principals which point outside of known AWS accounts. This job cleans
     # up those nodes after all AWS accounts have been synced.
-    run_cleanup_job('aws_post_ingestion_principals_cleanup.json', neo4j_session, common_job_parameters)
+    if selection.modules is None or 'iam' in selection.modules:
+        run_cleanup_job('aws_post_ingestion_principals_cleanup.json', neo4j_session, common_job_parameters)
 
     # There may be orphan DNS entries that point outside of known AWS zones. This job cleans
     # up those entries after all AWS accounts have been synced.
-    run_cleanup_job('aws_post_ingestion_dns_cleanup.json', neo4j_session, common_job_parameters)
+    if selection.modules is None or {'route53', 'elasticsearch'} <= set(selection.modules):
+        run_cleanup_job('aws_post_ingestion_dns_cleanup.json', neo4j_session, common_job_parameters)
 
 
 @timeit
@@ -113,9 +307,24 @@ def start_aws_ingestion(neo4j_session, config):
     common_job_parameters = {
         "UPDATE_TAG": config.update_tag,
         "permission_relationships_file": config.permission_relationships_file,
+        "permission_relationships_workers": config.permission_relationships_workers,
+        "permission_relationships_incremental": config.permission_relationships_incremental,
+        "aws_iam_authorization_details": config.aws_iam_authorization_details,
+        "aws_s3_workers": config.aws_s3_workers,
+        "aws_s3_bucket_settings": config.aws_s3_bucket_settings,
+        "aws_elbv2_workers": config.aws_elbv2_workers,
+        "aws_ecr_workers": config.aws_ecr_workers,
+        "aws_ecr_incremental": config.aws_ecr_incremental,
+        "aws_route53_workers": config.aws_route53_workers,
+        "aws_tags_all_types": config.aws_tags_all_types,
     }
+    iam.policy_document_cache = iam.PolicyDocumentCache(config.aws_policy_cache_dir)
+    cartography.intel.aws.util.reset_client_cache_stats()
+    cartography.intel.aws.ratelimit.max_rate = config.aws_rate_limit
+    cartography.intel.aws.ratelimit.reset()
     try:
         boto3_session = boto3.Session()
+        cartography.replay.register_boto3_session(boto3_session)
     except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
         logger.debug("Error occurred calling boto3.Session().", exc_info=True)
         logger.error(
@@ -147,7 +356,41 @@ def start_aws_ingestion(neo4j_session, config):
             ),
         )
 
-    _sync_multiple_accounts(neo4j_session, aws_accounts, config.update_tag, common_job_parameters)
+    selection = Selection(
+        modules=parse_module_selection(config.aws_modules),
+        regions=config.aws_regions,
+        all_accounts=config.aws_accounts is None,
+    )
+    if config.aws_accounts is not None:
+        aws_accounts = {
+            profile_name: account_id for profile_name, account_id in aws_accounts.items()
+            if profile_name in config.aws_accounts or account_id in config.aws_accounts
+        }
+        logger.info("Syncing the selected AWS accounts: %s", ', '.join(aws_accounts.values()))
+
+    cartography.util.aws_region_workers = config.aws_region_workers
+    # The permission relationships of all accounts are evaluated by the same worker processes, rather than starting
+    # new ones for each account.
+    permission_relationship_workers = config.permission_relationships_workers or 1
+    syncs_permission_relationships = selection.modules is None or 'permission_relationships' in selection.modules
+    if permission_relationship_workers > 1 and syncs_permission_relationships:
+        permission_relationships.start_worker_pool(permission_relationship_workers)
+    try:
+        _sync_multiple_accounts(
+            neo4j_session,
+            aws_accounts,
+            config.update_tag,
+            common_job_parameters,
+            neo4j_driver=cartography.util.neo4j_driver,
+            workers=config.aws_sync_workers,
+            selection=selection,
+        )
+    finally:
+        permission_relationships.stop_worker_pool()
+    logger.info("Created %d boto3 clients and resources.", cartography.intel.aws.util.clients_created)
+    if cartography.util.stats_client:
+        cartography.util.stats_client.gauge(f"{__name__}.clients_created", cartography.intel.aws.util.clients_created)
+    cartography.intel.aws.ratelimit.report()
 
     run_analysis_job(
         'aws_ec2_asset_exposure.json',
@@ -1,6 +1,9 @@
 import logging
 
+from cartography.intel.aws.util import get_client
+from cartography.util import aws_fetch_regions
 from cartography.util import aws_handle_regions
+from cartography.util import load_batched
 from cartography.util import run_cleanup_job
 from cartography.util import timeit
 
@@ -10,7 +13,7 @@ logger = logging.getLogger(__name__)
 @timeit
 @aws_handle_regions
 def get_dynamodb_tables(boto3_session, region):
-    client = boto3_session.client('dynamodb', region_name=region)
+    client = get_client(boto3_session, 'dynamodb', region_name=region)
     paginator = client.get_paginator('list_tables')
     dynamodb_tables = []
     for page in paginator.paginate():
@@ -22,12 +25,13 @@ def get_dynamodb_tables(boto3_session, region):
 @timeit
 def load_dynamodb_tables(neo4j_session, data, region, current_aws_account_id, aws_update_tag):
     ingest_table = """
-    MERGE (table:DynamoDBTable{id: {Arn}})
-    ON CREATE SET table.firstseen = timestamp(), table.arn = {Arn}, table.name = {TableName},
+    UNWIND {Rows} AS row
+    MERGE (table:DynamoDBTable{id: row.Arn})
+    ON CREATE SET table.firstseen = timestamp(), table.arn = row.Arn, table.name = row.TableName,
     table.region = {Region}
-    SET table.lastupdated = {aws_update_tag}, table.rows = {Rows}, table.size = {Size},
-    table.provisioned_throughput_read_capacity_units = {ProvisionedThroughputReadCapacityUnits},
-    table.provisioned_throughput_write_capacity_units = {ProvisionedThroughputWriteCapacityUnits}
+    SET table.lastupdated = {aws_update_tag}, table.rows = row.ItemCount, table.size = row.Size,
+    table.provisioned_throughput_read_capacity_units = row.ProvisionedThroughputReadCapacityUnits,
+    table.provisioned_throughput_write_capacity_units = row.ProvisionedThroughputWriteCapacityUnits
     WITH table
     MATCH (owner:AWSAccount{id: {AWS_ACCOUNT_ID}})
     MERGE (owner)-[r:RESOURCE]->(table)
@@ -35,50 +39,63 @@ def load_dynamodb_tables(neo4j_session, data, region, current_aws_account_id, aw
     SET r.lastupdated = {aws_update_tag}
     """
 
-    for table in data:
-        neo4j_session.run(
-            ingest_table,
-            Arn=table['Table']['TableArn'],
-            Region=region,
-            ProvisionedThroughputReadCapacityUnits=table['Table']['ProvisionedThroughput']['ReadCapacityUnits'],
-            ProvisionedThroughputWriteCapacityUnits=table['Table']['ProvisionedThroughput']['WriteCapacityUnits'],
-            Size=table['Table']['TableSizeBytes'],
-            TableName=table['Table']['TableName'],
-            Rows=table['Table']['ItemCount'],
-            AWS_ACCOUNT_ID=current_aws_account_id,
-            aws_update_tag=aws_update_tag,
-        )
-        load_gsi(neo4j_session, table, region, current_aws_account_id, aws_update_tag)
+    rows = [
+        {
+            'Arn': table['Table']['TableArn'],
+            'ProvisionedThroughputReadCapacityUnits': table['Table']['ProvisionedThroughput']['ReadCapacityUnits'],
+            'ProvisionedThroughputWriteCapacityUnits': table['Table']['ProvisionedThroughput']['WriteCapacityUnits'],
+            'Size': table['Table']['TableSizeBytes'],
+            'TableName': table['Table']['TableName'],
+            'ItemCount': table['Table']['ItemCount'],
+        } for table in data
+    ]
+    load_batched(
+        neo4j_session,
+        ingest_table,
+        rows,
+        Region=region,
+        AWS_ACCOUNT_ID=current_aws_account_id,
+        aws_update_tag=aws_update_tag,
+    )
+    load_gsi(neo4j_session, data, region, current_aws_account_id, aws_update_tag)
 
 
 @timeit
-def load_gsi(neo4j_session, table, region, current_aws_account_id, aws_update_tag):
+def load_gsi(neo4j_session, data, region, current_aws_account_id, aws_update_tag):
     ingest_gsi = """
-    MERGE (gsi:DynamoDBGlobalSecondaryIndex{id: {Arn}})
-    ON CREATE SET gsi.firstseen = timestamp(), gsi.arn = {Arn}, gsi.name = {GSIName},
+    UNWIND {Rows} AS row
+    MERGE (gsi:DynamoDBGlobalSecondaryIndex{id: row.Arn})
+    ON CREATE SET gsi.firstseen = timestamp(), gsi.arn = row.Arn, gsi.name = row.GSIName,
     gsi.region = {Region}
     SET gsi.lastupdated = {aws_update_tag},
-    gsi.provisioned_throughput_read_capacity_units = {ProvisionedThroughputReadCapacityUnits},
-    gsi.provisioned_throughput_write_capacity_units = {ProvisionedThroughputWriteCapacityUnits}
-    WITH gsi
-    MATCH (table:DynamoDBTable{arn: {TableArn}})
+    gsi.provisioned_throughput_read_capacity_units = row.ProvisionedThroughputReadCapacityUnits,
+    gsi.provisioned_throughput_write_capacity_units = row.ProvisionedThroughputWriteCapacityUnits
+    WITH gsi, row
+    MATCH (table:DynamoDBTable{arn: row.TableArn})
     MERGE (table)-[r:GLOBAL_SECONDARY_INDEX]->(gsi)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {aws_update_tag}
     """
 
-    for gsi in table['Table'].get('GlobalSecondaryIndexes', []):
-        neo4j_session.run(
-            ingest_gsi,
-            TableArn=table['Table']['TableArn'],
-            Arn=gsi['IndexArn'],
-            Region=region,
-            ProvisionedThroughputReadCapacityUnits=gsi['ProvisionedThroughput']['ReadCapacityUnits'],
-            ProvisionedThroughputWriteCapacityUnits=gsi['ProvisionedThroughput']['WriteCapacityUnits'],
-            GSIName=gsi['IndexName'],
-            AWS_ACCOUNT_ID=current_aws_account_id,
-            aws_update_tag=aws_update_tag,
-        )
+    rows = [
+        {
+            'TableArn': table['Table']['TableArn'],
+            'Arn': gsi['IndexArn'],
+            'ProvisionedThroughputReadCapacityUnits': gsi['ProvisionedThroughput']['ReadCapacityUnits'],
+            'ProvisionedThroughputWriteCapacityUnits': gsi['ProvisionedThroughput']['WriteCapacityUnits'],
+            'GSIName': gsi['IndexName'],
+        }
+        for table in data
+        for gsi in table['Table'].get('GlobalSecondaryIndexes', [])
+    ]
+    load_batched(
+        neo4j_session,
+        ingest_gsi,
+        rows,
+        Region=region,
+        AWS_ACCOUNT_ID=current_aws_account_id,
+        aws_update_tag=aws_update_tag,
+    )
 
 
 @timeit
@@ -91,9 +108,8 @@ def sync_dynamodb_tables(
     neo4j_session, boto3_session, regions, current_aws_account_id, aws_update_tag,
     common_job_parameters,
 ):
-    for region in regions:
+    for region, data in aws_fetch_regions(get_dynamodb_tables, boto3_session, regions):
         logger.info("Syncing DynamoDB for region in '%s' in account '%s'.", region, current_aws_account_id)
-        data = get_dynamodb_tables(boto3_session, region)
         load_dynamodb_tables(neo4j_session, data, region, current_aws_account_id, aws_update_tag)
     cleanup_dynamodb_tables(neo4j_session, common_job_parameters)
 
@@ -1,4 +1,5 @@
 import logging
+from collections import OrderedDict
 
 from .auto_scaling_groups import sync_ec2_auto_scaling_groups
 from .instances import sync_ec2_instances
@@ -11,6 +12,7 @@ from .subnets import sync_subnets
 from .tgw import sync_transit_gateways
 from .vpc import sync_vpc
 from .vpc_peering import sync_vpc_peering
+from cartography.intel.aws.util import get_client
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -18,22 +20,34 @@ logger = logging.getLogger(__name__)
 
 @timeit
 def get_ec2_regions(boto3_session):
-    client = boto3_session.client('ec2')
+    client = get_client(boto3_session, 'ec2')
     result = client.describe_regions()
     return [r['RegionName'] for r in result['Regions']]
 
 
+# The EC2 sync functions in the order they run, by the name used to select them with `--aws-modules ec2:<name>`.
+SYNC_FUNCTIONS = OrderedDict([
+    ('vpc', sync_vpc),
+    ('security_groups', sync_ec2_security_groupinfo),
+    ('key_pairs', sync_ec2_key_pairs),
+    ('instances', sync_ec2_instances),
+    ('auto_scaling_groups', sync_ec2_auto_scaling_groups),
+    ('load_balancers', sync_load_balancers),
+    ('subnets', sync_subnets),
+    ('load_balancer_v2s', sync_load_balancer_v2s),
+    ('vpc_peering', sync_vpc_peering),
+    ('tgw', sync_transit_gateways),
+    ('network_interfaces', sync_network_interfaces),
+])
+
+
 @timeit
-def sync(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters):
+def sync(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters, modules=None):
+    """
+    Sync EC2 resources for the given account and regions.
+    :param modules: The names of the SYNC_FUNCTIONS to run, or None to run all of them.
+    """
     logger.info("Syncing EC2 for account '%s'.", account_id)
-    sync_vpc(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
-    sync_ec2_security_groupinfo(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
-    sync_ec2_key_pairs(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
-    sync_ec2_instances(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
-    sync_ec2_auto_scaling_groups(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
-    sync_load_balancers(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
-    sync_subnets(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
-    sync_load_balancer_v2s(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
-    sync_vpc_peering(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
-    sync_transit_gateways(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
-    sync_network_interfaces(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
+    for name, sync_func in SYNC_FUNCTIONS.items():
+        if modules is None or name in modules:
+            sync_func(neo4j_session, boto3_session, regions, account_id, sync_tag, common_job_parameters)
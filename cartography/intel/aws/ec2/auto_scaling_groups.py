@@ -1,8 +1,11 @@
 import logging
 
 from .util import get_botocore_config
+from cartography.intel.aws.util import get_client
+from cartography.util import aws_fetch_regions
 from cartography.util import aws_handle_regions
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -11,7 +14,7 @@ logger = logging.getLogger(__name__)
 @timeit
 @aws_handle_regions
 def get_ec2_auto_scaling_groups(boto3_session, region):
-    client = boto3_session.client('autoscaling', region_name=region, config=get_botocore_config())
+    client = get_client(boto3_session, 'autoscaling', region_name=region, config=get_botocore_config())
     paginator = client.get_paginator('describe_auto_scaling_groups')
     asgs = []
     for page in paginator.paginate():
@@ -67,7 +70,8 @@ def load_ec2_auto_scaling_groups(neo4j_session, data, region, current_aws_accoun
         group_arn = group["AutoScalingGroupARN"]
         max_size = group["MaxSize"]
 
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             ingest_group,
             ARN=group_arn,
             Name=name,
@@ -82,7 +86,8 @@ def load_ec2_auto_scaling_groups(neo4j_session, data, region, current_aws_accoun
         if group.get('VPCZoneIdentifier'):
             vpclist = group["VPCZoneIdentifier"]
             for vpc in str(vpclist).split(','):
-                neo4j_session.run(
+                run_write(
+                    neo4j_session,
                     ingest_vpc,
                     SubnetId=vpc,
                     GROUPARN=group_arn,
@@ -92,7 +97,8 @@ def load_ec2_auto_scaling_groups(neo4j_session, data, region, current_aws_accoun
         if group.get("Instances"):
             for instance in group["Instances"]:
                 instanceid = instance["InstanceId"]
-                neo4j_session.run(
+                run_write(
+                    neo4j_session,
                     ingest_instance,
                     InstanceId=instanceid,
                     GROUPARN=group_arn,
@@ -116,8 +122,7 @@ def sync_ec2_auto_scaling_groups(
         neo4j_session, boto3_session, regions, current_aws_account_id, aws_update_tag,
         common_job_parameters,
 ):
-    for region in regions:
+    for region, data in aws_fetch_regions(get_ec2_auto_scaling_groups, boto3_session, regions):
         logger.debug("Syncing auto scaling groups for region '%s' in account '%s'.", region, current_aws_account_id)
-        data = get_ec2_auto_scaling_groups(boto3_session, region)
         load_ec2_auto_scaling_groups(neo4j_session, data, region, current_aws_account_id, aws_update_tag)
     cleanup_ec2_auto_scaling_groups(neo4j_session, common_job_parameters)
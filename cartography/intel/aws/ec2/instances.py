@@ -2,21 +2,33 @@ import logging
 import time
 
 from .util import get_botocore_config
+from cartography.intel.aws.util import get_client
 from cartography.util import aws_handle_regions
+from cartography.util import aws_stream_regions
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
 
 
+@aws_handle_regions
+def get_ec2_instance_pages(boto3_session, region):
+    """
+    Yield the reservations of each page of describe_instances for the given region.
+    """
+    client = get_client(boto3_session, 'ec2', region_name=region, config=get_botocore_config())
+    paginator = client.get_paginator('describe_instances')
+    for page in paginator.paginate():
+        yield page['Reservations']
+
+
 @timeit
 @aws_handle_regions
 def get_ec2_instances(boto3_session, region):
-    client = boto3_session.client('ec2', region_name=region, config=get_botocore_config())
-    paginator = client.get_paginator('describe_instances')
     reservations = []
-    for page in paginator.paginate():
-        reservations.extend(page['Reservations'])
+    for page in get_ec2_instance_pages(boto3_session, region):
+        reservations.extend(page)
     return reservations
 
 
@@ -56,12 +68,13 @@ def load_ec2_instance_network_interfaces(neo4j_session, instance_data, aws_updat
             SET r.lastupdated = {aws_update_tag}
     """
     instance_id = instance_data["InstanceId"]
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_interfaces,
         Interfaces=instance_data['NetworkInterfaces'],
         InstanceId=instance_id,
         aws_update_tag=aws_update_tag,
-    ).consume()  # TODO see issue 170
+    )
 
 
 @timeit
@@ -145,7 +158,8 @@ def load_ec2_instances(neo4j_session, data, region, current_aws_account_id, aws_
     for reservation in data:
         reservation_id = reservation["ReservationId"]
 
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             ingest_reservation,
             ReservationId=reservation_id,
             OwnerId=reservation.get("OwnerId"),
@@ -153,7 +167,7 @@ def load_ec2_instances(neo4j_session, data, region, current_aws_account_id, aws_
             AWS_ACCOUNT_ID=current_aws_account_id,
             Region=region,
             aws_update_tag=aws_update_tag,
-        ).consume()  # TODO see issue 170
+        )
 
         for instance in reservation["Instances"]:
             instanceid = instance["InstanceId"]
@@ -169,7 +183,8 @@ def load_ec2_instances(neo4j_session, data, region, current_aws_account_id, aws_
             else:
                 launch_time_unix = ""
 
-            neo4j_session.run(
+            run_write(
+                neo4j_session,
                 ingest_instance,
                 InstanceId=instanceid,
                 PublicDnsName=instance.get("PublicDnsName"),
@@ -186,12 +201,13 @@ def load_ec2_instances(neo4j_session, data, region, current_aws_account_id, aws_
                 AWS_ACCOUNT_ID=current_aws_account_id,
                 Region=region,
                 aws_update_tag=aws_update_tag,
-            ).consume()  # TODO see issue 170
+            )
 
             # SubnetId can return None intermittently so attach only if non-None.
             subnet_id = instance.get('SubnetId')
             if subnet_id:
-                neo4j_session.run(
+                run_write(
+                    neo4j_session,
                     ingest_subnet,
                     InstanceId=instanceid,
                     SubnetId=subnet_id,
@@ -202,7 +218,8 @@ def load_ec2_instances(neo4j_session, data, region, current_aws_account_id, aws_
             if instance.get("KeyName"):
                 key_name = instance["KeyName"]
                 key_pair_arn = f'arn:aws:ec2:{region}:{current_aws_account_id}:key-pair/{key_name}'
-                neo4j_session.run(
+                run_write(
+                    neo4j_session,
                     ingest_key_pair,
                     KeyPairARN=key_pair_arn,
                     KeyName=key_name,
@@ -210,11 +227,12 @@ def load_ec2_instances(neo4j_session, data, region, current_aws_account_id, aws_
                     InstanceId=instanceid,
                     AWS_ACCOUNT_ID=current_aws_account_id,
                     aws_update_tag=aws_update_tag,
-                ).consume()  # TODO see issue 170
+                )
 
             if instance.get("SecurityGroups"):
                 for group in instance["SecurityGroups"]:
-                    neo4j_session.run(
+                    run_write(
+                        neo4j_session,
                         ingest_security_groups,
                         GroupId=group["GroupId"],
                         GroupName=group.get("GroupName"),
@@ -222,7 +240,7 @@ def load_ec2_instances(neo4j_session, data, region, current_aws_account_id, aws_
                         Region=region,
                         AWS_ACCOUNT_ID=current_aws_account_id,
                         aws_update_tag=aws_update_tag,
-                    ).consume()  # TODO see issue 170
+                    )
 
             load_ec2_instance_network_interfaces(neo4j_session, instance, aws_update_tag)
 
@@ -237,8 +255,11 @@ def sync_ec2_instances(
     neo4j_session, boto3_session, regions, current_aws_account_id, aws_update_tag,
     common_job_parameters,
 ):
-    for region in regions:
-        logger.info("Syncing EC2 instances for region '%s' in account '%s'.", region, current_aws_account_id)
-        data = get_ec2_instances(boto3_session, region)
-        load_ec2_instances(neo4j_session, data, region, current_aws_account_id, aws_update_tag)
+    logger.info("Syncing EC2 instances for %d regions in account '%s'.", len(regions), current_aws_account_id)
+
+    def load_page(region, reservations):
+        logger.debug("Loading %d EC2 reservations for region '%s'.", len(reservations), region)
+        load_ec2_instances(neo4j_session, reservations, region, current_aws_account_id, aws_update_tag)
+
+    aws_stream_regions(get_ec2_instance_pages, boto3_session, regions, load_page)
     cleanup_ec2_instances(neo4j_session, common_job_parameters)
@@ -1,8 +1,11 @@
 import logging
 
 from .util import get_botocore_config
+from cartography.intel.aws.util import get_client
+from cartography.util import aws_fetch_regions
 from cartography.util import aws_handle_regions
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -11,7 +14,7 @@ logger = logging.getLogger(__name__)
 @timeit
 @aws_handle_regions
 def get_ec2_key_pairs(boto3_session, region):
-    client = boto3_session.client('ec2', region_name=region, config=get_botocore_config())
+    client = get_client(boto3_session, 'ec2', region_name=region, config=get_botocore_config())
     return client.describe_key_pairs()['KeyPairs']
 
 
@@ -34,7 +37,8 @@ def load_ec2_key_pairs(neo4j_session, data, region, current_aws_account_id, aws_
         key_fingerprint = key_pair.get("KeyFingerprint")
         key_pair_arn = f'arn:aws:ec2:{region}:{current_aws_account_id}:key-pair/{key_name}'
 
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             ingest_key_pair,
             ARN=key_pair_arn,
             KeyName=key_name,
@@ -55,8 +59,7 @@ def sync_ec2_key_pairs(
     neo4j_session, boto3_session, regions, current_aws_account_id, aws_update_tag,
     common_job_parameters,
 ):
-    for region in regions:
+    for region, data in aws_fetch_regions(get_ec2_key_pairs, boto3_session, regions):
         logger.info("Syncing EC2 key pairs for region '%s' in account '%s'.", region, current_aws_account_id)
-        data = get_ec2_key_pairs(boto3_session, region)
         load_ec2_key_pairs(neo4j_session, data, region, current_aws_account_id, aws_update_tag)
     cleanup_ec2_key_pairs(neo4j_session, common_job_parameters)
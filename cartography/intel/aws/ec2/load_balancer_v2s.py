@@ -1,7 +1,12 @@
 import logging
+from functools import partial
 
 from .util import get_botocore_config
+from cartography.intel.aws.util import get_client
+from cartography.intel.aws.util import map_concurrently
 from cartography.util import aws_handle_regions
+from cartography.util import aws_stream_regions
+from cartography.util import load_batched
 from cartography.util import run_cleanup_job
 from cartography.util import timeit
 
@@ -36,96 +41,123 @@ def get_load_balancer_v2_target_groups(client, load_balancer_arn):
     return target_groups
 
 
-@timeit
+def _get_load_balancer_v2_details(client, elbv2):
+    elbv2['Listeners'] = get_load_balancer_v2_listeners(client, elbv2['LoadBalancerArn'])
+    elbv2['TargetGroups'] = get_load_balancer_v2_target_groups(client, elbv2['LoadBalancerArn'])
+    return elbv2
+
+
 @aws_handle_regions
-def get_loadbalancer_v2_data(boto3_session, region):
-    client = boto3_session.client('elbv2', region_name=region, config=get_botocore_config())
+def get_loadbalancer_v2_pages(boto3_session, region, workers=1):
+    """
+    Yield the load balancers of each page of describe_load_balancers for the given region, with their listeners and
+    target groups. The listeners and target groups of up to `workers` load balancers are fetched at the same time.
+    """
+    client = get_client(boto3_session, 'elbv2', region_name=region, config=get_botocore_config())
     paginator = client.get_paginator('describe_load_balancers')
-    elbv2s = []
     for page in paginator.paginate():
-        elbv2s.extend(page['LoadBalancers'])
-
-    # Make extra calls to get listeners
-    for elbv2 in elbv2s:
-        elbv2['Listeners'] = get_load_balancer_v2_listeners(client, elbv2['LoadBalancerArn'])
-        elbv2['TargetGroups'] = get_load_balancer_v2_target_groups(client, elbv2['LoadBalancerArn'])
-    return elbv2s
+        # Make extra calls to get listeners and target groups
+        yield list(map_concurrently(partial(_get_load_balancer_v2_details, client), page['LoadBalancers'], workers))
 
 
 @timeit
 def load_load_balancer_v2s(neo4j_session, data, region, current_aws_account_id, aws_update_tag):
+    """
+    Load the given load balancers and their subnets, security groups, listeners and target instances, with one batched
+    query for each.
+    """
     ingest_load_balancer_v2 = """
-    MERGE (elbv2:LoadBalancerV2{id: {ID}})
-    ON CREATE SET elbv2.firstseen = timestamp(), elbv2.createdtime = {CREATED_TIME}
-    SET elbv2.lastupdated = {aws_update_tag}, elbv2.name = {NAME}, elbv2.dnsname = {DNS_NAME},
-    elbv2.canonicalhostedzonenameid = {HOSTED_ZONE_NAME_ID},
-    elbv2.type = {ELBv2_TYPE},
-    elbv2.scheme = {SCHEME}, elbv2.region = {Region}
+    UNWIND {Rows} AS lb
+    MERGE (elbv2:LoadBalancerV2{id: lb.DNSName})
+    ON CREATE SET elbv2.firstseen = timestamp(), elbv2.createdtime = lb.CreatedTime
+    SET elbv2.lastupdated = {aws_update_tag}, elbv2.name = lb.LoadBalancerName, elbv2.dnsname = lb.DNSName,
+    elbv2.canonicalhostedzonenameid = lb.CanonicalHostedZoneNameID,
+    elbv2.type = lb.Type,
+    elbv2.scheme = lb.Scheme, elbv2.region = {Region}
     WITH elbv2
     MATCH (aa:AWSAccount{id: {AWS_ACCOUNT_ID}})
     MERGE (aa)-[r:RESOURCE]->(elbv2)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {aws_update_tag}
     """
+    load_batched(
+        neo4j_session,
+        ingest_load_balancer_v2,
+        [
+            {
+                'DNSName': lb['DNSName'],
+                'CreatedTime': str(lb['CreatedTime']),
+                'LoadBalancerName': lb['LoadBalancerName'],
+                'CanonicalHostedZoneNameID': lb.get('CanonicalHostedZoneNameID'),
+                'Type': lb.get('Type'),
+                'Scheme': lb.get('Scheme'),
+            } for lb in data
+        ],
+        AWS_ACCOUNT_ID=current_aws_account_id,
+        Region=region,
+        aws_update_tag=aws_update_tag,
+    )
+
+    subnets = []
+    security_groups = []
+    listeners = []
+    targets = []
     for lb in data:
         load_balancer_id = lb["DNSName"]
+        subnets.extend(transform_load_balancer_v2_subnets(load_balancer_id, lb["AvailabilityZones"] or []))
+        # NLB's don't have SecurityGroups, so check for one first.
+        for group in lb.get("SecurityGroups") or []:
+            security_groups.append({'LoadBalancerId': load_balancer_id, 'GroupId': str(group)})
+        listeners.extend(transform_load_balancer_v2_listeners(load_balancer_id, lb['Listeners'] or []))
+        targets.extend(transform_load_balancer_v2_targets(load_balancer_id, lb['TargetGroups'] or []))
 
-        neo4j_session.run(
-            ingest_load_balancer_v2,
-            ID=load_balancer_id,
-            CREATED_TIME=str(lb["CreatedTime"]),
-            NAME=lb["LoadBalancerName"],
-            DNS_NAME=load_balancer_id,
-            HOSTED_ZONE_NAME_ID=lb.get("CanonicalHostedZoneNameID"),
-            ELBv2_TYPE=lb.get("Type"),
-            SCHEME=lb.get("Scheme"),
-            AWS_ACCOUNT_ID=current_aws_account_id,
-            Region=region,
-            aws_update_tag=aws_update_tag,
-        )
-
-        if lb["AvailabilityZones"]:
-            az = lb["AvailabilityZones"]
-            load_load_balancer_v2_subnets(neo4j_session, load_balancer_id, az, region, aws_update_tag)
+    _load_load_balancer_v2_subnets(neo4j_session, subnets, region, aws_update_tag)
+    _load_load_balancer_v2_security_groups(neo4j_session, security_groups, aws_update_tag)
+    _load_load_balancer_v2_listeners(neo4j_session, listeners, aws_update_tag)
+    _load_load_balancer_v2_targets(neo4j_session, targets, current_aws_account_id, aws_update_tag)
 
-        # NLB's don't have SecurityGroups, so check for one first.
-        if 'SecurityGroups' in lb and lb["SecurityGroups"]:
-            ingest_load_balancer_v2_security_group = """
-            MATCH (elbv2:LoadBalancerV2{id: {ID}}),
-            (group:EC2SecurityGroup{groupid: {GROUP_ID}})
-            MERGE (elbv2)-[r:MEMBER_OF_EC2_SECURITY_GROUP]->(group)
-            ON CREATE SET r.firstseen = timestamp()
-            SET r.lastupdated = {aws_update_tag}
-            """
-            for group in lb["SecurityGroups"]:
-                neo4j_session.run(
-                    ingest_load_balancer_v2_security_group,
-                    ID=load_balancer_id,
-                    GROUP_ID=str(group),
-                    aws_update_tag=aws_update_tag,
-                )
-
-        if lb['Listeners']:
-            load_load_balancer_v2_listeners(neo4j_session, load_balancer_id, lb['Listeners'], aws_update_tag)
-
-        if lb['TargetGroups']:
-            load_load_balancer_v2_target_groups(
-                neo4j_session, load_balancer_id, lb['TargetGroups'],
-                current_aws_account_id, aws_update_tag,
-            )
-
-        if lb['TargetGroups']:
-            load_load_balancer_v2_target_groups(
-                neo4j_session, load_balancer_id, lb['TargetGroups'],
-                current_aws_account_id, aws_update_tag,
-            )
+
+def transform_load_balancer_v2_subnets(load_balancer_id, az_data):
+    return [{'LoadBalancerId': load_balancer_id, 'SubnetId': az['SubnetId']} for az in az_data]
+
+
+def transform_load_balancer_v2_listeners(load_balancer_id, listener_data):
+    return [
+        {
+            'LoadBalancerId': load_balancer_id,
+            'ListenerArn': listener['ListenerArn'],
+            'Port': listener.get('Port'),
+            'Protocol': listener.get('Protocol'),
+            'TargetGroupArn': listener.get('TargetGroupArn'),
+        } for listener in listener_data
+    ]
+
+
+def transform_load_balancer_v2_targets(load_balancer_id, target_groups):
+    targets = []
+    for target_group in target_groups:
+
+        if not target_group['TargetType'] == 'instance':
+            # Only working on EC2 Instances now. TODO: Add IP & Lambda EXPOSE.
+            continue
+
+        for instance in target_group["Targets"]:
+            targets.append({'LoadBalancerId': load_balancer_id, 'InstanceId': instance})
+    return targets
 
 
 @timeit
 def load_load_balancer_v2_subnets(neo4j_session, load_balancer_id, az_data, region, aws_update_tag):
+    _load_load_balancer_v2_subnets(
+        neo4j_session, transform_load_balancer_v2_subnets(load_balancer_id, az_data), region, aws_update_tag,
+    )
+
+
+def _load_load_balancer_v2_subnets(neo4j_session, subnets, region, aws_update_tag):
     ingest_load_balancer_subnet = """
-    MATCH (elbv2:LoadBalancerV2{id: {ID}})
-    MERGE (subnet:EC2Subnet{subnetid: {SubnetId}})
+    UNWIND {Rows} AS row
+    MATCH (elbv2:LoadBalancerV2{id: row.LoadBalancerId})
+    MERGE (subnet:EC2Subnet{subnetid: row.SubnetId})
     ON CREATE SET subnet.firstseen = timestamp()
     SET subnet.region = {region}, subnet.lastupdated = {aws_update_tag}
     WITH elbv2, subnet
@@ -133,14 +165,30 @@ def load_load_balancer_v2_subnets(neo4j_session, load_balancer_id, az_data, regi
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {aws_update_tag}
     """
-    for az in az_data:
-        neo4j_session.run(
-            ingest_load_balancer_subnet,
-            ID=load_balancer_id,
-            SubnetId=az['SubnetId'],
-            region=region,
-            aws_update_tag=aws_update_tag,
-        )
+    load_batched(
+        neo4j_session,
+        ingest_load_balancer_subnet,
+        subnets,
+        region=region,
+        aws_update_tag=aws_update_tag,
+    )
+
+
+def _load_load_balancer_v2_security_groups(neo4j_session, security_groups, aws_update_tag):
+    ingest_load_balancer_v2_security_group = """
+    UNWIND {Rows} AS row
+    MATCH (elbv2:LoadBalancerV2{id: row.LoadBalancerId}),
+    (group:EC2SecurityGroup{groupid: row.GroupId})
+    MERGE (elbv2)-[r:MEMBER_OF_EC2_SECURITY_GROUP]->(group)
+    ON CREATE SET r.firstseen = timestamp()
+    SET r.lastupdated = {aws_update_tag}
+    """
+    load_batched(
+        neo4j_session,
+        ingest_load_balancer_v2_security_group,
+        security_groups,
+        aws_update_tag=aws_update_tag,
+    )
 
 
 @timeit
@@ -148,8 +196,16 @@ def load_load_balancer_v2_target_groups(
     neo4j_session, load_balancer_id, target_groups, current_aws_account_id,
     aws_update_tag,
 ):
+    _load_load_balancer_v2_targets(
+        neo4j_session, transform_load_balancer_v2_targets(load_balancer_id, target_groups),
+        current_aws_account_id, aws_update_tag,
+    )
+
+
+def _load_load_balancer_v2_targets(neo4j_session, targets, current_aws_account_id, aws_update_tag):
     ingest_instances = """
-    MATCH (elbv2:LoadBalancerV2{id: {ID}}), (instance:EC2Instance{instanceid: {INSTANCE_ID}})
+    UNWIND {Rows} AS row
+    MATCH (elbv2:LoadBalancerV2{id: row.LoadBalancerId}), (instance:EC2Instance{instanceid: row.InstanceId})
     MERGE (elbv2)-[r:EXPOSE]->(instance)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {aws_update_tag}
@@ -159,28 +215,26 @@ def load_load_balancer_v2_target_groups(
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {aws_update_tag}
     """
-    for target_group in target_groups:
-
-        if not target_group['TargetType'] == 'instance':
-            # Only working on EC2 Instances now. TODO: Add IP & Lambda EXPOSE.
-            continue
-
-        for instance in target_group["Targets"]:
-            neo4j_session.run(
-                ingest_instances,
-                ID=load_balancer_id,
-                INSTANCE_ID=instance,
-                AWS_ACCOUNT_ID=current_aws_account_id,
-                aws_update_tag=aws_update_tag,
-            )
+    load_batched(
+        neo4j_session,
+        ingest_instances,
+        targets,
+        AWS_ACCOUNT_ID=current_aws_account_id,
+        aws_update_tag=aws_update_tag,
+    )
 
 
 @timeit
 def load_load_balancer_v2_listeners(neo4j_session, load_balancer_id, listener_data, aws_update_tag):
+    _load_load_balancer_v2_listeners(
+        neo4j_session, transform_load_balancer_v2_listeners(load_balancer_id, listener_data), aws_update_tag,
+    )
+
+
+def _load_load_balancer_v2_listeners(neo4j_session, listeners, aws_update_tag):
     ingest_listener = """
-    MATCH (elbv2:LoadBalancerV2{id: {LoadBalancerId}})
-    WITH elbv2
-    UNWIND {Listeners} as data
+    UNWIND {Rows} as data
+        MATCH (elbv2:LoadBalancerV2{id: data.LoadBalancerId})
         MERGE (l:Endpoint:ELBV2Listener{id: data.ListenerArn})
         ON CREATE SET l.port = data.Port, l.protocol = data.Protocol,
         l.firstseen = timestamp(),
@@ -191,10 +245,10 @@ def load_load_balancer_v2_listeners(neo4j_session, load_balancer_id, listener_da
         ON CREATE SET r.firstseen = timestamp()
         SET r.lastupdated = {aws_update_tag}
     """
-    neo4j_session.run(
+    load_batched(
+        neo4j_session,
         ingest_listener,
-        LoadBalancerId=load_balancer_id,
-        Listeners=listener_data,
+        listeners,
         aws_update_tag=aws_update_tag,
     )
 
@@ -210,8 +264,12 @@ def sync_load_balancer_v2s(
     neo4j_session, boto3_session, regions, current_aws_account_id, aws_update_tag,
     common_job_parameters,
 ):
-    for region in regions:
-        logger.info("Syncing EC2 load balancers v2 for region '%s' in account '%s'.", region, current_aws_account_id)
-        data = get_loadbalancer_v2_data(boto3_session, region)
+    logger.info("Syncing EC2 load balancers v2 for %d regions in account '%s'.", len(regions), current_aws_account_id)
+
+    def load_page(region, data):
+        logger.debug("Loading %d EC2 load balancers v2 for region '%s'.", len(data), region)
         load_load_balancer_v2s(neo4j_session, data, region, current_aws_account_id, aws_update_tag)
+
+    workers = common_job_parameters.get('aws_elbv2_workers') or 1
+    aws_stream_regions(get_loadbalancer_v2_pages, boto3_session, regions, load_page, workers)
     cleanup_load_balancer_v2s(neo4j_session, common_job_parameters)
@@ -1,8 +1,11 @@
 import logging
 
 from .util import get_botocore_config
+from cartography.intel.aws.util import get_client
+from cartography.util import aws_fetch_regions
 from cartography.util import aws_handle_regions
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -11,7 +14,7 @@ logger = logging.getLogger(__name__)
 @timeit
 @aws_handle_regions
 def get_loadbalancer_data(boto3_session, region):
-    client = boto3_session.client('elb', region_name=region, config=get_botocore_config())
+    client = get_client(boto3_session, 'elb', region_name=region, config=get_botocore_config())
     paginator = client.get_paginator('describe_load_balancers')
     elbs = []
     for page in paginator.paginate():
@@ -37,7 +40,8 @@ def load_load_balancer_listeners(neo4j_session, load_balancer_id, listener_data,
         SET r.lastupdated = {aws_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_listener,
         LoadBalancerId=load_balancer_id,
         Listeners=listener_data,
@@ -55,7 +59,8 @@ def load_load_balancer_subnets(neo4j_session, load_balancer_id, subnets_data, aw
     """
 
     for subnet_id in subnets_data:
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             ingest_load_balancer_subnet,
             ID=load_balancer_id,
             SUBNET_ID=subnet_id,
@@ -109,7 +114,8 @@ def load_load_balancers(neo4j_session, data, region, current_aws_account_id, aws
     for lb in data:
         load_balancer_id = lb["DNSName"]
 
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             ingest_load_balancer,
             ID=load_balancer_id,
             CREATED_TIME=str(lb["CreatedTime"]),
@@ -128,7 +134,8 @@ def load_load_balancers(neo4j_session, data, region, current_aws_account_id, aws
 
         if lb["SecurityGroups"]:
             for group in lb["SecurityGroups"]:
-                neo4j_session.run(
+                run_write(
+                    neo4j_session,
                     ingest_load_balancer_security_group,
                     ID=load_balancer_id,
                     GROUP_ID=str(group),
@@ -137,7 +144,8 @@ def load_load_balancers(neo4j_session, data, region, current_aws_account_id, aws
 
         if lb["SourceSecurityGroup"]:
             source_group = lb["SourceSecurityGroup"]
-            neo4j_session.run(
+            run_write(
+                neo4j_session,
                 ingest_load_balancersource_security_group,
                 ID=load_balancer_id,
                 GROUP_NAME=source_group["GroupName"],
@@ -146,7 +154,8 @@ def load_load_balancers(neo4j_session, data, region, current_aws_account_id, aws
 
         if lb["Instances"]:
             for instance in lb["Instances"]:
-                neo4j_session.run(
+                run_write(
+                    neo4j_session,
                     ingest_instances,
                     ID=load_balancer_id,
                     INSTANCE_ID=instance["InstanceId"],
@@ -168,8 +177,7 @@ def sync_load_balancers(
     neo4j_session, boto3_session, regions, current_aws_account_id, aws_update_tag,
     common_job_parameters,
 ):
-    for region in regions:
+    for region, data in aws_fetch_regions(get_loadbalancer_data, boto3_session, regions):
         logger.info("Syncing EC2 load balancers for region '%s' in account '%s'.", region, current_aws_account_id)
-        data = get_loadbalancer_data(boto3_session, region)
         load_load_balancers(neo4j_session, data, region, current_aws_account_id, aws_update_tag)
     cleanup_load_balancers(neo4j_session, common_job_parameters)
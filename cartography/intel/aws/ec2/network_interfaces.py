@@ -2,8 +2,11 @@ import logging
 import re
 
 from .util import get_botocore_config
+from cartography.intel.aws.util import get_client
+from cartography.util import aws_fetch_regions
 from cartography.util import aws_handle_regions
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -12,7 +15,7 @@ logger = logging.getLogger(__name__)
 @timeit
 @aws_handle_regions
 def get_network_interface_data(boto3_session, region):
-    client = boto3_session.client('ec2', region_name=region, config=get_botocore_config())
+    client = get_client(boto3_session, 'ec2', region_name=region, config=get_botocore_config())
     paginator = client.get_paginator('describe_network_interfaces')
     subnets = []
     for page in paginator.paginate():
@@ -90,7 +93,8 @@ def load_network_interfaces(neo4j_session, data, region, aws_account_id, aws_upd
         ON CREATE SET r.firstseen = timestamp()
         SET r.lastupdated = {aws_update_tag}
     """
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_network_interfaces, network_interfaces=data, aws_update_tag=aws_update_tag,
         region=region, aws_account_id=aws_account_id,
     )
@@ -112,7 +116,8 @@ def load_network_interface_instance_relations(
         SET r.lastupdated = {aws_update_tag}
     """
     logger.debug("Attaching %d EC2 instances to network interfaces in %s.", len(instance_associations), region)
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_network_interface_instance_relations, instance_associations=instance_associations,
         aws_update_tag=aws_update_tag, region=region, aws_account_id=aws_account_id,
     )
@@ -132,7 +137,8 @@ def load_network_interface_elb_relations(neo4j_session, elb_associations, region
         SET r.lastupdated = {aws_update_tag}
     """
     logger.debug("Attaching %d ELBs to network interfaces in %s.", len(elb_associations), region)
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_network_interface_elb_relations, elb_associations=elb_associations,
         aws_update_tag=aws_update_tag, region=region, aws_account_id=aws_account_id,
     )
@@ -152,7 +158,8 @@ def load_network_interface_elbv2_relations(neo4j_session, elb_associations_v2, r
         SET r.lastupdated = {aws_update_tag}
     """
     logger.debug("Attaching %d ELB V2s to network interfaces in %s.", len(elb_associations_v2), region)
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_network_interface_elb2_relations, elb_associations=elb_associations_v2,
         aws_update_tag=aws_update_tag, region=region, aws_account_id=aws_account_id,
     )
@@ -171,7 +178,8 @@ def load_network_interface_instance_to_subnet_relations(neo4j_session, aws_updat
     SET r.lastupdated = {aws_update_tag}
     """
     logger.debug("-> Instance to subnet")
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_network_interface_instance_relations, aws_update_tag=aws_update_tag,
     )
 
@@ -189,7 +197,8 @@ def load_network_interface_load_balancer_relations(neo4j_session, aws_update_tag
     SET r.lastupdated = {aws_update_tag}
     """
     logger.debug("-> ELB to subnet")
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_network_interface_loadbalancer_relations, aws_update_tag=aws_update_tag,
     )
 
@@ -207,7 +216,8 @@ def load_network_interface_load_balancer_v2_relations(neo4j_session, aws_update_
     SET r.lastupdated = {aws_update_tag}
     """
     logger.debug("-> ELBv2 to subnet")
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_network_interface_loadbalancerv2_relations, aws_update_tag=aws_update_tag,
     )
 
@@ -259,8 +269,7 @@ def sync_network_interfaces(
     neo4j_session, boto3_session, regions, current_aws_account_id, aws_update_tag,
     common_job_parameters,
 ):
-    for region in regions:
+    for region, data in aws_fetch_regions(get_network_interface_data, boto3_session, regions):
         logger.info("Syncing EC2 network interfaces for region '%s' in account '%s'.", region, current_aws_account_id)
-        data = get_network_interface_data(boto3_session, region)
         load(neo4j_session, data, region, current_aws_account_id, aws_update_tag)
     cleanup_network_interfaces(neo4j_session, common_job_parameters)
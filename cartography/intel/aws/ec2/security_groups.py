@@ -2,8 +2,11 @@ import logging
 from string import Template
 
 from .util import get_botocore_config
+from cartography.intel.aws.util import get_client
+from cartography.util import aws_fetch_regions
 from cartography.util import aws_handle_regions
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -12,7 +15,7 @@ logger = logging.getLogger(__name__)
 @timeit
 @aws_handle_regions
 def get_ec2_security_group_data(boto3_session, region):
-    client = boto3_session.client('ec2', region_name=region, config=get_botocore_config())
+    client = get_client(boto3_session, 'ec2', region_name=region, config=get_botocore_config())
     paginator = client.get_paginator('describe_security_groups')
     security_groups = []
     for page in paginator.paginate():
@@ -68,7 +71,8 @@ def load_ec2_security_group_rule(neo4j_session, group, rule_type, aws_update_tag
             ruleid = f"{group_id}/{rule_type}/{from_port}{to_port}{protocol}"
             # NOTE Cypher query syntax is incompatible with Python string formatting, so we have to do this awkward
             # NOTE manual formatting instead.
-            neo4j_session.run(
+            run_write(
+                neo4j_session,
                 INGEST_RULE_TEMPLATE.safe_substitute(rule_label=rule_type_map[rule_type]),
                 RuleId=ruleid,
                 FromPort=from_port,
@@ -78,7 +82,8 @@ def load_ec2_security_group_rule(neo4j_session, group, rule_type, aws_update_tag
                 aws_update_tag=aws_update_tag,
             )
 
-            neo4j_session.run(
+            run_write(
+                neo4j_session,
                 ingest_rule_group_pair,
                 GroupId=group_id,
                 RuleId=ruleid,
@@ -87,7 +92,8 @@ def load_ec2_security_group_rule(neo4j_session, group, rule_type, aws_update_tag
 
             for ip_range in rule["IpRanges"]:
                 range_id = ip_range["CidrIp"]
-                neo4j_session.run(
+                run_write(
+                    neo4j_session,
                     ingest_range,
                     RangeId=range_id,
                     RuleId=ruleid,
@@ -116,7 +122,8 @@ def load_ec2_security_groupinfo(neo4j_session, data, region, current_aws_account
     for group in data:
         group_id = group["GroupId"]
 
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             ingest_security_group,
             GroupId=group_id,
             GroupName=group.get("GroupName"),
@@ -145,8 +152,7 @@ def sync_ec2_security_groupinfo(
         neo4j_session, boto3_session, regions, current_aws_account_id, aws_update_tag,
         common_job_parameters,
 ):
-    for region in regions:
+    for region, data in aws_fetch_regions(get_ec2_security_group_data, boto3_session, regions):
         logger.info("Syncing EC2 security groups for region '%s' in account '%s'.", region, current_aws_account_id)
-        data = get_ec2_security_group_data(boto3_session, region)
         load_ec2_security_groupinfo(neo4j_session, data, region, current_aws_account_id, aws_update_tag)
     cleanup_ec2_security_groupinfo(neo4j_session, common_job_parameters)
@@ -1,8 +1,11 @@
 import logging
 
 from .util import get_botocore_config
+from cartography.intel.aws.util import get_client
+from cartography.util import aws_fetch_regions
 from cartography.util import aws_handle_regions
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -11,7 +14,7 @@ logger = logging.getLogger(__name__)
 @timeit
 @aws_handle_regions
 def get_subnet_data(boto3_session, region):
-    client = boto3_session.client('ec2', region_name=region, config=get_botocore_config())
+    client = get_client(boto3_session, 'ec2', region_name=region, config=get_botocore_config())
     paginator = client.get_paginator('describe_subnets')
     subnets = []
     for page in paginator.paginate():
@@ -50,15 +53,18 @@ def load_subnets(neo4j_session, data, region, aws_account_id, aws_update_tag):
     SET r.lastupdated = {aws_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_subnets, subnets=data, aws_update_tag=aws_update_tag,
         region=region, aws_account_id=aws_account_id,
     )
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_subnet_vpc_relations, subnets=data, aws_update_tag=aws_update_tag,
         region=region, aws_account_id=aws_account_id,
     )
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_subnet_aws_account_relations, subnets=data, aws_update_tag=aws_update_tag,
         region=region, aws_account_id=aws_account_id,
     )
@@ -74,8 +80,7 @@ def sync_subnets(
     neo4j_session, boto3_session, regions, current_aws_account_id, aws_update_tag,
     common_job_parameters,
 ):
-    for region in regions:
+    for region, data in aws_fetch_regions(get_subnet_data, boto3_session, regions):
         logger.info("Syncing EC2 subnets for region '%s' in account '%s'.", region, current_aws_account_id)
-        data = get_subnet_data(boto3_session, region)
         load_subnets(neo4j_session, data, region, current_aws_account_id, aws_update_tag)
     cleanup_subnets(neo4j_session, common_job_parameters)
@@ -3,8 +3,11 @@ import logging
 import botocore.exceptions
 
 from .util import get_botocore_config
+from cartography.intel.aws.util import get_client
+from cartography.util import aws_fetch_regions
 from cartography.util import aws_handle_regions
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -13,7 +16,7 @@ logger = logging.getLogger(__name__)
 @timeit
 @aws_handle_regions
 def get_transit_gateways(boto3_session, region):
-    client = boto3_session.client('ec2', region_name=region, config=get_botocore_config())
+    client = get_client(boto3_session, 'ec2', region_name=region, config=get_botocore_config())
     data = []
     try:
         data = client.describe_transit_gateways()["TransitGateways"]
@@ -30,7 +33,7 @@ def get_transit_gateways(boto3_session, region):
 @timeit
 @aws_handle_regions
 def get_tgw_attachments(boto3_session, region):
-    client = boto3_session.client('ec2', region_name=region, config=get_botocore_config())
+    client = get_client(boto3_session, 'ec2', region_name=region, config=get_botocore_config())
     tgw_attachments = []
     try:
         paginator = client.get_paginator('describe_transit_gateway_attachments')
@@ -48,7 +51,7 @@ def get_tgw_attachments(boto3_session, region):
 @timeit
 @aws_handle_regions
 def get_tgw_vpc_attachments(boto3_session, region):
-    client = boto3_session.client('ec2', region_name=region, config=get_botocore_config())
+    client = get_client(boto3_session, 'ec2', region_name=region, config=get_botocore_config())
     tgw_vpc_attachments = []
     try:
         paginator = client.get_paginator('describe_transit_gateway_vpc_attachments')
@@ -63,6 +66,15 @@ def get_tgw_vpc_attachments(boto3_session, region):
     return tgw_vpc_attachments
 
 
+def get_transit_gateway_region_data(boto3_session, region):
+    """
+    Get the transit gateways of a region along with all of their attachments, including the VPC attachments.
+    """
+    tgws = get_transit_gateways(boto3_session, region)
+    tgw_attachments = get_tgw_attachments(boto3_session, region) + get_tgw_vpc_attachments(boto3_session, region)
+    return tgws, tgw_attachments
+
+
 @timeit
 def load_transit_gateways(neo4j_session, data, region, current_aws_account_id, aws_update_tag):
     ingest_transit_gateway = """
@@ -88,7 +100,8 @@ def load_transit_gateways(neo4j_session, data, region, current_aws_account_id, a
     for tgw in data:
         tgw_id = tgw["TransitGatewayId"]
 
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             ingest_transit_gateway,
             TgwId=tgw_id,
             ARN=tgw["TransitGatewayArn"],
@@ -119,7 +132,8 @@ def _attach_shared_transit_gateway(neo4j_session, tgw, region, current_aws_accou
     """
 
     if tgw["OwnerId"] != current_aws_account_id:
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             attach_tgw,
             ARN=tgw["TransitGatewayArn"],
             TransitGatewayId=tgw["TransitGatewayId"],
@@ -154,7 +168,8 @@ def load_tgw_attachments(neo4j_session, data, region, current_aws_account_id, aw
     for tgwa in data:
         tgwa_id = tgwa["TransitGatewayAttachmentId"]
 
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             ingest_transit_gateway,
             TgwAttachmentId=tgwa_id,
             TransitGatewayId=tgwa["TransitGatewayId"],
@@ -204,7 +219,8 @@ def _attach_tgw_vpc_attachment_to_vpc_subnets(
     SET p.lastupdated = {aws_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         attach_vpc_tgw_attachment_to_vpc,
         VpcId=tgw_vpc_attachment["VpcId"],
         TgwAttachmentId=tgw_vpc_attachment["TransitGatewayAttachmentId"],
@@ -212,7 +228,8 @@ def _attach_tgw_vpc_attachment_to_vpc_subnets(
     )
 
     for subnet_id in tgw_vpc_attachment["SubnetIds"]:
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             attach_vpc_tgw_attachment_to_subnet,
             SubnetId=subnet_id,
             TgwAttachmentId=tgw_vpc_attachment["TransitGatewayAttachmentId"],
@@ -230,19 +247,16 @@ def sync_transit_gateways(
     neo4j_session, boto3_session, regions, current_aws_account_id, aws_update_tag,
     common_job_parameters,
 ):
-    for region in regions:
+    for region, (tgws, tgw_attachments) in aws_fetch_regions(get_transit_gateway_region_data, boto3_session, regions):
         logger.info("Syncing AWS Transit Gateways for region '%s' in account '%s'.", region, current_aws_account_id)
-        tgws = get_transit_gateways(boto3_session, region)
         load_transit_gateways(neo4j_session, tgws, region, current_aws_account_id, aws_update_tag)
 
         logger.debug(
             "Syncing AWS Transit Gateway Attachments for region '%s' in account '%s'.",
             region, current_aws_account_id,
         )
-        tgw_attachments = get_tgw_attachments(boto3_session, region)
-        tgw_vpc_attachments = get_tgw_vpc_attachments(boto3_session, region)
         load_tgw_attachments(
-            neo4j_session, tgw_attachments + tgw_vpc_attachments,
+            neo4j_session, tgw_attachments,
             region, current_aws_account_id, aws_update_tag,
         )
     cleanup_transit_gateways(neo4j_session, common_job_parameters)
@@ -1,7 +1,10 @@
+from functools import lru_cache
+
 import botocore.config
 
 
-# TODO memoize this
+# Memoized so that clients created with it can be shared, see cartography.intel.aws.util.get_client
+@lru_cache(maxsize=None)
 def get_botocore_config():
     return botocore.config.Config(
         read_timeout=360,
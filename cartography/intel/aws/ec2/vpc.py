@@ -2,8 +2,11 @@ import logging
 from string import Template
 
 from .util import get_botocore_config
+from cartography.intel.aws.util import get_client
+from cartography.util import aws_fetch_regions
 from cartography.util import aws_handle_regions
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -12,7 +15,7 @@ logger = logging.getLogger(__name__)
 @timeit
 @aws_handle_regions
 def get_ec2_vpcs(boto3_session, region):
-    client = boto3_session.client('ec2', region_name=region, config=get_botocore_config())
+    client = get_client(boto3_session, 'ec2', region_name=region, config=get_botocore_config())
     return client.describe_vpcs()['Vpcs']
 
 
@@ -60,7 +63,8 @@ def load_cidr_association_set(neo4j_session, vpc_id, vpc_data, block_type, aws_u
     else:
         data = vpc_data.get("CidrBlockAssociationSet", [])
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_statement,
         VpcId=vpc_id,
         CidrBlock=data,
@@ -118,7 +122,8 @@ def load_ec2_vpcs(neo4j_session, data, region, current_aws_account_id, aws_updat
     for vpc in data:
         vpc_id = vpc["VpcId"]  # fail if not present
 
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             ingest_vpc,
             VpcId=vpc_id,
             InstanceTenancy=vpc.get("InstanceTenancy", None),
@@ -155,8 +160,7 @@ def cleanup_ec2_vpcs(neo4j_session, common_job_parameters):
 
 @timeit
 def sync_vpc(neo4j_session, boto3_session, regions, current_aws_account_id, aws_update_tag, common_job_parameters):
-    for region in regions:
+    for region, data in aws_fetch_regions(get_ec2_vpcs, boto3_session, regions):
         logger.info("Syncing EC2 VPC for region '%s' in account '%s'.", region, current_aws_account_id)
-        data = get_ec2_vpcs(boto3_session, region)
         load_ec2_vpcs(neo4j_session, data, region, current_aws_account_id, aws_update_tag)
     cleanup_ec2_vpcs(neo4j_session, common_job_parameters)
@@ -1,8 +1,11 @@
 import logging
 
 from .util import get_botocore_config
+from cartography.intel.aws.util import get_client
+from cartography.util import aws_fetch_regions
 from cartography.util import aws_handle_regions
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -11,7 +14,7 @@ logger = logging.getLogger(__name__)
 @timeit
 @aws_handle_regions
 def get_ec2_vpc_peering(boto3_session, region):
-    client = boto3_session.client('ec2', region_name=region, config=get_botocore_config())
+    client = get_client(boto3_session, 'ec2', region_name=region, config=get_botocore_config())
     return client.describe_vpc_peering_connections()['VpcPeeringConnections']
 
 
@@ -122,7 +125,8 @@ def load_ec2_vpc_peering(neo4j_session, data, aws_update_tag):
     """
     for peering in data:
         if peering["Status"]["Code"] == "active":
-            neo4j_session.run(
+            run_write(
+                neo4j_session,
                 ingest_peering,
                 AccepterVpcId=peering["AccepterVpcInfo"]["VpcId"],
                 AccepterCidrBlock=peering["AccepterVpcInfo"]["CidrBlock"],
@@ -138,7 +142,8 @@ def load_ec2_vpc_peering(neo4j_session, data, aws_update_tag):
 
             for accepter_block in peering["AccepterVpcInfo"].get("CidrBlockSet", []):
                 for requestor_block in peering["RequesterVpcInfo"].get("CidrBlockSet", []):
-                    neo4j_session.run(
+                    run_write(
+                        neo4j_session,
                         ingest_peering_block,
                         AccepterVpcId=peering["AccepterVpcInfo"]["VpcId"],
                         AccepterCidrBlock=accepter_block["CidrBlock"],
@@ -162,8 +167,7 @@ def sync_vpc_peering(
         neo4j_session, boto3_session, regions, current_aws_account_id, aws_update_tag,
         common_job_parameters,
 ):
-    for region in regions:
+    for region, data in aws_fetch_regions(get_ec2_vpc_peering, boto3_session, regions):
         logger.info("Syncing EC2 VPC peering for region '%s' in account '%s'.", region, current_aws_account_id)
-        data = get_ec2_vpc_peering(boto3_session, region)
         load_ec2_vpc_peering(neo4j_session, data, aws_update_tag)
     cleanup_ec2_vpc_peering(neo4j_session, common_job_parameters)
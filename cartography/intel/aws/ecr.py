@@ -1,19 +1,31 @@
+import hashlib
+import json
 import logging
+from functools import partial
 from typing import Dict
 from typing import List
 
+from botocore.exceptions import ClientError
+
+from cartography.intel.aws.util import get_client
+from cartography.intel.aws.util import map_concurrently
+from cartography.util import aws_fetch_regions
 from cartography.util import aws_handle_regions
+from cartography.util import load_batched
 from cartography.util import run_cleanup_job
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
 
+# The maximum number of image ids that describe_images accepts in one call.
+DESCRIBE_IMAGES_BATCH_SIZE = 100
+
 
 @timeit
 @aws_handle_regions
 def get_ecr_repositories(boto3_session, region) -> List[Dict]:
     logger.debug("Getting ECR repositories for region '%s'.", region)
-    client = boto3_session.client('ecr', region_name=region)
+    client = get_client(boto3_session, 'ecr', region_name=region)
     paginator = client.get_paginator('describe_repositories')
     ecr_repositories: List[Dict] = []
     for page in paginator.paginate():
@@ -25,7 +37,7 @@ def get_ecr_repositories(boto3_session, region) -> List[Dict]:
 @aws_handle_regions
 def get_ecr_repository_images(boto3_session, region, repository_name) -> List[Dict]:
     logger.debug("Getting ECR images in repository '%s' for region '%s'.", repository_name, region)
-    client = boto3_session.client('ecr', region_name=region)
+    client = get_client(boto3_session, 'ecr', region_name=region)
     paginator = client.get_paginator('list_images')
     ecr_repository_images: List[Dict] = []
     for page in paginator.paginate(repositoryName=repository_name):
@@ -33,13 +45,125 @@ def get_ecr_repository_images(boto3_session, region, repository_name) -> List[Di
     return ecr_repository_images
 
 
+def _describe_images_one_by_one(client, region, repository_name, batch) -> List[Dict]:
+    details: List[Dict] = []
+    for image_id in batch:
+        try:
+            details.extend(client.describe_images(repositoryName=repository_name, imageIds=[image_id])['imageDetails'])
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ImageNotFoundException':
+                raise
+            logger.warning(
+                "Failed to describe image '%s' of ECR repository '%s' in region '%s': %s",
+                image_id['imageDigest'], repository_name, region, e.response['Error']['Message'],
+            )
+    return details
+
+
+@timeit
+def get_ecr_image_details(boto3_session, region, repository_name, image_ids) -> Dict[str, Dict]:
+    """
+    Describe the images with the given ids in batches of DESCRIBE_IMAGES_BATCH_SIZE digests, and return the image
+    details keyed by image digest. Images that were deleted after they were listed are left out.
+    """
+    client = get_client(boto3_session, 'ecr', region_name=region)
+    digests = sorted({img['imageDigest'] for img in image_ids if img.get('imageDigest')})
+    details: Dict[str, Dict] = {}
+    for i in range(0, len(digests), DESCRIBE_IMAGES_BATCH_SIZE):
+        batch = [{'imageDigest': digest} for digest in digests[i:i + DESCRIBE_IMAGES_BATCH_SIZE]]
+        try:
+            batch_details = client.describe_images(repositoryName=repository_name, imageIds=batch)['imageDetails']
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ImageNotFoundException':
+                raise
+            # An image of the batch was deleted after it was listed, which fails the whole call, so describe the images
+            # of the batch one at a time to get the details of the others.
+            batch_details = _describe_images_one_by_one(client, region, repository_name, batch)
+        for detail in batch_details:
+            details[detail['imageDigest']] = detail
+    return details
+
+
+def get_image_count(image_ids) -> int:
+    """
+    Return the number of distinct tag and digest pairs of the given images that have a digest, which is the number of
+    ECRRepositoryImage to ECRImage links that load_ecr_repository_images creates for them.
+    """
+    return len({(img.get('imageTag'), img['imageDigest']) for img in image_ids if img.get('imageDigest')})
+
+
+def get_images_fingerprint(image_ids) -> str:
+    """
+    Return a hash of the digests and tags of the images of a repository, which does not depend on the order the images
+    are listed in. Pushing, retagging or deleting an image changes it.
+    """
+    images = sorted((img.get('imageDigest') or '', img.get('imageTag') or '') for img in image_ids)
+    return hashlib.sha256(json.dumps(images).encode('utf8')).hexdigest()
+
+
+def _get_repository_images(boto3_session, region, previous_fingerprints, repo):
+    image_ids = get_ecr_repository_images(boto3_session, region, repo['repositoryName'])
+    fingerprint = get_images_fingerprint(image_ids)
+    if previous_fingerprints.get(repo['repositoryArn']) == fingerprint:
+        return None, fingerprint, get_image_count(image_ids)
+
+    details = get_ecr_image_details(boto3_session, region, repo['repositoryName'], image_ids)
+    for img in image_ids:
+        detail = details.get(img.get('imageDigest'), {})
+        img['imagePushedAt'] = str(detail['imagePushedAt']) if 'imagePushedAt' in detail else None
+        img['imageSizeInBytes'] = detail.get('imageSizeInBytes')
+    return image_ids, fingerprint, get_image_count(image_ids)
+
+
+def get_ecr_region_data(boto3_session, region, workers=1, previous_fingerprints=None):
+    """
+    Get the ECR repositories of a region along with the images in each of them, keyed by repository URI. The images of
+    up to `workers` repositories are fetched at the same time.
+
+    Repositories whose image fingerprint equals the one in `previous_fingerprints`, keyed by repository ARN, are left
+    out of the image data. The fingerprint and image count of every repository are returned as a list of dicts.
+    """
+    repositories = get_ecr_repositories(boto3_session, region)
+    results = map_concurrently(
+        partial(_get_repository_images, boto3_session, region, previous_fingerprints or {}),
+        repositories,
+        workers,
+    )
+    image_data = {}
+    fingerprints = []
+    for repo, (images, fingerprint, image_count) in zip(repositories, results):
+        fingerprints.append({'RepositoryArn': repo['repositoryArn'], 'Fingerprint': fingerprint, 'Count': image_count})
+        if images is not None:
+            image_data[repo['repositoryUri']] = images
+    return repositories, image_data, fingerprints
+
+
+@timeit
+def get_ecr_fingerprints(neo4j_session, current_aws_account_id) -> Dict[str, str]:
+    """
+    Return the image fingerprints that were stored for the ECR repositories of the account, keyed by repository ARN.
+    Repositories whose images in the graph do not add up to the stored image count, e.g. because some of them were
+    deleted from the graph by hand, are left out so that their images are loaded again.
+    """
+    query = """
+    MATCH (:AWSAccount{id: {AWS_ACCOUNT_ID}})-[:RESOURCE]->(repo:ECRRepository)
+    WHERE EXISTS(repo.images_fingerprint)
+    OPTIONAL MATCH (repo)-[:REPO_IMAGE]->(:ECRRepositoryImage)-[:IMAGE]->(img:ECRImage)
+    WITH repo, count(img) AS image_count
+    WHERE image_count = repo.image_count
+    RETURN repo.id AS id, repo.images_fingerprint AS fingerprint
+    """
+    return {r['id']: r['fingerprint'] for r in neo4j_session.run(query, AWS_ACCOUNT_ID=current_aws_account_id)}
+
+
 @timeit
 def load_ecr_repositories(neo4j_session, data, region, current_aws_account_id, aws_update_tag):
     query = """
-    MERGE (repo:ECRRepository{id: {RepositoryArn}})
-    ON CREATE SET repo.firstseen = timestamp(), repo.arn = {RepositoryArn}, repo.name = {RepositoryName},
-        repo.region = {Region}, repo.created_at = {CreatedAt}
-    SET repo.lastupdated = {aws_update_tag}, repo.uri = {RepositoryUri}
+    UNWIND {Rows} AS row
+    MERGE (repo:ECRRepository{id: row.RepositoryArn})
+    ON CREATE SET repo.firstseen = timestamp(), repo.arn = row.RepositoryArn, repo.name = row.RepositoryName,
+        repo.region = {Region}, repo.created_at = row.CreatedAt
+    SET repo.lastupdated = {aws_update_tag}, repo.uri = row.RepositoryUri
     WITH repo
     MATCH (owner:AWSAccount{id: {AWS_ACCOUNT_ID}})
     MERGE (owner)-[r:RESOURCE]->(repo)
@@ -47,17 +171,22 @@ def load_ecr_repositories(neo4j_session, data, region, current_aws_account_id, a
     SET r.lastupdated = {aws_update_tag}
     """
     logger.debug("Loading ECR repositories for region '%s' into graph.", region)
-    for repo in data:
-        neo4j_session.run(
-            query,
-            RepositoryArn=repo['repositoryArn'],
-            RepositoryName=repo['repositoryName'],
-            RepositoryUri=repo['repositoryUri'],
-            CreatedAt=str(repo['createdAt']),
-            Region=region,
-            aws_update_tag=aws_update_tag,
-            AWS_ACCOUNT_ID=current_aws_account_id,
-        ).consume()  # See issue #440
+    rows = [
+        {
+            'RepositoryArn': repo['repositoryArn'],
+            'RepositoryName': repo['repositoryName'],
+            'RepositoryUri': repo['repositoryUri'],
+            'CreatedAt': str(repo['createdAt']),
+        } for repo in data
+    ]
+    load_batched(
+        neo4j_session,
+        query,
+        rows,
+        Region=region,
+        aws_update_tag=aws_update_tag,
+        AWS_ACCOUNT_ID=current_aws_account_id,
+    )
 
 
 @timeit
@@ -88,39 +217,91 @@ def transform_ecr_repository_images(repo_data):
 @timeit
 def load_ecr_repository_images(neo4j_session, repo_images_list, region, aws_update_tag):
     query = """
-    UNWIND {RepoList} as repo_item
-        UNWIND repo_item.repo_images as repo_img
-            MERGE (ri:ECRRepositoryImage{id: repo_item.repo_uri + COALESCE(":" + repo_img.imageTag, '')})
-            ON CREATE SET ri.firstseen = timestamp()
-            SET ri.lastupdated = {aws_update_tag},
-                ri.tag = repo_img.imageTag,
-                ri.uri = repo_item.repo_uri + COALESCE(":" + repo_img.imageTag, '')
-            WITH ri, repo_img, repo_item
-
-            MERGE (img:ECRImage{id: repo_img.imageDigest})
-            ON CREATE SET img.firstseen = timestamp(),
-                img.digest = repo_img.imageDigest
-            SET img.lastupdated = {aws_update_tag},
-                img.region = {Region}
-            WITH ri, img, repo_item
-
-            MERGE (ri)-[r1:IMAGE]->(img)
-            ON CREATE SET r1.firstseen = timestamp()
-            SET r1.lastupdated = {aws_update_tag}
-            WITH ri, repo_item
-
-            MATCH (repo:ECRRepository{uri: repo_item.repo_uri})
-            MERGE (repo)-[r2:REPO_IMAGE]->(ri)
-            ON CREATE SET r2.firstseen = timestamp()
-            SET r2.lastupdated = {aws_update_tag}
+    UNWIND {Rows} as repo_img
+        MERGE (ri:ECRRepositoryImage{id: repo_img.repo_uri + COALESCE(":" + repo_img.imageTag, '')})
+        ON CREATE SET ri.firstseen = timestamp()
+        SET ri.lastupdated = {aws_update_tag},
+            ri.tag = repo_img.imageTag,
+            ri.uri = repo_img.repo_uri + COALESCE(":" + repo_img.imageTag, '')
+        WITH ri, repo_img
+
+        MERGE (img:ECRImage{id: repo_img.imageDigest})
+        ON CREATE SET img.firstseen = timestamp(),
+            img.digest = repo_img.imageDigest
+        SET img.lastupdated = {aws_update_tag},
+            img.region = {Region},
+            img.image_pushed_at = repo_img.imagePushedAt,
+            img.image_size_bytes = repo_img.imageSizeInBytes
+        WITH ri, img, repo_img
+
+        MERGE (ri)-[r1:IMAGE]->(img)
+        ON CREATE SET r1.firstseen = timestamp()
+        SET r1.lastupdated = {aws_update_tag}
+        WITH ri, repo_img
+
+        MATCH (repo:ECRRepository{uri: repo_img.repo_uri})
+        MERGE (repo)-[r2:REPO_IMAGE]->(ri)
+        ON CREATE SET r2.firstseen = timestamp()
+        SET r2.lastupdated = {aws_update_tag}
     """
     logger.debug("Loading ECR repository images for region '%s' into graph.", region)
-    neo4j_session.run(
+    rows = [
+        {
+            'repo_uri': repo_item['repo_uri'],
+            'imageTag': img.get('imageTag'),
+            'imageDigest': img['imageDigest'],
+            'imagePushedAt': img.get('imagePushedAt'),
+            'imageSizeInBytes': img.get('imageSizeInBytes'),
+        }
+        for repo_item in repo_images_list
+        for img in repo_item['repo_images']
+    ]
+    load_batched(
+        neo4j_session,
         query,
-        RepoList=repo_images_list,
+        rows,
         aws_update_tag=aws_update_tag,
         Region=region,
-    ).consume()  # See issue #440
+    )
+
+
+@timeit
+def refresh_ecr_repository_images(neo4j_session, repository_arns, aws_update_tag):
+    """
+    Mark the images of the given repositories, whose images did not change, as seen in this sync so that the cleanup
+    job keeps them.
+    """
+    query = """
+    UNWIND {Rows} AS repo_arn
+    MATCH (:ECRRepository{id: repo_arn})-[r2:REPO_IMAGE]->(ri:ECRRepositoryImage)-[r1:IMAGE]->(img:ECRImage)
+    SET r2.lastupdated = {aws_update_tag}, ri.lastupdated = {aws_update_tag},
+        r1.lastupdated = {aws_update_tag}, img.lastupdated = {aws_update_tag}
+    """
+    load_batched(neo4j_session, query, repository_arns, aws_update_tag=aws_update_tag)
+
+
+@timeit
+def clear_ecr_fingerprints(neo4j_session, repository_arns):
+    """
+    Forget the image fingerprints of the given repositories before their images are loaded, so that a sync that fails
+    halfway does not leave a fingerprint that does not match the images in the graph.
+    """
+    query = """
+    UNWIND {Rows} AS repo_arn
+    MATCH (repo:ECRRepository{id: repo_arn})
+    REMOVE repo.images_fingerprint
+    """
+    load_batched(neo4j_session, query, repository_arns)
+
+
+@timeit
+def load_ecr_fingerprints(neo4j_session, fingerprints):
+    query = """
+    UNWIND {Rows} AS row
+    MATCH (repo:ECRRepository{id: row.RepositoryArn})
+    SET repo.images_fingerprint = row.Fingerprint, repo.image_count = row.Count
+    """
+    load_batched(neo4j_session, query, fingerprints)
 
 
 @timeit
@@ -131,14 +312,23 @@ def cleanup(neo4j_session, common_job_parameters):
 
 @timeit
 def sync(neo4j_session, boto3_session, regions, current_aws_account_id, aws_update_tag, common_job_parameters):
-    for region in regions:
+    workers = common_job_parameters.get('aws_ecr_workers') or 1
+    previous_fingerprints = {}
+    if common_job_parameters.get('aws_ecr_incremental'):
+        previous_fingerprints = get_ecr_fingerprints(neo4j_session, current_aws_account_id)
+    region_data = aws_fetch_regions(get_ecr_region_data, boto3_session, regions, workers, previous_fingerprints)
+    for region, (repositories, image_data, fingerprints) in region_data:
         logger.info("Syncing ECR for region '%s' in account '%s'.", region, current_aws_account_id)
-        image_data = {}
-        repositories = get_ecr_repositories(boto3_session, region)
-        for repo in repositories:
-            repo_image_obj = get_ecr_repository_images(boto3_session, region, repo['repositoryName'])
-            image_data[repo['repositoryUri']] = repo_image_obj
         load_ecr_repositories(neo4j_session, repositories, region, current_aws_account_id, aws_update_tag)
+        unchanged = [repo['repositoryArn'] for repo in repositories if repo['repositoryUri'] not in image_data]
+        if unchanged:
+            logger.info("Skipping %d ECR repositories whose images did not change.", len(unchanged))
+            refresh_ecr_repository_images(neo4j_session, unchanged, aws_update_tag)
+        clear_ecr_fingerprints(
+            neo4j_session,
+            [repo['repositoryArn'] for repo in repositories if repo['repositoryUri'] in image_data],
+        )
         repo_images_list = transform_ecr_repository_images(image_data)
         load_ecr_repository_images(neo4j_session, repo_images_list, region, aws_update_tag)
+        load_ecr_fingerprints(neo4j_session, fingerprints)
     cleanup(neo4j_session, common_job_parameters)
@@ -1,6 +1,9 @@
 import logging
 
+from cartography.intel.aws.util import get_client
+from cartography.util import aws_fetch_regions
 from cartography.util import aws_handle_regions
+from cartography.util import load_batched
 from cartography.util import run_cleanup_job
 from cartography.util import timeit
 
@@ -10,7 +13,7 @@ logger = logging.getLogger(__name__)
 @timeit
 @aws_handle_regions
 def get_eks_clusters(boto3_session, region):
-    client = boto3_session.client('eks', region_name=region)
+    client = get_client(boto3_session, 'eks', region_name=region)
     clusters = []
     paginator = client.get_paginator('list_clusters')
     for page in paginator.paginate():
@@ -20,28 +23,39 @@ def get_eks_clusters(boto3_session, region):
 
 @timeit
 def get_eks_describe_cluster(boto3_session, region, cluster_name):
-    client = boto3_session.client('eks', region_name=region)
+    client = get_client(boto3_session, 'eks', region_name=region)
     response = client.describe_cluster(name=cluster_name)
     return response['cluster']
 
 
+def get_eks_region_data(boto3_session, region):
+    """
+    Get the description of every EKS cluster in a region, keyed by cluster name.
+    """
+    cluster_data = {}
+    for cluster_name in get_eks_clusters(boto3_session, region):
+        cluster_data[cluster_name] = get_eks_describe_cluster(boto3_session, region, cluster_name)
+    return cluster_data
+
+
 @timeit
 def load_eks_clusters(neo4j_session, cluster_data, region, current_aws_account_id, aws_update_tag):
     query = """
-    MERGE (cluster:EKSCluster{id: {ClusterArn}})
+    UNWIND {Rows} AS row
+    MERGE (cluster:EKSCluster{id: row.ClusterArn})
     ON CREATE SET cluster.firstseen = timestamp(),
-                cluster.arn = {ClusterArn},
-                cluster.name = {ClusterName},
+                cluster.arn = row.ClusterArn,
+                cluster.name = row.ClusterName,
                 cluster.region = {Region},
-                cluster.created_at = {CreatedAt}
+                cluster.created_at = row.CreatedAt
     SET cluster.lastupdated = {aws_update_tag},
-        cluster.endpoint = {ClusterEndpoint},
-        cluster.endpoint_public_access = {ClusterEndointPublic},
-        cluster.rolearn = {ClusterRoleArn},
-        cluster.version = {ClusterVersion},
-        cluster.platform_version = {ClusterPlatformVersion},
-        cluster.status = {ClusterStatus},
-        cluster.audit_logging = {ClusterLogging}
+        cluster.endpoint = row.ClusterEndpoint,
+        cluster.endpoint_public_access = row.ClusterEndointPublic,
+        cluster.rolearn = row.ClusterRoleArn,
+        cluster.version = row.ClusterVersion,
+        cluster.platform_version = row.ClusterPlatformVersion,
+        cluster.status = row.ClusterStatus,
+        cluster.audit_logging = row.ClusterLogging
     WITH cluster
     MATCH (owner:AWSAccount{id: {AWS_ACCOUNT_ID}})
     MERGE (owner)-[r:RESOURCE]->(cluster)
@@ -49,24 +63,28 @@ def load_eks_clusters(neo4j_session, cluster_data, region, current_aws_account_i
     SET r.lastupdated = {aws_update_tag}
     """
 
-    for cd in cluster_data:
-        cluster = cluster_data[cd]
-        neo4j_session.run(
-            query,
-            ClusterArn=cluster['arn'],
-            ClusterName=cluster['name'],
-            ClusterEndpoint=cluster.get('endpoint'),
-            ClusterEndointPublic=cluster.get('resourcesVpcConfig', {}).get('endpointPublicAccess'),
-            ClusterRoleArn=cluster.get('roleArn'),
-            ClusterVersion=cluster.get('version'),
-            ClusterPlatformVersion=cluster.get('platformVersion'),
-            ClusterStatus=cluster.get('status'),
-            CreatedAt=str(cluster.get('createdAt')),
-            ClusterLogging=_process_logging(cluster),
-            Region=region,
-            aws_update_tag=aws_update_tag,
-            AWS_ACCOUNT_ID=current_aws_account_id,
-        )
+    rows = [
+        {
+            'ClusterArn': cluster['arn'],
+            'ClusterName': cluster['name'],
+            'ClusterEndpoint': cluster.get('endpoint'),
+            'ClusterEndointPublic': cluster.get('resourcesVpcConfig', {}).get('endpointPublicAccess'),
+            'ClusterRoleArn': cluster.get('roleArn'),
+            'ClusterVersion': cluster.get('version'),
+            'ClusterPlatformVersion': cluster.get('platformVersion'),
+            'ClusterStatus': cluster.get('status'),
+            'CreatedAt': str(cluster.get('createdAt')),
+            'ClusterLogging': _process_logging(cluster),
+        } for cluster in cluster_data.values()
+    ]
+    load_batched(
+        neo4j_session,
+        query,
+        rows,
+        Region=region,
+        aws_update_tag=aws_update_tag,
+        AWS_ACCOUNT_ID=current_aws_account_id,
+    )
 
 
 def _process_logging(cluster):
@@ -88,15 +106,8 @@ def cleanup(neo4j_session, common_job_parameters):
 
 @timeit
 def sync(neo4j_session, boto3_session, regions, current_aws_account_id, aws_update_tag, common_job_parameters):
-    for region in regions:
+    for region, cluster_data in aws_fetch_regions(get_eks_region_data, boto3_session, regions):
         logger.info("Syncing EKS for region '%s' in account '%s'.", region, current_aws_account_id)
-
-        clusters = get_eks_clusters(boto3_session, region)
-
-        cluster_data = {}
-        for cluster_name in clusters:
-            cluster_data[cluster_name] = get_eks_describe_cluster(boto3_session, region, cluster_name)
-
         load_eks_clusters(neo4j_session, cluster_data, region, current_aws_account_id, aws_update_tag)
 
     cleanup(neo4j_session, common_job_parameters)
@@ -1,12 +1,15 @@
 import json
 import logging
+from functools import lru_cache
 
 import botocore.config
 from policyuniverse.policy import Policy
 
+from cartography.intel.aws.util import get_client
 from cartography.intel.dns import ingest_dns_record_by_fqdn
 from cartography.util import aws_handle_regions
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -33,7 +36,8 @@ es_regions = [
 ]
 
 
-# TODO memoize this
+# Memoized so that clients created with it can be shared, see cartography.intel.aws.util.get_client
+@lru_cache(maxsize=None)
 def _get_botocore_config():
     return botocore.config.Config(
         retries={
@@ -103,7 +107,8 @@ def _load_es_domains(neo4j_session, domain_list, aws_account_id, aws_update_tag)
     for d in domain_list:
         del d['ServiceSoftwareOptions']
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_records,
         Records=domain_list,
         AWS_ACCOUNT_ID=aws_account_id,
@@ -173,7 +178,8 @@ def _link_es_domain_vpc(neo4j_session, domain_id, domain_data, aws_update_tag):
         groupList = vpc_data.get("SecurityGroupIds", [])
 
         if len(subnetList) > 0:
-            neo4j_session.run(
+            run_write(
+                neo4j_session,
                 ingest_subnet,
                 DomainId=domain_id,
                 SubnetList=subnetList,
@@ -181,7 +187,8 @@ def _link_es_domain_vpc(neo4j_session, domain_id, domain_data, aws_update_tag):
             )
 
         if len(groupList) > 0:
-            neo4j_session.run(
+            run_write(
+                neo4j_session,
                 ingest_sec_groups,
                 DomainId=domain_id,
                 SecGroupList=groupList,
@@ -208,7 +215,7 @@ def _process_access_policy(neo4j_session, domain_id, domain_data):
         if policy.is_internet_accessible():
             exposed_internet = True
 
-    neo4j_session.run(tag_es, DomainId=domain_id, InternetExposed=exposed_internet)
+    run_write(neo4j_session, tag_es, DomainId=domain_id, InternetExposed=exposed_internet)
 
 
 @timeit
@@ -224,7 +231,7 @@ def cleanup(neo4j_session, update_tag, aws_account_id):
 def sync(neo4j_session, boto3_session, aws_account_id, update_tag):
     for region in es_regions:
         logger.info("Syncing Elasticsearch Service for region '%s' in account '%s'.", region, aws_account_id)
-        client = boto3_session.client('es', region_name=region, config=_get_botocore_config())
+        client = get_client(boto3_session, 'es', region_name=region, config=_get_botocore_config())
         data = _get_es_domains(client)
         _load_es_domains(neo4j_session, data, aws_account_id, update_tag)
 
@@ -1,13 +1,27 @@
+import copy
 import enum
+import hashlib
 import json
 import logging
+import os
+import tempfile
+import threading
 
+from cartography.intel.aws.ec2.util import get_botocore_config
+from cartography.intel.aws.permission_relationships import CompiledPolicyEvaluator
 from cartography.intel.aws.permission_relationships import parse_statement_node
-from cartography.intel.aws.permission_relationships import principal_allowed_on_resource
+from cartography.intel.aws.util import get_client
+from cartography.intel.aws.util import get_resource
+from cartography.pipeline import run_pipeline
+from cartography.util import load_batched
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 logger = logging.getLogger(__name__)
 
+# The number of principals whose policies are fetched from AWS before they are loaded into Neo4j.
+POLICY_FETCH_CHUNK_SIZE = 50
+
 # Overview of IAM in AWS
 # https://aws.amazon.com/iam/
 
@@ -17,9 +31,85 @@ class PolicyType(enum.Enum):
     inline = 'inline'
 
 
+class PolicyDocumentCache:
+    """
+    A cache of managed policy statements keyed by policy ARN, policy id and default version id, so that a managed
+    policy that is attached to many principals is only downloaded once. AWS managed policies
+    (`arn:aws:iam::aws:policy/...`) are the same in every account, so they are only downloaded once per sync run.
+
+    Policy versions never change once created, so the statements can also be kept on disk and reused by later runs.
+    Only the default version id of each policy is looked up again in every run. The policy id is part of the key
+    because a customer managed policy that is deleted and created again keeps its ARN and starts over at version v1.
+
+    :type directory: string
+    :param directory: A directory to persist the policy statements in between runs. Optional.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._versions = {}
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    def get_statements(self, policy):
+        """
+        Return the statements of the default version of the given managed policy.
+        :param policy: A boto3 IAM Policy resource, e.g. from `attached_policies.all()`
+        :return: A copy of the policy statements that the caller may modify.
+        """
+        arn = policy.arn
+        with self._lock:
+            version = self._versions.get(arn)
+        if version is None:
+            version = (policy.policy_id, policy.default_version_id)
+            with self._lock:
+                self._versions[arn] = version
+
+        key = (arn,) + version
+        with self._lock:
+            statements = self._statements.get(key)
+        if statements is None:
+            statements = self._read(key)
+            if statements is None:
+                response = policy.meta.client.get_policy_version(PolicyArn=arn, VersionId=version[1])
+                statements = response['PolicyVersion']['Document']['Statement']
+                self._write(key, statements)
+            with self._lock:
+                self._statements[key] = statements
+        # transform_policy_data adds principal specific ids to the statements, so every caller gets its own copy.
+        return copy.deepcopy(statements)
+
+    def _path(self, key):
+        arn, policy_id, version_id = key
+        arn_digest = hashlib.sha256(arn.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{arn_digest}-{policy_id}-{version_id}.json")
+
+    def _read(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key, statements):
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(statements, f)
+        os.replace(tmp_path, self._path(key))
+
+
+# The managed policy cache of the current sync run. Replaced at the start of every AWS sync by start_aws_ingestion.
+policy_document_cache = PolicyDocumentCache()
+
+
 @timeit
 def get_group_policies(boto3_session, group_name):
-    client = boto3_session.client('iam')
+    client = get_client(boto3_session, 'iam', config=get_botocore_config())
     paginator = client.get_paginator('list_group_policies')
     policy_names = []
     for page in paginator.paginate(GroupName=group_name):
@@ -29,13 +119,13 @@ def get_group_policies(boto3_session, group_name):
 
 @timeit
 def get_group_policy_info(boto3_session, group_name, policy_name):
-    client = boto3_session.client('iam')
+    client = get_client(boto3_session, 'iam', config=get_botocore_config())
     return client.get_group_policy(GroupName=group_name, PolicyName=policy_name)
 
 
 @timeit
 def get_group_membership_data(boto3_session, group_name):
-    client = boto3_session.client('iam')
+    client = get_client(boto3_session, 'iam', config=get_botocore_config())
     try:
         memberships = client.get_group(GroupName=group_name)
         return memberships
@@ -47,7 +137,7 @@ def get_group_membership_data(boto3_session, group_name):
 
 @timeit
 def get_group_policy_data(boto3_session, group_list):
-    resource_client = boto3_session.resource('iam')
+    resource_client = get_resource(boto3_session, 'iam', config=get_botocore_config())
     policies = {}
     for group in group_list:
         name = group["GroupName"]
@@ -59,14 +149,14 @@ def get_group_policy_data(boto3_session, group_list):
 
 @timeit
 def get_group_managed_policy_data(boto3_session, group_list):
-    resource_client = boto3_session.resource('iam')
+    resource_client = get_resource(boto3_session, 'iam', config=get_botocore_config())
     policies = {}
     for group in group_list:
         name = group["GroupName"]
         arn = group["Arn"]
         resource_group = resource_client.Group(name)
         policies[arn] = {
-            p.policy_name: p.default_version.document["Statement"]
+            p.policy_name: policy_document_cache.get_statements(p)
             for p in resource_group.attached_policies.all()
         }
     return policies
@@ -74,7 +164,7 @@ def get_group_managed_policy_data(boto3_session, group_list):
 
 @timeit
 def get_user_policy_data(boto3_session, user_list):
-    resource_client = boto3_session.resource('iam')
+    resource_client = get_resource(boto3_session, 'iam', config=get_botocore_config())
     policies = {}
     for user in user_list:
         name = user["UserName"]
@@ -91,7 +181,7 @@ def get_user_policy_data(boto3_session, user_list):
 
 @timeit
 def get_user_managed_policy_data(boto3_session, user_list):
-    resource_client = boto3_session.resource('iam')
+    resource_client = get_resource(boto3_session, 'iam', config=get_botocore_config())
     policies = {}
     for user in user_list:
         name = user["UserName"]
@@ -99,7 +189,7 @@ def get_user_managed_policy_data(boto3_session, user_list):
         resource_user = resource_client.User(name)
         try:
             policies[arn] = {
-                p.policy_name: p.default_version.document["Statement"]
+                p.policy_name: policy_document_cache.get_statements(p)
                 for p in resource_user.attached_policies.all()
             }
         except resource_client.meta.client.exceptions.NoSuchEntityException:
@@ -111,7 +201,7 @@ def get_user_managed_policy_data(boto3_session, user_list):
 
 @timeit
 def get_role_policy_data(boto3_session, role_list):
-    resource_client = boto3_session.resource('iam')
+    resource_client = get_resource(boto3_session, 'iam', config=get_botocore_config())
     policies = {}
     for role in role_list:
         name = role["RoleName"]
@@ -128,7 +218,7 @@ def get_role_policy_data(boto3_session, role_list):
 
 @timeit
 def get_role_managed_policy_data(boto3_session, role_list):
-    resource_client = boto3_session.resource('iam')
+    resource_client = get_resource(boto3_session, 'iam', config=get_botocore_config())
     policies = {}
     for role in role_list:
         name = role["RoleName"]
@@ -136,7 +226,7 @@ def get_role_managed_policy_data(boto3_session, role_list):
         resource_role = resource_client.Role(name)
         try:
             policies[arn] = {
-                p.policy_name: p.default_version.document["Statement"]
+                p.policy_name: policy_document_cache.get_statements(p)
                 for p in resource_role.attached_policies.all()
             }
         except resource_client.meta.client.exceptions.NoSuchEntityException:
@@ -148,7 +238,7 @@ def get_role_managed_policy_data(boto3_session, role_list):
 
 @timeit
 def get_user_list_data(boto3_session):
-    client = boto3_session.client('iam')
+    client = get_client(boto3_session, 'iam', config=get_botocore_config())
 
     paginator = client.get_paginator('list_users')
     users = []
@@ -159,7 +249,7 @@ def get_user_list_data(boto3_session):
 
 @timeit
 def get_group_list_data(boto3_session):
-    client = boto3_session.client('iam')
+    client = get_client(boto3_session, 'iam', config=get_botocore_config())
     paginator = client.get_paginator('list_groups')
     groups = []
     for page in paginator.paginate():
@@ -169,7 +259,7 @@ def get_group_list_data(boto3_session):
 
 @timeit
 def get_role_list_data(boto3_session):
-    client = boto3_session.client('iam')
+    client = get_client(boto3_session, 'iam', config=get_botocore_config())
     paginator = client.get_paginator('list_roles')
     roles = []
     for page in paginator.paginate():
@@ -179,7 +269,7 @@ def get_role_list_data(boto3_session):
 
 @timeit
 def get_account_access_key_data(boto3_session, username):
-    client = boto3_session.client('iam')
+    client = get_client(boto3_session, 'iam', config=get_botocore_config())
     # NOTE we can get away without using a paginator here because users are limited to two access keys
     access_keys = {}
     try:
@@ -191,13 +281,86 @@ def get_account_access_key_data(boto3_session, username):
     return access_keys
 
 
+@timeit
+def get_account_authorization_details(boto3_session):
+    """
+    Fetch the users, groups and roles of the account together with their inline policies, attached managed policies
+    and group memberships, and all managed policies that are attached to them, in a few paginated bulk calls.
+    """
+    client = get_client(boto3_session, 'iam', config=get_botocore_config())
+    paginator = client.get_paginator('get_account_authorization_details')
+    details = {'UserDetailList': [], 'GroupDetailList': [], 'RoleDetailList': [], 'Policies': []}
+    for page in paginator.paginate(Filter=['User', 'Group', 'Role', 'LocalManagedPolicy', 'AWSManagedPolicy']):
+        for key in details:
+            details[key].extend(page.get(key, []))
+    return details
+
+
+def _get_default_policy_statements(policy):
+    for version in policy.get('PolicyVersionList', []):
+        if version['IsDefaultVersion']:
+            return version['Document']['Statement']
+    return None
+
+
+def transform_authorization_details_policies(details, detail_list_key, inline_policy_list_key):
+    """
+    Build the inline and managed policy maps of one kind of principal from the output of
+    get_account_authorization_details, in the same format as e.g. get_role_policy_data and
+    get_role_managed_policy_data return them.
+    :param details: The output of get_account_authorization_details
+    :param detail_list_key: The principal list to read, e.g. `RoleDetailList`
+    :param inline_policy_list_key: The key of the principals' inline policies, e.g. `RolePolicyList`
+    :return: A tuple of the inline and the managed policies, both dicts of principal ARNs to dicts of policy names to
+    policy statements
+    """
+    managed_statements = {policy['Arn']: _get_default_policy_statements(policy) for policy in details['Policies']}
+    inline_policies = {}
+    managed_policies = {}
+    for principal in details[detail_list_key]:
+        arn = principal['Arn']
+        inline_policies[arn] = {
+            policy['PolicyName']: policy['PolicyDocument']['Statement']
+            for policy in principal.get(inline_policy_list_key, [])
+        }
+        managed_policies[arn] = {}
+        for policy in principal.get('AttachedManagedPolicies', []):
+            statements = managed_statements.get(policy['PolicyArn'])
+            if statements is None:
+                logger.warning(
+                    "Could not find the default version of managed policy %s attached to %s; skipping.",
+                    policy['PolicyArn'],
+                    arn,
+                )
+                continue
+            # transform_policy_data adds principal specific ids to the statements, so every principal gets its own copy.
+            managed_policies[arn][policy['PolicyName']] = copy.deepcopy(statements)
+    return inline_policies, managed_policies
+
+
+def transform_authorization_details_group_memberships(details):
+    """
+    Build the group memberships from the output of get_account_authorization_details, in the same format as
+    sync_group_memberships builds them from get_group_membership_data.
+    :return: A dict of group ARNs to dicts with the `Users` that are members of the group
+    """
+    group_arns = {group['GroupName']: group['Arn'] for group in details['GroupDetailList']}
+    memberships = {arn: {'Users': []} for arn in group_arns.values()}
+    for user in details['UserDetailList']:
+        for group_name in user.get('GroupList', []):
+            if group_name in group_arns:
+                memberships[group_arns[group_name]]['Users'].append({'Arn': user['Arn']})
+    return memberships
+
+
 @timeit
 def load_users(neo4j_session, users, current_aws_account_id, aws_update_tag):
     ingest_user = """
-    MERGE (unode:AWSUser{arn: {ARN}})
-    ON CREATE SET unode:AWSPrincipal, unode.userid = {USERID}, unode.firstseen = timestamp(),
-    unode.createdate = {CREATE_DATE}
-    SET unode.name = {USERNAME}, unode.path = {PATH}, unode.passwordlastused = {PASSWORD_LASTUSED},
+    UNWIND {Rows} AS row
+    MERGE (unode:AWSUser{arn: row.ARN})
+    ON CREATE SET unode:AWSPrincipal, unode.userid = row.USERID, unode.firstseen = timestamp(),
+    unode.createdate = row.CREATE_DATE
+    SET unode.name = row.USERNAME, unode.path = row.PATH, unode.passwordlastused = row.PASSWORD_LASTUSED,
     unode.lastupdated = {aws_update_tag}
     WITH unode
     MATCH (aa:AWSAccount{id: {AWS_ACCOUNT_ID}})
@@ -206,26 +369,32 @@ def load_users(neo4j_session, users, current_aws_account_id, aws_update_tag):
     SET r.lastupdated = {aws_update_tag}
     """
 
-    for user in users:
-        neo4j_session.run(
-            ingest_user,
-            ARN=user["Arn"],
-            USERID=user["UserId"],
-            CREATE_DATE=str(user["CreateDate"]),
-            USERNAME=user["UserName"],
-            PATH=user["Path"],
-            PASSWORD_LASTUSED=str(user.get("PasswordLastUsed", "")),
-            AWS_ACCOUNT_ID=current_aws_account_id,
-            aws_update_tag=aws_update_tag,
-        )
+    rows = [
+        {
+            'ARN': user["Arn"],
+            'USERID': user["UserId"],
+            'CREATE_DATE': str(user["CreateDate"]),
+            'USERNAME': user["UserName"],
+            'PATH': user["Path"],
+            'PASSWORD_LASTUSED': str(user.get("PasswordLastUsed", "")),
+        } for user in users
+    ]
+    load_batched(
+        neo4j_session,
+        ingest_user,
+        rows,
+        AWS_ACCOUNT_ID=current_aws_account_id,
+        aws_update_tag=aws_update_tag,
+    )
 
 
 @timeit
 def load_groups(neo4j_session, groups, current_aws_account_id, aws_update_tag):
     ingest_group = """
-    MERGE (gnode:AWSGroup{arn: {ARN}})
-    ON CREATE SET gnode.groupid = {GROUP_ID}, gnode.firstseen = timestamp(), gnode.createdate = {CREATE_DATE}
-    SET gnode:AWSPrincipal, gnode.name = {GROUP_NAME}, gnode.path = {PATH},gnode.lastupdated = {aws_update_tag}
+    UNWIND {Rows} AS row
+    MERGE (gnode:AWSGroup{arn: row.ARN})
+    ON CREATE SET gnode.groupid = row.GROUP_ID, gnode.firstseen = timestamp(), gnode.createdate = row.CREATE_DATE
+    SET gnode:AWSPrincipal, gnode.name = row.GROUP_NAME, gnode.path = row.PATH,gnode.lastupdated = {aws_update_tag}
     WITH gnode
     MATCH (aa:AWSAccount{id: {AWS_ACCOUNT_ID}})
     MERGE (aa)-[r:RESOURCE]->(gnode)
@@ -233,17 +402,22 @@ def load_groups(neo4j_session, groups, current_aws_account_id, aws_update_tag):
     SET r.lastupdated = {aws_update_tag}
     """
 
-    for group in groups:
-        neo4j_session.run(
-            ingest_group,
-            ARN=group["Arn"],
-            GROUP_ID=group["GroupId"],
-            CREATE_DATE=str(group["CreateDate"]),
-            GROUP_NAME=group["GroupName"],
-            PATH=group["Path"],
-            AWS_ACCOUNT_ID=current_aws_account_id,
-            aws_update_tag=aws_update_tag,
-        )
+    rows = [
+        {
+            'ARN': group["Arn"],
+            'GROUP_ID': group["GroupId"],
+            'CREATE_DATE': str(group["CreateDate"]),
+            'GROUP_NAME': group["GroupName"],
+            'PATH': group["Path"],
+        } for group in groups
+    ]
+    load_batched(
+        neo4j_session,
+        ingest_group,
+        rows,
+        AWS_ACCOUNT_ID=current_aws_account_id,
+        aws_update_tag=aws_update_tag,
+    )
 
 
 def _parse_principal_entries(principal):
@@ -264,10 +438,11 @@ def _parse_principal_entries(principal):
 @timeit
 def load_roles(neo4j_session, roles, current_aws_account_id, aws_update_tag):
     ingest_role = """
-    MERGE (rnode:AWSRole{arn: {Arn}})
-    ON CREATE SET rnode:AWSPrincipal, rnode.roleid = {RoleId}, rnode.firstseen = timestamp(),
-    rnode.createdate = {CreateDate}
-    ON MATCH SET rnode.name = {RoleName}, rnode.path = {Path}
+    UNWIND {Rows} AS row
+    MERGE (rnode:AWSRole{arn: row.Arn})
+    ON CREATE SET rnode:AWSPrincipal, rnode.roleid = row.RoleId, rnode.firstseen = timestamp(),
+    rnode.createdate = row.CreateDate
+    ON MATCH SET rnode.name = row.RoleName, rnode.path = row.Path
     SET rnode.lastupdated = {aws_update_tag}
     WITH rnode
     MATCH (aa:AWSAccount{id: {AWS_ACCOUNT_ID}})
@@ -277,11 +452,12 @@ def load_roles(neo4j_session, roles, current_aws_account_id, aws_update_tag):
     """
 
     ingest_policy_statement = """
-    MERGE (spnnode:AWSPrincipal{arn: {SpnArn}})
+    UNWIND {Rows} AS row
+    MERGE (spnnode:AWSPrincipal{arn: row.SpnArn})
     ON CREATE SET spnnode.firstseen = timestamp()
-    SET spnnode.lastupdated = {aws_update_tag}, spnnode.type = {SpnType}
-    WITH spnnode
-    MATCH (role:AWSRole{arn: {RoleArn}})
+    SET spnnode.lastupdated = {aws_update_tag}, spnnode.type = row.SpnType
+    WITH spnnode, row
+    MATCH (role:AWSRole{arn: row.RoleArn})
     MERGE (role)-[r:TRUSTS_AWS_PRINCIPAL]->(spnnode)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {aws_update_tag}
@@ -289,28 +465,34 @@ def load_roles(neo4j_session, roles, current_aws_account_id, aws_update_tag):
 
     # TODO support conditions
 
+    role_rows = []
+    trust_rows = []
     for role in roles:
-        neo4j_session.run(
-            ingest_role,
-            Arn=role["Arn"],
-            RoleId=role["RoleId"],
-            CreateDate=str(role["CreateDate"]),
-            RoleName=role["RoleName"],
-            Path=role["Path"],
-            AWS_ACCOUNT_ID=current_aws_account_id,
-            aws_update_tag=aws_update_tag,
-        )
+        role_rows.append({
+            'Arn': role["Arn"],
+            'RoleId': role["RoleId"],
+            'CreateDate': str(role["CreateDate"]),
+            'RoleName': role["RoleName"],
+            'Path': role["Path"],
+        })
 
         for statement in role["AssumeRolePolicyDocument"]["Statement"]:
             principal_entries = _parse_principal_entries(statement["Principal"])
             for principal_type, principal_value in principal_entries:
-                neo4j_session.run(
-                    ingest_policy_statement,
-                    SpnArn=principal_value,
-                    SpnType=principal_type,
-                    RoleArn=role['Arn'],
-                    aws_update_tag=aws_update_tag,
-                )
+                trust_rows.append({
+                    'SpnArn': principal_value,
+                    'SpnType': principal_type,
+                    'RoleArn': role['Arn'],
+                })
+
+    load_batched(
+        neo4j_session,
+        ingest_role,
+        role_rows,
+        AWS_ACCOUNT_ID=current_aws_account_id,
+        aws_update_tag=aws_update_tag,
+    )
+    load_batched(neo4j_session, ingest_policy_statement, trust_rows, aws_update_tag=aws_update_tag)
 
 
 @timeit
@@ -331,7 +513,8 @@ def load_group_memberships(neo4j_session, group_memberships, aws_update_tag):
     for group_arn, membership_data in group_memberships.items():
         for info in membership_data.get("Users", []):
             principal_arn = info["Arn"]
-            neo4j_session.run(
+            run_write(
+                neo4j_session,
                 ingest_membership,
                 GroupArn=group_arn,
                 PrincipalArn=principal_arn,
@@ -358,6 +541,49 @@ def get_policies_for_principal(neo4j_session, principal_arn):
     return policies
 
 
+@timeit
+def get_policies_for_principals(neo4j_session, principal_arns):
+    """
+    Return the policies of the given principals with one query.
+    :param principal_arns: A list of principal ARNs
+    :return: A dict mapping each principal ARN that has policies to a dict of policy ids to statements
+    """
+    get_policy_query = """
+    MATCH
+    (principal:AWSPrincipal)-[:POLICY]->
+    (policy:AWSPolicy)-[:STATEMENT]->
+    (statements:AWSPolicyStatement)
+    WHERE principal.arn IN {Arns}
+    RETURN
+    DISTINCT principal.arn AS principal_arn, policy.id AS policy_id,
+    COLLECT(DISTINCT statements) AS statements
+    """
+    results = neo4j_session.run(
+        get_policy_query,
+        Arns=principal_arns,
+    )
+    principals = {}
+    for r in results:
+        principals.setdefault(r["principal_arn"], {})[r["policy_id"]] = parse_statement_node(r["statements"])
+    return principals
+
+
+def calculate_assumerole_relationships(principals, potential_sources):
+    """
+    Evaluate which of the principals that a role trusts are also allowed sts:AssumeRole on it by their own policies.
+    Identical policies are only compiled once and evaluated once per role, however many principals they are attached to.
+    :param principals: A dict mapping principal ARNs to dicts of policy ids to statements
+    :param potential_sources: A dict mapping role ARNs to the set of principal ARNs that the role trusts
+    :return: A list of dicts with the SourceArn and TargetArn of each allowed relationship
+    """
+    evaluator = CompiledPolicyEvaluator(principals, ["sts:AssumeRole"])
+    rows = []
+    for target_arn, source_arns in potential_sources.items():
+        for source_arn in evaluator.allowed_principals(target_arn, sorted(source_arns)):
+            rows.append({'SourceArn': source_arn, 'TargetArn': target_arn})
+    return rows
+
+
 @timeit
 def sync_assumerole_relationships(neo4j_session, current_aws_account_id, aws_update_tag, common_job_parameters):
     # Must be called after load_role
@@ -373,9 +599,10 @@ def sync_assumerole_relationships(neo4j_session, current_aws_account_id, aws_upd
     """
 
     ingest_policies_assume_role = """
-    MATCH (source:AWSPrincipal{arn: {SourceArn}})
-    WITH source
-    MATCH (role:AWSRole{arn: {TargetArn}})
+    UNWIND {Rows} AS row
+    MATCH (source:AWSPrincipal{arn: row.SourceArn})
+    WITH source, row
+    MATCH (role:AWSRole{arn: row.TargetArn})
     WITH role, source
     MERGE (source)-[r:STS_ASSUMEROLE_ALLOW]->(role)
     ON CREATE SET r.firstseen = timestamp()
@@ -386,16 +613,19 @@ def sync_assumerole_relationships(neo4j_session, current_aws_account_id, aws_upd
         query_potential_matches,
         AccountId=current_aws_account_id,
     )
-    potential_matches = [(r["source_arn"], r["target_arn"]) for r in results]
-    for source_arn, target_arn in potential_matches:
-        policies = get_policies_for_principal(neo4j_session, source_arn)
-        if principal_allowed_on_resource(policies, target_arn, ["sts:AssumeRole"]):
-            neo4j_session.run(
-                ingest_policies_assume_role,
-                SourceArn=source_arn,
-                TargetArn=target_arn,
-                aws_update_tag=aws_update_tag,
-            )
+    potential_sources = {}
+    for r in results:
+        potential_sources.setdefault(r["target_arn"], set()).add(r["source_arn"])
+    rows = calculate_assumerole_relationships(
+        get_policies_for_principals(neo4j_session, sorted(set().union(*potential_sources.values()))),
+        potential_sources,
+    )
+    load_batched(
+        neo4j_session,
+        ingest_policies_assume_role,
+        rows,
+        aws_update_tag=aws_update_tag,
+    )
     run_cleanup_job(
         'aws_import_roles_policy_cleanup.json',
         neo4j_session,
@@ -421,7 +651,8 @@ def load_user_access_keys(neo4j_session, user_access_keys, aws_update_tag):
     for username, access_keys in user_access_keys.items():
         for key in access_keys["AccessKeyMetadata"]:
             if key.get('AccessKeyId'):
-                neo4j_session.run(
+                run_write(
+                    neo4j_session,
                     ingest_account_key,
                     UserName=username,
                     AccessKeyId=key['AccessKeyId'],
@@ -490,14 +721,15 @@ def load_policy(neo4j_session, policy_id, policy_name, policy_type, principal_ar
     MERGE (policy) <-[r:POLICY]-(principal)
     SET r.lastupdated = {aws_update_tag}
     """
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         injest_policy,
         PolicyId=policy_id,
         PolicyName=policy_name,
         PolicyType=policy_type,
         PrincipalArn=principal_arn,
         aws_update_tag=aws_update_tag,
-    ).consume()
+    )
 
 
 @timeit
@@ -520,13 +752,14 @@ def load_policy_statements(neo4j_session, policy_id, policy_name, statements, aw
         ON CREATE SET r.firstseen = timestamp()
         SET r.lastupdated = {aws_update_tag}
         """
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         injest_policy_statement,
         PolicyId=policy_id,
         PolicyName=policy_name,
         Statements=statements,
         aws_update_tag=aws_update_tag,
-    ).consume()
+    )
 
 
 @timeit
@@ -539,6 +772,70 @@ def load_policy_data(neo4j_session, policy_map, policy_type, aws_update_tag):
             load_policy_statements(neo4j_session, policy_id, policy_name, statements, aws_update_tag)
 
 
+def sync_policy_data(neo4j_session, boto3_session, get_policy_data_func, principal_list, policy_type, aws_update_tag):
+    """
+    Fetch the policies of the given principals with get_policy_data_func and load them into Neo4j. Policies are
+    fetched for POLICY_FETCH_CHUNK_SIZE principals at a time on a background thread, and each chunk is loaded while
+    the next one is being fetched.
+    """
+    def fetch_chunks():
+        for i in range(0, len(principal_list), POLICY_FETCH_CHUNK_SIZE):
+            yield get_policy_data_func(boto3_session, principal_list[i:i + POLICY_FETCH_CHUNK_SIZE])
+
+    def load_chunk(policy_data):
+        transform_policy_data(policy_data, policy_type)
+        load_policy_data(neo4j_session, policy_data, policy_type, aws_update_tag)
+
+    run_pipeline([fetch_chunks], load_chunk)
+
+
+def load_principal_policies(neo4j_session, inline_policies, managed_policies, aws_update_tag):
+    transform_policy_data(inline_policies, PolicyType.inline.value)
+    load_policy_data(neo4j_session, inline_policies, PolicyType.inline.value, aws_update_tag)
+    transform_policy_data(managed_policies, PolicyType.managed.value)
+    load_policy_data(neo4j_session, managed_policies, PolicyType.managed.value, aws_update_tag)
+
+
+@timeit
+def sync_principals_from_authorization_details(
+    neo4j_session, boto3_session, current_aws_account_id, aws_update_tag, common_job_parameters,
+):
+    """
+    Sync IAM users, groups, roles, their policies and group memberships like sync_users, sync_groups, sync_roles and
+    sync_group_memberships do, but from get_account_authorization_details instead of several calls per principal.
+    Users are still listed with list_users because only it returns when their password was last used.
+    """
+    logger.debug("Syncing IAM principals from account authorization details for account '%s'.", current_aws_account_id)
+    details = get_account_authorization_details(boto3_session)
+
+    users = get_user_list_data(boto3_session)['Users']
+    load_users(neo4j_session, users, current_aws_account_id, aws_update_tag)
+    load_principal_policies(
+        neo4j_session, *transform_authorization_details_policies(details, 'UserDetailList', 'UserPolicyList'),
+        aws_update_tag,
+    )
+    run_cleanup_job('aws_import_users_cleanup.json', neo4j_session, common_job_parameters)
+
+    load_groups(neo4j_session, details['GroupDetailList'], current_aws_account_id, aws_update_tag)
+    load_principal_policies(
+        neo4j_session, *transform_authorization_details_policies(details, 'GroupDetailList', 'GroupPolicyList'),
+        aws_update_tag,
+    )
+    run_cleanup_job('aws_import_groups_cleanup.json', neo4j_session, common_job_parameters)
+
+    load_roles(neo4j_session, details['RoleDetailList'], current_aws_account_id, aws_update_tag)
+    load_principal_policies(
+        neo4j_session, *transform_authorization_details_policies(details, 'RoleDetailList', 'RolePolicyList'),
+        aws_update_tag,
+    )
+    run_cleanup_job('aws_import_roles_cleanup.json', neo4j_session, common_job_parameters)
+
+    load_group_memberships(
+        neo4j_session, transform_authorization_details_group_memberships(details), aws_update_tag,
+    )
+    run_cleanup_job('aws_import_groups_membership_cleanup.json', neo4j_session, common_job_parameters)
+
+
 @timeit
 def sync_users(neo4j_session, boto3_session, current_aws_account_id, aws_update_tag, common_job_parameters):
     logger.debug("Syncing IAM users for account '%s'.", current_aws_account_id)
@@ -554,16 +851,18 @@ def sync_users(neo4j_session, boto3_session, current_aws_account_id, aws_update_
 
 @timeit
 def sync_user_managed_policies(boto3_session, data, neo4j_session, aws_update_tag):
-    managed_policy_data = get_user_managed_policy_data(boto3_session, data['Users'])
-    transform_policy_data(managed_policy_data, PolicyType.managed.value)
-    load_policy_data(neo4j_session, managed_policy_data, PolicyType.managed.value, aws_update_tag)
+    sync_policy_data(
+        neo4j_session, boto3_session, get_user_managed_policy_data, data['Users'],
+        PolicyType.managed.value, aws_update_tag,
+    )
 
 
 @timeit
 def sync_user_inline_policies(boto3_session, data, neo4j_session, aws_update_tag):
-    policy_data = get_user_policy_data(boto3_session, data['Users'])
-    transform_policy_data(policy_data, PolicyType.inline.value)
-    load_policy_data(neo4j_session, policy_data, PolicyType.inline.value, aws_update_tag)
+    sync_policy_data(
+        neo4j_session, boto3_session, get_user_policy_data, data['Users'],
+        PolicyType.inline.value, aws_update_tag,
+    )
 
 
 @timeit
@@ -580,15 +879,17 @@ def sync_groups(neo4j_session, boto3_session, current_aws_account_id, aws_update
 
 
 def sync_group_managed_policies(boto3_session, data, neo4j_session, aws_update_tag):
-    managed_policy_data = get_group_managed_policy_data(boto3_session, data["Groups"])
-    transform_policy_data(managed_policy_data, PolicyType.managed.value)
-    load_policy_data(neo4j_session, managed_policy_data, PolicyType.managed.value, aws_update_tag)
+    sync_policy_data(
+        neo4j_session, boto3_session, get_group_managed_policy_data, data["Groups"],
+        PolicyType.managed.value, aws_update_tag,
+    )
 
 
 def sync_groups_inline_policies(boto3_session, data, neo4j_session, aws_update_tag):
-    policy_data = get_group_policy_data(boto3_session, data["Groups"])
-    transform_policy_data(policy_data, PolicyType.inline.value)
-    load_policy_data(neo4j_session, policy_data, PolicyType.inline.value, aws_update_tag)
+    sync_policy_data(
+        neo4j_session, boto3_session, get_group_policy_data, data["Groups"],
+        PolicyType.inline.value, aws_update_tag,
+    )
 
 
 @timeit
@@ -606,16 +907,18 @@ def sync_roles(neo4j_session, boto3_session, current_aws_account_id, aws_update_
 
 def sync_role_managed_policies(current_aws_account_id, boto3_session, data, neo4j_session, aws_update_tag):
     logger.debug("Syncing IAM role managed policies for account '%s'.", current_aws_account_id)
-    managed_policy_data = get_role_managed_policy_data(boto3_session, data["Roles"])
-    transform_policy_data(managed_policy_data, PolicyType.managed.value)
-    load_policy_data(neo4j_session, managed_policy_data, PolicyType.managed.value, aws_update_tag)
+    sync_policy_data(
+        neo4j_session, boto3_session, get_role_managed_policy_data, data["Roles"],
+        PolicyType.managed.value, aws_update_tag,
+    )
 
 
 def sync_role_inline_policies(current_aws_account_id, boto3_session, data, neo4j_session, aws_update_tag):
     logger.debug("Syncing IAM role inline policies for account '%s'.", current_aws_account_id)
-    inline_policy_data = get_role_policy_data(boto3_session, data["Roles"])
-    transform_policy_data(inline_policy_data, PolicyType.inline.value)
-    load_policy_data(neo4j_session, inline_policy_data, PolicyType.inline.value, aws_update_tag)
+    sync_policy_data(
+        neo4j_session, boto3_session, get_role_policy_data, data["Roles"],
+        PolicyType.inline.value, aws_update_tag,
+    )
 
 
 @timeit
@@ -656,10 +959,15 @@ def sync(neo4j_session, boto3_session, account_id, update_tag, common_job_parame
     logger.info("Syncing IAM for account '%s'.", account_id)
     # This module only syncs IAM information that is in use.
     # As such only policies that are attached to a user, role or group are synced
-    sync_users(neo4j_session, boto3_session, account_id, update_tag, common_job_parameters)
-    sync_groups(neo4j_session, boto3_session, account_id, update_tag, common_job_parameters)
-    sync_roles(neo4j_session, boto3_session, account_id, update_tag, common_job_parameters)
-    sync_group_memberships(neo4j_session, boto3_session, account_id, update_tag, common_job_parameters)
+    if common_job_parameters.get('aws_iam_authorization_details'):
+        sync_principals_from_authorization_details(
+            neo4j_session, boto3_session, account_id, update_tag, common_job_parameters,
+        )
+    else:
+        sync_users(neo4j_session, boto3_session, account_id, update_tag, common_job_parameters)
+        sync_groups(neo4j_session, boto3_session, account_id, update_tag, common_job_parameters)
+        sync_roles(neo4j_session, boto3_session, account_id, update_tag, common_job_parameters)
+        sync_group_memberships(neo4j_session, boto3_session, account_id, update_tag, common_job_parameters)
     sync_assumerole_relationships(neo4j_session, account_id, update_tag, common_job_parameters)
     sync_user_access_keys(neo4j_session, boto3_session, account_id, update_tag, common_job_parameters)
     run_cleanup_job('aws_import_principals_cleanup.json', neo4j_session, common_job_parameters)
@@ -1,6 +1,9 @@
 import logging
 
+from cartography.intel.aws.util import get_client
+from cartography.util import aws_fetch_regions
 from cartography.util import aws_handle_regions
+from cartography.util import load_batched
 from cartography.util import run_cleanup_job
 from cartography.util import timeit
 
@@ -13,7 +16,7 @@ def get_lambda_data(boto3_session, region):
     """
     Create an Lambda boto3 client and grab all the lambda functions.
     """
-    client = boto3_session.client('lambda', region_name=region)
+    client = get_client(boto3_session, 'lambda', region_name=region)
     paginator = client.get_paginator('list_functions')
     lambda_functions = []
     for page in paginator.paginate():
@@ -25,43 +28,49 @@ def get_lambda_data(boto3_session, region):
 @timeit
 def load_lambda_functions(neo4j_session, data, region, current_aws_account_id, aws_update_tag):
     ingest_lambda_functions = """
-    MERGE (lambda:AWSLambda{id: {Arn}})
+    UNWIND {Rows} AS row
+    MERGE (lambda:AWSLambda{id: row.Arn})
     ON CREATE SET lambda.firstseen = timestamp()
-    SET lambda.name = {LambdaName},
-    lambda.modifieddate = {LastModified},
-    lambda.arn = {Arn},
-    lambda.runtime = {Runtime},
-    lambda.description = {Description},
-    lambda.timeout = {Timeout},
-    lambda.memory = {MemorySize},
+    SET lambda.name = row.LambdaName,
+    lambda.modifieddate = row.LastModified,
+    lambda.arn = row.Arn,
+    lambda.runtime = row.Runtime,
+    lambda.description = row.Description,
+    lambda.timeout = row.Timeout,
+    lambda.memory = row.MemorySize,
     lambda.lastupdated = {aws_update_tag}
-    WITH lambda
+    WITH lambda, row
     MATCH (owner:AWSAccount{id: {AWS_ACCOUNT_ID}})
     MERGE (owner)-[r:RESOURCE]->(lambda)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {aws_update_tag}
-    WITH lambda
-    MATCH (role:AWSPrincipal{arn: {Role}})
+    WITH lambda, row
+    MATCH (role:AWSPrincipal{arn: row.Role})
     MERGE (lambda)-[r:STS_ASSUME_ROLE_ALLOW]->(role)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {aws_update_tag}
     """
 
-    for lambda_function in data:
-        neo4j_session.run(
-            ingest_lambda_functions,
-            LambdaName=lambda_function["FunctionName"],
-            Arn=lambda_function["FunctionArn"],
-            Runtime=lambda_function["Runtime"],
-            Role=lambda_function["Role"],
-            Description=lambda_function["Description"],
-            Timeout=lambda_function["Timeout"],
-            MemorySize=lambda_function["MemorySize"],
-            LastModified=lambda_function["LastModified"],
-            Region=region,
-            AWS_ACCOUNT_ID=current_aws_account_id,
-            aws_update_tag=aws_update_tag,
-        )
+    rows = [
+        {
+            'LambdaName': lambda_function["FunctionName"],
+            'Arn': lambda_function["FunctionArn"],
+            'Runtime': lambda_function["Runtime"],
+            'Role': lambda_function["Role"],
+            'Description': lambda_function["Description"],
+            'Timeout': lambda_function["Timeout"],
+            'MemorySize': lambda_function["MemorySize"],
+            'LastModified': lambda_function["LastModified"],
+        } for lambda_function in data
+    ]
+    load_batched(
+        neo4j_session,
+        ingest_lambda_functions,
+        rows,
+        Region=region,
+        AWS_ACCOUNT_ID=current_aws_account_id,
+        aws_update_tag=aws_update_tag,
+    )
 
 
 @timeit
@@ -74,9 +83,8 @@ def sync_lambda_functions(
     neo4j_session, boto3_session, regions, current_aws_account_id, aws_update_tag,
     common_job_parameters,
 ):
-    for region in regions:
+    for region, data in aws_fetch_regions(get_lambda_data, boto3_session, regions):
         logger.info("Syncing Lambda for region in '%s' in account '%s'.", region, current_aws_account_id)
-        data = get_lambda_data(boto3_session, region)
         load_lambda_functions(neo4j_session, data, region, current_aws_account_id, aws_update_tag)
 
     cleanup_lambda(neo4j_session, common_job_parameters)
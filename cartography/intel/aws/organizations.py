@@ -3,7 +3,10 @@ import logging
 import boto3
 import botocore.exceptions
 
+import cartography.replay
+from cartography.intel.aws.util import get_client
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -15,7 +18,7 @@ def get_account_from_arn(arn):
 
 
 def get_caller_identity(boto3_session):
-    client = boto3_session.client('sts')
+    client = get_client(boto3_session, 'sts')
     return client.get_caller_identity()
 
 
@@ -47,6 +50,7 @@ def get_aws_accounts_from_botocore_config(boto3_session):
             continue
         try:
             profile_boto3_session = boto3.Session(profile_name=profile_name)
+            cartography.replay.register_boto3_session(profile_boto3_session)
         except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
             logger.debug("Error occurred calling boto3.Session() with profile_name '%s'.", profile_name, exc_info=True)
             logger.error(
@@ -101,7 +105,8 @@ def load_aws_accounts(neo4j_session, aws_accounts, aws_update_tag, common_job_pa
     """
     for account_name, account_id in aws_accounts.items():
         root_arn = f'arn:aws:iam::{account_id}:root'
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             query,
             ACCOUNT_ID=account_id,
             ACCOUNT_NAME=account_name,
@@ -1,14 +1,46 @@
+import hashlib
 import logging
+import math
+import multiprocessing
 import os
+import pickle
 import re
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
 from string import Template
 
 import yaml
 
 from cartography.graph.statement import GraphStatement
+from cartography.util import load_batched
+from cartography.util import run_write
 
 logger = logging.getLogger(__name__)
 
+# The number of distinct clauses whose compiled matchers are kept. Clauses are shared by many statements, e.g. every
+# principal with the same AWS managed policy, so this only needs to hold the distinct clauses of an account's policies.
+CLAUSE_CACHE_SIZE = 2 ** 16
+
+# The number of (regex, value) match results that are kept. Only clauses with wildcards other than a trailing `*` are
+# matched with regexes, so this only needs to hold their matches against the evaluated permissions and resources.
+MATCH_RESULT_CACHE_SIZE = 2 ** 18
+
+# The maximum number of resources whose permission relationships a worker process evaluates in one work unit.
+RESOURCE_CHUNK_SIZE = 1000
+
+# The number of evaluators that a worker process keeps, by principal set and permissions. The chunks of a relationship
+# are evaluated one after another, so this only needs to hold the relationships whose chunks are in progress.
+WORKER_EVALUATOR_CACHE_SIZE = 16
+
+# The pool of worker processes that evaluate permission relationships, shared by the accounts of an AWS sync. Set by
+# start_worker_pool, when `permission_relationships_workers` is more than 1.
+worker_pool = None
+
+# The evaluators of a worker process by principal set and permissions, least recently used first. Only used in worker
+# processes.
+_worker_evaluators = OrderedDict()
+
 
 def evaluate_clause(clause, match):
     """ Evaluates the a clause in IAM. Clauses can be AWS [not]actions and [not]resources
@@ -22,8 +54,7 @@ def evaluate_clause(clause, match):
     Returns:
         [bool] -- True if the clause matched, False otherwise
     """
-    result = compile_regex(clause).fullmatch(match)
-    return result is not None
+    return _clause_matcher(clause).matches(match, _lowered(match))
 
 
 def evaluate_notaction_for_permission(statement, permission):
@@ -156,6 +187,11 @@ def calculate_permission_relationships(principals, resource_arns, permission):
     AWS Policy evaluation reference
     https://docs.aws.amazon.com/IAM/latest/UserGuide/reference_policies_evaluation-logic.html
 
+    The result is the same as calling `principal_allowed_on_resource` for every principal and resource, but the
+    policies are compiled first: the action clauses are resolved once per permission, principals whose policies can
+    never grant the permissions are dropped, principals with the same policies are evaluated together, and literal
+    and prefix clauses are matched without regexes.
+
     Arguments:
         principals {[dict]} -- The principals to check permission for
         resource_arns {[str]} -- The resources to test the permission against
@@ -164,14 +200,413 @@ def calculate_permission_relationships(principals, resource_arns, permission):
     Returns:
         [dict] -- The allowed mappings
     """
+    if not isinstance(permission, list):
+        raise ValueError("permissions is not a list")
+    return _allowed_mappings(CompiledPolicyEvaluator(principals, permission), resource_arns)
+
+
+def _allowed_mappings(evaluator, resource_arns):
     allowed_mappings = []
     for resource_arn in resource_arns:
-        for principal_arn, policies in principals.items():
-            if principal_allowed_on_resource(policies, resource_arn, permission):
-                allowed_mappings.append({"principal_arn": principal_arn, "resource_arn": resource_arn})
+        for principal_arn in evaluator.allowed_principals(resource_arn):
+            allowed_mappings.append({"principal_arn": principal_arn, "resource_arn": resource_arn})
     return allowed_mappings
 
 
+def _create_pool(max_workers):
+    # Worker processes are spawned rather than forked, because forking a process that runs other threads (e.g. other
+    # accounts' syncs and the Neo4j driver) can leave their locks held in the child.
+    return multiprocessing.get_context('spawn').Pool(processes=max_workers)
+
+
+def start_worker_pool(max_workers):
+    """ Start the worker processes that evaluate the permission relationships of all accounts of an AWS sync.
+
+    Arguments:
+        max_workers {int} -- The number of worker processes
+    """
+    global worker_pool
+    worker_pool = _create_pool(max_workers)
+
+
+def stop_worker_pool():
+    """ Stop the worker processes started by start_worker_pool, if any. """
+    global worker_pool
+    if worker_pool is not None:
+        worker_pool.terminate()
+        worker_pool.join()
+        worker_pool = None
+
+
+def _calculate_chunk(principal_set, pickled_principals, permissions, resource_arns):
+    key = (principal_set, tuple(permissions))
+    if key in _worker_evaluators:
+        _worker_evaluators.move_to_end(key)
+    else:
+        _worker_evaluators[key] = CompiledPolicyEvaluator(pickle.loads(pickled_principals), permissions)
+        if len(_worker_evaluators) > WORKER_EVALUATOR_CACHE_SIZE:
+            _worker_evaluators.popitem(last=False)
+    return _allowed_mappings(_worker_evaluators[key], resource_arns)
+
+
+def calculate_permission_relationships_in_processes(relationships, max_workers, pool=None):
+    """ Evaluate the permission relationships of several relationships across worker processes, with the same result
+    as calling calculate_permission_relationships for each of them.
+
+    The resources of each relationship are split into chunks, and every (relationship, chunk) pair is evaluated by one
+    of the worker processes. The principals are pickled once per call and sent along with each chunk; relationships
+    that share the same principals dict share one pickled copy of it, which each process unpickles only once.
+
+    Arguments:
+        relationships {[(dict, [str], [str])]} -- The (principals, permissions, resource_arns) of each relationship
+        max_workers {int} -- The number of worker processes
+        pool {multiprocessing.pool.Pool} -- The worker processes to use, e.g. the worker_pool of the AWS sync. If not
+            given, `max_workers` processes are started for this call and stopped when it is done.
+
+    Returns:
+        [generator] -- For each relationship, in order, a generator of lists of allowed mappings, one list per chunk.
+        The generators must be consumed in order, and the results of later relationships are computed in the
+        meantime.
+    """
+    # The principal sets of different calls, e.g. of accounts synced at the same time, must not share evaluators.
+    call_id = uuid.uuid4().hex
+    principal_sets = {}
+    for principals, permissions, _ in relationships:
+        if not isinstance(permissions, list):
+            raise ValueError("permissions is not a list")
+        if id(principals) not in principal_sets:
+            principal_sets[id(principals)] = ((call_id, len(principal_sets)), pickle.dumps(principals))
+    own_pool = pool is None
+    if own_pool:
+        pool = _create_pool(max_workers)
+    try:
+        results = []
+        for principals, permissions, resource_arns in relationships:
+            principal_set, pickled_principals = principal_sets[id(principals)]
+            chunk_size = max(1, min(RESOURCE_CHUNK_SIZE, math.ceil(len(resource_arns) / max_workers)))
+            results.append([
+                pool.apply_async(
+                    _calculate_chunk,
+                    (principal_set, pickled_principals, permissions, resource_arns[i:i + chunk_size]),
+                )
+                for i in range(0, len(resource_arns), chunk_size)
+            ])
+        for relationship_results in results:
+            yield (result.get() for result in relationship_results)
+    finally:
+        # All results have been read by now, unless loading them failed and the remaining chunks are not needed. A
+        # shared pool is left running for the other accounts; it just evaluates the remaining chunks in vain.
+        if own_pool:
+            pool.terminate()
+            pool.join()
+
+
+# Characters that make a clause more than a literal string once compile_regex has turned it into a regex.
+_REGEX_METACHARACTERS = frozenset('*?\\^$+()[]{}|.')
+
+
+def _clause_text(clause):
+    """ Return the clause in its original IAM form, e.g. `s3:Get*`, or None if it is a regex that compile_regex did not
+    produce.
+    """
+    if isinstance(clause, str):
+        return clause
+    if not clause.flags & re.IGNORECASE:
+        return None
+    # compile_regex escapes literal periods and turns a `*` into `.*`. Only undo a trailing wildcard, any other regex
+    # syntax is left in place and rejected by the callers.
+    pattern = clause.pattern
+    wildcard = pattern.endswith('.*') and not pattern.endswith('\\.*')
+    if wildcard:
+        pattern = pattern[:-2]
+    if any(c in _REGEX_METACHARACTERS for c in pattern.replace('\\.', '')):
+        return None
+    return pattern.replace('\\.', '.') + ('*' if wildcard else '')
+
+
+def _is_plain(text):
+    return _is_ascii(text) and not any(c in _REGEX_METACHARACTERS for c in text.replace('.', ''))
+
+
+class _ClauseMatcher:
+    """ Matches values against one clause, with the same result as evaluate_clause.
+
+    Clauses without wildcards, like `s3:GetObject`, are compared as lower case strings and clauses whose only wildcard
+    is a trailing `*`, like `s3:Get*` or `arn:aws:s3:::bucket/*`, as lower case prefixes. Other clauses are matched with
+    their regex and the results are kept in an LRU cache.
+    """
+
+    def __init__(self, clause):
+        self.pattern = compile_regex(clause)
+        self.literal = None
+        self.prefix = None
+        text = _clause_text(clause)
+        if text is None:
+            return
+        if _is_plain(text):
+            self.literal = text.lower()
+        elif text.endswith('*') and _is_plain(text[:-1]):
+            self.prefix = text[:-1].lower()
+
+    def matches(self, value, lowered):
+        """ Return whether the clause matches the value.
+
+        Arguments:
+            value {str} -- The item to match against.
+            lowered {str} -- The lower case value if the value is ASCII, None otherwise. Case insensitive matching of
+                other values is left to the regex.
+        """
+        if lowered is not None:
+            if self.literal is not None:
+                return lowered == self.literal
+            if self.prefix is not None:
+                # The `.*` of the regex does not match line breaks.
+                return lowered.startswith(self.prefix) and '\n' not in lowered[len(self.prefix):]
+        return _regex_fullmatch(self.pattern, value)
+
+
+@lru_cache(maxsize=CLAUSE_CACHE_SIZE)
+def _clause_matcher(clause):
+    return _ClauseMatcher(clause)
+
+
+@lru_cache(maxsize=MATCH_RESULT_CACHE_SIZE)
+def _regex_fullmatch(pattern, value):
+    return pattern.fullmatch(value) is not None
+
+
+class _CompiledClauses:
+    """ The clauses of one element of a statement, e.g. its resources. Literal clauses are matched with a set lookup,
+    prefix clauses with `str.startswith` and only the remaining clauses with their regexes.
+    """
+
+    def __init__(self, clauses):
+        self.matchers = [_clause_matcher(clause) for clause in clauses]
+        self.literals = {m.literal for m in self.matchers if m.literal is not None}
+        self.prefix_matchers = [m for m in self.matchers if m.prefix is not None]
+        self.prefixes = tuple(m.prefix for m in self.prefix_matchers)
+        self.others = [m for m in self.matchers if m.literal is None and m.prefix is None]
+
+    def matches(self, value, lowered):
+        """ Return whether any clause matches the value, like evaluate_clause.
+
+        Arguments:
+            value {str} -- The item to match against.
+            lowered {str} -- The lower case value if the value is ASCII, None otherwise.
+        """
+        if lowered is None:
+            return any(m.matches(value, None) for m in self.matchers)
+        if lowered in self.literals:
+            return True
+        if self.prefixes and lowered.startswith(self.prefixes):
+            if '\n' not in lowered or any(m.matches(value, lowered) for m in self.prefix_matchers):
+                return True
+        return any(m.matches(value, lowered) for m in self.others)
+
+
+@lru_cache(maxsize=CLAUSE_CACHE_SIZE)
+def _compiled_clauses(clauses):
+    return _CompiledClauses(clauses)
+
+
+def matcher_cache_stats():
+    """ Return the hit and miss counts of the clause and match result caches, to help size CLAUSE_CACHE_SIZE and
+    MATCH_RESULT_CACHE_SIZE.
+
+    Returns:
+        [dict] -- Maps the cache names to `functools.lru_cache` CacheInfo tuples
+    """
+    return {
+        'clauses': _clause_matcher.cache_info(),
+        'clause_lists': _compiled_clauses.cache_info(),
+        'match_results': _regex_fullmatch.cache_info(),
+    }
+
+
+def _log_matcher_cache_stats():
+    for name, info in matcher_cache_stats().items():
+        lookups = info.hits + info.misses
+        logger.debug(
+            "Permission matcher cache '%s': %d lookups, %.1f%% hits, %d/%d entries.",
+            name, lookups, 100.0 * info.hits / lookups if lookups else 0.0, info.currsize, info.maxsize,
+        )
+
+
+def _lowered(value):
+    return value.lower() if _is_ascii(value) else None
+
+
+def _is_ascii(value):
+    # Same as str.isascii, which is only available from Python 3.7.
+    try:
+        value.encode('ascii')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+class _CompiledStatement:
+    """ A statement whose action part has been evaluated for the permissions in advance, so that only its resource
+    part is left to evaluate for each resource.
+    """
+
+    def __init__(self, statement):
+        self.resource = _compiled_clauses(tuple(statement['resource'])) if 'resource' in statement else None
+        self.notresource = _compiled_clauses(tuple(statement['notresource'])) if 'notresource' in statement else None
+
+    def applies_to(self, resource_arn, lowered):
+        """ Same as evaluate_resource_for_permission and not evaluate_notresource_for_permission """
+        if self.resource is None or not self.resource.matches(resource_arn, lowered):
+            return False
+        return self.notresource is None or not self.notresource.matches(resource_arn, lowered)
+
+
+def _grants_action(statement, permission, lowered):
+    """ Same as not evaluate_notaction_for_permission and evaluate_action_for_permission """
+    if 'notaction' in statement and _compiled_clauses(tuple(statement['notaction'])).matches(permission, lowered):
+        return False
+    return 'action' not in statement or _compiled_clauses(tuple(statement['action'])).matches(permission, lowered)
+
+
+class _CompiledPolicy:
+    """ A policy reduced to the statements that can affect the given permissions. For each permission, in order, it
+    holds the Deny and Allow statements whose actions cover that permission.
+    """
+
+    def __init__(self, statements, permissions):
+        self.candidates = []
+        for permission in permissions:
+            lowered = _lowered(permission)
+            matching = [s for s in statements if _grants_action(s, permission, lowered)]
+            deny = [_CompiledStatement(s) for s in matching if s["effect"] == "Deny"]
+            allow = [_CompiledStatement(s) for s in matching if s["effect"] == "Allow"]
+            self.candidates.append((deny, allow))
+        self.can_allow = any(allow for _, allow in self.candidates)
+        self.can_deny = any(deny for deny, _ in self.candidates)
+
+    def evaluate(self, resource_arn, lowered):
+        """ Same as evaluate_policy_for_permission """
+        for deny, allow in self.candidates:
+            if any(s.applies_to(resource_arn, lowered) for s in deny):
+                return False, True
+            if any(s.applies_to(resource_arn, lowered) for s in allow):
+                return True, False
+        return False, False
+
+
+def _policy_fingerprint(statements):
+    """ Return a hashable value that is equal for policies with the same statements, whether their clauses are
+    strings or compiled regexes.
+    """
+    def clauses(statement, key):
+        if key not in statement:
+            return None
+        return tuple(c if isinstance(c, str) else (c.pattern, c.flags) for c in statement[key])
+    return tuple(
+        (s["effect"],) + tuple(clauses(s, key) for key in ('action', 'notaction', 'resource', 'notresource'))
+        for s in statements
+    )
+
+
+def principal_fingerprint(policies):
+    """ Return a digest of a principal's policies that only changes when the permissions they grant may change: it
+    ignores the policy ids, the order of the policies and of their statements, and whether they are compiled.
+
+    Arguments:
+        policies {dict} -- The principal's policies, mapping policy ids to statements
+
+    Returns:
+        [str] -- The hex digest
+    """
+    # Clauses are compiled first so that the digest does not depend on whether the policies were compiled already.
+    fingerprint = sorted(
+        repr(sorted(repr(s) for s in _policy_fingerprint(compile_statement([dict(s) for s in statements]))))
+        for statements in policies.values()
+    )
+    return hashlib.sha256(repr(fingerprint).encode('utf-8')).hexdigest()
+
+
+def relationship_fingerprint(rpr, resource_arns):
+    """ Return a digest of a permission relationship and the resources it is evaluated against.
+
+    Arguments:
+        rpr {dict} -- The entry of the permission relationships file
+        resource_arns {[str]} -- The ARNs of the target resources
+
+    Returns:
+        [str] -- The hex digest
+    """
+    fingerprint = (
+        rpr["relationship_name"], rpr["target_label"], tuple(rpr["permissions"]), tuple(sorted(resource_arns)),
+    )
+    return hashlib.sha256(repr(fingerprint).encode('utf-8')).hexdigest()
+
+
+class CompiledPolicyEvaluator:
+    """ Evaluates whether principals are allowed the given permissions on resources, with the same result as
+    `principal_allowed_on_resource` but much less work per resource.
+
+    Policies are compiled once: identical policies (e.g. an AWS managed policy attached to many roles) share one
+    compiled policy, statements that cannot affect the permissions are dropped, and principals that are not allowed the
+    permissions by any statement are skipped. Principals with the same compiled policies form a group that is evaluated
+    once per resource.
+
+    Arguments:
+        principals {dict} -- The principals, mapping principal ARNs to dicts of policy ids to statements
+        permissions {[str]} -- The permissions to evaluate
+    """
+
+    def __init__(self, principals, permissions):
+        compiled = {}
+        groups = {}
+        self._principal_policies = {}
+        for principal_arn, policies in principals.items():
+            key = []
+            for statements in policies.values():
+                fingerprint = _policy_fingerprint(statements)
+                if fingerprint not in compiled:
+                    compiled[fingerprint] = _CompiledPolicy(statements, permissions)
+                policy = compiled[fingerprint]
+                if policy.can_allow or policy.can_deny:
+                    key.append(policy)
+            # A principal is only allowed if one of its policies has an Allow statement for the permissions.
+            if not any(policy.can_allow for policy in key):
+                continue
+            groups.setdefault(tuple(key), []).append(principal_arn)
+            self._principal_policies[principal_arn] = tuple(key)
+        self._groups = list(groups.items())
+
+    def allowed_principals(self, resource_arn, principal_arns=None):
+        """ Return the ARNs of the principals that are allowed the permissions on the given resource.
+
+        Arguments:
+            resource_arn {str} -- The resource to test the permissions against
+            principal_arns {[str]} -- Only evaluate these principals, e.g. the principals that a role trusts. Optional.
+        """
+        lowered = _lowered(resource_arn)
+        results = {}
+        allowed = []
+        if principal_arns is None:
+            groups = self._groups
+        else:
+            groups = [
+                (self._principal_policies[arn], [arn]) for arn in principal_arns if arn in self._principal_policies
+            ]
+        for policies, principal_arns in groups:
+            granted = False
+            for policy in policies:
+                if policy not in results:
+                    results[policy] = policy.evaluate(resource_arn, lowered)
+                policy_allowed, explicit_deny = results[policy]
+                if explicit_deny:
+                    granted = False
+                    break
+                granted = granted or policy_allowed
+            if granted:
+                allowed.extend(principal_arns)
+        return allowed
+
+
 def parse_statement_node(node_group):
     """ Parse a dict from group of Neo4J node
 
@@ -200,17 +635,23 @@ def compile_regex(item):
     """
 
     if isinstance(item, str):
-        item = item.replace(".", "\\.").replace("*", ".*").replace("?", ".?")
-        try:
-            item = re.compile(item, flags=re.IGNORECASE)
-        except re.error:
-            logger.warning(f"Regex did not compile for {item}")
-            # in this case it must still return a regex.
-            # So it will return an re.Pattern of empry stringm
-            item = re.compile("", flags=re.IGNORECASE)
+        item = _compile_clause_regex(item)
     return item
 
 
+@lru_cache(maxsize=CLAUSE_CACHE_SIZE)
+def _compile_clause_regex(item):
+    # Cached so that a clause shared by many principals' statements is translated and compiled only once.
+    item = item.replace(".", "\\.").replace("*", ".*").replace("?", ".?")
+    try:
+        return re.compile(item, flags=re.IGNORECASE)
+    except re.error:
+        logger.warning(f"Regex did not compile for {item}")
+        # in this case it must still return a regex.
+        # So it will return an re.Pattern of empry stringm
+        return re.compile("", flags=re.IGNORECASE)
+
+
 def compile_statement(statements):
     """ Compile a statement by precompiling the regex for the relevant clauses. This is done to boost
     performance by not recompiling the regex over and over again.
@@ -282,7 +723,8 @@ def load_principal_mappings(neo4j_session, principal_mappings, node_label, relat
         node_label=node_label,
         relationship_name=relationship_name,
     )
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         map_policy_query,
         Mapping=principal_mappings,
         aws_update_tag=update_tag,
@@ -331,6 +773,77 @@ def is_valid_rpr(rpr):
     return True
 
 
+def get_fingerprints(neo4j_session, account_id):
+    """ Return the principal and relationship fingerprints stored by the last sync of the given account.
+
+    Returns:
+        [(dict, set)] -- The fingerprints of the principals by ARN, and the set of relationship fingerprints
+    """
+    get_principal_fingerprints_query = """
+    MATCH (:AWSAccount{id:{AccountId}})-[:RESOURCE]->(principal:AWSPrincipal)
+    WHERE exists(principal.permission_relationships_fingerprint)
+    RETURN principal.arn AS arn, principal.permission_relationships_fingerprint AS fingerprint
+    """
+    get_relationship_fingerprints_query = """
+    MATCH (acc:AWSAccount{id:{AccountId}})
+    RETURN acc.permission_relationships_fingerprints AS fingerprints
+    """
+    results = neo4j_session.run(get_principal_fingerprints_query, AccountId=account_id)
+    principal_fingerprints = {r["arn"]: r["fingerprint"] for r in results}
+    record = neo4j_session.run(get_relationship_fingerprints_query, AccountId=account_id).single()
+    relationship_fingerprints = set(record["fingerprints"] or []) if record else set()
+    return principal_fingerprints, relationship_fingerprints
+
+
+def load_principal_fingerprints(neo4j_session, account_id, principal_fingerprints):
+    """ Store the fingerprints of the principals whose mappings were just loaded. Principals that are not in
+    `principal_fingerprints`, e.g. because they no longer have policies, lose their fingerprint so that they are
+    evaluated again once they have.
+    """
+    ingest_principal_fingerprints = """
+    UNWIND {Rows} AS row
+    MATCH (:AWSAccount{id:{AccountId}})-[:RESOURCE]->(principal:AWSPrincipal{arn:row.arn})
+    SET principal.permission_relationships_fingerprint = row.fingerprint
+    """
+    remove_principal_fingerprints = """
+    MATCH (:AWSAccount{id:{AccountId}})-[:RESOURCE]->(principal:AWSPrincipal)
+    WHERE exists(principal.permission_relationships_fingerprint) AND NOT principal.arn IN {Arns}
+    REMOVE principal.permission_relationships_fingerprint
+    """
+    rows = [{"arn": arn, "fingerprint": fingerprint} for arn, fingerprint in principal_fingerprints.items()]
+    load_batched(neo4j_session, ingest_principal_fingerprints, rows, AccountId=account_id)
+    run_write(neo4j_session, remove_principal_fingerprints, AccountId=account_id, Arns=list(principal_fingerprints))
+
+
+def load_relationship_fingerprints(neo4j_session, account_id, relationship_fingerprints):
+    """ Store the fingerprints of the relationships whose mappings were loaded for all principals. """
+    ingest_relationship_fingerprints = """
+    MATCH (acc:AWSAccount{id:{AccountId}})
+    SET acc.permission_relationships_fingerprints = {Fingerprints}
+    """
+    run_write(
+        neo4j_session,
+        ingest_relationship_fingerprints, AccountId=account_id, Fingerprints=sorted(relationship_fingerprints),
+    )
+
+
+def refresh_principal_mappings(neo4j_session, account_id, principal_arns, node_label, relationship_name, update_tag):
+    """ Mark the existing relationships of the given principals to the account's resources as seen in this sync,
+    without evaluating them again.
+    """
+    refresh_query = Template("""
+    UNWIND {Rows} AS principal_arn
+    MATCH (acc:AWSAccount{id:{AccountId}})-[:RESOURCE]->(principal:AWSPrincipal{arn:principal_arn})
+    MATCH (principal)-[r:$relationship_name]->(resource:$node_label)<-[:RESOURCE]-(acc)
+    SET r.lastupdated = {aws_update_tag}
+    """)
+    refresh_query = refresh_query.safe_substitute(
+        node_label=node_label,
+        relationship_name=relationship_name,
+    )
+    load_batched(neo4j_session, refresh_query, principal_arns, AccountId=account_id, aws_update_tag=update_tag)
+
+
 def sync(neo4j_session, account_id, update_tag, common_job_parameters):
     logger.info("Syncing Permission Relationships for account '%s'.", account_id)
     principals = get_principals_for_account(neo4j_session, account_id)
@@ -348,14 +861,70 @@ def sync(neo4j_session, account_id, update_tag, common_job_parameters):
         Resource permission relationship is missing fields.
         Required fields: permissions, relationship_name, target_label"
         """)
-        permissions = rpr["permissions"]
+
+    # In incremental mode, relationships whose permissions and target resources are the same as in the last sync are
+    # only evaluated again for the principals whose policies changed since. The relationships of the other principals
+    # are still valid and only get their lastupdated bumped.
+    principal_fingerprints = {arn: principal_fingerprint(policies) for arn, policies in principals.items()}
+    incremental = common_job_parameters.get("permission_relationships_incremental")
+    stored_principal_fingerprints, stored_relationship_fingerprints = {}, set()
+    if incremental:
+        stored_principal_fingerprints, stored_relationship_fingerprints = get_fingerprints(neo4j_session, account_id)
+    # Forget the relationship fingerprints until all mappings are loaded, so that the next sync does not take the
+    # relationships of a sync that failed half way for complete ones.
+    load_relationship_fingerprints(neo4j_session, account_id, [])
+    unchanged_principal_arns = sorted(
+        arn for arn, fingerprint in principal_fingerprints.items()
+        if stored_principal_fingerprints.get(arn) == fingerprint
+    )
+    changed_principals = {
+        arn: policies for arn, policies in principals.items()
+        if stored_principal_fingerprints.get(arn) != principal_fingerprints[arn]
+    }
+    if incremental:
+        logger.info(
+            "Policies of %d of %d principals changed since the last sync of account '%s'.",
+            len(changed_principals), len(principals), account_id,
+        )
+
+    relationships = []
+    relationship_fingerprints = set()
+    for rpr in relationship_mapping:
+        resource_arns = get_resource_arns(neo4j_session, account_id, rpr["target_label"])
+        fingerprint = relationship_fingerprint(rpr, resource_arns)
+        relationship_fingerprints.add(fingerprint)
+        if fingerprint in stored_relationship_fingerprints:
+            logger.info(
+                "Refreshing relationship '%s' for node label '%s' of unchanged principals",
+                rpr["relationship_name"], rpr["target_label"],
+            )
+            refresh_principal_mappings(
+                neo4j_session, account_id, unchanged_principal_arns,
+                rpr["target_label"], rpr["relationship_name"], update_tag,
+            )
+            relationships.append((changed_principals, rpr["permissions"], resource_arns))
+        else:
+            relationships.append((principals, rpr["permissions"], resource_arns))
+
+    workers = common_job_parameters.get("permission_relationships_workers") or 1
+    if workers > 1 and relationships:
+        # The mappings are loaded on this thread, chunk by chunk, while the workers evaluate the remaining chunks.
+        results = calculate_permission_relationships_in_processes(relationships, workers, worker_pool)
+    else:
+        results = (
+            [calculate_permission_relationships(principals, resource_arns, permissions)]
+            for principals, permissions, resource_arns in relationships
+        )
+    for rpr, chunks in zip(relationship_mapping, results):
         relationship_name = rpr["relationship_name"]
         target_label = rpr["target_label"]
-        resource_arns = get_resource_arns(neo4j_session, account_id, target_label)
         logger.info("Syncing relationship '%s' for node label '%s'", relationship_name, target_label)
-        allowed_mappings = calculate_permission_relationships(principals, resource_arns, permissions)
-        load_principal_mappings(
-            neo4j_session, allowed_mappings,
-            target_label, relationship_name, update_tag,
-        )
+        for allowed_mappings in chunks:
+            load_principal_mappings(
+                neo4j_session, allowed_mappings,
+                target_label, relationship_name, update_tag,
+            )
         cleanup_rpr(neo4j_session, target_label, relationship_name, update_tag, account_id)
+    load_principal_fingerprints(neo4j_session, account_id, principal_fingerprints)
+    load_relationship_fingerprints(neo4j_session, account_id, relationship_fingerprints)
+    _log_matcher_cache_stats()
@@ -0,0 +1,216 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from functools import partial
+
+import cartography.replay
+import cartography.util
+
+logger = logging.getLogger(__name__)
+
+# The maximum number of requests per second to send to each service in each region of each account. This is set from
+# cartography.config.Config.aws_rate_limit when the AWS sync starts. None means requests are not limited, but throttling
+# is still counted.
+max_rate = None
+
+# The lowest rate that throttling can push a limiter down to, in requests per second.
+MIN_RATE = 0.5
+
+# After a throttled request the rate is multiplied by this factor, and every successful request adds this fraction of
+# max_rate back, up to max_rate.
+THROTTLE_DECREASE_FACTOR = 0.5
+SUCCESS_INCREASE_FRACTION = 0.05
+
+# The total number of attempts that botocore makes by default in the legacy and in the standard retry mode, when the
+# client config does not set them.
+LEGACY_MAX_ATTEMPTS = 5
+STANDARD_MAX_ATTEMPTS = 3
+
+# Error codes that AWS services use to signal that a request was throttled.
+THROTTLING_ERROR_CODES = frozenset([
+    'BandwidthLimitExceeded',
+    'EC2ThrottledException',
+    'LimitExceededException',
+    'PriorRequestNotComplete',
+    'ProvisionedThroughputExceededException',
+    'RequestLimitExceeded',
+    'RequestThrottled',
+    'RequestThrottledException',
+    'SlowDown',
+    'ThrottledException',
+    'Throttling',
+    'ThrottlingException',
+    'TooManyRequestsException',
+])
+
+
+class TokenBucket:
+    """
+    A token bucket that allows `rate` requests per second on average and bursts of up to `rate` requests. Its rate
+    is halved when a request is throttled and recovers gradually as requests succeed.
+
+    :type rate: float
+    :param rate: The maximum number of requests per second.
+    """
+
+    def __init__(self, rate):
+        self.max_rate = rate
+        self.rate = rate
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take a token, waiting for one to become available if necessary.
+        :return: The number of seconds waited.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token even if it is not there yet, so that waiting requests are served in order.
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def throttled(self):
+        with self._lock:
+            self.rate = max(MIN_RATE, self.rate * THROTTLE_DECREASE_FACTOR)
+
+    def succeeded(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * SUCCESS_INCREASE_FRACTION)
+
+
+class _Stats:
+    def __init__(self):
+        self.requests = 0
+        self.throttles = 0
+        self.wait_seconds = 0.0
+
+
+_lock = threading.Lock()
+_buckets = {}
+_stats = defaultdict(_Stats)
+
+
+def _key(account_id, context, service_name):
+    return account_id, service_name, context.get('client_region') or 'global'
+
+
+def _bucket(key):
+    with _lock:
+        if key not in _buckets:
+            _buckets[key] = TokenBucket(max_rate)
+        return _buckets[key]
+
+
+def _before_call(account_id, model, context, **kwargs):
+    key = _key(account_id, context, model.service_model.service_name)
+    wait = _bucket(key).acquire() if max_rate else 0.0
+    with _lock:
+        stats = _stats[key]
+        stats.requests += 1
+        stats.wait_seconds += wait
+
+
+def _after_call(account_id, http_response, model, context, **kwargs):
+    if max_rate and http_response.status_code < 400:
+        _bucket(_key(account_id, context, model.service_model.service_name)).succeeded()
+
+
+def _max_attempts(context):
+    config = context.get('client_config')
+    retries = (config.retries if config else None) or {}
+    if retries.get('total_max_attempts') is not None:
+        return retries['total_max_attempts']
+    if retries.get('max_attempts') is not None:
+        # The max_attempts of a client config counts the retries only.
+        return retries['max_attempts'] + 1
+    if retries.get('mode') in ('standard', 'adaptive'):
+        return STANDARD_MAX_ATTEMPTS
+    return LEGACY_MAX_ATTEMPTS
+
+
+def _needs_retry(account_id, response, operation, request_dict, attempts, **kwargs):
+    # botocore emits this after every attempt, before its own retry handler decides whether and when to retry.
+    if response is None:
+        return None
+    error_code = response[1].get('Error', {}).get('Code')
+    if error_code not in THROTTLING_ERROR_CODES:
+        return None
+    context = request_dict['context']
+    key = _key(account_id, context, operation.service_model.service_name)
+    with _lock:
+        _stats[key].throttles += 1
+    if max_rate:
+        bucket = _bucket(key)
+        bucket.throttled()
+        if attempts >= _max_attempts(context):
+            # botocore gives up after this attempt, so there is no retry to wait for.
+            return None
+        # The retry also has to wait for a token.
+        wait = bucket.acquire()
+        with _lock:
+            _stats[key].wait_seconds += wait
+    return None
+
+
+def register_boto3_session(boto3_session, account_id):
+    """
+    Count the requests and throttled responses of all clients that are created from the given boto3 session from now
+    on, and limit their request rate per service and region if `max_rate` is set. Does nothing when replaying
+    recorded responses.
+    :param boto3_session: The boto3 session
+    :param account_id: The AWS account ID of the session
+    """
+    if cartography.replay.is_replaying():
+        return
+    events = boto3_session.events
+    events.register('before-call', partial(_before_call, account_id))
+    events.register('after-call', partial(_after_call, account_id))
+    events.register('needs-retry', partial(_needs_retry, account_id))
+
+
+def reset():
+    """
+    Forget the limiters and statistics of the previous run.
+    """
+    with _lock:
+        _buckets.clear()
+        _stats.clear()
+
+
+def report():
+    """
+    Log the number of requests, throttled responses and time spent waiting for the rate limiter per account, service
+    and region since the last reset, and send the totals per service to statsd if it is enabled.
+    """
+    with _lock:
+        stats = sorted(_stats.items())
+    totals = defaultdict(_Stats)
+    for (account_id, service_name, region), s in stats:
+        if s.throttles or s.wait_seconds:
+            logger.info(
+                "AWS %s in %s for account %s: %d requests, %d throttled, %.1f seconds waiting for the rate limiter.",
+                service_name, region, account_id, s.requests, s.throttles, s.wait_seconds,
+            )
+        total = totals[service_name]
+        total.requests += s.requests
+        total.throttles += s.throttles
+        total.wait_seconds += s.wait_seconds
+    if cartography.util.stats_client:
+        for service_name, total in totals.items():
+            cartography.util.stats_client.gauge(f"{__name__}.{service_name}.requests", total.requests)
+            cartography.util.stats_client.gauge(f"{__name__}.{service_name}.throttles", total.throttles)
+            cartography.util.stats_client.gauge(f"{__name__}.{service_name}.wait_ms", int(total.wait_seconds * 1000))
+    throttles = sum(total.throttles for total in totals.values())
+    wait_seconds = sum(total.wait_seconds for total in totals.values())
+    logger.info(
+        "AWS sync sent %d requests, of which %d were throttled, and waited %.1f seconds for the rate limiter.",
+        sum(total.requests for total in totals.values()), throttles, wait_seconds,
+    )
@@ -1,6 +1,9 @@
 import logging
 
+from cartography.intel.aws.util import get_client
+from cartography.util import aws_fetch_regions
 from cartography.util import aws_handle_regions
+from cartography.util import load_batched
 from cartography.util import run_cleanup_job
 from cartography.util import timeit
 
@@ -13,7 +16,7 @@ def get_rds_instance_data(boto3_session, region):
     """
     Create an RDS boto3 client and grab all the DBInstances.
     """
-    client = boto3_session.client('rds', region_name=region)
+    client = get_client(boto3_session, 'rds', region_name=region)
     paginator = client.get_paginator('describe_db_instances')
     instances = []
     for page in paginator.paginate():
@@ -28,39 +31,40 @@ def load_rds_instances(neo4j_session, data, region, current_aws_account_id, aws_
     Ingest the RDS instances to neo4j and link them to necessary nodes.
     """
     ingest_rds_instance = """
-    MERGE (rds:RDSInstance{id: {DBInstanceArn}})
+    UNWIND {Rows} AS row
+    MERGE (rds:RDSInstance{id: row.DBInstanceArn})
     ON CREATE SET rds.firstseen = timestamp()
-    SET rds.arn = {DBInstanceArn},
-    rds.db_instance_identifier = {DBInstanceIdentifier},
-    rds.db_instance_class = {DBInstanceClass},
-    rds.engine = {Engine},
-    rds.master_username = {MasterUsername},
-    rds.db_name = {DBName},
-    rds.instance_create_time = {InstanceCreateTime},
-    rds.availability_zone = {AvailabilityZone},
-    rds.multi_az = {MultiAZ},
-    rds.engine_version = {EngineVersion},
-    rds.publicly_accessible = {PubliclyAccessible},
-    rds.db_cluster_identifier = {DBClusterIdentifier},
-    rds.storage_encrypted = {StorageEncrypted},
-    rds.kms_key_id = {KmsKeyId},
-    rds.dbi_resource_id = {DbiResourceId},
-    rds.ca_certificate_identifier = {CACertificateIdentifier},
-    rds.enhanced_monitoring_resource_arn = {EnhancedMonitoringResourceArn},
-    rds.monitoring_role_arn = {MonitoringRoleArn},
-    rds.performance_insights_enabled = {PerformanceInsightsEnabled},
-    rds.performance_insights_kms_key_id = {PerformanceInsightsKMSKeyId},
+    SET rds.arn = row.DBInstanceArn,
+    rds.db_instance_identifier = row.DBInstanceIdentifier,
+    rds.db_instance_class = row.DBInstanceClass,
+    rds.engine = row.Engine,
+    rds.master_username = row.MasterUsername,
+    rds.db_name = row.DBName,
+    rds.instance_create_time = row.InstanceCreateTime,
+    rds.availability_zone = row.AvailabilityZone,
+    rds.multi_az = row.MultiAZ,
+    rds.engine_version = row.EngineVersion,
+    rds.publicly_accessible = row.PubliclyAccessible,
+    rds.db_cluster_identifier = row.DBClusterIdentifier,
+    rds.storage_encrypted = row.StorageEncrypted,
+    rds.kms_key_id = row.KmsKeyId,
+    rds.dbi_resource_id = row.DbiResourceId,
+    rds.ca_certificate_identifier = row.CACertificateIdentifier,
+    rds.enhanced_monitoring_resource_arn = row.EnhancedMonitoringResourceArn,
+    rds.monitoring_role_arn = row.MonitoringRoleArn,
+    rds.performance_insights_enabled = row.PerformanceInsightsEnabled,
+    rds.performance_insights_kms_key_id = row.PerformanceInsightsKMSKeyId,
     rds.region = {Region},
-    rds.deletion_protection = {DeletionProtection},
-    rds.preferred_backup_window = {PreferredBackupWindow},
-    rds.latest_restorable_time = {LatestRestorableTime},
-    rds.preferred_maintenance_window = {PreferredMaintenanceWindow},
-    rds.backup_retention_period = {BackupRetentionPeriod},
-    rds.endpoint_address = {EndpointAddress},
-    rds.endpoint_hostedzoneid = {EndpointHostedZoneId},
-    rds.endpoint_port = {EndpointPort},
-    rds.iam_database_authentication_enabled = {IAMDatabaseAuthenticationEnabled},
-    rds.auto_minor_version_upgrade = {AutoMinorVersionUpgrade},
+    rds.deletion_protection = row.DeletionProtection,
+    rds.preferred_backup_window = row.PreferredBackupWindow,
+    rds.latest_restorable_time = row.LatestRestorableTime,
+    rds.preferred_maintenance_window = row.PreferredMaintenanceWindow,
+    rds.backup_retention_period = row.BackupRetentionPeriod,
+    rds.endpoint_address = row.EndpointAddress,
+    rds.endpoint_hostedzoneid = row.EndpointHostedZoneId,
+    rds.endpoint_port = row.EndpointPort,
+    rds.iam_database_authentication_enabled = row.IAMDatabaseAuthenticationEnabled,
+    rds.auto_minor_version_upgrade = row.AutoMinorVersionUpgrade,
     rds.lastupdated = {aws_update_tag}
     WITH rds
     MATCH (aa:AWSAccount{id: {AWS_ACCOUNT_ID}})
@@ -69,6 +73,7 @@ def load_rds_instances(neo4j_session, data, region, current_aws_account_id, aws_
     SET r.lastupdated = {aws_update_tag}
     """
     read_replicas = []
+    rows = []
 
     for rds in data:
         instance_create_time = str(rds['InstanceCreateTime']) if 'InstanceCreateTime' in rds else None
@@ -80,86 +85,95 @@ def load_rds_instances(neo4j_session, data, region, current_aws_account_id, aws_
         if rds.get("ReadReplicaSourceDBInstanceIdentifier"):
             read_replicas.append(rds)
 
-        neo4j_session.run(
-            ingest_rds_instance,
-            DBInstanceArn=rds['DBInstanceArn'],
-            DBInstanceIdentifier=rds['DBInstanceIdentifier'],
-            DBInstanceClass=rds.get('DBInstanceClass'),
-            Engine=rds.get('Engine'),
-            MasterUsername=rds.get('MasterUsername'),
-            DBName=rds.get('DBName'),
-            InstanceCreateTime=instance_create_time,
-            AvailabilityZone=rds.get('AvailabilityZone'),
-            MultiAZ=rds.get('MultiAZ'),
-            EngineVersion=rds.get('EngineVersion'),
-            PubliclyAccessible=rds.get('PubliclyAccessible'),
-            DBClusterIdentifier=rds.get('DBClusterIdentifier'),
-            StorageEncrypted=rds.get('StorageEncrypted'),
-            KmsKeyId=rds.get('KmsKeyId'),
-            DbiResourceId=rds.get('DbiResourceId'),
-            CACertificateIdentifier=rds.get('CACertificateIdentifier'),
-            EnhancedMonitoringResourceArn=rds.get('EnhancedMonitoringResourceArn'),
-            MonitoringRoleArn=rds.get('MonitoringRoleArn'),
-            PerformanceInsightsEnabled=rds.get('PerformanceInsightsEnabled'),
-            PerformanceInsightsKMSKeyId=rds.get('PerformanceInsightsKMSKeyId'),
-            DeletionProtection=rds.get('DeletionProtection'),
-            BackupRetentionPeriod=rds.get('BackupRetentionPeriod'),
-            PreferredBackupWindow=rds.get('PreferredBackupWindow'),
-            LatestRestorableTime=latest_restorable_time,
-            PreferredMaintenanceWindow=rds.get('PreferredMaintenanceWindow'),
-            EndpointAddress=ep.get('Address'),
-            EndpointHostedZoneId=ep.get('HostedZoneId'),
-            EndpointPort=ep.get('Port'),
-            IAMDatabaseAuthenticationEnabled=rds.get('IAMDatabaseAuthenticationEnabled'),
-            AutoMinorVersionUpgrade=rds.get('AutoMinorVersionUpgrade'),
-            Region=region,
-            AWS_ACCOUNT_ID=current_aws_account_id,
-            aws_update_tag=aws_update_tag,
-        )
-        _attach_ec2_security_groups(neo4j_session, rds, aws_update_tag)
-        _attach_ec2_subnet_groups(neo4j_session, rds, region, current_aws_account_id, aws_update_tag)
+        rows.append({
+            'DBInstanceArn': rds['DBInstanceArn'],
+            'DBInstanceIdentifier': rds['DBInstanceIdentifier'],
+            'DBInstanceClass': rds.get('DBInstanceClass'),
+            'Engine': rds.get('Engine'),
+            'MasterUsername': rds.get('MasterUsername'),
+            'DBName': rds.get('DBName'),
+            'InstanceCreateTime': instance_create_time,
+            'AvailabilityZone': rds.get('AvailabilityZone'),
+            'MultiAZ': rds.get('MultiAZ'),
+            'EngineVersion': rds.get('EngineVersion'),
+            'PubliclyAccessible': rds.get('PubliclyAccessible'),
+            'DBClusterIdentifier': rds.get('DBClusterIdentifier'),
+            'StorageEncrypted': rds.get('StorageEncrypted'),
+            'KmsKeyId': rds.get('KmsKeyId'),
+            'DbiResourceId': rds.get('DbiResourceId'),
+            'CACertificateIdentifier': rds.get('CACertificateIdentifier'),
+            'EnhancedMonitoringResourceArn': rds.get('EnhancedMonitoringResourceArn'),
+            'MonitoringRoleArn': rds.get('MonitoringRoleArn'),
+            'PerformanceInsightsEnabled': rds.get('PerformanceInsightsEnabled'),
+            'PerformanceInsightsKMSKeyId': rds.get('PerformanceInsightsKMSKeyId'),
+            'DeletionProtection': rds.get('DeletionProtection'),
+            'BackupRetentionPeriod': rds.get('BackupRetentionPeriod'),
+            'PreferredBackupWindow': rds.get('PreferredBackupWindow'),
+            'LatestRestorableTime': latest_restorable_time,
+            'PreferredMaintenanceWindow': rds.get('PreferredMaintenanceWindow'),
+            'EndpointAddress': ep.get('Address'),
+            'EndpointHostedZoneId': ep.get('HostedZoneId'),
+            'EndpointPort': ep.get('Port'),
+            'IAMDatabaseAuthenticationEnabled': rds.get('IAMDatabaseAuthenticationEnabled'),
+            'AutoMinorVersionUpgrade': rds.get('AutoMinorVersionUpgrade'),
+        })
+
+    load_batched(
+        neo4j_session,
+        ingest_rds_instance,
+        rows,
+        Region=region,
+        AWS_ACCOUNT_ID=current_aws_account_id,
+        aws_update_tag=aws_update_tag,
+    )
+    _attach_ec2_security_groups(neo4j_session, data, aws_update_tag)
+    _attach_ec2_subnet_groups(neo4j_session, data, region, current_aws_account_id, aws_update_tag)
     _attach_read_replicas(neo4j_session, read_replicas, aws_update_tag)
 
 
 @timeit
-def _attach_ec2_subnet_groups(neo4j_session, instance, region, current_aws_account_id, aws_update_tag):
+def _attach_ec2_subnet_groups(neo4j_session, instances, region, current_aws_account_id, aws_update_tag):
     """
-    Attach RDS instance to its EC2 subnets
+    Attach RDS instances to their EC2 subnets
     """
     attach_rds_to_subnet_group = """
-    MERGE(sng:DBSubnetGroup{id:{sng_arn}})
+    UNWIND {Rows} AS row
+    MERGE(sng:DBSubnetGroup{id:row.sng_arn})
     ON CREATE SET sng.firstseen = timestamp()
-    SET sng.name = {DBSubnetGroupName},
-    sng.vpc_id = {VpcId},
-    sng.description = {DBSubnetGroupDescription},
-    sng.status = {DBSubnetGroupStatus},
+    SET sng.name = row.DBSubnetGroupName,
+    sng.vpc_id = row.VpcId,
+    sng.description = row.DBSubnetGroupDescription,
+    sng.status = row.DBSubnetGroupStatus,
     sng.lastupdated = {aws_update_tag}
-    WITH sng
-    MATCH(rds:RDSInstance{id:{DBInstanceArn}})
+    WITH sng, row
+    MATCH(rds:RDSInstance{id:row.DBInstanceArn})
     MERGE(rds)-[r:MEMBER_OF_DB_SUBNET_GROUP]->(sng)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {aws_update_tag}
     """
-    if 'DBSubnetGroup' in instance:
-        db_sng = instance['DBSubnetGroup']
-        arn = _get_db_subnet_group_arn(region, current_aws_account_id, db_sng['DBSubnetGroupName'])
-        neo4j_session.run(
-            attach_rds_to_subnet_group,
-            sng_arn=arn,
-            DBSubnetGroupName=db_sng['DBSubnetGroupName'],
-            VpcId=db_sng.get("VpcId"),
-            DBSubnetGroupDescription=db_sng.get('DBSubnetGroupDescription'),
-            DBSubnetGroupStatus=db_sng.get('SubnetGroupStatus'),
-            DBInstanceArn=instance['DBInstanceArn'],
-            aws_update_tag=aws_update_tag,
-        )
-        _attach_ec2_subnets_to_subnetgroup(neo4j_session, db_sng, region, current_aws_account_id, aws_update_tag)
+    rows = []
+    db_subnet_groups = []
+    for instance in instances:
+        if 'DBSubnetGroup' in instance:
+            db_sng = instance['DBSubnetGroup']
+            arn = _get_db_subnet_group_arn(region, current_aws_account_id, db_sng['DBSubnetGroupName'])
+            rows.append({
+                'sng_arn': arn,
+                'DBSubnetGroupName': db_sng['DBSubnetGroupName'],
+                'VpcId': db_sng.get("VpcId"),
+                'DBSubnetGroupDescription': db_sng.get('DBSubnetGroupDescription'),
+                'DBSubnetGroupStatus': db_sng.get('SubnetGroupStatus'),
+                'DBInstanceArn': instance['DBInstanceArn'],
+            })
+            db_subnet_groups.append(db_sng)
+    load_batched(neo4j_session, attach_rds_to_subnet_group, rows, aws_update_tag=aws_update_tag)
+    _attach_ec2_subnets_to_subnetgroup(neo4j_session, db_subnet_groups, region, current_aws_account_id, aws_update_tag)
 
 
 @timeit
-def _attach_ec2_subnets_to_subnetgroup(neo4j_session, db_subnet_group, region, current_aws_account_id, aws_update_tag):
+def _attach_ec2_subnets_to_subnetgroup(neo4j_session, db_subnet_groups, region, current_aws_account_id, aws_update_tag):
     """
-    Attach EC2Subnets to the DB Subnet Group.
+    Attach EC2Subnets to the DB Subnet Groups.
 
     From https://docs.aws.amazon.com/AmazonRDS/latest/UserGuide/USER_VPC.WorkingWithRDSInstanceinaVPC.html:
     `Each DB subnet group should have subnets in at least two Availability Zones in a given region. When creating a DB
@@ -167,46 +181,47 @@ def _attach_ec2_subnets_to_subnetgroup(neo4j_session, db_subnet_group, region, c
     Availability Zone to select a subnet and an IP address within that subnet to associate with your DB instance.`
     """
     attach_subnets_to_sng = """
-    MATCH(sng:DBSubnetGroup{id:{sng_arn}})
-    MERGE(subnet:EC2Subnet{subnetid:{SubnetIdentifier}})
+    UNWIND {Rows} AS row
+    MATCH(sng:DBSubnetGroup{id:row.sng_arn})
+    MERGE(subnet:EC2Subnet{subnetid:row.SubnetIdentifier})
     ON CREATE SET subnet.firstseen = timestamp()
     MERGE(sng)-[r:RESOURCE]->(subnet)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {aws_update_tag},
-    subnet.availability_zone = {SubnetAvailabilityZone},
+    subnet.availability_zone = row.SubnetAvailabilityZone,
     subnet.lastupdated = {aws_update_tag}
     """
-    for sn in db_subnet_group.get('Subnets', []):
-        subnet_id = sn.get('SubnetIdentifier')
+    rows = []
+    for db_subnet_group in db_subnet_groups:
         arn = _get_db_subnet_group_arn(region, current_aws_account_id, db_subnet_group['DBSubnetGroupName'])
-        neo4j_session.run(
-            attach_subnets_to_sng,
-            SubnetIdentifier=subnet_id,
-            sng_arn=arn,
-            aws_update_tag=aws_update_tag,
-            SubnetAvailabilityZone=sn.get('SubnetAvailabilityZone', {}).get('Name'),
-        )
+        for sn in db_subnet_group.get('Subnets', []):
+            rows.append({
+                'SubnetIdentifier': sn.get('SubnetIdentifier'),
+                'sng_arn': arn,
+                'SubnetAvailabilityZone': sn.get('SubnetAvailabilityZone', {}).get('Name'),
+            })
+    load_batched(neo4j_session, attach_subnets_to_sng, rows, aws_update_tag=aws_update_tag)
 
 
 @timeit
-def _attach_ec2_security_groups(neo4j_session, instance, aws_update_tag):
+def _attach_ec2_security_groups(neo4j_session, instances, aws_update_tag):
     """
-    Attach an RDS instance to its EC2SecurityGroups
+    Attach RDS instances to their EC2SecurityGroups
     """
     attach_rds_to_group = """
-    MATCH (rds:RDSInstance{id:{RdsArn}})
-    MERGE (sg:EC2SecurityGroup{id:{GroupId}})
+    UNWIND {Rows} AS row
+    MATCH (rds:RDSInstance{id:row.RdsArn})
+    MERGE (sg:EC2SecurityGroup{id:row.GroupId})
     MERGE (rds)-[m:MEMBER_OF_EC2_SECURITY_GROUP]->(sg)
     ON CREATE SET m.firstseen = timestamp()
     SET m.lastupdated = {aws_update_tag}
     """
-    for group in instance.get('VpcSecurityGroups', []):
-        neo4j_session.run(
-            attach_rds_to_group,
-            RdsArn=instance['DBInstanceArn'],
-            GroupId=group['VpcSecurityGroupId'],
-            aws_update_tag=aws_update_tag,
-        )
+    rows = [
+        {'RdsArn': instance['DBInstanceArn'], 'GroupId': group['VpcSecurityGroupId']}
+        for instance in instances
+        for group in instance.get('VpcSecurityGroups', [])
+    ]
+    load_batched(neo4j_session, attach_rds_to_group, rows, aws_update_tag=aws_update_tag)
 
 
 @timeit
@@ -215,19 +230,20 @@ def _attach_read_replicas(neo4j_session, read_replicas, aws_update_tag):
     Attach read replicas to their source instances
     """
     attach_replica_to_source = """
-    MATCH (replica:RDSInstance{id:{ReplicaArn}}),
-    (source:RDSInstance{db_instance_identifier:{SourceInstanceIdentifier}})
+    UNWIND {Rows} AS row
+    MATCH (replica:RDSInstance{id:row.ReplicaArn}),
+    (source:RDSInstance{db_instance_identifier:row.SourceInstanceIdentifier})
     MERGE (replica)-[r:IS_READ_REPLICA_OF]->(source)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {aws_update_tag}
     """
-    for replica in read_replicas:
-        neo4j_session.run(
-            attach_replica_to_source,
-            ReplicaArn=replica['DBInstanceArn'],
-            SourceInstanceIdentifier=replica['ReadReplicaSourceDBInstanceIdentifier'],
-            aws_update_tag=aws_update_tag,
-        )
+    rows = [
+        {
+            'ReplicaArn': replica['DBInstanceArn'],
+            'SourceInstanceIdentifier': replica['ReadReplicaSourceDBInstanceIdentifier'],
+        } for replica in read_replicas
+    ]
+    load_batched(neo4j_session, attach_replica_to_source, rows, aws_update_tag=aws_update_tag)
 
 
 def _validate_rds_endpoint(rds):
@@ -267,9 +283,8 @@ def sync_rds_instances(
     """
     Grab RDS instance data from AWS, ingest to neo4j, and run the cleanup job.
     """
-    for region in regions:
+    for region, data in aws_fetch_regions(get_rds_instance_data, boto3_session, regions):
         logger.info("Syncing RDS for region '%s' in account '%s'.", region, current_aws_account_id)
-        data = get_rds_instance_data(boto3_session, region)
         load_rds_instances(neo4j_session, data, region, current_aws_account_id, aws_update_tag)
     cleanup_rds_instances_and_db_subnet_groups(neo4j_session, common_job_parameters)
 
@@ -1,7 +1,9 @@
 import logging
 
+from cartography.intel.aws.util import get_client
 from cartography.util import aws_handle_regions
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -10,7 +12,7 @@ logger = logging.getLogger(__name__)
 @timeit
 @aws_handle_regions
 def get_redshift_cluster_data(boto3_session, region):
-    client = boto3_session.client('redshift', region_name=region)
+    client = get_client(boto3_session, 'redshift', region_name=region)
     paginator = client.get_paginator('describe_clusters')
     clusters = []
     for page in paginator.paginate():
@@ -58,7 +60,8 @@ def load_redshift_cluster_data(neo4j_session, clusters, region, current_aws_acco
     SET r.lastupdated = {aws_update_tag}
     """
     for cluster in clusters:
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             ingest_cluster,
             Arn=cluster['arn'],
             AZ=cluster['AvailabilityZone'],
@@ -94,7 +97,8 @@ def _attach_ec2_security_groups(neo4j_session, cluster, aws_update_tag):
     SET m.lastupdated = {aws_update_tag}
     """
     for group in cluster.get('VpcSecurityGroups', []):
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             attach_cluster_to_group,
             ClusterArn=cluster['arn'],
             GroupId=group['VpcSecurityGroupId'],
@@ -112,7 +116,8 @@ def _attach_iam_roles(neo4j_session, cluster, aws_update_tag):
     SET s.lastupdated = {aws_update_tag}
     """
     for role in cluster.get('IamRoles', []):
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             attach_cluster_to_role,
             ClusterArn=cluster['arn'],
             RoleArn=role['IamRoleArn'],
@@ -130,7 +135,8 @@ def _attach_aws_vpc(neo4j_session, cluster, aws_update_tag):
     SET m.lastupdated = {aws_update_tag}
     """
     if cluster.get('VpcId'):
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             attach_cluster_to_vpc,
             ClusterArn=cluster['arn'],
             VpcId=cluster['VpcId'],
@@ -1,8 +1,14 @@
 import logging
+import re
+from collections import defaultdict
 from string import Template
 
+from cartography.intel.aws.util import get_client
+from cartography.util import aws_fetch_regions
 from cartography.util import aws_handle_regions
+from cartography.util import load_batched
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -58,7 +64,7 @@ def get_tags(boto3_session, resource_types, region):
     """
     Create boto3 client and retrieve tag data.
     """
-    client = boto3_session.client('resourcegroupstaggingapi', region_name=region)
+    client = get_client(boto3_session, 'resourcegroupstaggingapi', region_name=region)
     paginator = client.get_paginator('get_resources')
     resources = []
     for page in paginator.paginate(
@@ -70,6 +76,78 @@ def get_tags(boto3_session, resource_types, region):
     return resources
 
 
+def get_resource_type_from_arn(arn):
+    """
+    Return the key of TAG_RESOURCE_TYPE_MAPPINGS that the resource with the given ARN belongs to, or None if its type
+    is not supported.
+    For example, for "arn:aws:rds:us-east-1:1234:db:rds-db-1", return 'rds:db'.
+    :param arn: The ARN
+    :return: The resource type
+    """
+    parts = arn.split(':', 5)
+    if len(parts) < 6:
+        return None
+    service = parts[2]
+    if service in TAG_RESOURCE_TYPE_MAPPINGS:
+        return service
+    resource_type = f"{service}:{re.split('[/:]', parts[5], 1)[0]}"
+    return resource_type if resource_type in TAG_RESOURCE_TYPE_MAPPINGS else None
+
+
+@timeit
+@aws_handle_regions
+def get_tags_for_all_types(boto3_session, region):
+    """
+    Retrieve the tag data of all supported resource types in the region with a single paginated get_resources call.
+    """
+    return get_tags(boto3_session, list(TAG_RESOURCE_TYPE_MAPPINGS), region)
+
+
+@timeit
+def transform_tags_by_label(tag_data_by_region):
+    """
+    Partition tag data of all supported resource types by the label and id property of their nodes, so that the tags
+    of every label can be loaded with one query.
+    :param tag_data_by_region: A list of (region, tag data) tuples.
+    :return: A dict of (label, property) to a list of tag mappings, each with its resource_id and region.
+    """
+    tag_data_by_label = defaultdict(list)
+    for region, tag_data in tag_data_by_region:
+        for tag_mapping in tag_data:
+            resource_type = get_resource_type_from_arn(tag_mapping['ResourceARN'])
+            if resource_type is None:
+                logger.debug("Skipping tags of unsupported resource %s.", tag_mapping['ResourceARN'])
+                continue
+            mapping = TAG_RESOURCE_TYPE_MAPPINGS[resource_type]
+            tag_mapping['resource_id'] = compute_resource_id(tag_mapping, resource_type)
+            tag_mapping['region'] = region
+            tag_data_by_label[(mapping['label'], mapping['property'])].append(tag_mapping)
+    return tag_data_by_label
+
+
+@timeit
+def load_tags_by_label(neo4j_session, tag_data_by_label, aws_update_tag):
+    INGEST_TAG_TEMPLATE = Template("""
+    UNWIND {Rows} as tag_mapping
+        UNWIND tag_mapping.Tags as input_tag
+            MATCH (resource:$resource_label{$property:tag_mapping.resource_id})
+            MERGE(aws_tag:AWSTag:Tag{id:input_tag.Key + ":" + input_tag.Value})
+            ON CREATE SET aws_tag.firstseen = timestamp()
+
+            SET aws_tag.lastupdated = {UpdateTag},
+            aws_tag.key = input_tag.Key,
+            aws_tag.value =  input_tag.Value,
+            aws_tag.region = tag_mapping.region
+
+            MERGE (resource)-[r:TAGGED]->(aws_tag)
+            SET r.lastupdated = {UpdateTag},
+            r.firstseen = timestamp()
+    """)
+    for (label, property), tag_data in tag_data_by_label.items():
+        query = INGEST_TAG_TEMPLATE.safe_substitute(resource_label=label, property=property)
+        load_batched(neo4j_session, query, tag_data, UpdateTag=aws_update_tag)
+
+
 @timeit
 def load_tags(neo4j_session, tag_data, resource_type, region, aws_update_tag):
     INGEST_TAG_TEMPLATE = Template("""
@@ -92,7 +170,8 @@ def load_tags(neo4j_session, tag_data, resource_type, region, aws_update_tag):
         resource_label=TAG_RESOURCE_TYPE_MAPPINGS[resource_type]['label'],
         property=TAG_RESOURCE_TYPE_MAPPINGS[resource_type]['property'],
     )
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         query,
         TagData=tag_data,
         UpdateTag=aws_update_tag,
@@ -119,8 +198,19 @@ def cleanup(neo4j_session, common_job_parameters):
     run_cleanup_job('aws_import_tags_cleanup.json', neo4j_session, common_job_parameters)
 
 
+def _sync_all_types(neo4j_session, boto3_session, regions, aws_update_tag):
+    logger.info("Syncing AWS tags of all resource types for %d regions.", len(regions))
+    tag_data_by_region = aws_fetch_regions(get_tags_for_all_types, boto3_session, regions)
+    tag_data_by_label = transform_tags_by_label(tag_data_by_region)
+    load_tags_by_label(neo4j_session, tag_data_by_label, aws_update_tag)
+
+
 @timeit
 def sync(neo4j_session, boto3_session, regions, aws_update_tag, common_job_parameters):
+    if common_job_parameters.get('aws_tags_all_types'):
+        _sync_all_types(neo4j_session, boto3_session, regions, aws_update_tag)
+        cleanup(neo4j_session, common_job_parameters)
+        return
     for region in regions:
         logger.info("Syncing AWS tags for region '%s'.", region)
         for resource_type in TAG_RESOURCE_TYPE_MAPPINGS.keys():
@@ -1,111 +1,126 @@
 import logging
-
+from collections import defaultdict
+from functools import partial
+from string import Template
+
+from cartography.intel.aws.ec2.util import get_botocore_config
+from cartography.intel.aws.util import get_client
+from cartography.intel.aws.util import map_concurrently
+from cartography.util import load_batched
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
 
 
-@timeit
-def link_aws_resources(neo4j_session, update_tag):
-    # find records that point to other records
-    link_records = """
-    MATCH (n:AWSDNSRecord) WITH n MATCH (v:AWSDNSRecord{value: n.name})
-    WHERE NOT n = v
-    MERGE (v)-[p:DNS_POINTS_TO]->(n)
-    ON CREATE SET p.firstseen = timestamp()
-    SET p.lastupdated = {aws_update_tag}
-    """
-    neo4j_session.run(link_records, aws_update_tag=update_tag)
+# The nodes that AWS DNS records can point to, and the property that holds their DNS name.
+DNS_TARGETS = [
+    ('LoadBalancer', 'dnsname'),
+    ('LoadBalancerV2', 'dnsname'),
+    ('EC2Instance', 'publicdnsname'),
+]
 
-    # find records that point to AWS LoadBalancers
-    link_elb = """
-    MATCH (n:AWSDNSRecord) WITH n MATCH (l:LoadBalancer{dnsname: n.value})
-    MERGE (n)-[p:DNS_POINTS_TO]->(l)
-    ON CREATE SET p.firstseen = timestamp()
-    SET p.lastupdated = {aws_update_tag}
-    """
-    neo4j_session.run(link_elb, aws_update_tag=update_tag)
 
-    # find records that point to AWS LoadBalancersV2
-    link_elbv2 = """
-    MATCH (n:AWSDNSRecord) WITH n MATCH (l:LoadBalancerV2{dnsname: n.value})
-    MERGE (n)-[p:DNS_POINTS_TO]->(l)
-    ON CREATE SET p.firstseen = timestamp()
-    SET p.lastupdated = {aws_update_tag}
+@timeit
+def get_dns_records(neo4j_session, update_tag):
     """
-    neo4j_session.run(link_elbv2, aws_update_tag=update_tag)
-
-    # find records that point to AWS EC2 Instances
-    link_ec2 = """
-    MATCH (n:AWSDNSRecord) WITH n MATCH (e:EC2Instance{publicdnsname: n.value})
-    MERGE (n)-[p:DNS_POINTS_TO]->(e)
-    ON CREATE SET p.firstseen = timestamp()
-    SET p.lastupdated = {aws_update_tag}
+    Return the id and value of every AWS DNS record that was loaded with the given update tag.
     """
-    neo4j_session.run(link_ec2, aws_update_tag=update_tag)
+    query = """
+    MATCH (n:AWSDNSRecord) WHERE n.lastupdated = {aws_update_tag}
+    RETURN n.id AS id, n.value AS value
+    """
+    return [(r['id'], r['value']) for r in neo4j_session.run(query, aws_update_tag=update_tag)]
 
 
 @timeit
-def load_a_records(neo4j_session, records, update_tag):
-    ingest_records = """
-    UNWIND {records} as record
-    MERGE (a:DNSRecord:AWSDNSRecord{id: record.id})
-    ON CREATE SET a.firstseen = timestamp(), a.name = record.name, a.type = record.type
-    SET a.lastupdated = {aws_update_tag}, a.value = record.value
-    WITH a,record
-    MATCH (zone:AWSDNSZone{zoneid: record.zoneid})
-    MERGE (a)-[r:MEMBER_OF_DNS_ZONE]->(zone)
-    ON CREATE SET r.firstseen = timestamp()
-    SET r.lastupdated = {aws_update_tag}
+def get_dns_record_names(neo4j_session):
     """
-    neo4j_session.run(
-        ingest_records,
-        records=records,
-        aws_update_tag=update_tag,
-    )
+    Return the id and name of every AWS DNS record in the graph, including the records of accounts that were not synced
+    in this run.
+    """
+    query = """
+    MATCH (n:AWSDNSRecord)
+    RETURN n.id AS id, n.name AS name
+    """
+    return [(r['id'], r['name']) for r in neo4j_session.run(query)]
 
 
 @timeit
-def load_alias_records(neo4j_session, records, update_tag):
-    # create the DNSRecord nodes and link them to matching DNSZone and S3Bucket nodes
-    ingest_records = """
-    UNWIND {records} as record
-    MERGE (a:DNSRecord:AWSDNSRecord{id: record.id})
-    ON CREATE SET a.firstseen = timestamp(), a.name = record.name, a.type = record.type
-    SET a.lastupdated = {aws_update_tag}, a.value = record.value
-    WITH a,record
-    MATCH (zone:AWSDNSZone{zoneid: record.zoneid})
-    MERGE (a)-[r:MEMBER_OF_DNS_ZONE]->(zone)
-    ON CREATE SET r.firstseen = timestamp()
-    SET r.lastupdated = {aws_update_tag}
+def transform_record_links(records, targets):
     """
-    neo4j_session.run(
-        ingest_records,
-        records=records,
-        aws_update_tag=update_tag,
-    )
+    Return the pairs of records in which the value of the source record is the name of the target record, found with a
+    hash join on the record names.
+    :param records: A list of (id, value) tuples of the source records
+    :param targets: A list of (id, name) tuples of the records that the source records may point to
+    :return: A list of dicts with the source and target record ids
+    """
+    ids_by_name = defaultdict(list)
+    for record_id, name in targets:
+        ids_by_name[name].append(record_id)
+    return [
+        {'source': record_id, 'target': target_id}
+        for record_id, value in records
+        for target_id in ids_by_name.get(value, ())
+        if target_id != record_id
+    ]
+
+
+def _get_dns_names(neo4j_session, label, property):
+    query = Template("""
+    MATCH (t:$label) WHERE EXISTS(t.$property)
+    RETURN DISTINCT t.$property AS dnsname
+    """).safe_substitute(label=label, property=property)
+    return {r['dnsname'] for r in neo4j_session.run(query)}
 
 
 @timeit
-def load_cname_records(neo4j_session, records, update_tag):
-    ingest_records = """
-    UNWIND {records} as record
-    MERGE (a:DNSRecord:AWSDNSRecord{id: record.id})
-    ON CREATE SET a.firstseen = timestamp(), a.name = record.name, a.type = record.type
-    SET a.lastupdated = {aws_update_tag}, a.value = record.value
-    WITH a,record
-    MATCH (zone:AWSDNSZone{zoneid: record.zoneid})
-    MERGE (a)-[r:MEMBER_OF_DNS_ZONE]->(zone)
-    ON CREATE SET r.firstseen = timestamp()
-    SET r.lastupdated = {aws_update_tag}
+def link_aws_resources(neo4j_session, update_tag):
     """
-    neo4j_session.run(
-        ingest_records,
-        records=records,
+    Link the AWS DNS records loaded with the given update tag to the records, load balancers and EC2 instances whose
+    name is their value, whichever run loaded them. This runs once after all AWS accounts have been synced, and
+    aws_dns_links_cleanup.json then removes the links of these records that were not refreshed. The joins are computed
+    in memory, so the graph is only asked for the records of this run and for the names of the targets, and the
+    relationships are written by id with batched, indexed lookups.
+    """
+    records = get_dns_records(neo4j_session, update_tag)
+
+    # find records that point to other records
+    link_records = """
+    UNWIND {Rows} AS link
+    MATCH (v:AWSDNSRecord{id: link.source}), (n:AWSDNSRecord{id: link.target})
+    MERGE (v)-[p:DNS_POINTS_TO]->(n)
+    ON CREATE SET p.firstseen = timestamp()
+    SET p.lastupdated = {aws_update_tag}
+    """
+    load_batched(
+        neo4j_session,
+        link_records,
+        transform_record_links(records, get_dns_record_names(neo4j_session)),
         aws_update_tag=update_tag,
     )
 
+    # find records that point to AWS LoadBalancers, LoadBalancersV2 and EC2 Instances
+    link_targets = Template("""
+    UNWIND {Rows} AS record
+    MATCH (n:AWSDNSRecord{id: record.id})
+    WITH n, record
+    MATCH (t:$label{$property: record.value})
+    MERGE (n)-[p:DNS_POINTS_TO]->(t)
+    ON CREATE SET p.firstseen = timestamp()
+    SET p.lastupdated = {aws_update_tag}
+    """)
+    for label, property in DNS_TARGETS:
+        dns_names = _get_dns_names(neo4j_session, label, property)
+        rows = [{'id': record_id, 'value': value} for record_id, value in records if value in dns_names]
+        load_batched(
+            neo4j_session,
+            link_targets.safe_substitute(label=label, property=property),
+            rows,
+            aws_update_tag=update_tag,
+        )
+
 
 @timeit
 def load_zone(neo4j_session, zone, current_aws_id, update_tag):
@@ -119,7 +134,8 @@ def load_zone(neo4j_session, zone, current_aws_id, update_tag):
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {aws_update_tag}
     """
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_z,
         ZoneName=zone['name'][:-1],
         ZoneId=zone['zoneid'],
@@ -131,49 +147,58 @@ def load_zone(neo4j_session, zone, current_aws_id, update_tag):
 
 
 @timeit
-def load_ns_records(neo4j_session, records, zone_name, update_tag):
+def map_name_servers(neo4j_session, ns_records, zone_name, update_tag):
+    """
+    Map the official name servers for a domain: the servers of the NS records that are named after the zone.
+    """
+    map_ns_records = """
+    UNWIND {Rows} as record
+    MATCH (zone:AWSDNSZone{zoneid: record.zoneid})
+    WITH zone, record
+    UNWIND record.servers as server
+    MATCH (ns:NameServer{id:server})
+    MERGE (ns)<-[r:NAMESERVER]-(zone)
+    SET r.lastupdated = {aws_update_tag}
+    """
+    load_batched(
+        neo4j_session,
+        map_ns_records,
+        [record for record in ns_records if record["name"] == zone_name],
+        aws_update_tag=update_tag,
+    )
+
+
+@timeit
+def load_zone_records(neo4j_session, records, update_tag):
+    """
+    Load the A, ALIAS, CNAME and NS records of a zone with one batched query. NS records have no value of their own and
+    point to their name servers instead.
+    """
     ingest_records = """
-    UNWIND {records} as record
+    UNWIND {Rows} as record
     MERGE (a:DNSRecord:AWSDNSRecord{id: record.id})
     ON CREATE SET a.firstseen = timestamp(), a.name = record.name, a.type = record.type
-    SET a.lastupdated = {aws_update_tag}, a.value = record.name
+    SET a.lastupdated = {aws_update_tag}, a.value = coalesce(record.value, record.name)
     WITH a,record
     MATCH (zone:AWSDNSZone{zoneid: record.zoneid})
     MERGE (a)-[r:MEMBER_OF_DNS_ZONE]->(zone)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {aws_update_tag}
-    WITH a,record
-    UNWIND record.servers as server
-    MERGE (ns:NameServer{id:server})
-    ON CREATE SET ns.firstseen = timestamp()
-    SET ns.lastupdated = {aws_update_tag}, ns.name = server
-    MERGE (a)-[pt:DNS_POINTS_TO]->(ns)
-    SET pt.lastupdated = {aws_update_tag}
-
+    FOREACH (server IN coalesce(record.servers, []) |
+        MERGE (ns:NameServer{id:server})
+        ON CREATE SET ns.firstseen = timestamp()
+        SET ns.lastupdated = {aws_update_tag}, ns.name = server
+        MERGE (a)-[pt:DNS_POINTS_TO]->(ns)
+        SET pt.lastupdated = {aws_update_tag}
+    )
     """
-    neo4j_session.run(
+    load_batched(
+        neo4j_session,
         ingest_records,
-        records=records,
+        records,
         aws_update_tag=update_tag,
     )
 
-    # Map the official name servers for a domain.
-    map_ns_records = """
-    UNWIND {servers} as server
-    MATCH (ns:NameServer{id:server})
-    MATCH (zone:AWSDNSZone{zoneid:{zoneid}})
-    MERGE (ns)<-[r:NAMESERVER]-(zone)
-    SET r.lastupdated = {aws_update_tag}
-    """
-    for record in records:
-        if zone_name == record["name"]:
-            neo4j_session.run(
-                map_ns_records,
-                servers=record["servers"],
-                zoneid=record["zoneid"],
-                aws_update_tag=update_tag,
-            )
-
 
 @timeit
 def link_sub_zones(neo4j_session, update_tag):
@@ -190,7 +215,8 @@ def link_sub_zones(neo4j_session, update_tag):
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {aws_update_tag}
     """
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         query,
         aws_update_tag=update_tag,
     )
@@ -289,10 +315,13 @@ def transform_zone(zone):
 
 @timeit
 def load_dns_details(neo4j_session, dns_details, current_aws_id, update_tag):
+    """
+    Load the zones and their records. dns_details may be a generator of (zone, record sets) tuples, which is consumed
+    one zone at a time. The records are linked to what they point to by link_aws_resources once all accounts have been
+    synced.
+    """
     for zone, zone_record_sets in dns_details:
-        zone_a_records = []
-        zone_alias_records = []
-        zone_cname_records = []
+        zone_records = []
         zone_ns_records = []
         parsed_zone = transform_zone(zone)
 
@@ -300,29 +329,17 @@ def load_dns_details(neo4j_session, dns_details, current_aws_id, update_tag):
 
         for record_set in zone_record_sets:
             if record_set['Type'] == 'A' or record_set['Type'] == 'CNAME':
-                record = transform_record_set(record_set, zone['Id'], record_set['Name'][:-1])
-
-                if record['type'] == 'A':
-                    zone_a_records.append(record)
-                elif record['type'] == 'ALIAS':
-                    zone_alias_records.append(record)
-                elif record['type'] == 'CNAME':
-                    zone_cname_records.append(record)
+                zone_records.append(transform_record_set(record_set, zone['Id'], record_set['Name'][:-1]))
 
             if record_set['Type'] == 'NS':
                 record = transform_ns_record_set(record_set, zone['Id'])
-                zone_ns_records.append(record)
-        if zone_a_records:
-            load_a_records(neo4j_session, zone_a_records, update_tag)
-
-        if zone_alias_records:
-            load_alias_records(neo4j_session, zone_alias_records, update_tag)
-
-        if zone_cname_records:
-            load_cname_records(neo4j_session, zone_cname_records, update_tag)
+                if record is not None:
+                    zone_records.append(record)
+                    zone_ns_records.append(record)
+        if zone_records:
+            load_zone_records(neo4j_session, zone_records, update_tag)
         if zone_ns_records:
-            load_ns_records(neo4j_session, zone_ns_records, parsed_zone['name'][:-1], update_tag)
-    link_aws_resources(neo4j_session, update_tag)
+            map_name_servers(neo4j_session, zone_ns_records, parsed_zone['name'][:-1], update_tag)
 
 
 @timeit
@@ -335,18 +352,22 @@ def get_zone_record_sets(client, zone_id):
     return resource_record_sets
 
 
+def _get_zone_details(client, hosted_zone):
+    return hosted_zone, get_zone_record_sets(client, hosted_zone['Id'])
+
+
 @timeit
-def get_zones(client):
+def get_zones(client, workers=1):
+    """
+    Yields each hosted zone with its record sets, in the order of the zones. The record sets of up to `workers` zones
+    are fetched at the same time, and only a few zones are fetched ahead of the consumer.
+    """
     paginator = client.get_paginator('list_hosted_zones')
     hosted_zones = []
     for page in paginator.paginate():
         hosted_zones.extend(page['HostedZones'])
 
-    results = []
-    for hosted_zone in hosted_zones:
-        record_sets = get_zone_record_sets(client, hosted_zone['Id'])
-        results.append((hosted_zone, record_sets))
-    return results
+    yield from map_concurrently(partial(_get_zone_details, client), hosted_zones, workers)
 
 
 def _create_dns_record_id(zoneid, name, record_type):
@@ -367,10 +388,10 @@ def cleanup_route53(neo4j_session, current_aws_id, update_tag):
 
 
 @timeit
-def sync(neo4j_session, boto3_session, aws_id, update_tag):
+def sync(neo4j_session, boto3_session, aws_id, update_tag, workers=1):
     logger.info("Syncing Route53 for account '%s'.", aws_id)
-    client = boto3_session.client('route53')
-    zones = get_zones(client)
+    client = get_client(boto3_session, 'route53', config=get_botocore_config())
+    zones = get_zones(client, workers)
     load_dns_details(neo4j_session, zones, aws_id, update_tag)
     link_sub_zones(neo4j_session, update_tag)
     cleanup_route53(neo4j_session, aws_id, update_tag)
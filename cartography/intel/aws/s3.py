@@ -1,61 +1,78 @@
 import hashlib
 import json
 import logging
+from functools import partial
 
 from botocore.exceptions import ClientError
 from policyuniverse.policy import Policy
 
+from cartography.intel.aws.ec2.util import get_botocore_config
+from cartography.intel.aws.util import get_client
+from cartography.intel.aws.util import map_concurrently
+from cartography.util import load_batched
 from cartography.util import run_analysis_job
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
 
 
+def _get_bucket_location(client, bucket):
+    try:
+        return client.get_bucket_location(Bucket=bucket['Name'])['LocationConstraint']
+    except ClientError as e:
+        if "AccessDenied" in e.args[0]:
+            # If we don't have perms to call get_bucket_location(), set region to None and keep going
+            logger.warning("get_bucket_location(bucket='{}') AccessDenied, skipping.".format(bucket['Name']))
+            return None
+        elif "NoSuchBucket" in e.args[0]:
+            logger.warning("get_bucket_location({}) threw NoSuchBucket exception, skipping".format(bucket['Name']))
+            return None
+        elif "AllAccessDisabled" in e.args[0]:
+            logger.warning("get_bucket_location({}) failed - bucket is disabled, skipping".format(bucket['Name']))
+            return None
+        else:
+            raise
+
+
 @timeit
-def get_s3_bucket_list(boto3_session):
-    client = boto3_session.client('s3')
+def get_s3_bucket_list(boto3_session, workers=1):
+    """
+    Lists the S3 buckets of the account and looks up the region of each, for up to `workers` buckets at the same time.
+    """
+    client = get_client(boto3_session, 's3', config=get_botocore_config())
     # NOTE no paginator available for this operation
     buckets = client.list_buckets()
-    for bucket in buckets['Buckets']:
-        try:
-            bucket['Region'] = client.get_bucket_location(Bucket=bucket['Name'])['LocationConstraint']
-        except ClientError as e:
-            if "AccessDenied" in e.args[0]:
-                # If we don't have perms to call get_bucket_location(), set region to None and keep going
-                logger.warning("get_bucket_location(bucket='{}') AccessDenied, skipping.".format(bucket['Name']))
-                bucket['Region'] = None
-                continue
-            elif "NoSuchBucket" in e.args[0]:
-                logger.warning("get_bucket_location({}) threw NoSuchBucket exception, skipping".format(bucket['Name']))
-                bucket['Region'] = None
-                continue
-            elif "AllAccessDisabled" in e.args[0]:
-                logger.warning("get_bucket_location({}) failed - bucket is disabled, skipping".format(bucket['Name']))
-            else:
-                raise
+    regions = map_concurrently(partial(_get_bucket_location, client), buckets['Buckets'], workers)
+    for bucket, region in zip(buckets['Buckets'], regions):
+        bucket['Region'] = region
     return buckets
 
 
+def _get_bucket_details(boto3_session, bucket_settings, bucket):
+    # Note: bucket['Region'] is sometimes None because
+    # client.get_bucket_location() does not return a location constraint for buckets
+    # in us-east-1 region
+    client = get_client(boto3_session, 's3', bucket['Region'], config=get_botocore_config())
+    acl = get_acl(bucket, client)
+    policy = get_policy(bucket, client)
+    settings = get_bucket_settings(bucket, client) if bucket_settings else None
+    return bucket['Name'], acl, policy, settings
+
+
 @timeit
-def get_s3_bucket_details(boto3_session, bucket_data):
+def get_s3_bucket_details(boto3_session, bucket_data, workers=1, bucket_settings=False):
     """
-    Iterates over all S3 buckets. Yields bucket name (string) and pairs of S3 bucket policies (JSON) and ACLs (JSON)
+    Iterates over all S3 buckets. Yields the bucket name (string), ACL (JSON), policy (JSON) and settings (dict) of each
+    bucket, in the order of bucket_data. The settings are None unless bucket_settings is True. Up to `workers` buckets
+    are looked up at the same time.
     """
-    # a local store for s3 clients so that we may re-use clients for an AWS region
-    s3_regional_clients = {}
-
-    for bucket in bucket_data['Buckets']:
-        # Note: bucket['Region'] is sometimes None because
-        # client.get_bucket_location() does not return a location constraint for buckets
-        # in us-east-1 region
-        client = s3_regional_clients.get(bucket['Region'])
-        if not client:
-            client = boto3_session.client('s3', bucket['Region'])
-            s3_regional_clients[bucket['Region']] = client
-        acl = get_acl(bucket, client)
-        policy = get_policy(bucket, client)
-        yield bucket['Name'], acl, policy
+    yield from map_concurrently(
+        partial(_get_bucket_details, boto3_session, bucket_settings),
+        bucket_data['Buckets'],
+        workers,
+    )
 
 
 @timeit
@@ -108,6 +125,46 @@ def get_acl(bucket, client):
     return acl
 
 
+def _get_bucket_setting(bucket, client, operation, not_configured_error):
+    """
+    Calls the given S3 client operation for the bucket. Returns the response, an empty dict if the setting is not
+    configured for the bucket, or None if it could not be retrieved.
+    """
+    try:
+        return getattr(client, operation)(Bucket=bucket['Name'])
+    except ClientError as e:
+        if not_configured_error and not_configured_error in e.args[0]:
+            return {}
+        elif "AccessDenied" in e.args[0]:
+            logger.warning("Failed to retrieve S3 bucket {} {} - Access Denied".format(bucket['Name'], operation))
+            return None
+        elif "NoSuchBucket" in e.args[0]:
+            logger.warning("Failed to retrieve S3 bucket {} {} - No Such Bucket".format(bucket['Name'], operation))
+            return None
+        elif "AllAccessDisabled" in e.args[0]:
+            logger.warning("Failed to retrieve S3 bucket {} {} - Bucket is disabled".format(bucket['Name'], operation))
+            return None
+        else:
+            raise
+
+
+@timeit
+def get_bucket_settings(bucket, client):
+    """
+    Gets the default encryption, public access block and versioning configuration of the S3 bucket. Returns a dict of
+    the raw responses, in which a response is None if it could not be retrieved.
+    """
+    return {
+        'encryption': _get_bucket_setting(
+            bucket, client, 'get_bucket_encryption', 'ServerSideEncryptionConfigurationNotFoundError',
+        ),
+        'public_access_block': _get_bucket_setting(
+            bucket, client, 'get_public_access_block', 'NoSuchPublicAccessBlockConfiguration',
+        ),
+        'versioning': _get_bucket_setting(bucket, client, 'get_bucket_versioning', None),
+    }
+
+
 @timeit
 def _load_s3_acls(neo4j_session, acls, aws_account_id, update_tag):
     """
@@ -125,7 +182,8 @@ def _load_s3_acls(neo4j_session, acls, aws_account_id, update_tag):
     SET r.lastupdated = {UpdateTag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_acls,
         acls=acls,
         UpdateTag=update_tag,
@@ -154,20 +212,46 @@ def _load_s3_policies(neo4j_session, policies, update_tag):
     s.lastupdated = {UpdateTag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_policies,
         policies=policies,
         UpdateTag=update_tag,
     )
 
 
+@timeit
+def _load_s3_bucket_settings(neo4j_session, settings, update_tag):
+    """
+    Ingest S3 bucket encryption, public access block and versioning settings into neo4j.
+    """
+    ingest_settings = """
+    UNWIND {Rows} AS setting
+    MATCH (s:S3Bucket{id: setting.bucket})
+    SET s.default_encryption = setting.default_encryption, s.encryption_algorithm = setting.encryption_algorithm,
+    s.encryption_key_id = setting.encryption_key_id, s.bucket_key_enabled = setting.bucket_key_enabled,
+    s.block_public_acls = setting.block_public_acls, s.ignore_public_acls = setting.ignore_public_acls,
+    s.block_public_policy = setting.block_public_policy, s.restrict_public_buckets = setting.restrict_public_buckets,
+    s.versioning_status = setting.versioning_status, s.mfa_delete = setting.mfa_delete,
+    s.lastupdated = {UpdateTag}
+    """
+
+    load_batched(
+        neo4j_session,
+        ingest_settings,
+        settings,
+        UpdateTag=update_tag,
+    )
+
+
 def _set_default_values(neo4j_session, aws_account_id):
     set_defaults = """
     MATCH (:AWSAccount{id: {AWS_ID}})-[:RESOURCE]->(s:S3Bucket) where NOT EXISTS(s.anonymous_actions)
     SET s.anonymous_access = false, s.anonymous_actions = []
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         set_defaults,
         AWS_ID=aws_account_id,
     )
@@ -176,11 +260,15 @@ def _set_default_values(neo4j_session, aws_account_id):
 @timeit
 def load_s3_details(neo4j_session, s3_details_iter, aws_account_id, update_tag):
     """
-    Create dictionaries for all bucket ACLs and all bucket policies so we can import them in a single query for each
+    Create dictionaries for all bucket ACLs, bucket policies and bucket settings so we can import them in a single query
+    for each
     """
     acls = []
     policies = []
-    for bucket, acl, policy in s3_details_iter:
+    settings = []
+    for bucket, acl, policy, bucket_settings in s3_details_iter:
+        if bucket_settings is not None:
+            settings.append(parse_bucket_settings(bucket, bucket_settings))
         if acl is None:
             continue
         parsed_acls = parse_acl(acl, bucket, aws_account_id)
@@ -202,6 +290,7 @@ def load_s3_details(neo4j_session, s3_details_iter, aws_account_id, update_tag):
     _load_s3_acls(neo4j_session, acls, aws_account_id, update_tag)
     _load_s3_policies(neo4j_session, policies, update_tag)
     _set_default_values(neo4j_session, aws_account_id)
+    _load_s3_bucket_settings(neo4j_session, settings, update_tag)
 
 
 @timeit
@@ -259,6 +348,48 @@ def parse_policy(bucket, policy):
         return None
 
 
+def parse_bucket_settings(bucket, settings):
+    """
+    Flattens the encryption, public access block and versioning responses of get_bucket_settings into a dict of bucket
+    properties. The properties of a setting that could not be retrieved are None.
+    """
+    parsed = {
+        "bucket": bucket,
+        "default_encryption": None,
+        "encryption_algorithm": None,
+        "encryption_key_id": None,
+        "bucket_key_enabled": None,
+        "block_public_acls": None,
+        "ignore_public_acls": None,
+        "block_public_policy": None,
+        "restrict_public_buckets": None,
+        "versioning_status": None,
+        "mfa_delete": None,
+    }
+    encryption = settings['encryption']
+    if encryption is not None:
+        rules = encryption.get('ServerSideEncryptionConfiguration', {}).get('Rules', [])
+        parsed['default_encryption'] = bool(rules)
+        if rules:
+            default = rules[0].get('ApplyServerSideEncryptionByDefault', {})
+            parsed['encryption_algorithm'] = default.get('SSEAlgorithm')
+            parsed['encryption_key_id'] = default.get('KMSMasterKeyID')
+            parsed['bucket_key_enabled'] = rules[0].get('BucketKeyEnabled', False)
+    public_access_block = settings['public_access_block']
+    if public_access_block is not None:
+        configuration = public_access_block.get('PublicAccessBlockConfiguration', {})
+        parsed['block_public_acls'] = configuration.get('BlockPublicAcls', False)
+        parsed['ignore_public_acls'] = configuration.get('IgnorePublicAcls', False)
+        parsed['block_public_policy'] = configuration.get('BlockPublicPolicy', False)
+        parsed['restrict_public_buckets'] = configuration.get('RestrictPublicBuckets', False)
+    versioning = settings['versioning']
+    if versioning is not None:
+        # Status is only returned once versioning has been enabled on the bucket
+        parsed['versioning_status'] = versioning.get('Status', 'Disabled')
+        parsed['mfa_delete'] = versioning.get('MFADelete') == 'Enabled'
+    return parsed
+
+
 @timeit
 def parse_acl(acl, bucket, aws_account_id):
     """ Parses the AWS ACL object and returns a dict of the relevant data """
@@ -333,9 +464,10 @@ def parse_acl(acl, bucket, aws_account_id):
 @timeit
 def load_s3_buckets(neo4j_session, data, current_aws_account_id, aws_update_tag):
     ingest_bucket = """
-    MERGE (bucket:S3Bucket{id:{BucketName}})
-    ON CREATE SET bucket.firstseen = timestamp(), bucket.creationdate = {CreationDate}
-    SET bucket.name = {BucketName}, bucket.region = {BucketRegion}, bucket.arn = {Arn},
+    UNWIND {Rows} AS row
+    MERGE (bucket:S3Bucket{id:row.BucketName})
+    ON CREATE SET bucket.firstseen = timestamp(), bucket.creationdate = row.CreationDate
+    SET bucket.name = row.BucketName, bucket.region = row.BucketRegion, bucket.arn = row.Arn,
     bucket.lastupdated = {aws_update_tag}
     WITH bucket
     MATCH (owner:AWSAccount{id: {AWS_ACCOUNT_ID}})
@@ -348,17 +480,21 @@ def load_s3_buckets(neo4j_session, data, current_aws_account_id, aws_update_tag)
     # there doesn't seem to be a way to retreive the mapping but we can get the current context account
     # so we map to that directly
 
-    for bucket in data["Buckets"]:
-        arn = "arn:aws:s3:::" + bucket["Name"]
-        neo4j_session.run(
-            ingest_bucket,
-            BucketName=bucket["Name"],
-            BucketRegion=bucket["Region"],
-            Arn=arn,
-            CreationDate=str(bucket["CreationDate"]),
-            AWS_ACCOUNT_ID=current_aws_account_id,
-            aws_update_tag=aws_update_tag,
-        )
+    rows = [
+        {
+            'BucketName': bucket["Name"],
+            'BucketRegion': bucket["Region"],
+            'Arn': "arn:aws:s3:::" + bucket["Name"],
+            'CreationDate': str(bucket["CreationDate"]),
+        } for bucket in data["Buckets"]
+    ]
+    load_batched(
+        neo4j_session,
+        ingest_bucket,
+        rows,
+        AWS_ACCOUNT_ID=current_aws_account_id,
+        aws_update_tag=aws_update_tag,
+    )
 
 
 @timeit
@@ -374,11 +510,17 @@ def cleanup_s3_bucket_acl_and_policy(neo4j_session, common_job_parameters):
 @timeit
 def sync(neo4j_session, boto3_session, current_aws_account_id, aws_update_tag, common_job_parameters):
     logger.info("Syncing S3 for account '%s'.", current_aws_account_id)
-    bucket_data = get_s3_bucket_list(boto3_session)
+    workers = common_job_parameters.get('aws_s3_workers') or 1
+    bucket_data = get_s3_bucket_list(boto3_session, workers)
 
     load_s3_buckets(neo4j_session, bucket_data, current_aws_account_id, aws_update_tag)
     cleanup_s3_buckets(neo4j_session, common_job_parameters)
 
-    acl_and_policy_data_iter = get_s3_bucket_details(boto3_session, bucket_data)
-    load_s3_details(neo4j_session, acl_and_policy_data_iter, current_aws_account_id, aws_update_tag)
+    details_iter = get_s3_bucket_details(
+        boto3_session,
+        bucket_data,
+        workers,
+        bucket_settings=common_job_parameters.get('aws_s3_bucket_settings', False),
+    )
+    load_s3_details(neo4j_session, details_iter, current_aws_account_id, aws_update_tag)
     cleanup_s3_bucket_acl_and_policy(neo4j_session, common_job_parameters)
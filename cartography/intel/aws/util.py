@@ -0,0 +1,90 @@
+import logging
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+
+# Clients and resources by boto3 session, then by (kind, service, region, config). Entries go away with their session,
+# e.g. when the sync of an account that has its own session completes.
+_cache = weakref.WeakKeyDictionary()
+
+# The number of clients and resources created since the last reset_client_cache_stats call.
+clients_created = 0
+
+
+def _get(kind, boto3_session, service_name, region_name, config):
+    key = (kind, service_name, region_name, config)
+    if kind == 'resource':
+        # Unlike clients, boto3 resources are not thread safe, so every thread gets its own.
+        key += (threading.get_ident(),)
+    # boto3 sessions are not thread safe either, so clients are also created under the lock.
+    with _lock:
+        session_cache = _cache.setdefault(boto3_session, {})
+        if key not in session_cache:
+            create = boto3_session.client if kind == 'client' else boto3_session.resource
+            session_cache[key] = create(service_name, region_name=region_name, config=config)
+            global clients_created
+            clients_created += 1
+        return session_cache[key]
+
+
+def get_client(boto3_session, service_name, region_name=None, config=None):
+    """
+    Return a boto3 client for the given service, region and config, which is only created the first time it is asked
+    for from the given session. Creating a client loads the service model and endpoint data, which is slow compared to
+    most API calls.
+    :param boto3_session: The boto3 session
+    :param service_name: The service name, e.g. `ec2`
+    :param region_name: The region name. Defaults to the region of the session.
+    :param config: A botocore Config. Configs are compared by identity, so use a shared one such as the one
+        `cartography.intel.aws.ec2.util.get_botocore_config` returns.
+    :return: The boto3 client
+    """
+    return _get('client', boto3_session, service_name, region_name, config)
+
+
+def get_resource(boto3_session, service_name, region_name=None, config=None):
+    """
+    Return a boto3 service resource like get_client returns a client. Resources are not thread safe, so each thread gets
+    its own.
+    """
+    return _get('resource', boto3_session, service_name, region_name, config)
+
+
+def reset_client_cache_stats():
+    global clients_created
+    with _lock:
+        clients_created = 0
+
+
+def map_concurrently(func, items, workers):
+    """
+    Yield `func(item)` for each of the given items, in the order of the items, calling `func` from up to `workers`
+    threads at the same time. Only a few more calls than `workers` are started ahead of the result being consumed, so
+    the results do not all have to fit in memory. If a call raises, the exception is re-raised to the consumer and the
+    calls that have not started yet are cancelled.
+    :param func: A function of one item, e.g. one that makes a few API calls for a single resource
+    :param items: The items
+    :param workers: The maximum number of calls to run at the same time. 1 or less calls `func` on the consuming thread.
+    :return: A generator of the results
+    """
+    if workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -1,6 +1,7 @@
 import logging
 
 from cartography.util import load_resource_binary
+from cartography.util import run_write
 
 logger = logging.getLogger(__name__)
 
@@ -19,4 +20,4 @@ def run(neo4j_session, config):
     logger.info("Creating indexes for cartography node types.")
     for statement in get_index_statements():
         logger.debug("Executing statement: %s", statement)
-        neo4j_session.run(statement)
+        run_write(neo4j_session, statement)
@@ -4,6 +4,7 @@ import logging
 import requests.auth
 from requests import exceptions
 
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -216,7 +217,7 @@ def load_extensions(extensions, session, update_tag):
     """
 
     logger.info(f'Ingesting {len(extensions)} extensions')
-    session.run(ingestion_cypher, ExtensionsData=extensions, UpdateTag=update_tag)
+    run_write(session, ingestion_cypher, ExtensionsData=extensions, UpdateTag=update_tag)
 
 
 @timeit
@@ -287,9 +288,9 @@ def load_user_extensions(users, extensions_by_user, session, update_tag):
     """
 
     logger.info(f'Ingesting {len(users)} users')
-    session.run(user_ingestion_cypher, Users=users, UpdateTag=update_tag)
+    run_write(session, user_ingestion_cypher, Users=users, UpdateTag=update_tag)
     logger.info(f'Ingesting {len(extensions_by_user)} user->extension relationships')
-    session.run(extension_ingestion_cypher, ExtensionsUsers=extensions_by_user, UpdateTag=update_tag)
+    run_write(session, extension_ingestion_cypher, ExtensionsUsers=extensions_by_user, UpdateTag=update_tag)
 
 
 @timeit
@@ -4,6 +4,7 @@ from string import Template
 import dns.rdatatype
 import dns.resolver
 
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -85,7 +86,8 @@ def _link_ip_to_A_record(neo4j_session, update_tag, ip_list, parent_record):
     SET r.lastupdated = {update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest,
         ParentId=parent_record,
         IP_LIST=ip_list,
@@ -124,7 +126,8 @@ def ingest_dns_record(
 
     record_id = f"{name}+{type}"
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         template.safe_substitute(record_label=record_label, dns_node_additional_label=dns_node_additional_label),
         Id=record_id,
         Name=name,
@@ -6,12 +6,15 @@ import googleapiclient.discovery
 from oauth2client.client import ApplicationDefaultCredentialsError
 from oauth2client.client import GoogleCredentials
 
+import cartography.checkpoint
+import cartography.replay
 from cartography.intel.gcp import compute
 from cartography.intel.gcp import crm
 from cartography.intel.gcp import dns
 from cartography.intel.gcp import gke
 from cartography.intel.gcp import storage
 from cartography.util import run_analysis_job
+from cartography.util import SKIP_CLEANUP
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -37,7 +40,9 @@ def _get_crm_resource_v1(credentials):
     """
     # cache_discovery=False to suppress extra warnings.
     # See https://github.com/googleapis/google-api-python-client/issues/299#issuecomment-268915510 and related issues
-    return googleapiclient.discovery.build('cloudresourcemanager', 'v1', credentials=credentials, cache_discovery=False)
+    return googleapiclient.discovery.build(
+        'cloudresourcemanager', 'v1', cache_discovery=False, **cartography.replay.google_build_kwargs(credentials),
+    )
 
 
 def _get_crm_resource_v2(credentials):
@@ -47,7 +52,9 @@ def _get_crm_resource_v2(credentials):
     :param credentials: The GoogleCredentials object
     :return: A CRM v2 resource object
     """
-    return googleapiclient.discovery.build('cloudresourcemanager', 'v2', credentials=credentials, cache_discovery=False)
+    return googleapiclient.discovery.build(
+        'cloudresourcemanager', 'v2', cache_discovery=False, **cartography.replay.google_build_kwargs(credentials),
+    )
 
 
 def _get_compute_resource(credentials):
@@ -57,7 +64,9 @@ def _get_compute_resource(credentials):
     :param credentials: The GoogleCredentials object
     :return: A Compute resource object
     """
-    return googleapiclient.discovery.build('compute', 'v1', credentials=credentials, cache_discovery=False)
+    return googleapiclient.discovery.build(
+        'compute', 'v1', cache_discovery=False, **cartography.replay.google_build_kwargs(credentials),
+    )
 
 
 def _get_storage_resource(credentials):
@@ -69,7 +78,9 @@ def _get_storage_resource(credentials):
     :param credentials: The GoogleCredentials object
     :return: A Storage resource object
     """
-    return googleapiclient.discovery.build('storage', 'v1', credentials=credentials, cache_discovery=False)
+    return googleapiclient.discovery.build(
+        'storage', 'v1', cache_discovery=False, **cartography.replay.google_build_kwargs(credentials),
+    )
 
 
 def _get_container_resource(credentials):
@@ -80,7 +91,9 @@ def _get_container_resource(credentials):
     :param credentials: The GoogleCredentials object
     :return: A Container resource object
     """
-    return googleapiclient.discovery.build('container', 'v1', credentials=credentials, cache_discovery=False)
+    return googleapiclient.discovery.build(
+        'container', 'v1', cache_discovery=False, **cartography.replay.google_build_kwargs(credentials),
+    )
 
 
 def _get_dns_resource(credentials):
@@ -91,7 +104,9 @@ def _get_dns_resource(credentials):
     :param credentials: The GoogleCredentials object
     :return: A DNS resource object
     """
-    return googleapiclient.discovery.build('dns', 'v1', credentials=credentials, cache_discovery=False)
+    return googleapiclient.discovery.build(
+        'dns', 'v1', cache_discovery=False, **cartography.replay.google_build_kwargs(credentials),
+    )
 
 
 def _get_serviceusage_resource(credentials):
@@ -102,7 +117,9 @@ def _get_serviceusage_resource(credentials):
     :param credentials: The GoogleCredentials object
     :return: A serviceusage resource object
     """
-    return googleapiclient.discovery.build('serviceusage', 'v1', credentials=credentials, cache_discovery=False)
+    return googleapiclient.discovery.build(
+        'serviceusage', 'v1', cache_discovery=False, **cartography.replay.google_build_kwargs(credentials),
+    )
 
 
 def _initialize_resources(credentials):
@@ -174,7 +191,9 @@ def _sync_single_project(neo4j_session, resources, project_id, gcp_update_tag, c
         dns.sync(neo4j_session, resources.dns, project_id, gcp_update_tag, common_job_parameters)
 
 
-def _sync_multiple_projects(neo4j_session, resources, projects, gcp_update_tag, common_job_parameters):
+def _sync_multiple_projects(
+    neo4j_session, resources, projects, gcp_update_tag, common_job_parameters, project_ids=None,
+):
     """
     Handles graph sync for multiple GCP projects.
     :param neo4j_session: The Neo4j session
@@ -185,15 +204,28 @@ def _sync_multiple_projects(neo4j_session, resources, projects, gcp_update_tag,
     See https://cloud.google.com/resource-manager/reference/rest/v1/projects.
     :param gcp_update_tag: The timestamp value to set our new Neo4j nodes with
     :param common_job_parameters: Other parameters sent to Neo4j
+    :param project_ids: The IDs of the projects whose resources to sync, or None to sync all of them. All projects are
+    loaded either way, but the resource cleanup jobs are skipped when only some projects are synced.
     :return: Nothing
     """
     logger.info("Syncing %d GCP projects.", len(projects))
     crm.sync_gcp_projects(neo4j_session, projects, gcp_update_tag, common_job_parameters)
 
+    project_job_parameters = common_job_parameters
+    if project_ids is not None:
+        projects = [project for project in projects if project['projectId'] in project_ids]
+        # The GCP resource cleanup jobs are not scoped to a project, so they would delete the resources of the projects
+        # that were left out.
+        project_job_parameters = dict(common_job_parameters, **{SKIP_CLEANUP: True})
+
     for project in projects:
         project_id = project['projectId']
+        if cartography.checkpoint.is_completed(cartography.checkpoint.GCP_PROJECT, project_id):
+            logger.info("Skipping GCP project %s, which completed in an earlier attempt of this run.", project_id)
+            continue
         logger.info("Syncing GCP project %s.", project_id)
-        _sync_single_project(neo4j_session, resources, project_id, gcp_update_tag, common_job_parameters)
+        _sync_single_project(neo4j_session, resources, project_id, gcp_update_tag, project_job_parameters)
+        cartography.checkpoint.mark_completed(cartography.checkpoint.GCP_PROJECT, project_id)
 
 
 @timeit
@@ -213,7 +245,8 @@ def start_gcp_ingestion(neo4j_session, config):
         # Explicitly use Application Default Credentials.
         # See https://oauth2client.readthedocs.io/en/latest/source/
         #             oauth2client.client.html#oauth2client.client.OAuth2Credentials
-        credentials = GoogleCredentials.get_application_default()
+        # When replaying recorded responses no requests are sent, so no credentials are needed.
+        credentials = None if cartography.replay.is_replaying() else GoogleCredentials.get_application_default()
     except ApplicationDefaultCredentialsError as e:
         logger.debug("Error occurred calling GoogleCredentials.get_application_default().", exc_info=True)
         logger.error(
@@ -234,7 +267,9 @@ def start_gcp_ingestion(neo4j_session, config):
 
     projects = crm.get_gcp_projects(resources.crm_v1)
 
-    _sync_multiple_projects(neo4j_session, resources, projects, config.update_tag, common_job_parameters)
+    _sync_multiple_projects(
+        neo4j_session, resources, projects, config.update_tag, common_job_parameters, project_ids=config.gcp_projects,
+    )
 
     run_analysis_job(
         'gcp_compute_asset_inet_exposure.json',
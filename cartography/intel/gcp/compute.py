@@ -3,11 +3,15 @@
 import json
 import logging
 from collections import namedtuple
+from functools import partial
 from string import Template
 
 from googleapiclient.discovery import HttpError
 
+from cartography.pipeline import run_pipeline
+from cartography.util import load_batched
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -99,15 +103,25 @@ def get_gcp_instance_responses(project_id, zones, compute):
     :param compute: The compute resource object
     :return: A list of response objects of the form {id: str, items: []} where each item in `items` is a GCP instance
     """
+    return list(get_gcp_instance_response_pages(project_id, zones, compute))
+
+
+def get_gcp_instance_response_pages(project_id, zones, compute):
+    """
+    Yield the GCP instance response objects for a given project and list of zones one at a time, so that they can be
+    loaded while the next zone is being queried.
+    :param project_id: The project ID
+    :param zones: The list of zones to query for instances
+    :param compute: The compute resource object
+    :return: A generator of response objects of the form {id: str, items: []} where each item in `items` is a GCP
+    instance
+    """
     if not zones:
         # If the Compute Engine API is not enabled for a project, there are no zones and therefore no instances.
-        return []
-    response_objects = []
+        return
     for zone in zones:
         req = compute.instances().list(project=project_id, zone=zone['name'])
-        res = req.execute()
-        response_objects.append(res)
-    return response_objects
+        yield req.execute()
 
 
 @timeit
@@ -497,19 +511,20 @@ def load_gcp_instances(neo4j_session, data, gcp_update_tag):
     :return: Nothing
     """
     query = """
-    MERGE (p:GCPProject{id:{ProjectId}})
+    UNWIND {Rows} AS row
+    MERGE (p:GCPProject{id:row.ProjectId})
     ON CREATE SET p.firstseen = timestamp()
     SET p.lastupdated = {gcp_update_tag}
 
-    MERGE (i:Instance:GCPInstance{id:{PartialUri}})
+    MERGE (i:Instance:GCPInstance{id:row.PartialUri})
     ON CREATE SET i.firstseen = timestamp(),
-    i.partial_uri = {PartialUri}
-    SET i.self_link = {SelfLink},
-    i.instancename = {InstanceName},
-    i.hostname = {Hostname},
-    i.zone_name = {ZoneName},
-    i.project_id = {ProjectId},
-    i.status = {Status},
+    i.partial_uri = row.PartialUri
+    SET i.self_link = row.SelfLink,
+    i.instancename = row.InstanceName,
+    i.hostname = row.Hostname,
+    i.zone_name = row.ZoneName,
+    i.project_id = row.ProjectId,
+    i.status = row.Status,
     i.lastupdated = {gcp_update_tag}
     WITH i, p
 
@@ -517,21 +532,21 @@ def load_gcp_instances(neo4j_session, data, gcp_update_tag):
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {gcp_update_tag}
     """
-    for instance in data:
-        neo4j_session.run(
-            query,
-            ProjectId=instance['project_id'],
-            PartialUri=instance['partial_uri'],
-            SelfLink=instance['selfLink'],
-            InstanceName=instance['name'],
-            ZoneName=instance['zone_name'],
-            Hostname=instance.get('hostname', None),
-            Status=instance['status'],
-            gcp_update_tag=gcp_update_tag,
-        )
-        _attach_instance_tags(neo4j_session, instance, gcp_update_tag)
-        _attach_gcp_nics(neo4j_session, instance, gcp_update_tag)
-        _attach_gcp_vpc(neo4j_session, instance['partial_uri'], gcp_update_tag)
+    rows = [
+        {
+            'ProjectId': instance['project_id'],
+            'PartialUri': instance['partial_uri'],
+            'SelfLink': instance['selfLink'],
+            'InstanceName': instance['name'],
+            'ZoneName': instance['zone_name'],
+            'Hostname': instance.get('hostname', None),
+            'Status': instance['status'],
+        } for instance in data
+    ]
+    load_batched(neo4j_session, query, rows, gcp_update_tag=gcp_update_tag)
+    _attach_instance_tags(neo4j_session, data, gcp_update_tag)
+    _attach_gcp_nics(neo4j_session, data, gcp_update_tag)
+    _attach_gcp_vpc(neo4j_session, [instance['partial_uri'] for instance in data], gcp_update_tag)
 
 
 @timeit
@@ -564,7 +579,8 @@ def load_gcp_vpcs(neo4j_session, vpcs, gcp_update_tag):
     SET r.lastupdated = {gcp_update_tag}
     """
     for vpc in vpcs:
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             query,
             ProjectId=vpc['project_id'],
             PartialUri=vpc['partial_uri'],
@@ -609,7 +625,8 @@ def load_gcp_subnets(neo4j_session, subnets, gcp_update_tag):
     SET r.lastupdated = {gcp_update_tag}
     """
     for s in subnets:
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             query,
             VpcPartialUri=s['vpc_partial_uri'],
             VpcSelfLink=s['vpc_self_link'],
@@ -658,7 +675,8 @@ def load_gcp_forwarding_rules(neo4j_session, fwd_rules, gcp_update_tag):
         network = fwd.get('network', None)
         subnetwork = fwd.get('subnetwork', None)
 
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             query,
             PartialUri=fwd['partial_uri'],
             IPAddress=fwd['ip_address'],
@@ -700,7 +718,8 @@ def _attach_fwd_rule_to_subnet(neo4j_session, fwd, gcp_update_tag):
         SET p.lastupdated = {gcp_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         query,
         PartialUri=fwd['partial_uri'],
         SubNetworkPartialUri=fwd.get('subnetwork_partial_uri', None),
@@ -723,7 +742,8 @@ def _attach_fwd_rule_to_vpc(neo4j_session, fwd, gcp_update_tag):
         SET r.lastupdated = {gcp_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         query,
         PartialUri=fwd['partial_uri'],
         NetworkPartialUri=fwd.get('network_partial_uri', None),
@@ -732,20 +752,21 @@ def _attach_fwd_rule_to_vpc(neo4j_session, fwd, gcp_update_tag):
 
 
 @timeit
-def _attach_instance_tags(neo4j_session, instance, gcp_update_tag):
+def _attach_instance_tags(neo4j_session, instances, gcp_update_tag):
     """
-    Attach tags to GCP instance and to the VPCs that they are defined in.
+    Attach tags to GCP instances and to the VPCs that they are defined in.
     :param neo4j_session: The session
-    :param instance: The instance object
+    :param instances: The list of instance objects
     :param gcp_update_tag: The timestamp
     :return: Nothing
     """
     query = """
-    MATCH (i:GCPInstance{id:{InstanceId}})
+    UNWIND {Rows} AS row
+    MATCH (i:GCPInstance{id:row.InstanceId})
 
-    MERGE (t:GCPNetworkTag{id:{TagId}})
-    ON CREATE SET t.tag_id = {TagId},
-    t.value = {TagValue},
+    MERGE (t:GCPNetworkTag{id:row.TagId})
+    ON CREATE SET t.tag_id = row.TagId,
+    t.value = row.TagValue,
     t.firstseen = timestamp()
     SET t.lastupdated = {gcp_update_tag}
 
@@ -753,135 +774,144 @@ def _attach_instance_tags(neo4j_session, instance, gcp_update_tag):
     ON CREATE SET h.firstseen = timestamp()
     SET h.lastupdated = {gcp_update_tag}
 
-    WITH t
-    MATCH (vpc:GCPVpc{id:{VpcPartialUri}})
+    WITH t, row
+    MATCH (vpc:GCPVpc{id:row.VpcPartialUri})
 
     MERGE (vpc)<-[d:DEFINED_IN]-(t)
     ON CREATE SET d.firstseen = timestamp()
     SET d.lastupdated = {gcp_update_tag}
     """
-    for tag in instance.get('tags', {}).get('items', []):
-        for nic in instance.get('networkInterfaces', []):
-            tag_id = _create_gcp_network_tag_id(nic['vpc_partial_uri'], tag)
-            neo4j_session.run(
-                query,
-                InstanceId=instance['partial_uri'],
-                TagId=tag_id,
-                TagValue=tag,
-                VpcPartialUri=nic['vpc_partial_uri'],
-                gcp_update_tag=gcp_update_tag,
-            )
+    rows = []
+    for instance in instances:
+        for tag in instance.get('tags', {}).get('items', []):
+            for nic in instance.get('networkInterfaces', []):
+                rows.append({
+                    'InstanceId': instance['partial_uri'],
+                    'TagId': _create_gcp_network_tag_id(nic['vpc_partial_uri'], tag),
+                    'TagValue': tag,
+                    'VpcPartialUri': nic['vpc_partial_uri'],
+                })
+    load_batched(neo4j_session, query, rows, gcp_update_tag=gcp_update_tag)
 
 
 @timeit
-def _attach_gcp_nics(neo4j_session, instance, gcp_update_tag):
+def _attach_gcp_nics(neo4j_session, instances, gcp_update_tag):
     """
     Attach GCP Network Interfaces to GCP Instances and GCP Subnets.
     Then, attach GCP Instances directly to VPCs.
     :param neo4j_session: The Neo4j session
-    :param instance: The GCP instance
+    :param instances: The list of GCP instances
     :param gcp_update_tag: Timestamp to set the nodes
     :return: Nothing
     """
     query = """
-    MATCH (i:GCPInstance{id:{InstanceId}})
-    MERGE (nic:GCPNetworkInterface:NetworkInterface{id:{NicId}})
+    UNWIND {Rows} AS row
+    MATCH (i:GCPInstance{id:row.InstanceId})
+    MERGE (nic:GCPNetworkInterface:NetworkInterface{id:row.NicId})
     ON CREATE SET nic.firstseen = timestamp(),
-    nic.nic_id = {NicId}
-    SET nic.private_ip = {NetworkIP},
-    nic.name = {NicName},
+    nic.nic_id = row.NicId
+    SET nic.private_ip = row.NetworkIP,
+    nic.name = row.NicName,
     nic.lastupdated = {gcp_update_tag}
 
     MERGE (i)-[r:NETWORK_INTERFACE]->(nic)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {gcp_update_tag}
 
-    MERGE (subnet:GCPSubnet{id:{SubnetPartialUri}})
+    MERGE (subnet:GCPSubnet{id:row.SubnetPartialUri})
     ON CREATE SET subnet.firstseen = timestamp(),
-    subnet.partial_uri = {SubnetPartialUri}
+    subnet.partial_uri = row.SubnetPartialUri
     SET subnet.lastupdated = {gcp_update_tag}
 
     MERGE (nic)-[p:PART_OF_SUBNET]->(subnet)
     ON CREATE SET p.firstseen = timestamp()
     SET p.lastupdated = {gcp_update_tag}
     """
-    for nic in instance.get('networkInterfaces', []):
-        # Make an ID for GCPNetworkInterface nodes because GCP doesn't define one but we need to uniquely identify them
-        nic_id = f"{instance['partial_uri']}/networkinterfaces/{nic['name']}"
-        neo4j_session.run(
-            query,
-            InstanceId=instance['partial_uri'],
-            NicId=nic_id,
-            NetworkIP=nic.get('networkIP'),
-            NicName=nic['name'],
-            gcp_update_tag=gcp_update_tag,
-            SubnetPartialUri=nic['subnet_partial_uri'],
-        )
-        _attach_gcp_nic_access_configs(neo4j_session, nic_id, nic, gcp_update_tag)
+    rows = []
+    nics = []
+    for instance in instances:
+        for nic in instance.get('networkInterfaces', []):
+            # Make an ID for GCPNetworkInterface nodes because GCP doesn't define one but we need to uniquely identify
+            # them
+            nic_id = f"{instance['partial_uri']}/networkinterfaces/{nic['name']}"
+            rows.append({
+                'InstanceId': instance['partial_uri'],
+                'NicId': nic_id,
+                'NetworkIP': nic.get('networkIP'),
+                'NicName': nic['name'],
+                'SubnetPartialUri': nic['subnet_partial_uri'],
+            })
+            nics.append((nic_id, nic))
+    load_batched(neo4j_session, query, rows, gcp_update_tag=gcp_update_tag)
+    _attach_gcp_nic_access_configs(neo4j_session, nics, gcp_update_tag)
 
 
 @timeit
-def _attach_gcp_nic_access_configs(neo4j_session, nic_id, nic, gcp_update_tag):
+def _attach_gcp_nic_access_configs(neo4j_session, nics, gcp_update_tag):
     """
-    Attach an access configuration to the GCP NIC.
+    Attach access configurations to the GCP NICs.
     :param neo4j_session: The Neo4j session
-    :param instance: The GCP instance
+    :param nics: A list of (NIC ID, NIC object) tuples
     :param gcp_update_tag: The timestamp to set updated nodes to
     :return: Nothing
     """
     query = """
-    MATCH (nic{id:{NicId}})
-    MERGE (ac:GCPNicAccessConfig{id:{AccessConfigId}})
+    UNWIND {Rows} AS row
+    MATCH (nic:GCPNetworkInterface{id:row.NicId})
+    MERGE (ac:GCPNicAccessConfig{id:row.AccessConfigId})
     ON CREATE SET ac.firstseen = timestamp(),
-    ac.access_config_id = {AccessConfigId}
-    SET ac.type={Type},
-    ac.name = {Name},
-    ac.public_ip = {NatIP},
-    ac.set_public_ptr = {SetPublicPtr},
-    ac.public_ptr_domain_name = {PublicPtrDomainName},
-    ac.network_tier = {NetworkTier},
+    ac.access_config_id = row.AccessConfigId
+    SET ac.type=row.Type,
+    ac.name = row.Name,
+    ac.public_ip = row.NatIP,
+    ac.set_public_ptr = row.SetPublicPtr,
+    ac.public_ptr_domain_name = row.PublicPtrDomainName,
+    ac.network_tier = row.NetworkTier,
     ac.lastupdated = {gcp_update_tag}
 
     MERGE (nic)-[r:RESOURCE]->(ac)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {gcp_update_tag}
     """
-    for ac in nic.get('accessConfigs', []):
-        # Make an ID for GCPNicAccessConfig nodes because GCP doesn't define one but we need to uniquely identify them
-        access_config_id = f"{nic_id}/accessconfigs/{ac['type']}"
-        neo4j_session.run(
-            query,
-            NicId=nic_id,
-            AccessConfigId=access_config_id,
-            Type=ac['type'],
-            Name=ac['name'],
-            NatIP=ac.get('natIP', None),
-            SetPublicPtr=ac.get('setPublicPtr', None),
-            PublicPtrDomainName=ac.get('publicPtrDomainName', None),
-            NetworkTier=ac.get('networkTier', None),
-            gcp_update_tag=gcp_update_tag,
-        )
+    rows = []
+    for nic_id, nic in nics:
+        for ac in nic.get('accessConfigs', []):
+            rows.append({
+                'NicId': nic_id,
+                # Make an ID for GCPNicAccessConfig nodes because GCP doesn't define one but we need to uniquely
+                # identify them
+                'AccessConfigId': f"{nic_id}/accessconfigs/{ac['type']}",
+                'Type': ac['type'],
+                'Name': ac['name'],
+                'NatIP': ac.get('natIP', None),
+                'SetPublicPtr': ac.get('setPublicPtr', None),
+                'PublicPtrDomainName': ac.get('publicPtrDomainName', None),
+                'NetworkTier': ac.get('networkTier', None),
+            })
+    load_batched(neo4j_session, query, rows, gcp_update_tag=gcp_update_tag)
 
 
 @timeit
-def _attach_gcp_vpc(neo4j_session, instance_id, gcp_update_tag):
+def _attach_gcp_vpc(neo4j_session, instance_ids, gcp_update_tag):
     """
-    Attach a GCP instance directly to a VPC
+    Attach GCP instances directly to their VPCs
     :param neo4j_session: neo4j_session
-    :param instance: The GCP instance object
+    :param instance_ids: The list of GCP instance IDs
     :param gcp_update_tag:
     :return: Nothing
     """
     query = """
-    MATCH (i:GCPInstance{id:{InstanceId}})-[:NETWORK_INTERFACE]->(nic:GCPNetworkInterface)
+    UNWIND {Rows} AS row
+    MATCH (i:GCPInstance{id:row.InstanceId})-[:NETWORK_INTERFACE]->(nic:GCPNetworkInterface)
           -[p:PART_OF_SUBNET]->(sn:GCPSubnet)<-[r:RESOURCE]-(vpc:GCPVpc)
     MERGE (i)-[m:MEMBER_OF_GCP_VPC]->(vpc)
     ON CREATE SET m.firstseen = timestamp()
     SET m.lastupdated = {gcp_update_tag}
     """
-    neo4j_session.run(
+    load_batched(
+        neo4j_session,
         query,
-        InstanceId=instance_id,
+        [{'InstanceId': instance_id} for instance_id in instance_ids],
         gcp_update_tag=gcp_update_tag,
     )
 
@@ -915,7 +945,8 @@ def load_gcp_ingress_firewalls(neo4j_session, fw_list, gcp_update_tag):
     SET r.lastupdated = {gcp_update_tag}
     """
     for fw in fw_list:
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             query,
             FwPartialUri=fw['id'],
             Direction=fw['direction'],
@@ -974,7 +1005,8 @@ def _attach_firewall_rules(neo4j_session, fw, gcp_update_tag):
             # If sourceRanges is not specified then the rule must specify sourceTags.
             # Since an IP range cannot have a tag applied to it, it is ok if we don't ingest this rule.
             for ip_range in fw.get('sourceRanges', []):
-                neo4j_session.run(
+                run_write(
+                    neo4j_session,
                     template.safe_substitute(fw_rule_relationship_label=label),
                     FwPartialUri=fw['id'],
                     RuleId=rule['ruleid'],
@@ -1010,7 +1042,8 @@ def _attach_target_tags(neo4j_session, fw, gcp_update_tag):
     """
     for tag in fw.get('targetTags', []):
         tag_id = _create_gcp_network_tag_id(fw['vpc_partial_uri'], tag)
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             query,
             FwPartialUri=fw['id'],
             TagId=tag_id,
@@ -1088,9 +1121,12 @@ def sync_gcp_instances(neo4j_session, compute, project_id, zones, gcp_update_tag
     :param common_job_parameters: dict of other job parameters to pass to Neo4j
     :return: Nothing
     """
-    instance_responses = get_gcp_instance_responses(project_id, zones, compute)
-    instance_list = transform_gcp_instances(instance_responses)
-    load_gcp_instances(neo4j_session, instance_list, gcp_update_tag)
+    def load_response(instance_response):
+        instance_list = transform_gcp_instances([instance_response])
+        load_gcp_instances(neo4j_session, instance_list, gcp_update_tag)
+
+    # The compute resource object is not thread-safe, so the zones are queried one at a time on a single thread.
+    run_pipeline([partial(get_gcp_instance_response_pages, project_id, zones, compute)], load_response)
     # TODO scope the cleanup to the current project - https://github.com/lyft/cartography/issues/381
     cleanup_gcp_instances(neo4j_session, common_job_parameters)
 
@@ -6,6 +6,7 @@ from string import Template
 from googleapiclient.discovery import HttpError
 
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -88,7 +89,8 @@ def load_gcp_organizations(neo4j_session, data, gcp_update_tag):
     org.lastupdated = {gcp_update_tag}
     """
     for org_object in data:
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             query,
             OrgName=org_object['name'],
             DisplayName=org_object.get('displayName', None),
@@ -129,7 +131,8 @@ def load_gcp_folders(neo4j_session, data, gcp_update_tag):
         ON CREATE SET r.firstseen = timestamp()
         SET r.lastupdated = {gcp_update_tag}
         """
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             query,
             ParentId=folder['parent'],
             FolderName=folder['name'],
@@ -159,7 +162,8 @@ def load_gcp_projects(neo4j_session, data, gcp_update_tag):
     """
 
     for project in data:
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             query,
             ProjectId=project['projectId'],
             ProjectNumber=project['projectNumber'],
@@ -199,7 +203,8 @@ def _attach_gcp_project_parent(neo4j_session, project, gcp_update_tag):
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {gcp_update_tag}
     """)
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         INGEST_PARENT_TEMPLATE.safe_substitute(parent_label=parent_label),
         ParentId=parent_id,
         ProjectId=project['projectId'],
@@ -4,6 +4,7 @@ import logging
 from googleapiclient.discovery import HttpError
 
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -128,7 +129,8 @@ def load_dns_zones(neo4j_session, dns_zones, project_id, gcp_update_tag):
         r.firstseen = timestamp(),
         r.lastupdated = {gcp_update_tag}
     """
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_records,
         records=dns_zones,
         ProjectId=project_id,
@@ -174,7 +176,8 @@ def load_rrs(neo4j_session, dns_rrs, project_id, gcp_update_tag):
         r.firstseen = timestamp(),
         r.lastupdated = {gcp_update_tag}
     """
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_records,
         records=dns_rrs,
         gcp_update_tag=gcp_update_tag,
@@ -4,6 +4,7 @@ import logging
 from googleapiclient.discovery import HttpError
 
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -97,7 +98,8 @@ def load_gke_clusters(neo4j_session, cluster_resp, project_id, gcp_update_tag):
     SET r.lastupdated = {gcp_update_tag}
     """
     for cluster in cluster_resp.get('clusters', []):
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             query,
             ProjectId=project_id,
             ClusterSelfLink=cluster['selfLink'],
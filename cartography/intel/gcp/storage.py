@@ -3,6 +3,7 @@ import logging
 from googleapiclient.discovery import HttpError
 
 from cartography.intel.gcp import compute
+from cartography.util import load_batched
 from cartography.util import run_cleanup_job
 from cartography.util import timeit
 
@@ -110,90 +111,94 @@ def load_gcp_buckets(neo4j_session, buckets, gcp_update_tag):
     '''
 
     query = """
-    MERGE(p:GCPProject{projectnumber:{ProjectNumber}})
+    UNWIND {Rows} AS row
+    MERGE(p:GCPProject{projectnumber:row.ProjectNumber})
     ON CREATE SET p.firstseen = timestamp()
     SET p.lastupdated = {gcp_update_tag}
 
-    MERGE(bucket:GCPBucket{id:{BucketId}})
+    MERGE(bucket:GCPBucket{id:row.BucketId})
     ON CREATE SET bucket.firstseen = timestamp(),
-    bucket.bucket_id = {BucketId}
-    SET bucket.self_link = {SelfLink},
-    bucket.project_number = {ProjectNumber},
-    bucket.kind = {Kind},
-    bucket.location = {Location},
-    bucket.location_type = {LocationType},
-    bucket.meta_generation = {MetaGeneration},
-    bucket.storage_class = {StorageClass},
-    bucket.time_created = {TimeCreated},
-    bucket.retention_period = {RetentionPeriod},
-    bucket.iam_config_bucket_policy_only = {IamConfigBucketPolicyOnly},
-    bucket.owner_entity = {OwnerEntity},
-    bucket.owner_entity_id = {OwnerEntityId},
+    bucket.bucket_id = row.BucketId
+    SET bucket.self_link = row.SelfLink,
+    bucket.project_number = row.ProjectNumber,
+    bucket.kind = row.Kind,
+    bucket.location = row.Location,
+    bucket.location_type = row.LocationType,
+    bucket.meta_generation = row.MetaGeneration,
+    bucket.storage_class = row.StorageClass,
+    bucket.time_created = row.TimeCreated,
+    bucket.retention_period = row.RetentionPeriod,
+    bucket.iam_config_bucket_policy_only = row.IamConfigBucketPolicyOnly,
+    bucket.owner_entity = row.OwnerEntity,
+    bucket.owner_entity_id = row.OwnerEntityId,
     bucket.lastupdated = {gcp_update_tag},
-    bucket.versioning_enabled = {VersioningEnabled},
-    bucket.log_bucket = {LogBucket},
-    bucket.requester_pays = {RequesterPays},
-    bucket.default_kms_key_name = {DefaultKmsKeyName}
+    bucket.versioning_enabled = row.VersioningEnabled,
+    bucket.log_bucket = row.LogBucket,
+    bucket.requester_pays = row.RequesterPays,
+    bucket.default_kms_key_name = row.DefaultKmsKeyName
 
     MERGE (p)-[r:RESOURCE]->(bucket)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {gcp_update_tag}
     """
-    for bucket in buckets:
-        neo4j_session.run(
-            query,
-            ProjectNumber=bucket['project_number'],
-            BucketId=bucket['id'],
-            SelfLink=bucket['self_link'],
-            Kind=bucket['kind'],
-            Location=bucket['location'],
-            LocationType=bucket['location_type'],
-            MetaGeneration=bucket['meta_generation'],
-            StorageClass=bucket['storage_class'],
-            TimeCreated=bucket['time_created'],
-            RetentionPeriod=bucket['retention_period'],
-            IamConfigBucketPolicyOnly=bucket['iam_config_bucket_policy_only'],
-            OwnerEntity=bucket['owner_entity'],
-            OwnerEntityId=bucket['owner_entity_id'],
-            VersioningEnabled=bucket['versioning_enabled'],
-            LogBucket=bucket['log_bucket'],
-            RequesterPays=bucket['requester_pays'],
-            DefaultKmsKeyName=bucket['default_kms_key_name'],
-            gcp_update_tag=gcp_update_tag,
-        )
-        _attach_gcp_bucket_labels(neo4j_session, bucket, gcp_update_tag)
+    rows = [
+        {
+            'ProjectNumber': bucket['project_number'],
+            'BucketId': bucket['id'],
+            'SelfLink': bucket['self_link'],
+            'Kind': bucket['kind'],
+            'Location': bucket['location'],
+            'LocationType': bucket['location_type'],
+            'MetaGeneration': bucket['meta_generation'],
+            'StorageClass': bucket['storage_class'],
+            'TimeCreated': bucket['time_created'],
+            'RetentionPeriod': bucket['retention_period'],
+            'IamConfigBucketPolicyOnly': bucket['iam_config_bucket_policy_only'],
+            'OwnerEntity': bucket['owner_entity'],
+            'OwnerEntityId': bucket['owner_entity_id'],
+            'VersioningEnabled': bucket['versioning_enabled'],
+            'LogBucket': bucket['log_bucket'],
+            'RequesterPays': bucket['requester_pays'],
+            'DefaultKmsKeyName': bucket['default_kms_key_name'],
+        } for bucket in buckets
+    ]
+    load_batched(neo4j_session, query, rows, gcp_update_tag=gcp_update_tag)
+    _attach_gcp_bucket_labels(neo4j_session, buckets, gcp_update_tag)
 
 
 @timeit
-def _attach_gcp_bucket_labels(neo4j_session, bucket, gcp_update_tag):
+def _attach_gcp_bucket_labels(neo4j_session, buckets, gcp_update_tag):
     """
-    Attach GCP bucket labels to the bucket.
+    Attach GCP bucket labels to their buckets.
     :param neo4j_session: The neo4j session
-    :param bucket: The GCP bucket object
+    :param buckets: The list of GCP bucket objects
     :param gcp_update_tag: The update tag for this sync
     :return: Nothing
     """
     query = """
-    MERGE (l:Label:GCPBucketLabel{id: {BucketLabelId}})
+    UNWIND {Rows} AS row
+    MERGE (l:Label:GCPBucketLabel{id: row.BucketLabelId})
     ON CREATE SET l.firstseen = timestamp(),
-    l.key = {Key}
-    SET l.value = {Value},
+    l.key = row.Key
+    SET l.value = row.Value,
     l.lastupdated = {gcp_update_tag}
-    WITH l
-    MATCH (bucket:GCPBucket{id:{BucketId}})
+    WITH l, row
+    MATCH (bucket:GCPBucket{id:row.BucketId})
     MERGE (l)<-[r:LABELED]-(bucket)
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {gcp_update_tag}
     """
-    for (key, val) in bucket.get('labels', []):
-        neo4j_session.run(
-            query,
-            BucketLabelId=f"GCPBucket_{key}",
-            Key=key,
-            Value=val,
-            BucketId=bucket['id'],
-            gcp_update_tag=gcp_update_tag,
-        )
+    rows = [
+        {
+            'BucketLabelId': f"GCPBucket_{key}",
+            'Key': key,
+            'Value': val,
+            'BucketId': bucket['id'],
+        }
+        for bucket in buckets
+        for (key, val) in bucket.get('labels', [])
+    ]
+    load_batched(neo4j_session, query, rows, gcp_update_tag=gcp_update_tag)
 
 
 @timeit
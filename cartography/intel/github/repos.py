@@ -1,4 +1,5 @@
 import logging
+from functools import partial
 from string import Template
 
 from packaging.requirements import InvalidRequirement
@@ -6,7 +7,10 @@ from packaging.requirements import Requirement
 from packaging.utils import canonicalize_name
 
 from cartography.intel.github.util import fetch_all
+from cartography.intel.github.util import fetch_pages
+from cartography.pipeline import run_pipeline
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 
@@ -95,6 +99,18 @@ def get(token, api_url, organization):
     return repos
 
 
+def get_pages(token, api_url, organization):
+    """
+    Yield the repos of a Github organization one page of up to 100 repos at a time.
+    :param token: The Github API token as string.
+    :param api_url: The Github v4 API endpoint as string.
+    :param organization: The name of the target Github organization as string.
+    :return: A generator of lists of dicts representing repos. See tests.data.github.repos for data shape.
+    """
+    for resp in fetch_pages(token, api_url, organization, GITHUB_ORG_REPOS_PAGINATED_GRAPHQL, 'repositories'):
+        yield resp['data']['organization']['repositories']['nodes']
+
+
 def transform(repos_json):
     """
     Parses the JSON returned from GitHub API to create data for graph ingestion
@@ -324,7 +340,8 @@ def load_github_repos(neo4j_session, update_tag, repo_data):
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = r.UpdateTag
     """
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_repo,
         RepoData=repo_data,
         UpdateTag=update_tag,
@@ -354,7 +371,8 @@ def load_github_languages(neo4j_session, update_tag, repo_languages):
         ON CREATE SET r.firstseen = timestamp()
         SET r.lastupdated = {UpdateTag}"""
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_languages,
         Languages=repo_languages,
         UpdateTag=update_tag,
@@ -385,7 +403,8 @@ def load_github_owners(neo4j_session, update_tag, repo_owners):
 
         account_type = {'User': "GitHubUser", 'Organization': "GitHubOrganization"}
 
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             ingest_owner_template.safe_substitute(account_type=account_type[owner['type']]),
             Id=owner['owner_id'],
             UserName=owner['owner'],
@@ -416,7 +435,8 @@ def load_collaborators(neo4j_session, update_tag, collaborators):
     """)
     for collab_type in collaborators.keys():
         relationship_label = f"OUTSIDE_COLLAB_{collab_type}"
-        neo4j_session.run(
+        run_write(
+            neo4j_session,
             query.safe_substitute(rel_label=relationship_label),
             UserData=collaborators[collab_type],
             UpdateTag=update_tag,
@@ -449,7 +469,8 @@ def load_python_requirements(neo4j_session, update_tag, requirements_objects):
         SET r.lastupdated = {UpdateTag},
         r.specifier = req.specifier
     """
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         query,
         Requirements=requirements_objects,
         UpdateTag=update_tag,
@@ -467,7 +488,10 @@ def sync(neo4j_session, common_job_parameters, github_api_key, github_url, organ
     :return: Nothing
     """
     logger.info("Syncing GitHub repos")
-    repos_json = get(github_api_key, github_url, organization)
-    repo_data = transform(repos_json)
-    load(neo4j_session, common_job_parameters, repo_data)
+
+    def load_page(repos_json):
+        repo_data = transform(repos_json)
+        load(neo4j_session, common_job_parameters, repo_data)
+
+    run_pipeline([partial(get_pages, github_api_key, github_url, organization)], load_page)
     run_cleanup_job('github_repos_cleanup.json', neo4j_session, common_job_parameters)
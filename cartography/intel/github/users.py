@@ -2,6 +2,7 @@ import logging
 
 from cartography.intel.github.util import fetch_all
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -77,7 +78,8 @@ def load_organization_users(neo4j_session, user_data, org_data, update_tag):
     ON CREATE SET r.firstseen = timestamp()
     SET r.lastupdated = {UpdateTag}
     """
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         query,
         OrgUrl=org_data['url'],
         OrgLogin=org_data['login'],
@@ -3,6 +3,8 @@ import logging
 
 import requests
 
+import cartography.replay
+
 logger = logging.getLogger(__name__)
 # Connect and read timeouts of 60 seconds each; see https://requests.readthedocs.io/en/master/user/advanced/#timeouts
 _TIMEOUT = (60, 60)
@@ -17,6 +19,11 @@ def call_github_api(query, variables, token, api_url):
     :param api_url: the URL to call for the API
     :return: query results json
     """
+    key = [api_url, query, variables]
+    return cartography.replay.call('github', 'graphql', key, _post_query, query, variables, token, api_url)
+
+
+def _post_query(query, variables, token, api_url):
     headers = {'Authorization': f"token {token}"}
     try:
         response = requests.post(
@@ -69,9 +76,28 @@ def fetch_all(token, api_url, organization, query, resource_type, field_name):
     :return: A 2-tuple containing 1. A list of data items of the given `resource_type` and `field_name`,  and 2. a dict
     containing the `url` and the `login` fields of the organization that the items belong to.
     """
+    data = []
+    for resp in fetch_pages(token, api_url, organization, query, resource_type):
+        data.extend(resp['data']['organization'][resource_type][field_name])
+    org_data = {'url': resp['data']['organization']['url'], 'login': resp['data']['organization']['login']}
+    return data, org_data
+
+
+def fetch_pages(token, api_url, organization, query, resource_type):
+    """
+    Yield the raw responses of Github's paginated GraphQL API one page at a time, so that callers can process a page
+    while the next one is being fetched. On API timeouts and HTTP errors a warning is logged and no more pages are
+    yielded.
+    :param token: The Github API token as string.
+    :param api_url: The Github v4 API endpoint as string.
+    :param organization: The name of the target Github organization as string.
+    :param query: The GraphQL query, e.g. `GITHUB_ORG_USERS_PAGINATED_GRAPHQL`
+    :param resource_type: The name of the paginated resource under the organization e.g. `membersWithRole` or
+    `repositories`.
+    :return: A generator of raw response objects from the requests.get().json() call.
+    """
     cursor = None
     has_next_page = True
-    data = []
     while has_next_page:
         try:
             resp = fetch_page(token, api_url, organization, query, cursor)
@@ -80,16 +106,14 @@ def fetch_all(token, api_url, organization, query, resource_type, field_name):
                 "GitHub: Could not retrieve page of resource %s due to API timeout; continuing with incomplete data",
                 resource_type,
             )
-            break
+            return
         except requests.exceptions.HTTPError as e:
             logger.warning(
                 f"GitHub: Could not retrieve page of resource `{resource_type}` due to HTTP error."
                 f"Details: {e}; Continuing with incomplete data.",
             )
-            break
+            return
+        yield resp
         resource = resp['data']['organization'][resource_type]
-        data.extend(resource[field_name])
         cursor = resource['pageInfo']['endCursor']
         has_next_page = resource['pageInfo']['hasNextPage']
-    org_data = {'url': resp['data']['organization']['url'], 'login': resp['data']['organization']['login']}
-    return data, org_data
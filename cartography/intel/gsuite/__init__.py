@@ -6,6 +6,7 @@ import googleapiclient.discovery
 from oauth2client.client import ApplicationDefaultCredentialsError
 from oauth2client.client import GoogleCredentials
 
+import cartography.replay
 from cartography.intel.gsuite import api
 from cartography.util import timeit
 
@@ -32,7 +33,9 @@ def _get_admin_resource(credentials):
     :param credentials: The GoogleCredentials object
     :return: An admin api resource object
     """
-    return googleapiclient.discovery.build('admin', 'directory_v1', credentials=credentials, cache_discovery=False)
+    return googleapiclient.discovery.build(
+        'admin', 'directory_v1', cache_discovery=False, **cartography.replay.google_build_kwargs(credentials),
+    )
 
 
 def _initialize_resources(credentials):
@@ -60,9 +63,13 @@ def start_gsuite_ingestion(session, config):
     }
 
     try:
-        credentials = GoogleCredentials.from_stream(GSUITE_CREDS)
-        credentials = credentials.create_scoped(OAUTH_SCOPE)
-        credentials = credentials.create_delegated(GSUITE_DELEGATED_ADMIN)
+        if cartography.replay.is_replaying():
+            # When replaying recorded responses no requests are sent, so no credentials are needed.
+            credentials = None
+        else:
+            credentials = GoogleCredentials.from_stream(GSUITE_CREDS)
+            credentials = credentials.create_scoped(OAUTH_SCOPE)
+            credentials = credentials.create_delegated(GSUITE_DELEGATED_ADMIN)
 
     except ApplicationDefaultCredentialsError as e:
         logger.debug('Error occurred calling GoogleCredentials.get_application_default().', exc_info=True)
@@ -1,6 +1,7 @@
 import logging
 
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 
@@ -138,7 +139,7 @@ def load_gsuite_groups(session, groups, gsuite_update_tag):
         g.lastupdated = {UpdateTag}
     """
     logger.info('Ingesting {} gsuite groups'.format(len(groups)))
-    session.run(ingestion_qry, GroupData=groups, UpdateTag=gsuite_update_tag)
+    run_write(session, ingestion_qry, GroupData=groups, UpdateTag=gsuite_update_tag)
 
 
 @timeit
@@ -177,7 +178,7 @@ def load_gsuite_users(session, users, gsuite_update_tag):
         u.lastupdated = {UpdateTag}
     """
     logger.info('Ingesting {} gsuite users'.format(len(users)))
-    session.run(ingestion_qry, UserData=users, UpdateTag=gsuite_update_tag)
+    run_write(session, ingestion_qry, UserData=users, UpdateTag=gsuite_update_tag)
 
 
 @timeit
@@ -191,7 +192,8 @@ def load_gsuite_members(session, group, members, gsuite_update_tag):
         ON MATCH SET
         r.lastupdated = {UpdateTag}
     """
-    session.run(
+    run_write(
+        session,
         ingestion_qry,
         MemberData=members,
         GroupID=group.get("id"),
@@ -206,7 +208,7 @@ def load_gsuite_members(session, group, members, gsuite_update_tag):
         ON MATCH SET
         r.lastupdated = {UpdateTag}
     """
-    session.run(membership_qry, MemberData=members, GroupID=group.get("id"), UpdateTag=gsuite_update_tag)
+    run_write(session, membership_qry, MemberData=members, GroupID=group.get("id"), UpdateTag=gsuite_update_tag)
 
 
 @timeit
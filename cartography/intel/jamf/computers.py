@@ -2,6 +2,7 @@ import logging
 
 from cartography.intel.jamf.util import call_jamf_api
 from cartography.util import run_cleanup_job
+from cartography.util import run_write
 from cartography.util import timeit
 
 
@@ -24,7 +25,7 @@ def load_computer_groups(data, neo4j_session, update_tag):
     g.lastupdated = {UpdateTag}
     """
     groups = data.get("computer_groups")
-    neo4j_session.run(ingest_groups, JsonData=groups, UpdateTag=update_tag)
+    run_write(neo4j_session, ingest_groups, JsonData=groups, UpdateTag=update_tag)
 
 
 @timeit
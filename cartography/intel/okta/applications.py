@@ -7,6 +7,7 @@ from okta.framework.OktaError import OktaError
 
 from cartography.intel.okta.utils import create_api_client
 from cartography.intel.okta.utils import is_last_page
+from cartography.util import run_write
 from cartography.util import timeit
 
 
@@ -264,7 +265,8 @@ def _load_okta_applications(neo4j_session, okta_org_id, app_list, okta_update_ta
     SET org_r.lastupdated = {okta_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_statement,
         ORG_ID=okta_org_id,
         APP_LIST=app_list,
@@ -293,7 +295,8 @@ def _load_application_user(neo4j_session, app_id, user_list, okta_update_tag):
     SET r.lastupdated = {okta_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest,
         APP_ID=app_id,
         USER_LIST=user_list,
@@ -322,7 +325,8 @@ def _load_application_group(neo4j_session, app_id, group_list, okta_update_tag):
     SET r.lastupdated = {okta_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest,
         APP_ID=app_id,
         GROUP_LIST=group_list,
@@ -356,7 +360,8 @@ def _load_application_reply_urls(neo4j_session, app_id, reply_urls, okta_update_
     SET r.lastupdated = {okta_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest,
         APP_ID=app_id,
         URL_LIST=reply_urls,
@@ -2,6 +2,7 @@
 import logging
 import re
 
+from cartography.util import run_write
 from cartography.util import timeit
 
 
@@ -70,7 +71,8 @@ def _load_okta_group_to_aws_roles(neo4j_session, group_to_role, okta_update_tag)
     SET r.lastupdated = {okta_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_statement,
         GROUP_TO_ROLE=group_to_role,
         okta_update_tag=okta_update_tag,
@@ -91,7 +93,8 @@ def _load_human_can_assume_role(neo4j_session, okta_update_tag):
     SET r.lastupdated = {okta_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_statement,
         okta_update_tag=okta_update_tag,
     )
@@ -4,6 +4,8 @@ import logging
 from okta import FactorsClient
 from okta.framework.OktaError import OktaError
 
+import cartography.replay
+from cartography.util import run_write
 from cartography.util import timeit
 
 
@@ -25,7 +27,7 @@ def _create_factor_client(okta_org, okta_api_key):
         api_token=okta_api_key,
     )
 
-    return factor_client
+    return cartography.replay.register_okta_client(factor_client)
 
 
 @timeit
@@ -117,7 +119,8 @@ def _load_user_factors(neo4j_session, user_id, factors, okta_update_tag):
     SET r.lastupdated = {okta_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest,
         USER_ID=user_id,
         FACTOR_LIST=factors,
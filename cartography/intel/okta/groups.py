@@ -8,6 +8,7 @@ from okta.models.usergroup import UserGroup
 
 from cartography.intel.okta.utils import create_api_client
 from cartography.intel.okta.utils import is_last_page
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -185,7 +186,8 @@ def _load_okta_groups(neo4j_session, okta_org_id, group_list, okta_update_tag):
     SET org_r.lastupdated = {okta_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_statement,
         ORG_ID=okta_org_id,
         GROUP_LIST=group_list,
@@ -214,7 +216,8 @@ def _load_okta_group_members(neo4j_session, group_id, member_list, okta_update_t
     SET r.lastupdated = {okta_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest,
         GROUP_ID=group_id,
         MEMBER_LIST=member_list,
@@ -1,6 +1,7 @@
 # Okta intel module - Organization
 import logging
 
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -21,7 +22,8 @@ def create_okta_organization(neo4j_session, organization, okta_update_tag):
     SET org.lastupdated = {okta_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest,
         ORG_NAME=organization,
         okta_update_tag=okta_update_tag,
@@ -3,6 +3,7 @@ import json
 import logging
 
 from cartography.intel.okta.utils import create_api_client
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -86,7 +87,8 @@ def _load_trusted_origins(neo4j_session, okta_org_id, trusted_list, okta_update_
     SET r.lastupdated = {okta_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest,
         ORG_ID=okta_org_id,
         TRUSTED_LIST=trusted_list,
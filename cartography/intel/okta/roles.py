@@ -3,6 +3,7 @@ import json
 import logging
 
 from cartography.intel.okta.utils import create_api_client
+from cartography.util import run_write
 from cartography.util import timeit
 
 logger = logging.getLogger(__name__)
@@ -105,7 +106,8 @@ def _load_user_role(neo4j_session, user_id, roles_data, okta_update_tag):
     SET r2.lastupdated = {okta_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest,
         USER_ID=user_id,
         ROLES_DATA=roles_data,
@@ -132,7 +134,8 @@ def _load_group_role(neo4j_session, group_id, roles_data, okta_update_tag):
     SET r2.lastupdated = {okta_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest,
         GROUP_ID=group_id,
         ROLES_DATA=roles_data,
@@ -3,6 +3,8 @@ import logging
 
 from okta import UsersClient
 
+import cartography.replay
+from cartography.util import run_write
 from cartography.util import timeit
 
 
@@ -22,7 +24,7 @@ def _create_user_client(okta_org, okta_api_key):
         api_token=okta_api_key,
     )
 
-    return user_client
+    return cartography.replay.register_okta_client(user_client)
 
 
 @timeit
@@ -151,7 +153,8 @@ def _load_okta_users(neo4j_session, okta_org_id, user_list, okta_update_tag):
     SET h.lastupdated = {okta_update_tag}
     """
 
-    neo4j_session.run(
+    run_write(
+        neo4j_session,
         ingest_statement,
         ORG_ID=okta_org_id,
         USER_LIST=user_list,
@@ -1,6 +1,8 @@
 # Okta intel module - utility functions
 from okta.framework.ApiClient import ApiClient
 
+import cartography.replay
+
 
 def is_last_page(response):
     """
@@ -26,4 +28,4 @@ def create_api_client(okta_org, path_name, api_key):
         api_token=api_key,
     )
 
-    return api_client
+    return cartography.replay.register_okta_client(api_client)
@@ -0,0 +1,82 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# The number of items that producers may get ahead of the loader before they block.
+DEFAULT_MAX_QUEUE_SIZE = 10
+
+# How often, in seconds, a blocked producer checks whether the pipeline has been stopped.
+_PUT_POLL_INTERVAL = 0.1
+
+_DONE = object()
+
+
+class _ProducerFailure:
+    def __init__(self, exception):
+        self.exception = exception
+
+
+def _put(items, item, stopped):
+    while not stopped.is_set():
+        try:
+            items.put(item, timeout=_PUT_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(producer, items, stopped):
+    if stopped.is_set():
+        return
+    try:
+        for item in producer():
+            if not _put(items, item, stopped):
+                return
+    except BaseException as e:
+        # Always hand the loader a terminal item, otherwise it would wait forever for this producer to finish.
+        _put(items, _ProducerFailure(e), stopped)
+    else:
+        _put(items, _DONE, stopped)
+
+
+def run_pipeline(producers, load_func, max_workers=1, max_queue_size=DEFAULT_MAX_QUEUE_SIZE):
+    """
+    Overlap fetching data from an API with loading it into Neo4j.
+
+    Each producer runs on a background thread and its items are handed to `load_func` on the calling thread through a
+    bounded queue, so that the Neo4j session is only ever used from the thread that owns it. When the queue is full the
+    producers block until the loader catches up, which keeps at most `max_queue_size` items in memory at once.
+
+    If a producer or `load_func` raises, the remaining producers are stopped at their next item and the exception is
+    re-raised from this function.
+
+    :param producers: A list of callables that take no arguments and return an iterable of items, usually a generator
+        that yields one page of API results at a time.
+    :param load_func: The function called with each item, on the calling thread.
+    :param max_workers: The maximum number of producers that run at the same time. Items of a single producer are
+        loaded in the order they were produced, but items of different producers may be interleaved.
+    :param max_queue_size: The maximum number of items waiting to be loaded.
+    """
+    if not producers:
+        return
+    items = queue.Queue(maxsize=max_queue_size)
+    stopped = threading.Event()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(producers)))) as executor:
+        try:
+            for producer in producers:
+                executor.submit(_produce, producer, items, stopped)
+            remaining = len(producers)
+            while remaining:
+                item = items.get()
+                if item is _DONE:
+                    remaining -= 1
+                elif isinstance(item, _ProducerFailure):
+                    raise item.exception
+                else:
+                    load_func(item)
+        finally:
+            stopped.set()
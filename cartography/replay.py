@@ -0,0 +1,247 @@
+import base64
+import datetime
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from functools import partial
+from functools import wraps
+
+import dateutil.parser
+import httplib2
+import requests
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+logger = logging.getLogger(__name__)
+
+# The store that API responses are recorded to or replayed from. Set at the start of a run by
+# `cartography.sync.run_with_config` if `--record-dir` or `--replay-dir` is given; None means call the APIs as usual.
+store = None
+
+_AWS_CONTEXT_KEY = 'cartography_replay_key'
+
+
+class ReplayMissError(KeyError):
+    """
+    Raised in replay mode when an API call is made whose response was not recorded.
+    """
+
+
+class _ReplayEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return {'__datetime__': o.isoformat()}
+        if isinstance(o, bytes):
+            return {'__bytes__': base64.b64encode(o).decode('ascii')}
+        return super().default(o)
+
+
+def _decode_object(d):
+    if '__datetime__' in d:
+        return dateutil.parser.parse(d['__datetime__'])
+    if '__bytes__' in d:
+        return base64.b64decode(d['__bytes__'])
+    return d
+
+
+class ResponseStore:
+    """
+    A directory of gzipped JSON files holding raw API responses, one file per request.
+
+    Responses are stored at `<directory>/<namespace>/<name>-<digest>.json.gz`, where the namespace groups responses by
+    provider and scope (e.g. `aws/<profile>/<region>/<service>`) and the digest is a hash of the request's parameters.
+    Datetimes and bytes are encoded so that replayed responses have the same types as the original ones.
+
+    :type directory: string
+    :param directory: The directory to read and write responses in.
+    :type replaying: bool
+    :param replaying: If True, responses are read from the store instead of calling the APIs. Otherwise API responses
+        are written to the store as they are received.
+    """
+
+    def __init__(self, directory, replaying=False):
+        self.directory = directory
+        self.replaying = replaying
+
+    def _path(self, namespace, name, key):
+        digest = hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, namespace, f"{name}-{digest}.json.gz")
+
+    def load(self, namespace, name, key):
+        """
+        Return the response recorded for the given request.
+        :raises ReplayMissError: If no response was recorded for the request.
+        """
+        path = self._path(namespace, name, key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                return json.load(f, object_hook=_decode_object)
+        except FileNotFoundError:
+            raise ReplayMissError(f"No recorded response for {namespace}/{name} with key {key} at {path}.")
+
+    def save(self, namespace, name, key, value):
+        """
+        Record the response to the given request, replacing any previously recorded one. Responses that cannot be
+        serialized to JSON are skipped with a warning.
+        """
+        try:
+            data = json.dumps(value, cls=_ReplayEncoder).encode('utf-8')
+        except TypeError:
+            logger.warning("Not recording response for %s/%s: it cannot be serialized.", namespace, name, exc_info=True)
+            return
+        path = self._path(namespace, name, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so that concurrent writers and interrupted runs never leave partial files.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(gzip.compress(data))
+        os.replace(tmp_path, path)
+
+
+def is_replaying():
+    return store is not None and store.replaying
+
+
+def call(namespace, name, key, func, *args, **kwargs):
+    """
+    Call `func(*args, **kwargs)` through the response store: its return value is recorded if recording, or returned
+    from the store without calling `func` if replaying.
+    :param namespace: The namespace of the response in the store, e.g. `github`.
+    :param name: A readable name for the request, used in the file name.
+    :param key: A JSON-serializable value that identifies the request within the namespace.
+    :param func: The function that calls the API.
+    :return: The return value of `func`.
+    """
+    if store is None:
+        return func(*args, **kwargs)
+    if store.replaying:
+        return store.load(namespace, name, key)
+    result = func(*args, **kwargs)
+    store.save(namespace, name, key, result)
+    return result
+
+
+# AWS: hook into the botocore event system of a boto3 session so that every client created from it, and every page of
+# its paginators, goes through the store.
+def _aws_set_key(profile_name, params, model, context, **kwargs):
+    region = context.get('client_region') or 'global'
+    namespace = '/'.join(['aws', profile_name, region, model.service_model.service_name])
+    context[_AWS_CONTEXT_KEY] = (namespace, model.name, params)
+
+
+class _ReplayedHttpResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+        self.content = b''
+        self.raw = None
+
+
+def _aws_replay(context, **kwargs):
+    if _AWS_CONTEXT_KEY not in context or not is_replaying():
+        return None
+    recorded = store.load(*context[_AWS_CONTEXT_KEY])
+    # Returning a response from `before-call` makes botocore skip sending the request.
+    return _ReplayedHttpResponse(recorded['status_code']), recorded['parsed']
+
+
+def _aws_record(http_response, parsed, context, **kwargs):
+    if _AWS_CONTEXT_KEY not in context or store is None or store.replaying:
+        return
+    store.save(*context[_AWS_CONTEXT_KEY], {'status_code': http_response.status_code, 'parsed': parsed})
+
+
+def register_boto3_session(boto3_session):
+    """
+    Record or replay the API calls of all clients that are created from the given boto3 session from now on. Does
+    nothing if no response store is configured.
+    :param boto3_session: The boto3 session.
+    """
+    if store is None:
+        return
+    events = boto3_session.events
+    events.register('provide-client-params', partial(_aws_set_key, boto3_session.profile_name or 'default'))
+    events.register('before-call', _aws_replay)
+    events.register('after-call', _aws_record)
+
+
+# Google: a request class for `googleapiclient.discovery.build` that executes requests through the store. HTTP errors
+# are recorded too because the GCP intel modules inspect them to detect disabled APIs.
+class _StoredHttpRequest(HttpRequest):
+    def execute(self, http=None, num_retries=0):
+        key = [self.method, self.uri, self.body]
+        if is_replaying():
+            recorded = store.load('google', self.methodId or 'request', key)
+            if 'error' in recorded:
+                error = recorded['error']
+                raise HttpError(httplib2.Response({'status': error['status']}), error['content'], uri=self.uri)
+            return recorded['response']
+        try:
+            response = super().execute(http=http, num_retries=num_retries)
+        except HttpError as e:
+            error = {'status': e.resp.status, 'content': e.content}
+            store.save('google', self.methodId or 'request', key, {'error': error})
+            raise
+        store.save('google', self.methodId or 'request', key, {'response': response})
+        return response
+
+
+def google_build_kwargs(credentials):
+    """
+    Return the keyword arguments to pass to `googleapiclient.discovery.build` for a resource object whose requests
+    go through the response store, if one is configured.
+    :param credentials: The Google credentials to authorize requests with. Unused when replaying.
+    :return: A dict of keyword arguments.
+    """
+    if store is None:
+        return {'credentials': credentials}
+    if store.replaying:
+        return {'http': httplib2.Http(), 'requestBuilder': _StoredHttpRequest}
+    return {'credentials': credentials, 'requestBuilder': _StoredHttpRequest}
+
+
+# Okta: the SDK clients send all reads through `ApiClient.get` and hand back `requests.Response` objects, so the
+# responses are stored with enough detail to rebuild them, including the `Link` headers used for paging.
+def _okta_response_to_dict(response):
+    return {
+        'status_code': response.status_code,
+        'headers': dict(response.headers),
+        'url': response.url,
+        'content': response.content,
+    }
+
+
+def _okta_response_from_dict(recorded):
+    response = requests.Response()
+    response.status_code = recorded['status_code']
+    response.headers = requests.structures.CaseInsensitiveDict(recorded['headers'])
+    response.url = recorded['url']
+    response._content = recorded['content']
+    response.encoding = 'utf-8'
+    return response
+
+
+def register_okta_client(okta_client):
+    """
+    Record or replay the GET requests of the given Okta SDK client. Does nothing if no response store is configured.
+    :param okta_client: An instance of `okta.framework.ApiClient.ApiClient` or one of its subclasses.
+    :return: The same client.
+    """
+    if store is None:
+        return okta_client
+    get = okta_client.get
+
+    @wraps(get)
+    def stored_get(url, params=None, attempts=0):
+        key = [url, params]
+        if is_replaying():
+            return _okta_response_from_dict(store.load('okta', 'get', key))
+        response = get(url, params, attempts)
+        store.save('okta', 'get', key, _okta_response_to_dict(response))
+        return response
+
+    okta_client.get = stored_get
+    return okta_client
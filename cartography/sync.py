@@ -1,11 +1,15 @@
 import logging
 import time
 from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
 
 import neobolt.exceptions
 from neo4j import GraphDatabase
 from statsd import StatsClient
 
+import cartography.checkpoint
 import cartography.intel.analysis
 import cartography.intel.aws
 import cartography.intel.create_indexes
@@ -14,6 +18,8 @@ import cartography.intel.gcp
 import cartography.intel.github
 import cartography.intel.gsuite
 import cartography.intel.okta
+import cartography.replay
+import cartography.util
 
 
 logger = logging.getLogger(__name__)
@@ -27,13 +33,18 @@ class Sync:
     a sequence of sync "stages" which are responsible for retrieving data from various sources (APIs, files, etc.),
     pushing that data to Neo4j, and removing now-invalid nodes and relationships from the graph. An instance of this
     class can be configured to run any number of stages in a specific order.
+
+    Stages may declare the names of other stages they depend on. A stage is only started once all of its dependencies
+    have finished, and stages whose dependencies are satisfied may run concurrently (see config.stage_workers). Each
+    stage runs on its own Neo4j session.
     """
 
     def __init__(self):
         # NOTE we may need meta-stages at some point to allow hooking into pre-sync, sync, and post-sync
         self._stages = OrderedDict()
+        self._dependencies = {}
 
-    def add_stage(self, name, func):
+    def add_stage(self, name, func, depends_on=None):
         """
         Add one stage to the sync task.
 
@@ -41,22 +52,54 @@ class Sync:
         :param name: The name of the stage.
         :type func: Callable
         :param func: The object to call when the stage is executed.
+        :type depends_on: List[string]
+        :param depends_on: Names of the stages that must finish before this stage is started. Optional.
         """
         self._stages[name] = func
+        self._dependencies[name] = list(depends_on or [])
 
     def add_stages(self, stages):
         """
         Add multiple stages to the sync task.
 
-        :type stages: List[Tuple[string, Callable]]
-        :param stages: A list of stage names and stage callable pairs.
+        :type stages: List[Tuple]
+        :param stages: A list of (stage name, stage callable) or (stage name, stage callable, dependency names) tuples.
+        """
+        for stage in stages:
+            self.add_stage(*stage)
+
+    def get_stage_order(self):
         """
-        for name, func in stages:
-            self.add_stage(name, func)
+        Return the stage names in an order which satisfies all declared dependencies. Stages without an ordering
+        constraint between them keep the order in which they were added.
+
+        :rtype: List[string]
+        :return: The ordered stage names.
+        """
+        for name, dependencies in self._dependencies.items():
+            for dependency in dependencies:
+                if dependency not in self._stages:
+                    raise ValueError(f"Sync stage '{name}' depends on unknown stage '{dependency}'.")
+        ordered = []
+        remaining = OrderedDict((name, set(deps)) for name, deps in self._dependencies.items())
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Sync stages have circular dependencies: {', '.join(remaining)}.")
+            for name in ready:
+                del remaining[name]
+                ordered.append(name)
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return ordered
 
     def run(self, neo4j_driver, config):
         """
-        Execute all stages in the sync task in sequence.
+        Execute all stages in the sync task, respecting declared stage dependencies.
+
+        Up to config.stage_workers stages run at the same time. If a stage raises, no further stages are started and
+        the exception is re-raised once the stages that are already running have finished. If config.stages is set,
+        only those stages are run, and their dependencies on the stages that are left out are ignored.
 
         :type neo4j_driver: neo4j.Driver
         :param neo4j_driver: Neo4j driver object.
@@ -64,20 +107,71 @@ class Sync:
         :param config: Configuration for the sync run.
         """
         logger.info("Starting sync with update tag '%d'", config.update_tag)
-        with neo4j_driver.session() as neo4j_session:
-            for stage_name, stage_func in self._stages.items():
-                logger.info("Starting sync stage '%s'", stage_name)
-                try:
-                    stage_func(neo4j_session, config)
-                except (KeyboardInterrupt, SystemExit):
-                    logger.warning("Sync interrupted during stage '%s'.", stage_name)
-                    raise
-                except Exception:
-                    logger.exception("Unhandled exception during sync stage '%s'", stage_name)
-                    raise  # TODO this should be configurable
-                logger.info("Finishing sync stage '%s'", stage_name)
+        self.get_stage_order()  # validate the dependency graph before starting anything
+        selected = set(self._stages)
+        if config.stages is not None:
+            unknown = set(config.stages) - selected
+            if unknown:
+                raise ValueError(
+                    f"Unknown sync stages: {', '.join(sorted(unknown))}. Valid stages are: {', '.join(self._stages)}.",
+                )
+            selected = set(config.stages)
+            logger.info("Running the selected sync stages: %s", ', '.join(config.stages))
+        cartography.util.neo4j_driver = neo4j_driver
+        pending = OrderedDict(
+            (name, set(deps) & selected) for name, deps in self._dependencies.items() if name in selected
+        )
+        completed = [
+            name for name in pending if cartography.checkpoint.is_completed(cartography.checkpoint.STAGE, name)
+        ]
+        for name in completed:
+            logger.info("Skipping sync stage '%s', which completed in an earlier attempt of this run.", name)
+            del pending[name]
+        for deps in pending.values():
+            deps.difference_update(completed)
+        running = {}
+        failure = None
+        with ThreadPoolExecutor(max_workers=max(1, config.stage_workers or 1)) as executor:
+            try:
+                while pending or running:
+                    if failure is None:
+                        ready = [name for name, deps in pending.items() if not deps]
+                        for name in ready:
+                            del pending[name]
+                            running[executor.submit(self._run_stage, name, neo4j_driver, config)] = name
+                    if not running:
+                        break
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage_name = running.pop(future)
+                        exception = future.exception()
+                        if exception is not None:
+                            failure = failure or exception
+                            continue
+                        for deps in pending.values():
+                            deps.discard(stage_name)
+            except BaseException:
+                for future in running:
+                    future.cancel()
+                raise
+        if failure is not None:
+            raise failure  # TODO this should be configurable
         logger.info("Finishing sync with update tag '%d'", config.update_tag)
 
+    def _run_stage(self, stage_name, neo4j_driver, config):
+        logger.info("Starting sync stage '%s'", stage_name)
+        with neo4j_driver.session() as neo4j_session:
+            try:
+                self._stages[stage_name](neo4j_session, config)
+            except (KeyboardInterrupt, SystemExit):
+                logger.warning("Sync interrupted during stage '%s'.", stage_name)
+                raise
+            except Exception:
+                logger.exception("Unhandled exception during sync stage '%s'", stage_name)
+                raise
+        cartography.checkpoint.mark_completed(cartography.checkpoint.STAGE, stage_name)
+        logger.info("Finishing sync stage '%s'", stage_name)
+
 
 def run_with_config(sync, config):
     """
@@ -99,13 +193,25 @@ def run_with_config(sync, config):
             prefix=config.statsd_prefix,
         )
 
+    if config.replay_dir:
+        cartography.replay.store = cartography.replay.ResponseStore(config.replay_dir, replaying=True)
+    elif config.record_dir:
+        cartography.replay.store = cartography.replay.ResponseStore(config.record_dir)
+
+    if config.neo4j_batch_size:
+        cartography.util.neo4j_batch_size = config.neo4j_batch_size
+
     neo4j_auth = None
     if config.neo4j_user or config.neo4j_password:
         neo4j_auth = (config.neo4j_user, config.neo4j_password)
+    neo4j_config = {}
+    if config.neo4j_max_retry_time is not None:
+        neo4j_config['max_retry_time'] = config.neo4j_max_retry_time
     try:
         neo4j_driver = GraphDatabase.driver(
             config.neo4j_uri,
             auth=neo4j_auth,
+            **neo4j_config,
         )
     except neobolt.exceptions.ServiceUnavailable as e:
         logger.debug("Error occurred during Neo4j connect.", exc_info=True)
@@ -142,7 +248,33 @@ def run_with_config(sync, config):
     default_update_tag = int(time.time())
     if not config.update_tag:
         config.update_tag = default_update_tag
-    return sync.run(neo4j_driver, config)
+
+    checkpoint = None
+    if config.checkpoint_file:
+        if config.resume:
+            checkpoint = cartography.checkpoint.Checkpoint.load(config.checkpoint_file)
+            if checkpoint is None:
+                logger.info("No checkpoint found at '%s', starting a new sync run.", config.checkpoint_file)
+            else:
+                logger.info(
+                    "Resuming the sync run with update tag '%d' from checkpoint '%s'.",
+                    checkpoint.update_tag,
+                    config.checkpoint_file,
+                )
+                # Units that completed in the earlier attempt are skipped, so their data keeps the old update tag and
+                # the cleanup jobs must use it too.
+                config.update_tag = checkpoint.update_tag
+        if checkpoint is None:
+            checkpoint = cartography.checkpoint.Checkpoint(config.checkpoint_file, config.update_tag)
+            checkpoint.save()
+        cartography.checkpoint.current = checkpoint
+    elif config.resume:
+        logger.warning("--resume has no effect without --checkpoint-file.")
+
+    result = sync.run(neo4j_driver, config)
+    if checkpoint is not None:
+        checkpoint.remove()
+    return result
 
 
 def build_default_sync():
@@ -155,12 +287,14 @@ def build_default_sync():
     sync = Sync()
     sync.add_stages([
         ('create-indexes', cartography.intel.create_indexes.run),
-        ('aws', cartography.intel.aws.start_aws_ingestion),
-        ('gcp', cartography.intel.gcp.start_gcp_ingestion),
-        ('gsuite', cartography.intel.gsuite.start_gsuite_ingestion),
-        ('crxcavator', cartography.intel.crxcavator.start_extension_ingestion),
-        ('okta', cartography.intel.okta.start_okta_ingestion),
-        ('github', cartography.intel.github.start_github_ingestion),
-        ('analysis', cartography.intel.analysis.run),
+        ('aws', cartography.intel.aws.start_aws_ingestion, ['create-indexes']),
+        ('gcp', cartography.intel.gcp.start_gcp_ingestion, ['create-indexes']),
+        ('gsuite', cartography.intel.gsuite.start_gsuite_ingestion, ['create-indexes']),
+        # CRXcavator MERGEs GSuiteUser nodes by email, so it must not race with the GSuite stage.
+        ('crxcavator', cartography.intel.crxcavator.start_extension_ingestion, ['create-indexes', 'gsuite']),
+        # The Okta AWS SAML integration links Okta groups to AWSRole nodes created by the AWS stage.
+        ('okta', cartography.intel.okta.start_okta_ingestion, ['create-indexes', 'aws']),
+        ('github', cartography.intel.github.start_github_ingestion, ['create-indexes']),
+        ('analysis', cartography.intel.analysis.run, ['aws', 'gcp', 'gsuite', 'crxcavator', 'okta', 'github']),
     ])
     return sync
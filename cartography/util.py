@@ -1,9 +1,15 @@
+import inspect
 import logging
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from functools import wraps
 
 import botocore
 
 from cartography.graph.job import GraphJob
+from cartography.pipeline import run_pipeline
 
 if sys.version_info >= (3, 7):
     from importlib.resources import open_binary, read_text
@@ -24,7 +30,15 @@ def run_analysis_job(filename, neo4j_session, common_job_parameters):
     )
 
 
+# A job parameter that makes run_cleanup_job skip the job when it is True. Partial syncs set it for modules whose
+# cleanup jobs would otherwise delete the data that was left out of the sync.
+SKIP_CLEANUP = 'skip_cleanup'
+
+
 def run_cleanup_job(filename, neo4j_session, common_job_parameters):
+    if common_job_parameters.get(SKIP_CLEANUP):
+        logger.info("Skipping cleanup job %s because only part of its data was synced.", filename)
+        return
     GraphJob.run_from_json(
         neo4j_session,
         read_text(
@@ -35,6 +49,53 @@ def run_cleanup_job(filename, neo4j_session, common_job_parameters):
     )
 
 
+# The number of rows that load_batched writes to Neo4j per transaction. This is set from
+# cartography.config.Config.neo4j_batch_size when a sync starts.
+neo4j_batch_size = 1000
+
+
+def _run_batch(tx, query, rows, kwargs):
+    tx.run(query, Rows=rows, **kwargs).consume()
+
+
+def load_batched(neo4j_session, query, rows, batch_size=None, **kwargs):
+    """
+    Write a list of rows to Neo4j with one round trip per batch of rows instead of one per row.
+
+    The query receives each batch as the `Rows` parameter and should iterate over it, e.g.
+    `UNWIND {Rows} AS row MERGE (n:Node{id: row.id}) SET n.lastupdated = {UpdateTag}`. Each batch is written in its own
+    managed write transaction, which the Neo4j driver retries with exponential backoff on transient errors such as
+    deadlocks and leader switches, so the query must be safe to run more than once.
+
+    :param neo4j_session: The Neo4j session
+    :param query: The Cypher query to run for each batch
+    :param rows: A list of dicts, one per item to write
+    :param batch_size: The maximum number of rows per transaction. Defaults to neo4j_batch_size.
+    :param kwargs: Other parameters of the query that are the same for every row, such as the update tag
+    :return: Nothing
+    """
+    batch_size = batch_size or neo4j_batch_size
+    for i in range(0, len(rows), batch_size):
+        neo4j_session.write_transaction(_run_batch, query, rows[i:i + batch_size], kwargs)
+
+
+def _run_write(tx, query, kwargs):
+    tx.run(query, **kwargs).consume()
+
+
+def run_write(neo4j_session, query, **kwargs):
+    """
+    Run a single write query in a managed write transaction instead of an auto-commit one, so that the Neo4j driver
+    retries it with exponential backoff on transient errors. Use load_batched instead when writing a list of rows.
+
+    :param neo4j_session: The Neo4j session
+    :param query: The Cypher query to run
+    :param kwargs: The parameters of the query
+    :return: Nothing
+    """
+    neo4j_session.write_transaction(_run_write, query, kwargs)
+
+
 def load_resource_binary(package, resource_name):
     return open_binary(package, resource_name)
 
@@ -42,6 +103,14 @@ def load_resource_binary(package, resource_name):
 # The statsd client used for observability.  This is `None` unless cartography.config.statsd_enabled is True.
 stats_client = None
 
+# The Neo4j driver of the sync that is currently running. This is set by cartography.sync.Sync.run so that intel modules
+# which fan work out across threads can open one session per worker. It is `None` outside of a sync run.
+neo4j_driver = None
+
+# The maximum number of AWS regions that aws_fetch_regions will query at the same time for a single service. This is set
+# from cartography.config.Config.aws_region_workers when the AWS sync starts.
+aws_region_workers = 1
+
 
 def timeit(method):
     """
@@ -49,6 +118,7 @@ def timeit(method):
     This is only active if config.statsd_enabled is True.
     :param method: The function to measure execution
     """
+    @wraps(method)
     def timed(*args, **kwargs):
         if stats_client:
             # Example metric name "cartography.intel.aws.iam.get_group_membership_data"
@@ -73,15 +143,96 @@ def aws_handle_regions(func):
         'AuthFailure',
     ]
 
+    def should_skip(e):
+        # The account is not authorized to use this service in this region
+        # so we can continue without raising an exception
+        if e.response['Error']['Code'] in ERROR_CODES:
+            logger.warning("{} in this region. Skipping...".format(e.response['Error']['Message']))
+            return True
+        return False
+
+    if inspect.isgeneratorfunction(func):
+        # Generators only raise once they are iterated, so the error has to be handled while yielding. Pages that were
+        # already yielded before the error are kept.
+        @wraps(func)
+        def inner_generator(*args, **kwargs):
+            try:
+                yield from func(*args, **kwargs)
+            except botocore.exceptions.ClientError as e:
+                if not should_skip(e):
+                    raise
+        return inner_generator
+
+    @wraps(func)
     def inner_function(*args, **kwargs):
         try:
             return func(*args, **kwargs)
         except botocore.exceptions.ClientError as e:
-            # The account is not authorized to use this service in this region
-            # so we can continue without raising an exception
-            if e.response['Error']['Code'] in ERROR_CODES:
-                logger.warning("{} in this region. Skipping...".format(e.response['Error']['Message']))
+            if should_skip(e):
                 return []
             else:
                 raise
     return inner_function
+
+
+def _fetch_region(get_func, boto3_session, region, args):
+    start = time.time()
+    result = get_func(boto3_session, region, *args)
+    elapsed = time.time() - start
+    logger.debug("Fetched %s for region '%s' in %.2f seconds.", get_func.__name__, region, elapsed)
+    if stats_client:
+        stats_client.timing(f"{get_func.__module__}.{get_func.__name__}.{region}", int(elapsed * 1000))
+    return result
+
+
+def aws_fetch_regions(get_func, boto3_session, regions, *args):
+    """
+    Call `get_func(boto3_session, region, *args)` for each of the given regions, querying up to aws_region_workers
+    regions at the same time, and return the results as a list of (region, result) tuples in the order of `regions`.
+    Only the fetching is done concurrently: callers should load the results into Neo4j from the calling thread.
+
+    `get_func` should be decorated with aws_handle_regions so that a region the account is not allowed to use is
+    skipped instead of failing the whole sync. Any other exception is re-raised once all regions have been queried.
+
+    :param get_func: The function that gets the data for a single region.
+    :param boto3_session: The boto3 session to use. boto3 sessions are not thread safe, so get_func must only use it to
+        create clients and resources through cartography.intel.aws.util.get_client and get_resource.
+    :param regions: The regions to query.
+    :param args: Extra positional arguments passed to get_func after the region.
+    :return: A list of (region, result) tuples.
+    """
+    workers = min(aws_region_workers or 1, len(regions))
+    if workers <= 1:
+        return [(region, _fetch_region(get_func, boto3_session, region, args)) for region in regions]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_fetch_region, get_func, boto3_session, region, args) for region in regions
+        ]
+    return [(region, future.result()) for region, future in zip(regions, futures)]
+
+
+def _region_pages(get_pages_func, boto3_session, region, args):
+    for page in get_pages_func(boto3_session, region, *args):
+        yield region, page
+
+
+def aws_stream_regions(get_pages_func, boto3_session, regions, load_func, *args):
+    """
+    Like aws_fetch_regions, but for get functions that yield their results one page at a time. The pages of up to
+    aws_region_workers regions are fetched at the same time and each page is passed to `load_func(region, page)` on the
+    calling thread as soon as it arrives, so fetching and loading overlap and only a few pages are held in memory.
+
+    `get_pages_func` should be a generator decorated with aws_handle_regions.
+
+    :param get_pages_func: The generator function that yields the pages of a single region.
+    :param boto3_session: The boto3 session to use, like in aws_fetch_regions.
+    :param regions: The regions to query.
+    :param load_func: The function that loads a single page of a region.
+    :param args: Extra positional arguments passed to get_pages_func after the region.
+    """
+    run_pipeline(
+        [partial(_region_pages, get_pages_func, boto3_session, region, args) for region in regions],
+        lambda item: load_func(*item),
+        max_workers=aws_region_workers or 1,
+    )
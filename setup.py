@@ -37,6 +37,7 @@ setup(
         "oauth2client>=4.1.3",
         "marshmallow>=3.0.0rc7",
         "okta<1.0.0",
+        "python-dateutil",
         "pyyaml>=5.3.1",
         "requests>=2.22.0",
         "statsd",
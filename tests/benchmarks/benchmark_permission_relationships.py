@@ -0,0 +1,187 @@
+"""
+Benchmarks for IAM policy evaluation, on synthetic principals, policies and resources, without AWS or Neo4j.
+
+Run with `make benchmark`, or e.g.
+
+    python -m tests.benchmarks.benchmark_permission_relationships --principals 2000 --resources 5000 --json out.json
+
+Each benchmark is timed on its own and then run again under tracemalloc to measure its peak memory, so that tracing
+does not distort the timings. The policy caches of the evaluator are cleared before every run.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from cartography.intel.aws import iam
+from cartography.intel.aws import permission_relationships
+
+SERVICES = ["s3", "ec2", "iam", "dynamodb", "lambda", "rds", "sts", "kms"]
+VERBS = ["Get", "List", "Describe", "Put", "Create", "Delete", "Update", "Tag"]
+NOUNS = ["Object", "Bucket", "Instance", "Role", "Table", "Function", "Key", "Policy"]
+
+
+def _action(rng, wildcards):
+    service = rng.choice(SERVICES)
+    if wildcards and rng.random() < 0.3:
+        return rng.choice([f"{service}:*", f"{service}:{rng.choice(VERBS)}*", f"{service}:*{rng.choice(NOUNS)}"])
+    return f"{service}:{rng.choice(VERBS)}{rng.choice(NOUNS)}"
+
+
+def _bucket_arn(index):
+    return f"arn:aws:s3:::bucket-{index // 100}-{index}"
+
+
+def _resource(rng, resource_count):
+    index = rng.randrange(resource_count)
+    return rng.choice([
+        "*",
+        _bucket_arn(index),
+        f"arn:aws:s3:::bucket-{index // 100}-*",
+        f"arn:aws:s3:::bucket-{index // 100}-{index}/*",
+        f"arn:aws:s3:::bucket-?-{index}",
+    ])
+
+
+def _statement(rng, resource_count):
+    statement = {"effect": "Deny" if rng.random() < 0.1 else "Allow"}
+    if rng.random() < 0.15:
+        statement["notaction"] = [_action(rng, True) for _ in range(rng.randint(1, 3))]
+    else:
+        statement["action"] = [_action(rng, True) for _ in range(rng.randint(1, 5))]
+    if rng.random() < 0.1:
+        statement["notresource"] = [_resource(rng, resource_count) for _ in range(rng.randint(1, 2))]
+    else:
+        statement["resource"] = [_resource(rng, resource_count) for _ in range(rng.randint(1, 3))]
+    return statement
+
+
+def _policy(rng, resource_count):
+    return [_statement(rng, resource_count) for _ in range(rng.randint(1, 6))]
+
+
+def generate_principals(rng, principal_count, resource_count, managed_policy_count):
+    """ Return principals like get_principals_for_account does: each has a few managed policies, which are shared with
+    other principals, and an inline policy of its own. All statements are compiled.
+    """
+    managed_policies = [_policy(rng, resource_count) for _ in range(managed_policy_count)]
+    principals = {}
+    for i in range(principal_count):
+        policies = {
+            f"managed-{j}": permission_relationships.compile_statement([dict(s) for s in managed_policies[j]])
+            for j in rng.sample(range(managed_policy_count), min(managed_policy_count, rng.randint(1, 4)))
+        }
+        policies["inline"] = permission_relationships.compile_statement(_policy(rng, resource_count))
+        principals[f"arn:aws:iam::000000000000:role/role-{i}"] = policies
+    return principals
+
+
+def _clear_caches():
+    for cache in (
+        permission_relationships._clause_matcher,
+        permission_relationships._compiled_clauses,
+        permission_relationships._regex_fullmatch,
+        permission_relationships._compile_clause_regex,
+    ):
+        cache.cache_clear()
+
+
+def _measure(name, evaluations, func):
+    _clear_caches()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+
+    _clear_caches()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "name": name,
+        "evaluations": evaluations,
+        "seconds": elapsed,
+        "evaluations_per_second": evaluations / elapsed if elapsed else float("inf"),
+        "peak_memory_bytes": peak,
+        "results": len(result),
+    }
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    principals = generate_principals(rng, args.principals, args.resources, args.managed_policies)
+    resource_arns = [_bucket_arn(i) for i in range(args.resources)]
+    permissions = ["s3:GetObject", "s3:PutObject"]
+
+    benchmarks = [
+        _measure(
+            "calculate_permission_relationships",
+            len(principals) * len(resource_arns),
+            lambda: permission_relationships.calculate_permission_relationships(principals, resource_arns, permissions),
+        ),
+    ]
+
+    # The per principal evaluation is much slower, so it is run on a sample of the resources.
+    legacy_arns = resource_arns[:args.legacy_resources]
+    benchmarks.append(_measure(
+        "principal_allowed_on_resource",
+        len(principals) * len(legacy_arns),
+        lambda: [
+            (principal_arn, resource_arn)
+            for resource_arn in legacy_arns
+            for principal_arn, policies in principals.items()
+            if permission_relationships.principal_allowed_on_resource(policies, resource_arn, permissions)
+        ],
+    ))
+
+    role_arns = [f"arn:aws:iam::000000000000:role/target-{i}" for i in range(args.roles)]
+    principal_arns = list(principals)
+    potential_sources = {
+        role_arn: set(rng.sample(principal_arns, min(len(principal_arns), args.trusted_principals)))
+        for role_arn in role_arns
+    }
+    benchmarks.append(_measure(
+        "calculate_assumerole_relationships",
+        sum(len(sources) for sources in potential_sources.values()),
+        lambda: iam.calculate_assumerole_relationships(principals, potential_sources),
+    ))
+    return benchmarks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark IAM policy evaluation on synthetic data.")
+    parser.add_argument("--principals", type=int, default=500, help="The number of principals. Default = 500.")
+    parser.add_argument("--resources", type=int, default=1000, help="The number of S3 buckets. Default = 1000.")
+    parser.add_argument(
+        "--managed-policies", type=int, default=50,
+        help="The number of managed policies that the principals share. Default = 50.",
+    )
+    parser.add_argument(
+        "--legacy-resources", type=int, default=50,
+        help="The number of buckets to evaluate principal_allowed_on_resource against. Default = 50.",
+    )
+    parser.add_argument("--roles", type=int, default=250, help="The number of roles to assume. Default = 250.")
+    parser.add_argument(
+        "--trusted-principals", type=int, default=20,
+        help="The number of principals that each role trusts. Default = 20.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="The seed of the synthetic data. Default = 0.")
+    parser.add_argument("--json", help="A file to also write the results to, as JSON.")
+    args = parser.parse_args(argv)
+
+    benchmarks = run(args)
+    print(f"{'benchmark':<40}{'evaluations':>14}{'seconds':>10}{'evals/sec':>14}{'peak MiB':>10}")
+    for b in benchmarks:
+        print(
+            f"{b['name']:<40}{b['evaluations']:>14}{b['seconds']:>10.2f}{b['evaluations_per_second']:>14.0f}"
+            f"{b['peak_memory_bytes'] / 2 ** 20:>10.1f}",
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"arguments": vars(args), "benchmarks": benchmarks}, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
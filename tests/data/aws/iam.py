@@ -142,3 +142,82 @@ LIST_ROLES = {
         },
     ],
 }
+
+
+GET_ACCOUNT_AUTHORIZATION_DETAILS = {
+    "UserDetailList": [
+        {
+            "Path": "/",
+            "UserName": "example-user-0",
+            "UserId": "AIDA00000000000000000",
+            "Arn": "arn:aws:iam::000000000000:user/example-user-0",
+            "CreateDate": datetime.datetime(2019, 1, 1, 0, 0, 1),
+            "UserPolicyList": [
+                {
+                    "PolicyName": "inline_user_policy",
+                    "PolicyDocument": {
+                        "Version": "2012-10-17",
+                        "Statement": [{"Effect": "Allow", "Action": "s3:GetObject", "Resource": "*"}],
+                    },
+                },
+            ],
+            "GroupList": ["example-group-0"],
+            "AttachedManagedPolicies": [],
+        },
+    ],
+    "GroupDetailList": [
+        {
+            "Path": "/",
+            "GroupName": "example-group-0",
+            "GroupId": "AGPA000000000000000000",
+            "Arn": "arn:aws:iam::000000000000:group/example-group-0",
+            "CreateDate": datetime.datetime(2019, 1, 1, 0, 0, 1),
+            "GroupPolicyList": [],
+            "AttachedManagedPolicies": [
+                {"PolicyName": "ReadOnlyAccess", "PolicyArn": "arn:aws:iam::aws:policy/ReadOnlyAccess"},
+            ],
+        },
+    ],
+    "RoleDetailList": [
+        {
+            "Path": "/",
+            "RoleName": "example-role-0",
+            "RoleId": "AROA00000000000000000",
+            "Arn": "arn:aws:iam::000000000000:role/example-role-0",
+            "CreateDate": datetime.datetime(2019, 1, 1, 0, 0, 1),
+            "AssumeRolePolicyDocument": {
+                "Version": "2012-10-17",
+                "Statement": [
+                    {"Effect": "Allow", "Principal": {"Service": "ec2.amazonaws.com"}, "Action": "sts:AssumeRole"},
+                ],
+            },
+            "RolePolicyList": [],
+            "AttachedManagedPolicies": [
+                {"PolicyName": "ReadOnlyAccess", "PolicyArn": "arn:aws:iam::aws:policy/ReadOnlyAccess"},
+                {"PolicyName": "MissingPolicy", "PolicyArn": "arn:aws:iam::aws:policy/MissingPolicy"},
+            ],
+        },
+    ],
+    "Policies": [
+        {
+            "PolicyName": "ReadOnlyAccess",
+            "Arn": "arn:aws:iam::aws:policy/ReadOnlyAccess",
+            "DefaultVersionId": "v2",
+            "PolicyVersionList": [
+                {
+                    "Document": {"Version": "2012-10-17", "Statement": [{"Effect": "Allow", "Action": "*"}]},
+                    "VersionId": "v1",
+                    "IsDefaultVersion": False,
+                },
+                {
+                    "Document": {
+                        "Version": "2012-10-17",
+                        "Statement": [{"Effect": "Allow", "Action": ["s3:Get*", "s3:List*"], "Resource": "*"}],
+                    },
+                    "VersionId": "v2",
+                    "IsDefaultVersion": True,
+                },
+            ],
+        },
+    ],
+}
@@ -1,3 +1,5 @@
+import copy
+
 import cartography.intel.aws.ec2
 import cartography.intel.aws.resourcegroupstaggingapi as rgta
 import tests.data.aws.ec2.instances
@@ -45,3 +47,28 @@ def test_transform_and_load_ec2_tags(neo4j_session):
     }
 
     assert actual == expected
+
+
+def test_transform_and_load_tags_by_label(neo4j_session):
+    """
+    Verify that tags fetched for all resource types at once are attached to the right nodes.
+    """
+    _ensure_local_neo4j_has_test_ec2_instance_data(neo4j_session)
+    tag_data_by_label = rgta.transform_tags_by_label(
+        [(TEST_REGION, copy.deepcopy(tests.data.aws.resourcegroupstaggingapi.GET_RESOURCES_RESPONSE))],
+    )
+    rgta.load_tags_by_label(neo4j_session, tag_data_by_label, TEST_UPDATE_TAG)
+    expected = {
+        ('i-01', 'TestKey:TestValue', TEST_REGION),
+    }
+
+    result = neo4j_session.run(
+        """
+        MATCH (n1:EC2Instance)-[:TAGGED]->(n2:AWSTag) RETURN n1.id, n2.id, n2.region;
+        """,
+    )
+    actual = {
+        (r['n1.id'], r['n2.id'], r['n2.region']) for r in result
+    }
+
+    assert actual == expected
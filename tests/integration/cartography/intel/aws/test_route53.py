@@ -15,6 +15,7 @@ def _ensure_local_neo4j_has_test_route53_records(neo4j_session):
         TEST_AWS_ACCOUNTID, TEST_UPDATE_TAG,
     )
     cartography.intel.aws.route53.link_sub_zones(neo4j_session, TEST_UPDATE_TAG)
+    cartography.intel.aws.route53.link_aws_resources(neo4j_session, TEST_UPDATE_TAG)
 
 
 def _ensure_local_neo4j_has_test_ec2_records(neo4j_session):
@@ -29,7 +30,8 @@ def test_transform_and_load_ns(neo4j_session):
     data = tests.data.aws.route53.NS_RECORD
     parsed_data = cartography.intel.aws.route53.transform_ns_record_set(data, TEST_ZONE_ID)
     assert "ns-856.awsdns-43.net" in parsed_data["servers"]
-    cartography.intel.aws.route53.load_ns_records(neo4j_session, [parsed_data], TEST_ZONE_NAME, TEST_UPDATE_TAG)
+    cartography.intel.aws.route53.load_zone_records(neo4j_session, [parsed_data], TEST_UPDATE_TAG)
+    cartography.intel.aws.route53.map_name_servers(neo4j_session, [parsed_data], TEST_ZONE_NAME, TEST_UPDATE_TAG)
 
 
 def test_transform_and_load_zones(neo4j_session):
@@ -48,10 +50,10 @@ def test_transform_and_load_cname_records(neo4j_session):
     # Test that CNAME records are correctly transformed and loaded
     data = tests.data.aws.route53.CNAME_RECORD
     first_data = cartography.intel.aws.route53.transform_record_set(data, TEST_ZONE_ID, data['Name'][:-1])
-    cartography.intel.aws.route53.load_cname_records(neo4j_session, first_data, TEST_UPDATE_TAG)
+    cartography.intel.aws.route53.load_zone_records(neo4j_session, [first_data], TEST_UPDATE_TAG)
 
     second_data = cartography.intel.aws.route53.transform_record_set(data, TEST_ZONE_ID + "2", data['Name'][:-1])
-    cartography.intel.aws.route53.load_cname_records(neo4j_session, second_data, TEST_UPDATE_TAG)
+    cartography.intel.aws.route53.load_zone_records(neo4j_session, [second_data], TEST_UPDATE_TAG)
     result = neo4j_session.run("MATCH (n:AWSDNSRecord{name:'subdomain.lyft.com'}) return count(n) as recordcount")
     for r in result:
         assert r["recordcount"] == 2
@@ -61,10 +63,12 @@ def test_transform_and_load_ns_records(neo4j_session):
     # Test that NS records are correctly transformed and loaded
     data = tests.data.aws.route53.NS_RECORD
     first_data = [cartography.intel.aws.route53.transform_ns_record_set(data, TEST_ZONE_ID)]
-    cartography.intel.aws.route53.load_ns_records(neo4j_session, first_data, TEST_ZONE_NAME, TEST_UPDATE_TAG)
+    cartography.intel.aws.route53.load_zone_records(neo4j_session, first_data, TEST_UPDATE_TAG)
+    cartography.intel.aws.route53.map_name_servers(neo4j_session, first_data, TEST_ZONE_NAME, TEST_UPDATE_TAG)
 
     second_data = [cartography.intel.aws.route53.transform_ns_record_set(data, TEST_ZONE_ID + "2")]
-    cartography.intel.aws.route53.load_ns_records(neo4j_session, second_data, TEST_ZONE_NAME, TEST_UPDATE_TAG)
+    cartography.intel.aws.route53.load_zone_records(neo4j_session, second_data, TEST_UPDATE_TAG)
+    cartography.intel.aws.route53.map_name_servers(neo4j_session, second_data, TEST_ZONE_NAME, TEST_UPDATE_TAG)
     result = neo4j_session.run("MATCH (n:AWSDNSRecord{name:'testdomain.net'}) return count(n) as recordcount")
     for r in result:
         assert r["recordcount"] == 2
@@ -132,6 +136,7 @@ def test_load_and_cleanup_dnspointsto_relationships(neo4j_session):
         neo4j_session, update_tag=new_update_tag, aws_account_id=TEST_AWS_ACCOUNTID,
     )
     cartography.util.run_cleanup_job('aws_account_dns_cleanup.json', neo4j_session, new_job_parameters)
+    cartography.util.run_cleanup_job('aws_dns_links_cleanup.json', neo4j_session, new_job_parameters)
     cartography.util.run_cleanup_job('aws_post_ingestion_dns_cleanup.json', neo4j_session, new_job_parameters)
 
     # Verify that the AWSDNSRecord-->AWSDNSRecord relationships don't exist anymore
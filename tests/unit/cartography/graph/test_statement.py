@@ -0,0 +1,29 @@
+import unittest.mock
+
+from cartography.graph.statement import GraphStatement
+
+
+def _session(results):
+    tx = unittest.mock.MagicMock()
+    tx.run.side_effect = results
+    session = unittest.mock.MagicMock()
+    session.write_transaction.side_effect = lambda func, *args: func(tx, *args)
+    return session, tx
+
+
+def test_run_uses_write_transaction():
+    session, tx = _session([iter([])])
+    GraphStatement('MATCH (n) DETACH DELETE n', {'UPDATE_TAG': 1}).run(session)
+    session.write_transaction.assert_called_once()
+    session.run.assert_not_called()
+    assert tx.run.call_args[0][1]['UPDATE_TAG'] == 1
+
+
+def test_run_iterative_commits_each_iteration():
+    session, tx = _session([
+        iter([{'TotalCompleted': 100}]),
+        iter([{'TotalCompleted': 5}]),
+        iter([{'TotalCompleted': 0}]),
+    ])
+    GraphStatement('MATCH (n) RETURN COUNT(*) AS TotalCompleted', {}, iterative=True, iterationsize=100).run(session)
+    assert session.write_transaction.call_count == 3
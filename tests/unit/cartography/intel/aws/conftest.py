@@ -0,0 +1,30 @@
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+from cartography.intel.aws.util import get_client
+
+
+@pytest.fixture
+def boto3_session():
+    return boto3.Session(aws_access_key_id='test', aws_secret_access_key='test', region_name='us-east-1')
+
+
+@pytest.fixture
+def stub_client(boto3_session):
+    """
+    Return a function that activates a Stubber on the client that get_client returns from `boto3_session` for the same
+    arguments, so that the code under test uses the stubbed client. Every stubbed response must be used by the test.
+    """
+    stubbers = []
+
+    def stub(service_name, region_name=None, config=None):
+        stubber = Stubber(get_client(boto3_session, service_name, region_name=region_name, config=config))
+        stubber.activate()
+        stubbers.append(stubber)
+        return stubber
+
+    yield stub
+    for stubber in stubbers:
+        stubber.deactivate()
+        stubber.assert_no_pending_responses()
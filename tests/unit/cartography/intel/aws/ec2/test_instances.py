@@ -0,0 +1,22 @@
+import unittest.mock
+
+from cartography.intel.aws.ec2 import instances
+from tests.data.aws.ec2.instances import DESCRIBE_INSTANCES
+
+
+def test_load_ec2_instances():
+    neo4j_session = unittest.mock.MagicMock()
+    tx = unittest.mock.MagicMock()
+    neo4j_session.write_transaction.side_effect = lambda func, *args: func(tx, *args)
+
+    instances.load_ec2_instances(
+        neo4j_session, DESCRIBE_INSTANCES['Reservations'], 'us-east-1', '000000000000', 1,
+    )
+
+    neo4j_session.run.assert_not_called()
+    loaded_instance_ids = {call[1]['InstanceId'] for call in tx.run.call_args_list if 'InstanceId' in call[1]}
+    assert loaded_instance_ids == {
+        instance['InstanceId']
+        for reservation in DESCRIBE_INSTANCES['Reservations']
+        for instance in reservation['Instances']
+    }
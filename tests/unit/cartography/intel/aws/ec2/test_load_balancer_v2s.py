@@ -0,0 +1,37 @@
+from cartography.intel.aws.ec2 import load_balancer_v2s
+from cartography.intel.aws.ec2.util import get_botocore_config
+from tests.data.aws.ec2.load_balancers import LOAD_BALANCER_DATA
+
+LB_ARN = 'arn:aws:elasticloadbalancing:us-east-1:000000000000:loadbalancer/app/lb/1'
+TG_ARN = 'arn:aws:elasticloadbalancing:us-east-1:000000000000:targetgroup/tg/1'
+
+
+def test_transform_load_balancer_v2_targets():
+    lb = LOAD_BALANCER_DATA[0]
+    targets = load_balancer_v2s.transform_load_balancer_v2_targets(lb['DNSName'], lb['TargetGroups'])
+    assert targets == [{'LoadBalancerId': 'myawesomeloadbalancer.amazonaws.com', 'InstanceId': 'i-0f76fade'}]
+
+
+def test_get_loadbalancer_v2_pages(boto3_session, stub_client):
+    stubber = stub_client('elbv2', region_name='us-east-1', config=get_botocore_config())
+    stubber.add_response('describe_load_balancers', {'LoadBalancers': [{'LoadBalancerArn': LB_ARN}]})
+    stubber.add_response(
+        'describe_listeners', {'Listeners': [{'ListenerArn': 'listener'}]}, {'LoadBalancerArn': LB_ARN},
+    )
+    stubber.add_response(
+        'describe_target_groups',
+        {'TargetGroups': [{'TargetGroupArn': TG_ARN, 'TargetType': 'instance'}]},
+        {'LoadBalancerArn': LB_ARN},
+    )
+    stubber.add_response(
+        'describe_target_health',
+        {'TargetHealthDescriptions': [{'Target': {'Id': 'i-01'}}]},
+        {'TargetGroupArn': TG_ARN},
+    )
+    pages = list(load_balancer_v2s.get_loadbalancer_v2_pages(boto3_session, 'us-east-1', 2))
+
+    assert pages == [[{
+        'LoadBalancerArn': LB_ARN,
+        'Listeners': [{'ListenerArn': 'listener'}],
+        'TargetGroups': [{'TargetGroupArn': TG_ARN, 'TargetType': 'instance', 'Targets': ['i-01']}],
+    }]]
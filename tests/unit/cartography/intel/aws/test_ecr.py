@@ -0,0 +1,106 @@
+import datetime
+
+from cartography.intel.aws import ecr
+
+REPO = {
+    'repositoryArn': 'arn:aws:ecr:us-east-1:000000000000:repository/example-repository',
+    'repositoryName': 'example-repository',
+    'repositoryUri': '000000000000.dkr.ecr.us-east-1/example-repository',
+    'createdAt': datetime.datetime(2019, 1, 1, 0, 0, 1),
+}
+
+
+def _image_ids():
+    return [{'imageDigest': f'sha256:{i:064d}', 'imageTag': str(i)} for i in range(150)]
+
+
+def _image_detail(digest):
+    return {
+        'imageDigest': digest,
+        'imagePushedAt': datetime.datetime(2020, 1, 1),
+        'imageSizeInBytes': 1024,
+    }
+
+
+def test_get_images_fingerprint_ignores_order():
+    image_ids = _image_ids()
+    assert ecr.get_images_fingerprint(image_ids) == ecr.get_images_fingerprint(list(reversed(image_ids)))
+    assert ecr.get_images_fingerprint(image_ids) != ecr.get_images_fingerprint(image_ids[1:])
+
+
+def test_get_ecr_region_data_describes_images_in_batches(boto3_session, stub_client):
+    stubber = stub_client('ecr', region_name='us-east-1')
+    digests = sorted(img['imageDigest'] for img in _image_ids())
+    stubber.add_response('describe_repositories', {'repositories': [REPO]})
+    stubber.add_response('list_images', {'imageIds': _image_ids()}, {'repositoryName': 'example-repository'})
+    for batch in (digests[:100], digests[100:]):
+        stubber.add_response(
+            'describe_images',
+            {'imageDetails': [_image_detail(digest) for digest in batch]},
+            {'repositoryName': 'example-repository', 'imageIds': [{'imageDigest': d} for d in batch]},
+        )
+    repositories, image_data, fingerprints = ecr.get_ecr_region_data(boto3_session, 'us-east-1', 2)
+
+    images = image_data[REPO['repositoryUri']]
+    assert len(images) == 150
+    assert all(img['imageSizeInBytes'] == 1024 for img in images)
+    assert fingerprints == [{
+        'RepositoryArn': REPO['repositoryArn'],
+        'Fingerprint': ecr.get_images_fingerprint(_image_ids()),
+        'Count': 150,
+    }]
+
+
+def test_get_ecr_region_data_skips_unchanged_repositories(boto3_session, stub_client):
+    stubber = stub_client('ecr', region_name='us-east-1')
+    previous_fingerprints = {REPO['repositoryArn']: ecr.get_images_fingerprint(_image_ids())}
+    stubber.add_response('describe_repositories', {'repositories': [REPO]})
+    stubber.add_response('list_images', {'imageIds': _image_ids()}, {'repositoryName': 'example-repository'})
+    # No describe_images calls are expected.
+    repositories, image_data, fingerprints = ecr.get_ecr_region_data(
+        boto3_session, 'us-east-1', 1, previous_fingerprints,
+    )
+
+    assert repositories == [REPO]
+    assert image_data == {}
+    assert fingerprints[0]['Fingerprint'] == previous_fingerprints[REPO['repositoryArn']]
+
+
+def test_get_ecr_image_details_describes_a_failed_batch_one_by_one(boto3_session, stub_client, monkeypatch):
+    monkeypatch.setattr(ecr, 'DESCRIBE_IMAGES_BATCH_SIZE', 2)
+    stubber = stub_client('ecr', region_name='us-east-1')
+    digests = sorted(img['imageDigest'] for img in _image_ids()[:3])
+    params = {'repositoryName': 'example-repository'}
+    stubber.add_client_error(
+        'describe_images', 'ImageNotFoundException',
+        expected_params=dict(params, imageIds=[{'imageDigest': d} for d in digests[:2]]),
+    )
+    stubber.add_client_error(
+        'describe_images', 'ImageNotFoundException',
+        expected_params=dict(params, imageIds=[{'imageDigest': digests[0]}]),
+    )
+    stubber.add_response(
+        'describe_images',
+        {'imageDetails': [_image_detail(digests[1])]},
+        dict(params, imageIds=[{'imageDigest': digests[1]}]),
+    )
+    stubber.add_response(
+        'describe_images',
+        {'imageDetails': [_image_detail(digests[2])]},
+        dict(params, imageIds=[{'imageDigest': digests[2]}]),
+    )
+    details = ecr.get_ecr_image_details(boto3_session, 'us-east-1', 'example-repository', _image_ids()[:3])
+
+    assert sorted(details) == digests[1:]
+
+
+def test_get_image_count_counts_distinct_tag_and_digest_pairs():
+    image_ids = [
+        {'imageDigest': 'sha256:1', 'imageTag': 'latest'},
+        {'imageDigest': 'sha256:1', 'imageTag': 'v1'},
+        {'imageDigest': 'sha256:1', 'imageTag': 'v1'},
+        {'imageDigest': 'sha256:2'},
+        {'imageDigest': 'sha256:3'},
+        {'imageTag': 'no-digest'},
+    ]
+    assert ecr.get_image_count(image_ids) == 4
@@ -1,4 +1,7 @@
+import unittest.mock
+
 from cartography.intel.aws import iam
+from tests.data.aws.iam import GET_ACCOUNT_AUTHORIZATION_DETAILS
 
 SINGLE_STATEMENT = {
     "Resource": "*",
@@ -30,3 +33,143 @@ def test__parse_principal_entries():
     assert principal_entries[1] == ("Service", "test-service-1")
     assert principal_entries[2] == ("Service", "test-service-2")
     assert principal_entries[3] == ("Federated", "test-provider-1")
+
+
+def test_transform_authorization_details_policies():
+    inline, managed = iam.transform_authorization_details_policies(
+        GET_ACCOUNT_AUTHORIZATION_DETAILS, 'RoleDetailList', 'RolePolicyList',
+    )
+    role_arn = "arn:aws:iam::000000000000:role/example-role-0"
+    assert inline == {role_arn: {}}
+    # Only the default version of a managed policy is used, and policies that are missing from the details are skipped.
+    assert managed == {
+        role_arn: {
+            "ReadOnlyAccess": [{"Effect": "Allow", "Action": ["s3:Get*", "s3:List*"], "Resource": "*"}],
+        },
+    }
+
+    inline, _ = iam.transform_authorization_details_policies(
+        GET_ACCOUNT_AUTHORIZATION_DETAILS, 'UserDetailList', 'UserPolicyList',
+    )
+    assert inline == {
+        "arn:aws:iam::000000000000:user/example-user-0": {
+            "inline_user_policy": [{"Effect": "Allow", "Action": "s3:GetObject", "Resource": "*"}],
+        },
+    }
+
+    # Principals that share a managed policy each get their own statements, with their own statement ids.
+    policy_arn = "arn:aws:iam::aws:policy/ReadOnlyAccess"
+    statement = {
+        "Effect": "Allow", "Action": "s3:Get*", "Resource": "*", "Condition": {"Bool": {"aws:SecureTransport": "true"}},
+    }
+    details = {
+        "Policies": [{
+            "Arn": policy_arn,
+            "PolicyVersionList": [{"IsDefaultVersion": True, "Document": {"Statement": [statement]}}],
+        }],
+        "RoleDetailList": [
+            {
+                "Arn": f"arn:aws:iam::000000000000:role/role-{i}",
+                "AttachedManagedPolicies": [{"PolicyName": "ReadOnlyAccess", "PolicyArn": policy_arn}],
+            }
+            for i in range(2)
+        ],
+    }
+    _, managed = iam.transform_authorization_details_policies(details, 'RoleDetailList', 'RolePolicyList')
+    iam.transform_policy_data(managed, iam.PolicyType.managed.value)
+
+    for i in range(2):
+        role_arn = f"arn:aws:iam::000000000000:role/role-{i}"
+        [transformed] = managed[role_arn]["ReadOnlyAccess"]
+        assert transformed["id"] == f"{role_arn}/managed_policy/ReadOnlyAccess/statement/1"
+        assert transformed["Condition"] == '[{"Bool": {"aws:SecureTransport": "true"}}]'
+
+
+def test_transform_authorization_details_group_memberships():
+    assert iam.transform_authorization_details_group_memberships(GET_ACCOUNT_AUTHORIZATION_DETAILS) == {
+        "arn:aws:iam::000000000000:group/example-group-0": {
+            "Users": [{"Arn": "arn:aws:iam::000000000000:user/example-user-0"}],
+        },
+    }
+
+
+def _write_transaction_session():
+    neo4j_session = unittest.mock.MagicMock()
+    tx = unittest.mock.MagicMock()
+    neo4j_session.write_transaction.side_effect = lambda func, *args: func(tx, *args)
+    return neo4j_session, tx
+
+
+def test_load_policy():
+    neo4j_session, tx = _write_transaction_session()
+    iam.load_policy(neo4j_session, 'principal/inline_policy/p1', 'p1', 'inline', 'principal', 1)
+    assert tx.run.call_args[1]['PolicyId'] == 'principal/inline_policy/p1'
+    neo4j_session.run.assert_not_called()
+
+
+def test_load_policy_statements():
+    neo4j_session, tx = _write_transaction_session()
+    statements = iam._transform_policy_statements([dict(SINGLE_STATEMENT)], 'principal/inline_policy/p1')
+    iam.load_policy_statements(neo4j_session, 'principal/inline_policy/p1', 'p1', statements, 1)
+    assert tx.run.call_args[1]['Statements'] == statements
+    neo4j_session.run.assert_not_called()
+
+
+def _managed_policy(arn, version_id, policy_id='ANPA000000000000EXAMPLE'):
+    policy = unittest.mock.MagicMock(arn=arn, policy_id=policy_id, default_version_id=version_id)
+    policy.meta.client.get_policy_version.return_value = {
+        'PolicyVersion': {'Document': {'Statement': [dict(SINGLE_STATEMENT)]}},
+    }
+    return policy
+
+
+def test_policy_document_cache(tmp_path):
+    cache = iam.PolicyDocumentCache(str(tmp_path))
+    arn = 'arn:aws:iam::aws:policy/ReadOnlyAccess'
+    first = _managed_policy(arn, 'v3')
+    second = _managed_policy(arn, 'v3')
+
+    statements = cache.get_statements(first)
+    assert statements == [SINGLE_STATEMENT]
+    # Callers get their own copy because transform_policy_data adds principal specific ids to the statements.
+    iam._transform_policy_statements(statements, 'principal/managed_policy/ReadOnlyAccess')
+    assert cache.get_statements(second) == [SINGLE_STATEMENT]
+    first.meta.client.get_policy_version.assert_called_once_with(PolicyArn=arn, VersionId='v3')
+    second.meta.client.get_policy_version.assert_not_called()
+
+    # A later run reads the documents from disk and only downloads new versions.
+    cache = iam.PolicyDocumentCache(str(tmp_path))
+    same_version = _managed_policy(arn, 'v3')
+    new_version = _managed_policy('arn:aws:iam::000000000000:policy/example', 'v1')
+    assert cache.get_statements(same_version) == [SINGLE_STATEMENT]
+    assert cache.get_statements(new_version) == [SINGLE_STATEMENT]
+    same_version.meta.client.get_policy_version.assert_not_called()
+    new_version.meta.client.get_policy_version.assert_called_once()
+
+    # A customer managed policy that was deleted and created again has the same ARN and version id but a new policy id.
+    cache = iam.PolicyDocumentCache(str(tmp_path))
+    recreated = _managed_policy('arn:aws:iam::000000000000:policy/example', 'v1', policy_id='ANPA000000000000RECREATED')
+    assert cache.get_statements(recreated) == [SINGLE_STATEMENT]
+    recreated.meta.client.get_policy_version.assert_called_once()
+
+
+def test_calculate_assumerole_relationships():
+    allow_assume_role = [{"effect": "Allow", "action": ["sts:AssumeRole"], "resource": ["arn:aws:iam::*:role/app-*"]}]
+    deny_all = [{"effect": "Deny", "action": ["*"], "resource": ["*"]}]
+    principals = {
+        "arn:aws:iam::000000000000:user/alice": {"p1": allow_assume_role},
+        "arn:aws:iam::000000000000:user/bob": {"p1": allow_assume_role, "p2": deny_all},
+        "arn:aws:iam::000000000000:user/carol": {"p1": allow_assume_role},
+    }
+    potential_sources = {
+        "arn:aws:iam::000000000000:role/app-1": {
+            "arn:aws:iam::000000000000:user/alice",
+            "arn:aws:iam::000000000000:user/bob",
+            "arn:aws:iam::000000000000:user/dave",
+        },
+        "arn:aws:iam::000000000000:role/admin": {"arn:aws:iam::000000000000:user/carol"},
+    }
+    rows = iam.calculate_assumerole_relationships(principals, potential_sources)
+    assert rows == [
+        {"SourceArn": "arn:aws:iam::000000000000:user/alice", "TargetArn": "arn:aws:iam::000000000000:role/app-1"},
+    ]
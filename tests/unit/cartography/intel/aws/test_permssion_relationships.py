@@ -464,3 +464,114 @@ def test_permissions_list():
         assert False
     except ValueError:
         assert True
+
+
+def test_compiled_evaluator_matches_principal_allowed_on_resource():
+    # Literal, wildcard, single-character and regex-like clauses, in both raw and compiled form.
+    actions = ["s3:GetObject", "S3:get*", "s3:?etObject", "dynamodb:*", "*", "s3:Get(Object|Bucket)"]
+    resources = ["arn:aws:s3:::testbucket", "arn:aws:s3:::TEST*", "arn:aws:s3:::test?ucket", "*", "arn:aws:s3:::other"]
+    principals = {}
+    for i, (action, resource) in enumerate(zip(actions * 5, resources * 6)):
+        statements = [
+            {"action": [action], "resource": [resource], "effect": "Allow"},
+            {"notaction": [actions[(i + 1) % len(actions)]], "resource": [resources[i % 3]], "effect": "Deny"},
+        ]
+        if i % 2:
+            statements = permission_relationships.compile_statement(statements)
+        principals[f"principal{i}"] = {"shared": [statements[0]], f"policy{i}": statements}
+    resource_arns = ["arn:aws:s3:::testbucket", "arn:aws:s3:::TestBucket", "arn:aws:s3:::other", "arn:aws:s3:::x.y"]
+    permissions = ["S3:GetObject", "dynamodb:Query"]
+
+    expected = [
+        {"principal_arn": principal_arn, "resource_arn": resource_arn}
+        for resource_arn in resource_arns
+        for principal_arn, policies in principals.items()
+        if permission_relationships.principal_allowed_on_resource(policies, resource_arn, permissions)
+    ]
+    actual = permission_relationships.calculate_permission_relationships(principals, resource_arns, permissions)
+    key = lambda mapping: (mapping["resource_arn"], mapping["principal_arn"])  # noqa: E731
+    assert expected
+    assert sorted(actual, key=key) == sorted(expected, key=key)
+
+
+def test_clause_matcher_fast_paths():
+    literal = permission_relationships._clause_matcher("s3:GetObject")
+    prefix = permission_relationships._clause_matcher(permission_relationships.compile_regex("arn:aws:s3:::bucket/*"))
+    regex = permission_relationships._clause_matcher("s3:Get*Acl")
+    assert literal.literal == "s3:getobject"
+    assert prefix.prefix == "arn:aws:s3:::bucket/"
+    assert regex.literal is None and regex.prefix is None
+
+    assert permission_relationships.evaluate_clause("s3:GetObject", "S3:GETOBJECT")
+    assert permission_relationships.evaluate_clause("arn:aws:s3:::bucket/*", "arn:aws:s3:::Bucket/key")
+    assert not permission_relationships.evaluate_clause("arn:aws:s3:::bucket/*", "arn:aws:s3:::bucket/a\nb")
+    assert permission_relationships.evaluate_clause("s3:Get*Acl", "s3:GetBucketAcl")
+    assert not permission_relationships.evaluate_clause("s3:Get*Acl", "s3:GetObject")
+
+    stats = permission_relationships.matcher_cache_stats()
+    assert stats["clauses"].hits > 0
+    assert stats["match_results"].currsize > 0
+
+
+def test_calculate_permission_relationships_in_processes(monkeypatch):
+    monkeypatch.setattr(permission_relationships, "RESOURCE_CHUNK_SIZE", 2)
+    principals = {
+        "principal1": {"policy": permission_relationships.compile_statement(GET_OBJECT_LOWERCASE_RESOURCE_WILDCARD)},
+        "principal2": {"policy": [{"action": ["s3:PutObject"], "resource": ["*"], "effect": "Allow"}]},
+    }
+    resource_arns = ["arn:aws:s3:::testbucket", "arn:aws:s3:::other", "arn:aws:s3:::test2", "arn:aws:s3:::test3"]
+    some_principals = {"principal2": principals["principal2"]}
+    relationships = [
+        (principals, ["S3:GetObject"], resource_arns),
+        (principals, ["s3:PutObject"], resource_arns[:1]),
+        (some_principals, ["s3:PutObject"], resource_arns),
+        (principals, ["s3:PutObject"], []),
+    ]
+
+    results = permission_relationships.calculate_permission_relationships_in_processes(relationships, 2)
+    actual = [[mapping for chunk in chunks for mapping in chunk] for chunks in results]
+    expected = [
+        permission_relationships.calculate_permission_relationships(principals, arns, permissions)
+        for principals, permissions, arns in relationships
+    ]
+    assert actual == expected
+    assert [len(mappings) for mappings in actual] == [3, 1, 4, 0]
+
+
+def test_calculate_permission_relationships_in_processes_shared_pool(monkeypatch):
+    monkeypatch.setattr(permission_relationships, "RESOURCE_CHUNK_SIZE", 2)
+    resource_arns = ["arn:aws:s3:::testbucket", "arn:aws:s3:::other", "arn:aws:s3:::test2"]
+    permission_relationships.start_worker_pool(2)
+    pool = permission_relationships.worker_pool
+    try:
+        # Two accounts with different principals evaluate the same permissions on the same pool.
+        deny = [{"action": ["s3:*"], "resource": ["*"], "effect": "Deny"}]
+        for policy, count in ((GET_OBJECT_LOWERCASE_RESOURCE_WILDCARD, 2), (deny, 0)):
+            principals = {"principal1": {"policy": permission_relationships.compile_statement(policy)}}
+            relationships = [(principals, ["S3:GetObject"], resource_arns)]
+            results = permission_relationships.calculate_permission_relationships_in_processes(relationships, 2, pool)
+            actual = [[mapping for chunk in chunks for mapping in chunk] for chunks in results]
+            expected = permission_relationships.calculate_permission_relationships(
+                principals, resource_arns, ["S3:GetObject"],
+            )
+            assert actual == [expected]
+            assert len(expected) == count
+        assert permission_relationships.worker_pool is pool
+    finally:
+        permission_relationships.stop_worker_pool()
+    assert permission_relationships.worker_pool is None
+
+
+def test_fingerprints():
+    allow = {"action": ["s3:GetObject"], "resource": ["*"], "effect": "Allow"}
+    deny = {"action": ["s3:*"], "resource": ["arn:aws:s3:::secret"], "effect": "Deny"}
+    fingerprint = permission_relationships.principal_fingerprint({"a": [allow, deny], "b": [allow]})
+    assert permission_relationships.principal_fingerprint(
+        {"c": [allow], "d": permission_relationships.compile_statement([dict(deny), dict(allow)])},
+    ) == fingerprint
+    assert permission_relationships.principal_fingerprint({"a": [allow], "b": [deny]}) != fingerprint
+
+    rpr = {"permissions": ["s3:GetObject"], "relationship_name": "CAN_READ", "target_label": "S3Bucket"}
+    fingerprint = permission_relationships.relationship_fingerprint(rpr, ["arn:aws:s3:::a", "arn:aws:s3:::b"])
+    assert permission_relationships.relationship_fingerprint(rpr, ["arn:aws:s3:::b", "arn:aws:s3:::a"]) == fingerprint
+    assert permission_relationships.relationship_fingerprint(rpr, ["arn:aws:s3:::a"]) != fingerprint
@@ -0,0 +1,83 @@
+import unittest.mock
+
+import pytest
+from botocore.config import Config
+
+from cartography.intel.aws import ratelimit
+from cartography.intel.aws.ec2.util import get_botocore_config
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = unittest.mock.MagicMock(now=100.0)
+    clock.monotonic = lambda: clock.now
+    clock.sleep.side_effect = lambda seconds: setattr(clock, 'now', clock.now + seconds)
+    monkeypatch.setattr(ratelimit.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(ratelimit.time, 'sleep', clock.sleep)
+    return clock
+
+
+def test_token_bucket(clock):
+    bucket = ratelimit.TokenBucket(10)
+    assert sum(bucket.acquire() for _ in range(10)) == 0
+    assert bucket.acquire() == pytest.approx(0.1)
+
+    bucket.throttled()
+    assert bucket.rate == 5
+    bucket.succeeded()
+    assert bucket.rate == 5.5
+    for _ in range(20):
+        bucket.succeeded()
+    assert bucket.rate == 10
+
+
+def test_throttles_are_counted_and_slow_down_requests(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit, 'max_rate', 2)
+    ratelimit.reset()
+    model = unittest.mock.MagicMock()
+    model.service_model.service_name = 'iam'
+    context = {'client_region': 'us-east-1'}
+    throttled = (unittest.mock.MagicMock(status_code=400), {'Error': {'Code': 'Throttling'}})
+
+    ratelimit._before_call('000000000000', model=model, context=context)
+    ratelimit._needs_retry(
+        '000000000000', response=throttled, operation=model, request_dict={'context': context}, attempts=1,
+    )
+    ratelimit._needs_retry(
+        '000000000000', response=None, operation=model, request_dict={'context': context}, attempts=2,
+    )
+
+    key = ('000000000000', 'iam', 'us-east-1')
+    assert ratelimit._stats[key].requests == 1
+    assert ratelimit._stats[key].throttles == 1
+    assert ratelimit._buckets[key].rate == 1
+    assert ratelimit._stats[key].wait_seconds == 0
+    ratelimit.report()
+
+
+def test_no_token_is_taken_after_the_last_attempt(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit, 'max_rate', 1)
+    ratelimit.reset()
+    model = unittest.mock.MagicMock()
+    model.service_model.service_name = 'iam'
+    context = {'client_region': 'us-east-1', 'client_config': get_botocore_config()}
+    throttled = (unittest.mock.MagicMock(status_code=400), {'Error': {'Code': 'Throttling'}})
+    key = ('000000000000', 'iam', 'us-east-1')
+
+    # get_botocore_config allows 10 retries, so botocore gives up after the 11th attempt.
+    ratelimit._needs_retry(
+        '000000000000', response=throttled, operation=model, request_dict={'context': context}, attempts=11,
+    )
+    assert ratelimit._stats[key].wait_seconds == 0
+    ratelimit._needs_retry(
+        '000000000000', response=throttled, operation=model, request_dict={'context': context}, attempts=10,
+    )
+    assert ratelimit._stats[key].wait_seconds > 0
+    assert ratelimit._stats[key].throttles == 2
+
+
+def test_max_attempts():
+    assert ratelimit._max_attempts({}) == ratelimit.LEGACY_MAX_ATTEMPTS
+    assert ratelimit._max_attempts({'client_config': Config(retries={'mode': 'standard'})}) == 3
+    assert ratelimit._max_attempts({'client_config': Config(retries={'max_attempts': 4})}) == 5
+    assert ratelimit._max_attempts({'client_config': Config(retries={'total_max_attempts': 4})}) == 4
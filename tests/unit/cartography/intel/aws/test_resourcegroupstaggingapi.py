@@ -31,3 +31,29 @@ def test_transform_tags():
     assert 'resource_id' not in test_data.GET_RESOURCES_RESPONSE[0]
     rgta.transform_tags(test_data.GET_RESOURCES_RESPONSE, 'ec2:instance')
     assert 'resource_id' in test_data.GET_RESOURCES_RESPONSE[0]
+
+
+def test_get_resource_type_from_arn():
+    assert 'ec2:instance' == rgta.get_resource_type_from_arn('arn:aws:ec2:us-east-1:1234:instance/i-abcd')
+    assert 'ec2:transit-gateway-attachment' == rgta.get_resource_type_from_arn(
+        'arn:aws:ec2:us-east-1:1234:transit-gateway-attachment/tgw-attach-1',
+    )
+    assert 'rds:db' == rgta.get_resource_type_from_arn('arn:aws:rds:us-east-1:1234:db:rds-db-1')
+    assert 'es:domain' == rgta.get_resource_type_from_arn('arn:aws:es:us-east-1:1234:domain/my-domain')
+    assert 's3' == rgta.get_resource_type_from_arn('arn:aws:s3:::bucket_name')
+    assert rgta.get_resource_type_from_arn('arn:aws:lambda:us-east-1:1234:function:my-function') is None
+
+
+def test_transform_tags_by_label():
+    tag_data = [
+        {'ResourceARN': 'arn:aws:ec2:us-east-1:1234:instance/i-01', 'Tags': []},
+        {'ResourceARN': 'arn:aws:s3:::bucket-1', 'Tags': []},
+        {'ResourceARN': 'arn:aws:ec2:us-east-1:1234:subnet/subnet-01', 'Tags': []},
+        {'ResourceARN': 'arn:aws:lambda:us-east-1:1234:function:my-function', 'Tags': []},
+    ]
+    by_label = rgta.transform_tags_by_label([('us-east-1', tag_data[:2]), ('us-west-2', tag_data[2:])])
+    assert {key: [(t['resource_id'], t['region']) for t in tags] for key, tags in by_label.items()} == {
+        ('EC2Instance', 'id'): [('i-01', 'us-east-1')],
+        ('S3Bucket', 'id'): [('bucket-1', 'us-east-1')],
+        ('EC2Subnet', 'subnetid'): [('subnet-01', 'us-west-2')],
+    }
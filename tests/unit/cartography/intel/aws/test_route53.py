@@ -0,0 +1,58 @@
+from botocore.stub import ANY
+
+from cartography.intel.aws import route53
+from cartography.intel.aws.util import get_client
+
+
+def _zone(zone_id):
+    return {
+        'Id': zone_id,
+        'Name': f'{zone_id}.example.com.',
+        'CallerReference': zone_id,
+        'Config': {'PrivateZone': False},
+        'ResourceRecordSetCount': 1,
+    }
+
+
+RECORD_SETS = {
+    'ResourceRecordSets': [{'Name': 'example.com.', 'Type': 'A', 'ResourceRecords': [{'Value': '1.1.1.1'}]}],
+    'IsTruncated': False,
+    'MaxItems': '100',
+}
+
+
+def test_get_zones_yields_zones_in_order(boto3_session, stub_client):
+    stubber = stub_client('route53')
+    zone_ids = ['zone-1', 'zone-2', 'zone-3']
+    stubber.add_response(
+        'list_hosted_zones',
+        {'HostedZones': [_zone(z) for z in zone_ids], 'IsTruncated': False, 'Marker': '', 'MaxItems': '100'},
+    )
+    for zone_id in zone_ids:
+        stubber.add_response('list_resource_record_sets', RECORD_SETS, {'HostedZoneId': ANY})
+    zones = list(route53.get_zones(get_client(boto3_session, 'route53'), workers=3))
+
+    assert [zone['Id'] for zone, _ in zones] == zone_ids
+    assert all(record_sets == RECORD_SETS['ResourceRecordSets'] for _, record_sets in zones)
+
+
+def test_transform_record_links():
+    records = [
+        ('zone/a.example.com/CNAME', 'b.example.com'),
+        ('zone/self.example.com/CNAME', 'self.example.com'),
+        ('zone/c.example.com/CNAME', 'other-account.example.com'),
+    ]
+    # The targets include the records of accounts that were not synced in this run.
+    targets = [
+        ('zone/a.example.com/CNAME', 'a.example.com'),
+        ('zone/b.example.com/A', 'b.example.com'),
+        ('zone2/b.example.com/A', 'b.example.com'),
+        ('zone/self.example.com/CNAME', 'self.example.com'),
+        ('zone3/other-account.example.com/A', 'other-account.example.com'),
+    ]
+    links = route53.transform_record_links(records, targets)
+    assert sorted((link['source'], link['target']) for link in links) == [
+        ('zone/a.example.com/CNAME', 'zone/b.example.com/A'),
+        ('zone/a.example.com/CNAME', 'zone2/b.example.com/A'),
+        ('zone/c.example.com/CNAME', 'zone3/other-account.example.com/A'),
+    ]
@@ -0,0 +1,50 @@
+from cartography.intel.aws import s3
+from cartography.intel.aws.ec2.util import get_botocore_config
+
+
+def test_parse_bucket_settings():
+    settings = {
+        'encryption': {
+            'ServerSideEncryptionConfiguration': {
+                'Rules': [{
+                    'ApplyServerSideEncryptionByDefault': {'SSEAlgorithm': 'aws:kms', 'KMSMasterKeyID': 'key'},
+                    'BucketKeyEnabled': True,
+                }],
+            },
+        },
+        'public_access_block': {},
+        'versioning': None,
+    }
+    parsed = s3.parse_bucket_settings('bucket', settings)
+    assert parsed['default_encryption'] is True
+    assert parsed['encryption_algorithm'] == 'aws:kms'
+    assert parsed['encryption_key_id'] == 'key'
+    assert parsed['bucket_key_enabled'] is True
+    # No public access block is configured
+    assert parsed['block_public_acls'] is False
+    assert parsed['restrict_public_buckets'] is False
+    # Versioning could not be retrieved
+    assert parsed['versioning_status'] is None
+    assert parsed['mfa_delete'] is None
+
+
+def test_get_s3_bucket_details_with_settings(boto3_session, stub_client):
+    stubber = stub_client('s3', 'us-west-2', config=get_botocore_config())
+    bucket_data = {'Buckets': [{'Name': 'bucket-1', 'Region': 'us-west-2'}]}
+    acl = {'Grants': [], 'Owner': {'ID': 'owner'}}
+    stubber.add_response('get_bucket_acl', acl, {'Bucket': 'bucket-1'})
+    stubber.add_client_error('get_bucket_policy', 'NoSuchBucketPolicy', expected_params={'Bucket': 'bucket-1'})
+    stubber.add_client_error(
+        'get_bucket_encryption', 'ServerSideEncryptionConfigurationNotFoundError',
+        expected_params={'Bucket': 'bucket-1'},
+    )
+    stubber.add_client_error('get_public_access_block', 'AccessDenied', expected_params={'Bucket': 'bucket-1'})
+    stubber.add_response('get_bucket_versioning', {'Status': 'Enabled'}, {'Bucket': 'bucket-1'})
+    details = list(s3.get_s3_bucket_details(boto3_session, bucket_data, workers=2, bucket_settings=True))
+
+    assert details == [(
+        'bucket-1',
+        acl,
+        None,
+        {'encryption': {}, 'public_access_block': None, 'versioning': {'Status': 'Enabled'}},
+    )]
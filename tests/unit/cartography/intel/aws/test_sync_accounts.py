@@ -0,0 +1,104 @@
+import unittest.mock
+
+import pytest
+
+import cartography.intel.aws
+import cartography.util
+
+TEST_ACCOUNTS = {'profile-a': '000000000001', 'profile-b': '000000000002', 'profile-c': '000000000003'}
+
+
+@unittest.mock.patch.object(cartography.intel.aws.route53, 'link_aws_resources')
+@unittest.mock.patch.object(cartography.intel.aws, 'run_cleanup_job')
+@unittest.mock.patch.object(cartography.intel.aws.organizations, 'sync')
+@unittest.mock.patch.object(cartography.intel.aws, '_autodiscover_accounts')
+@unittest.mock.patch.object(cartography.intel.aws, '_sync_one_account')
+@unittest.mock.patch.object(cartography.intel.aws.boto3, 'Session')
+def test_sync_multiple_accounts_concurrently(
+    mock_session, mock_sync_one, mock_autodiscover, mock_org_sync, mock_cleanup, mock_link_dns,
+):
+    common_job_parameters = {'UPDATE_TAG': 1}
+    driver = unittest.mock.MagicMock()
+
+    cartography.intel.aws._sync_multiple_accounts(
+        unittest.mock.MagicMock(), TEST_ACCOUNTS, 1, common_job_parameters, neo4j_driver=driver, workers=3,
+    )
+
+    # Every account is synced on its own session, with its own AWS_ID.
+    assert driver.session.call_count == 3
+    synced = {call[0][2]: call[0][4]['AWS_ID'] for call in mock_sync_one.call_args_list}
+    assert synced == {account_id: account_id for account_id in TEST_ACCOUNTS.values()}
+    assert 'AWS_ID' not in common_job_parameters
+
+    # DNS records are linked and post-ingestion cleanup runs exactly once for all accounts.
+    assert mock_link_dns.call_count == 1
+    assert [call[0][0] for call in mock_cleanup.call_args_list] == [
+        'aws_dns_links_cleanup.json',
+        'aws_post_ingestion_principals_cleanup.json',
+        'aws_post_ingestion_dns_cleanup.json',
+    ]
+
+
+@unittest.mock.patch.object(cartography.intel.aws, 'run_cleanup_job')
+@unittest.mock.patch.object(cartography.intel.aws.organizations, 'sync')
+@unittest.mock.patch.object(cartography.intel.aws, '_autodiscover_accounts')
+@unittest.mock.patch.object(cartography.intel.aws, '_sync_one_account')
+@unittest.mock.patch.object(cartography.intel.aws.boto3, 'Session')
+def test_sync_multiple_accounts_without_driver_is_sequential(
+    mock_session, mock_sync_one, mock_autodiscover, mock_org_sync, mock_cleanup,
+):
+    neo4j_session = unittest.mock.MagicMock()
+    cartography.intel.aws._sync_multiple_accounts(neo4j_session, TEST_ACCOUNTS, 1, {'UPDATE_TAG': 1}, workers=3)
+
+    assert [call[0][2] for call in mock_sync_one.call_args_list] == list(TEST_ACCOUNTS.values())
+    assert all(call[0][0] is neo4j_session for call in mock_sync_one.call_args_list)
+
+
+def test_parse_module_selection():
+    assert cartography.intel.aws.parse_module_selection(None) is None
+    assert cartography.intel.aws.parse_module_selection(['iam', 'ec2:instances', 'ec2:security_groups']) == {
+        'iam': None,
+        'ec2': {'instances', 'security_groups'},
+    }
+    assert cartography.intel.aws.parse_module_selection(['ec2:instances', 'ec2']) == {'ec2': None}
+    with pytest.raises(ValueError):
+        cartography.intel.aws.parse_module_selection(['ec3'])
+    with pytest.raises(ValueError):
+        cartography.intel.aws.parse_module_selection(['iam:users'])
+
+
+@unittest.mock.patch.object(cartography.intel.aws, 'run_cleanup_job')
+@unittest.mock.patch.object(cartography.intel.aws.iam, 'sync')
+@unittest.mock.patch.object(cartography.intel.aws.ec2, 'get_ec2_regions', return_value=['us-east-1', 'us-west-2'])
+@unittest.mock.patch.object(cartography.intel.aws.ec2, 'sync')
+def test_sync_one_account_selection(mock_ec2_sync, mock_get_regions, mock_iam_sync, mock_cleanup):
+    selection = cartography.intel.aws.Selection(
+        modules={'ec2': {'instances'}}, regions=['us-west-2'], all_accounts=False,
+    )
+    cartography.intel.aws._sync_one_account(
+        unittest.mock.MagicMock(), unittest.mock.MagicMock(), '000000000001', 1, {'UPDATE_TAG': 1}, selection,
+    )
+
+    mock_iam_sync.assert_not_called()
+    mock_cleanup.assert_not_called()
+    args, kwargs = mock_ec2_sync.call_args
+    assert args[2] == ['us-west-2']
+    assert args[5][cartography.util.SKIP_CLEANUP] is True
+    assert kwargs == {'modules': {'instances'}}
+
+
+@unittest.mock.patch.object(cartography.intel.aws.ec2, 'get_ec2_regions', return_value=['us-east-1'])
+@unittest.mock.patch.object(cartography.intel.aws.ec2, 'sync')
+def test_sync_one_account_ec2_submodules_skip_cleanup(mock_ec2_sync, mock_get_regions):
+    selection = cartography.intel.aws.Selection(modules={'ec2': {'instances'}}, regions=None, all_accounts=True)
+    cartography.intel.aws._sync_one_account(
+        unittest.mock.MagicMock(), unittest.mock.MagicMock(), '000000000001', 1, {'UPDATE_TAG': 1}, selection,
+    )
+    assert mock_ec2_sync.call_args[0][5][cartography.util.SKIP_CLEANUP] is True
+
+    mock_ec2_sync.reset_mock()
+    selection = cartography.intel.aws.Selection(modules={'ec2': None}, regions=None, all_accounts=True)
+    cartography.intel.aws._sync_one_account(
+        unittest.mock.MagicMock(), unittest.mock.MagicMock(), '000000000001', 1, {'UPDATE_TAG': 1}, selection,
+    )
+    assert cartography.util.SKIP_CLEANUP not in mock_ec2_sync.call_args[0][5]
@@ -0,0 +1,67 @@
+import threading
+import unittest.mock
+
+import boto3
+
+import cartography.util
+from cartography.intel.aws import util
+from cartography.intel.aws.ec2.util import get_botocore_config
+
+
+def test_get_client_is_cached_per_session_region_and_config(boto3_session):
+    util.reset_client_cache_stats()
+    client = util.get_client(boto3_session, 'ec2', region_name='us-west-2', config=get_botocore_config())
+    assert util.get_client(boto3_session, 'ec2', region_name='us-west-2', config=get_botocore_config()) is client
+    assert util.get_client(boto3_session, 'ec2', region_name='us-east-2', config=get_botocore_config()) is not client
+    assert util.get_client(boto3_session, 'ec2', region_name='us-west-2') is not client
+    other_session = boto3.Session(aws_access_key_id='test', aws_secret_access_key='test', region_name='us-east-1')
+    assert util.get_client(other_session, 'ec2', region_name='us-west-2', config=get_botocore_config()) is not client
+    assert util.clients_created == 4
+
+
+@unittest.mock.patch.object(cartography.util, 'aws_region_workers', 2)
+def test_get_client_is_cached_across_region_workers(boto3_session):
+    def get_region_data(boto3_session, region):
+        return util.get_client(boto3_session, 'ec2', region_name=region, config=get_botocore_config())
+
+    util.reset_client_cache_stats()
+    regions = ['us-east-1', 'us-west-2']
+    first = cartography.util.aws_fetch_regions(get_region_data, boto3_session, regions)
+    second = cartography.util.aws_fetch_regions(get_region_data, boto3_session, regions)
+    assert [client for _, client in first] == [client for _, client in second]
+    assert util.clients_created == 2
+
+
+def test_get_resource_is_cached_per_thread(boto3_session):
+    resource = util.get_resource(boto3_session, 'iam')
+    assert util.get_resource(boto3_session, 'iam') is resource
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(util.get_resource(boto3_session, 'iam')))
+    thread.start()
+    thread.join()
+    assert other[0] is not resource
+
+
+def test_map_concurrently_keeps_order():
+    def square(x):
+        return x * x
+
+    assert list(util.map_concurrently(square, range(50), 4)) == [x * x for x in range(50)]
+    assert list(util.map_concurrently(square, range(5), 1)) == [0, 1, 4, 9, 16]
+
+
+def test_map_concurrently_reraises():
+    def fail_on_three(x):
+        if x == 3:
+            raise ValueError(x)
+        return x
+
+    results = util.map_concurrently(fail_on_three, range(20), 2)
+    assert [next(results) for _ in range(3)] == [0, 1, 2]
+    try:
+        next(results)
+    except ValueError:
+        pass
+    else:
+        assert False
@@ -122,8 +122,10 @@ def test_load_gsuite_groups():
     groups = []
     update_tag = 1
     session = mock.MagicMock()
+    tx = mock.MagicMock()
+    session.write_transaction.side_effect = lambda func, *args: func(tx, *args)
     api.load_gsuite_groups(session, groups, update_tag)
-    session.run.assert_called_with(
+    tx.run.assert_called_with(
         ingestion_qry,
         GroupData=groups,
         UpdateTag=update_tag,
@@ -167,8 +169,10 @@ def test_load_gsuite_users():
     users = []
     update_tag = 1
     session = mock.MagicMock()
+    tx = mock.MagicMock()
+    session.write_transaction.side_effect = lambda func, *args: func(tx, *args)
     api.load_gsuite_users(session, users, update_tag)
-    session.run.assert_called_with(
+    tx.run.assert_called_with(
         ingestion_qry,
         UserData=users,
         UpdateTag=update_tag,
@@ -0,0 +1,55 @@
+import unittest.mock
+
+import pytest
+
+import cartography.checkpoint
+import cartography.sync
+from cartography.checkpoint import Checkpoint
+from cartography.config import Config
+from cartography.sync import Sync
+
+
+@pytest.fixture(autouse=True)
+def reset_checkpoint(monkeypatch):
+    monkeypatch.setattr(cartography.checkpoint, 'current', None)
+
+
+def test_checkpoint_round_trip(tmp_path):
+    path = str(tmp_path / 'checkpoint.json')
+    assert Checkpoint.load(path) is None
+
+    checkpoint = Checkpoint(path, 1234)
+    checkpoint.mark_completed(cartography.checkpoint.AWS_ACCOUNT, '000000000001')
+
+    loaded = Checkpoint.load(path)
+    assert loaded.update_tag == 1234
+    assert loaded.is_completed(cartography.checkpoint.AWS_ACCOUNT, '000000000001')
+    assert not loaded.is_completed(cartography.checkpoint.AWS_ACCOUNT, '000000000002')
+    assert not loaded.is_completed(cartography.checkpoint.STAGE, 'aws')
+
+    loaded.remove()
+    assert Checkpoint.load(path) is None
+
+
+@unittest.mock.patch.object(cartography.sync, 'GraphDatabase')
+def test_resume_skips_completed_stages_and_reuses_update_tag(mock_graph_database, tmp_path):
+    path = str(tmp_path / 'checkpoint.json')
+    calls = []
+    sync = Sync()
+    sync.add_stage('create-indexes', lambda session, config: calls.append(('create-indexes', config.update_tag)))
+    sync.add_stage('aws', lambda session, config: calls.append(('aws', config.update_tag)), ['create-indexes'])
+
+    # The first attempt fails in the aws stage.
+    failing_sync = Sync()
+    failing_sync.add_stage('create-indexes', lambda session, config: None)
+    failing_sync.add_stage('aws', unittest.mock.MagicMock(side_effect=RuntimeError('boom')), ['create-indexes'])
+    config = Config(neo4j_uri='bolt://thisdoesnotmatter:1234', update_tag=1, checkpoint_file=path)
+    with pytest.raises(RuntimeError):
+        cartography.sync.run_with_config(failing_sync, config)
+    assert Checkpoint.load(path).is_completed(cartography.checkpoint.STAGE, 'create-indexes')
+
+    config = Config(neo4j_uri='bolt://thisdoesnotmatter:1234', update_tag=2, checkpoint_file=path, resume=True)
+    cartography.sync.run_with_config(sync, config)
+    assert calls == [('aws', 1)]
+    # The checkpoint is removed once the run completes.
+    assert Checkpoint.load(path) is None
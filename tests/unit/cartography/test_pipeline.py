@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from cartography.pipeline import run_pipeline
+
+
+def test_run_pipeline_loads_every_item_in_producer_order():
+    loaded = []
+    run_pipeline(
+        [lambda: iter([1, 2, 3]), lambda: iter(['a', 'b'])],
+        loaded.append,
+        max_workers=2,
+    )
+    assert [item for item in loaded if isinstance(item, int)] == [1, 2, 3]
+    assert [item for item in loaded if isinstance(item, str)] == ['a', 'b']
+
+
+def test_run_pipeline_loads_on_calling_thread():
+    threads = set()
+    run_pipeline([lambda: iter(range(5))], lambda item: threads.add(threading.current_thread()))
+    assert threads == {threading.current_thread()}
+
+
+def test_run_pipeline_applies_backpressure():
+    produced = []
+
+    def producer():
+        for i in range(10):
+            produced.append(i)
+            yield i
+
+    def load(item):
+        # With a queue of one item the producer can be at most two items ahead: one queued and one waiting to be put.
+        assert len(produced) <= item + 3
+
+    run_pipeline([producer], load, max_queue_size=1)
+    assert produced == list(range(10))
+
+
+def test_run_pipeline_reraises_producer_errors():
+    def producer():
+        yield 1
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        run_pipeline([producer], lambda item: None)
+
+
+def test_run_pipeline_reraises_producer_base_exceptions():
+    class Interrupted(BaseException):
+        pass
+
+    def producer():
+        yield 1
+        raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        run_pipeline([producer], lambda item: None)
+
+
+def test_run_pipeline_stops_producers_when_load_fails():
+    produced = []
+
+    def producer():
+        for i in range(1000):
+            produced.append(i)
+            yield i
+
+    def load(item):
+        raise ValueError('bad item')
+
+    with pytest.raises(ValueError):
+        run_pipeline([producer], load, max_queue_size=1)
+    assert len(produced) < 1000
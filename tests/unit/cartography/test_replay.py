@@ -0,0 +1,65 @@
+import datetime
+import unittest.mock
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+from dateutil.tz import tzutc
+
+import cartography.replay
+
+DESCRIBE_REGIONS = {
+    'Regions': [
+        {'Endpoint': 'ec2.us-east-1.amazonaws.com', 'RegionName': 'us-east-1', 'OptInStatus': 'opt-in-not-required'},
+    ],
+}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = cartography.replay.ResponseStore(str(tmp_path))
+    monkeypatch.setattr(cartography.replay, 'store', store)
+    return store
+
+
+def _boto3_session():
+    return boto3.Session(aws_access_key_id='test', aws_secret_access_key='test', region_name='us-east-1')
+
+
+def test_store_round_trip(store):
+    response = {'created': datetime.datetime(2020, 1, 2, 3, 4, 5, tzinfo=tzutc()), 'blob': b'\x00\x01', 'n': [1]}
+    store.save('aws/default/us-east-1/ec2', 'DescribeRegions', {'a': 1}, response)
+
+    loaded = store.load('aws/default/us-east-1/ec2', 'DescribeRegions', {'a': 1})
+    assert loaded == response
+    assert str(loaded['created']) == str(response['created'])
+    with pytest.raises(cartography.replay.ReplayMissError):
+        store.load('aws/default/us-east-1/ec2', 'DescribeRegions', {'a': 2})
+
+
+def test_boto3_record_then_replay(store):
+    boto3_session = _boto3_session()
+    cartography.replay.register_boto3_session(boto3_session)
+    client = boto3_session.client('ec2')
+    with Stubber(client) as stubber:
+        stubber.add_response('describe_regions', DESCRIBE_REGIONS)
+        assert client.describe_regions()['Regions'] == DESCRIBE_REGIONS['Regions']
+
+    store.replaying = True
+    boto3_session = _boto3_session()
+    cartography.replay.register_boto3_session(boto3_session)
+    client = boto3_session.client('ec2')
+    # Nothing is stubbed here, so the response can only come from the store.
+    assert client.describe_regions()['Regions'] == DESCRIBE_REGIONS['Regions']
+    with pytest.raises(cartography.replay.ReplayMissError):
+        client.describe_regions(AllRegions=True)
+
+
+def test_call_replays_without_calling(store):
+    func = unittest.mock.MagicMock(return_value={'data': 1})
+    assert cartography.replay.call('github', 'graphql', ['query'], func, 'arg') == {'data': 1}
+    func.assert_called_once_with('arg')
+
+    store.replaying = True
+    assert cartography.replay.call('github', 'graphql', ['query'], func, 'arg') == {'data': 1}
+    func.assert_called_once_with('arg')
@@ -0,0 +1,93 @@
+import threading
+import unittest.mock
+
+import pytest
+
+from cartography.config import Config
+from cartography.sync import build_default_sync
+from cartography.sync import Sync
+
+
+def _config(stage_workers):
+    return Config(neo4j_uri='bolt://thisdoesnotmatter:1234', update_tag=1, stage_workers=stage_workers)
+
+
+def test_get_stage_order_respects_dependencies():
+    sync = Sync()
+    sync.add_stages([
+        ('analysis', unittest.mock.MagicMock(), ['aws', 'gcp']),
+        ('aws', unittest.mock.MagicMock(), ['create-indexes']),
+        ('gcp', unittest.mock.MagicMock(), ['create-indexes']),
+        ('create-indexes', unittest.mock.MagicMock()),
+    ])
+    assert sync.get_stage_order() == ['create-indexes', 'aws', 'gcp', 'analysis']
+
+
+def test_get_stage_order_rejects_bad_dependencies():
+    sync = Sync()
+    sync.add_stage('a', unittest.mock.MagicMock(), ['missing'])
+    with pytest.raises(ValueError):
+        sync.get_stage_order()
+
+    sync = Sync()
+    sync.add_stage('a', unittest.mock.MagicMock(), ['b'])
+    sync.add_stage('b', unittest.mock.MagicMock(), ['a'])
+    with pytest.raises(ValueError):
+        sync.get_stage_order()
+
+
+def test_default_sync_stage_order():
+    order = build_default_sync().get_stage_order()
+    assert order[0] == 'create-indexes'
+    assert order[-1] == 'analysis'
+    assert order.index('aws') < order.index('okta')
+    assert order.index('gsuite') < order.index('crxcavator')
+
+
+def test_run_sequential_uses_insertion_order():
+    calls = []
+    sync = Sync()
+    for name in ['first', 'second', 'third']:
+        sync.add_stage(name, lambda session, config, name=name: calls.append(name))
+    sync.run(unittest.mock.MagicMock(), _config(1))
+    assert calls == ['first', 'second', 'third']
+
+
+def test_run_concurrent_stages_overlap():
+    # Both independent stages must be running at the same time for the barrier to be passed.
+    barrier = threading.Barrier(2, timeout=5)
+    finished = []
+    sync = Sync()
+    sync.add_stage('aws', lambda session, config: barrier.wait())
+    sync.add_stage('gcp', lambda session, config: barrier.wait())
+    sync.add_stage('analysis', lambda session, config: finished.append('analysis'), ['aws', 'gcp'])
+    driver = unittest.mock.MagicMock()
+    sync.run(driver, _config(2))
+    assert finished == ['analysis']
+    assert driver.session.call_count == 3
+
+
+def test_run_stops_scheduling_after_failure():
+    downstream = unittest.mock.MagicMock()
+    sync = Sync()
+    sync.add_stage('aws', unittest.mock.MagicMock(side_effect=RuntimeError('boom')))
+    sync.add_stage('analysis', downstream, ['aws'])
+    with pytest.raises(RuntimeError):
+        sync.run(unittest.mock.MagicMock(), _config(2))
+    downstream.assert_not_called()
+
+
+def test_run_selected_stages_ignores_left_out_dependencies():
+    calls = []
+    sync = Sync()
+    sync.add_stage('create-indexes', lambda session, config: calls.append('create-indexes'))
+    sync.add_stage('aws', lambda session, config: calls.append('aws'), ['create-indexes'])
+    sync.add_stage('analysis', lambda session, config: calls.append('analysis'), ['aws'])
+    config = _config(1)
+    config.stages = ['aws']
+    sync.run(unittest.mock.MagicMock(), config)
+    assert calls == ['aws']
+
+    config.stages = ['gcp']
+    with pytest.raises(ValueError):
+        sync.run(unittest.mock.MagicMock(), config)
@@ -0,0 +1,77 @@
+import threading
+import unittest.mock
+
+import botocore.exceptions
+
+import cartography.util
+from cartography.util import aws_fetch_regions
+from cartography.util import aws_handle_regions
+from cartography.util import aws_stream_regions
+from cartography.util import load_batched
+
+
+@aws_handle_regions
+def _get_region_data(boto3_session, region, prefix):
+    boto3_session.client('ec2', region_name=region)
+    if region == 'denied-region':
+        raise botocore.exceptions.ClientError({'Error': {'Code': 'AuthFailure', 'Message': 'Denied'}}, 'Describe')
+    return [f'{prefix}-{region}']
+
+
+def test_aws_fetch_regions_sequential():
+    regions = ['us-east-1', 'denied-region', 'eu-west-1']
+    boto3_session = unittest.mock.MagicMock()
+    assert aws_fetch_regions(_get_region_data, boto3_session, regions, 'x') == [
+        ('us-east-1', ['x-us-east-1']),
+        ('denied-region', []),
+        ('eu-west-1', ['x-eu-west-1']),
+    ]
+    assert boto3_session.client.call_count == 3
+
+
+@unittest.mock.patch.object(cartography.util, 'aws_region_workers', 2)
+def test_aws_fetch_regions_concurrent_preserves_order():
+    # Both regions must be queried at the same time for the barrier to be passed.
+    barrier = threading.Barrier(2, timeout=5)
+
+    def get_data(boto3_session, region):
+        barrier.wait()
+        return region.upper()
+
+    regions = ['us-east-1', 'us-west-2']
+    assert aws_fetch_regions(get_data, unittest.mock.MagicMock(), regions) == [
+        ('us-east-1', 'US-EAST-1'),
+        ('us-west-2', 'US-WEST-2'),
+    ]
+
+
+@aws_handle_regions
+def _get_region_pages(boto3_session, region):
+    yield ['page-1']
+    raise botocore.exceptions.ClientError({'Error': {'Code': 'AccessDeniedException', 'Message': 'Denied'}}, 'List')
+
+
+def test_aws_handle_regions_generator():
+    assert list(_get_region_pages(unittest.mock.MagicMock(), 'us-east-1')) == [['page-1']]
+
+
+def test_aws_stream_regions():
+    loaded = []
+    aws_stream_regions(
+        _get_region_pages, unittest.mock.MagicMock(), ['us-east-1', 'us-west-2'],
+        lambda region, page: loaded.append((region, page)),
+    )
+    assert loaded == [('us-east-1', ['page-1']), ('us-west-2', ['page-1'])]
+
+
+def test_load_batched():
+    neo4j_session = unittest.mock.MagicMock()
+    tx = unittest.mock.MagicMock()
+    neo4j_session.write_transaction.side_effect = lambda func, *args: func(tx, *args)
+    rows = [{'id': i} for i in range(5)]
+
+    load_batched(neo4j_session, 'UNWIND {Rows} AS row MERGE (n{id: row.id})', rows, batch_size=2, UpdateTag=1)
+
+    assert neo4j_session.write_transaction.call_count == 3
+    assert [call[1]['Rows'] for call in tx.run.call_args_list] == [rows[0:2], rows[2:4], rows[4:5]]
+    assert all(call[1]['UpdateTag'] == 1 for call in tx.run.call_args_list)